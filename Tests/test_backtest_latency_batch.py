@@ -0,0 +1,35 @@
+"""
+Backtest des latences en mode batch : mêmes réactions que la mesure par
+événement, mêmes résultats en un ou plusieurs process.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import backtest_latency_predictions as bt
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def test_batch_reactions_and_workers(tmp_path, monkeypatch):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=1, window_min=90)
+    monkeypatch.setattr(bt, "get_db_path", lambda: Path(db))
+
+    with duckdb.connect(db, read_only=True) as con:
+        times = con.execute("""
+            SELECT ts_utc FROM events WHERE actual IS NOT NULL ORDER BY ts_utc DESC LIMIT 15
+        """).fetchdf()["ts_utc"]
+        batch = bt.measure_actual_market_reactions(con, times)
+    for ts, got in zip(times, batch.to_dict("records")):
+        ref = bt.measure_actual_market_reaction(ts)
+        assert ref is not None and got == ref
+
+    one = bt.run_backtest_batch(min_empirical_score=0, db_path=db, output_dir=tmp_path)
+    two = bt.run_backtest_batch(min_empirical_score=0, db_path=db, workers=2, output_dir=tmp_path)
+    assert one is not None and one["family"].nunique() > 1
+    pd.testing.assert_frame_equal(one, two)
+    assert len(list(tmp_path.glob("backtest_results_*.csv"))) >= 1
@@ -0,0 +1,32 @@
+"""
+Smoke test du benchmark headless : warehouse synthétique + mesure de la page d'accueil.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "fx_impact_app" / "src"))
+
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+from fx_impact_app.scripts.bench_pages import PAGES, bench_page
+
+
+def test_synthetic_warehouse_schema(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=0.5, window_min=30)
+    with duckdb.connect(db, read_only=True) as con:
+        n_future = con.execute("SELECT COUNT(*) FROM events WHERE ts_utc > now()").fetchone()[0]
+        n_bars = con.execute("SELECT COUNT(*) FROM prices_1m_v").fetchone()[0]
+        n_fam = con.execute("SELECT COUNT(*) FROM event_families WHERE latency_median IS NOT NULL").fetchone()[0]
+    assert n_future > 0 and n_bars > 0 and n_fam > 0
+
+
+def test_bench_home_page(tmp_path, monkeypatch):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=0.5, window_min=30)
+    monkeypatch.setenv("DUCKDB_PATH", db)
+    home = next(p for p in PAGES if p.name == "Home")
+    rows = bench_page(home, repeat=1, timeout=60)
+    assert {(r["step"], r["phase"]) for r in rows} == {("load", "run"), ("load", "cached")}
+    assert all(r["n_exceptions"] == 0 and r["wall_ms"] > 0 for r in rows)
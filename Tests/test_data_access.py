@@ -0,0 +1,51 @@
+"""
+data_access : requêtes nommées à paramètres liés ; chemin event_family_map et
+repli regex donnent les mêmes événements.
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src import data_access
+from fx_impact_app.src.event_families import FAMILY_PATTERNS
+from fx_impact_app.src.family_map import MAP_TABLE
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def test_named_statements(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=1, window_min=60)
+    since = datetime(2000, 1, 1)
+    patterns = [FAMILY_PATTERNS["NFP"], FAMILY_PATTERNS["CPI"]]
+    with duckdb.connect(db) as con:
+        mapped = data_access.events_for_family(con, patterns, since, countries=["US", "EU"]).fetchdf()
+        regex = con.execute("""
+            SELECT ts_utc, event_key FROM events
+            WHERE country IN ('US', 'EU') AND (event_key ~ ? OR event_key ~ ?) ORDER BY ts_utc
+        """, patterns).fetchdf()
+        assert len(mapped) > 0
+        assert mapped[["ts_utc", "event_key"]].equals(regex)
+
+        con.execute(f"DROP TABLE {MAP_TABLE}")
+        fallback = data_access.events_for_family(con, patterns, since, countries=["US", "EU"]).fetchdf()
+        assert fallback.equals(mapped)
+
+        cal = data_access.calendar_range(con, since, datetime(2100, 1, 1), ["US"], min_importance=3).fetchdf()
+        assert (cal["country"] == "US").all() and (cal["importance_n"] >= 3).all()
+
+        ts = con.execute("SELECT MAX(ts_utc) FROM prices_1m_v").fetchone()[0]
+        last, before = [r[0] for r in con.execute(
+            "SELECT close FROM prices_1m_v ORDER BY ts_utc DESC LIMIT 2").fetchall()]
+        assert data_access.ref_price(con, ts, inclusive=True) == last
+        assert data_access.ref_price(con, ts) == before
+        window = data_access.price_window(con, ts, ts)
+        assert list(window) == ["ts", "close"] and window["close"].tolist() == [last]
+
+    assert data_access.statement("price_window") is data_access.statement("price_window")
+    with pytest.raises(ValueError):
+        data_access.statement("ref_price", "2m")
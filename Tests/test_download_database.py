@@ -0,0 +1,113 @@
+"""
+Téléchargement de la base : plages HTTP parallèles, reprise, vérification SHA-256,
+rename atomique, repli sans plages — contre un serveur HTTP local.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src import download_database as dd
+from fx_impact_app.src import http_download
+
+PAYLOAD = os.urandom(300_000)
+SHA = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+@pytest.fixture
+def server():
+    served = {"bytes": 0, "ranges": True}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/manifest.json"):
+                body = json.dumps({"url": "warehouse.duckdb", "size": len(PAYLOAD), "sha256": SHA}).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            m = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+            if m and served["ranges"]:
+                a, b = int(m.group(1)), min(int(m.group(2)), len(PAYLOAD) - 1)
+                body = PAYLOAD[a:b + 1]
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {a}-{b}/{len(PAYLOAD)}")
+            else:
+                body = PAYLOAD
+                self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            served["bytes"] += len(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    served["base"] = f"http://127.0.0.1:{srv.server_address[1]}"
+    yield served
+    srv.shutdown()
+
+
+def test_parallel_chunks_and_resume(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_download, "MIN_CHUNK_BYTES", 50_000)
+    dest = tmp_path / "warehouse.duckdb"
+    url = server["base"] + "/warehouse.duckdb"
+
+    # Interruption simulée : .part partiellement rempli + état de reprise
+    part = tmp_path / "warehouse.duckdb.part"
+    chunks = http_download._split(len(PAYLOAD), 4)
+    assert len(chunks) == 4
+    with open(part, "wb") as f:
+        f.truncate(len(PAYLOAD))
+        f.write(PAYLOAD[:chunks[0][1] + 1])          # chunk 0 complet
+    chunks[0][2] = chunks[0][1] + 1
+    (tmp_path / "warehouse.duckdb.part.json").write_text(
+        json.dumps({"url": url, "size": len(PAYLOAD), "sha256": SHA, "chunks": chunks}))
+
+    http_download.download(url, dest, size=len(PAYLOAD), sha256=SHA)
+    assert dest.read_bytes() == PAYLOAD
+    assert not part.exists() and not (tmp_path / "warehouse.duckdb.part.json").exists()
+    # sonde (1 octet) + 3 chunks restants seulement
+    assert server["bytes"] == 1 + len(PAYLOAD) - (chunks[0][1] + 1)
+
+
+def test_bad_checksum_leaves_no_file(server, tmp_path):
+    dest = tmp_path / "warehouse.duckdb"
+    with pytest.raises(http_download.ChecksumError):
+        http_download.download(server["base"] + "/warehouse.duckdb", dest, sha256="0" * 64)
+    assert not dest.exists()
+    assert not list(tmp_path.glob("*.part*"))
+
+
+def test_no_range_server_falls_back_to_stream(server, tmp_path):
+    server["ranges"] = False
+    dest = tmp_path / "warehouse.duckdb"
+    http_download.download(server["base"] + "/warehouse.duckdb", dest, sha256=SHA)
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_download_database_replaces_truncated_db(server, tmp_path, monkeypatch):
+    db = tmp_path / "warehouse.duckdb"
+    db.write_bytes(PAYLOAD[:1000])  # téléchargement précédent tronqué
+    monkeypatch.setenv("DUCKDB_PATH", str(db))
+    monkeypatch.setenv("DB_MANIFEST_URL", server["base"] + "/manifest.json")
+
+    dd.download_database()
+    assert db.read_bytes() == PAYLOAD
+    assert (tmp_path / "warehouse.duckdb.sha256").read_text() == SHA
+
+    before = server["bytes"]
+    dd.download_database()  # à jour : pas de nouveau transfert
+    assert server["bytes"] == before
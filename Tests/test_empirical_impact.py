@@ -0,0 +1,66 @@
+"""
+Impact empirique en SQL : mêmes stats que la boucle par occurrence
+(prix de référence = première minute, latence = rang de la minute).
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from calculate_empirical_impact import (
+    EMPIRICAL_COLUMNS, calculate_impact_score, measure_event_impact, update_empirical_impacts,
+)
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def _reference(con, event_key, country, threshold=5.0, window=60):
+    events = con.execute("""
+        SELECT CAST(floor(epoch(ts_utc)) AS BIGINT) FROM events
+        WHERE event_key = ? AND country = ? AND actual IS NOT NULL AND ts_utc >= '2022-09-01'
+    """, [event_key, country]).fetchall()
+    moves, latencies = [], []
+    for (t0,) in events:
+        close = [r[0] for r in con.execute(
+            "SELECT close FROM prices_1m WHERE timestamp BETWEEN ? AND ? ORDER BY timestamp",
+            [t0, t0 + window * 60]).fetchall()]
+        if len(close) < 2:
+            continue
+        m = np.abs(np.array(close) - close[0]) * 10000
+        moves.append(m.max())
+        hit = np.flatnonzero(m >= threshold)
+        latencies.append(float(hit[0]) if len(hit) else None)
+    return len(events), moves, latencies
+
+
+def test_sql_pipeline_matches_per_occurrence_loop(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=1, window_min=90)
+    con = duckdb.connect(db)
+    for key, country in [("non farm payrolls", "US"), ("unemployment rate", "EU"), ("cpi", "US")]:
+        n, moves, lat = _reference(con, key, country)
+        got = measure_event_impact(con, key, country)
+        reacted = [x for x in lat if x is not None]
+        assert got["occurrences"] == n and got["analyzed"] == len(moves) > 0
+        assert got["avg_movement"] == pytest.approx(np.mean(moves))
+        assert got["median_movement"] == pytest.approx(np.median(moves))
+        assert got["reaction_rate"] == pytest.approx(len(reacted) / len(moves))
+        if reacted:
+            assert got["avg_latency"] == pytest.approx(np.mean(reacted))
+            assert got["median_latency"] == pytest.approx(np.median(reacted))
+
+    for column, sql_type in EMPIRICAL_COLUMNS.items():
+        con.execute(f"ALTER TABLE event_families ADD COLUMN IF NOT EXISTS {column} {sql_type}")
+    updated = update_empirical_impacts(con)
+    assert len(updated) > 0
+    score, analyzed = con.execute("""
+        SELECT empirical_score, analyzed_occurrences FROM event_families
+        WHERE event_key = 'non farm payrolls' AND country = 'US'
+    """).fetchone()
+    stats = measure_event_impact(con, "non farm payrolls", "US")
+    con.close()
+    assert analyzed == stats["analyzed"]
+    assert score == pytest.approx(calculate_impact_score(stats), abs=0.01)
@@ -0,0 +1,49 @@
+"""
+Classification groupée des event_key : même résultat que la double boucle
+historique (mots-clés non tradables puis première famille qui matche).
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from create_event_families_table import (
+    NON_TRADABLE_EXCEPTIONS, NON_TRADABLE_KEYWORDS, TRADABLE_EVENTS, classify_event_keys,
+)
+
+
+def _reference(event_key):
+    event_lower = event_key.lower()
+    for keyword in NON_TRADABLE_KEYWORDS:
+        if keyword in event_lower and not any(e in event_lower for e in NON_TRADABLE_EXCEPTIONS):
+            return None, True
+    for family, config in TRADABLE_EVENTS.items():
+        if any(excl in event_lower for excl in config['exclude']):
+            continue
+        if any(kw in event_lower for kw in config['keywords']):
+            return family, False
+    return None, False
+
+
+def test_bulk_classifier_matches_loop():
+    terms = list(NON_TRADABLE_KEYWORDS) + list(NON_TRADABLE_EXCEPTIONS)
+    for config in TRADABLE_EVENTS.values():
+        terms += config['keywords'] + config['exclude']
+    rng = np.random.default_rng(3)
+    filler = ["mom", "yoy", "final", "prel", "s.a", "ex autos", "Flash", "Tokyo"]
+    keys = [t.title() for t in terms]
+    for _ in range(3000):
+        words = list(rng.choice(terms, size=rng.integers(1, 3))) + list(rng.choice(filler, size=1))
+        rng.shuffle(words)
+        keys.append(" ".join(words))
+    keys += ["Core Inflation Rate YoY", "FOMC Minutes", "ECB Press Conference", "Fed Chair Powell Speech"]
+
+    got = classify_event_keys(pd.Series(keys))
+    for key, family, excluded in zip(keys, got['family'], got['excluded']):
+        family = family if isinstance(family, str) else None
+        assert (family, bool(excluded)) == _reference(key), key
+    assert got.loc[got['family'] == 'CPI', 'impact_level'].eq('HIGH').all()
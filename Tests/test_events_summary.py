@@ -0,0 +1,35 @@
+"""
+Résumé journalier des événements : mêmes métriques que l'agrégation directe sur events.
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import duckdb
+
+from fx_impact_app.src.events_summary import SUMMARY_TABLE, home_metrics
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def test_summary_matches_events(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=0.5, window_min=30)
+    con = duckdb.connect(db)
+    now = datetime(*con.execute("SELECT max(ts_utc) FROM events").fetchone()[0].timetuple()[:6]) \
+        - timedelta(days=10, hours=3)
+    fast = home_metrics(con, now=now)
+    assert fast["from_summary"] and fast["total"] > 0
+    # semaine glissante ]now, now + 7 j[ : les événements passés du jour n'y sont pas
+    expected_week = con.execute("""
+        SELECT count(*) FROM events WHERE ts_utc > ? AND ts_utc < ? AND country IN ('US', 'EU', 'GB')
+    """, [now, now + timedelta(days=7)]).fetchone()[0]
+    assert fast["week"] == expected_week > 0
+
+    con.execute(f"DROP TABLE {SUMMARY_TABLE}")
+    slow = home_metrics(con, now=now)
+    con.close()
+    assert not slow["from_summary"]
+    assert {k: fast[k] for k in ("total", "with_forecast", "week", "today")} == \
+           {k: slow[k] for k in ("total", "with_forecast", "week", "today")}
@@ -0,0 +1,68 @@
+"""
+event_family_map : mêmes lignes que le filtre regex, mise à jour incrémentale
+à l'upsert, reconstruction quand FAMILY_PATTERNS change.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.data_access import events_for_family
+from fx_impact_app.src.eodhd_client import upsert_events
+from fx_impact_app.src.event_families import FAMILY_PATTERNS
+from fx_impact_app.src.family_map import MAP_TABLE, map_predicate, update_family_map
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def _keys(con, where, params):
+    return sorted(con.execute(f"SELECT ts_utc, event_key, country FROM events WHERE {where}", params).fetchall())
+
+
+def test_map_matches_regex_filters(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=1, window_min=60)
+    with duckdb.connect(db) as con:
+        assert con.execute(f"SELECT COUNT(*) FROM {MAP_TABLE}").fetchone()[0] > 0
+        for pattern in FAMILY_PATTERNS.values():
+            sql, params = map_predicate(con, pattern)
+            assert _keys(con, sql, params) == _keys(con, "event_key ~ ?", [pattern])
+            sql, params = map_predicate(con, pattern, full_match=False)
+            assert _keys(con, sql, params) == _keys(con, "regexp_matches(event_key, ?)", [pattern])
+        assert map_predicate(con, "(?i)(ad hoc)") is None
+
+
+def test_incremental_update_and_rebuild(tmp_path):
+    with duckdb.connect(str(tmp_path / "e.duckdb")) as con:
+        df = pd.DataFrame({
+            "ts_utc": pd.to_datetime(["2024-01-05 13:30", "2024-01-11 13:30"], utc=True),
+            "country": ["us", "us"],
+            "event_key": ["non farm payrolls", "cpi"],
+            "actual": [200.0, 3.1],
+        })
+        upsert_events(con, df)
+        assert con.execute(f"SELECT COUNT(DISTINCT event_key) FROM {MAP_TABLE}").fetchone()[0] == 2
+
+        # mêmes clés, nouvelle date : rien à classer ; nouvelle clé : une seule
+        assert update_family_map(con) == 0
+        df2 = pd.DataFrame({
+            "ts_utc": pd.to_datetime(["2024-02-02 13:30", "2024-02-02 15:00"], utc=True),
+            "country": ["us", "us"],
+            "event_key": ["non farm payrolls", "some new survey"],
+            "actual": [180.0, 1.0],
+        })
+        upsert_events(con, df2)
+        rows = dict(con.execute(f"SELECT event_key, family FROM {MAP_TABLE}").fetchall())
+        assert rows["some new survey"] is None and len(rows) == 3
+
+        # patterns modifiés : reconstruction complète
+        assert update_family_map(con, patterns={"Survey": "(?i).*survey.*"}) == 3
+        fam = dict(con.execute(f"SELECT event_key, family FROM {MAP_TABLE}").fetchall())
+        assert fam == {"non farm payrolls": None, "cpi": None, "some new survey": "Survey"}
+
+        # table classée avec d'autres patterns : repli regex, pas de filtre vide
+        assert map_predicate(con, FAMILY_PATTERNS["NFP"]) is None
+        got = events_for_family(con, FAMILY_PATTERNS["NFP"], "2024-01-01", "2024-03-01")
+        assert len(got.fetchall()) == 2
@@ -0,0 +1,94 @@
+"""
+Sketches KLL : exacts sous k valeurs, erreur de rang bornée au-delà, fusion et
+BLOB ; store incrémental identique à une reconstruction, roll-up = stats brutes.
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.event_families import FAMILY_PATTERNS
+from fx_impact_app.src.family_sketches import SKETCH_TABLE, sketch_stats, update_sketch_store
+from fx_impact_app.src.forecaster_mvp import ForecastEngine
+from fx_impact_app.src.quantile_sketch import KLLSketch
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def test_kll_sketch():
+    rng = np.random.default_rng(7)
+    small = rng.normal(size=150)
+    sk = KLLSketch()
+    sk.update_many(small)
+    assert np.allclose(sk.percentile([20, 50, 80, 90]), np.percentile(small, [20, 50, 80, 90]))
+
+    big = rng.lognormal(size=40_000)
+    a, b = KLLSketch(), KLLSketch()
+    a.update_many(big[:25_000])
+    b.update_many(big[25_000:])
+    a.merge(b)
+    assert a.n == len(big) and a.size() < 1_000
+    qs = np.array([0.2, 0.5, 0.8, 0.9])
+    ranks = np.searchsorted(np.sort(big), a.quantile(qs)) / len(big)
+    assert np.abs(ranks - qs).max() < 0.02
+
+    c = KLLSketch.from_bytes(a.to_bytes())
+    assert c.n == a.n and np.array_equal(c.quantile(qs), a.quantile(qs))
+
+
+def test_store_incremental_and_stats(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=1, window_min=60)
+    now = datetime.utcnow()
+    with duckdb.connect(db) as con:
+        first = update_sketch_store(con, now=now - timedelta(days=120))
+        second = update_sketch_store(con, now=now)
+        assert first > 0 and second > 0
+        assert update_sketch_store(con, now=now) == 0
+        incremental = con.execute(
+            f"SELECT family, metric, horizon_min, country, period, n, total FROM {SKETCH_TABLE} ORDER BY ALL"
+        ).fetchall()
+        assert update_sketch_store(con, now=now, rebuild=True) == first + second
+        rebuilt = con.execute(
+            f"SELECT family, metric, horizon_min, country, period, n, total FROM {SKETCH_TABLE} ORDER BY ALL"
+        ).fetchall()
+        assert [r[:6] for r in incremental] == [r[:6] for r in rebuilt]
+        assert np.allclose([r[6] for r in incremental], [r[6] for r in rebuilt])
+
+    raw = ForecastEngine(db, use_cube=False)
+    engine = ForecastEngine(db, use_cube=False, use_sketches=True)
+    assert engine.use_sketches
+    for family, countries in (("NFP", None), ("Unemployment", ["US", "EU"])):
+        ref = raw.calculate_family_stats(FAMILY_PATTERNS[family], 30, 5, countries)
+        got = engine.calculate_family_stats(FAMILY_PATTERNS[family], 30, 5, countries)
+        assert ref["n_events"] > 0
+        for k, v in ref.items():
+            assert got[k] == (pytest.approx(v) if isinstance(v, float) else v), (family, k)
+    # horizon non stocké : calcul brut
+    assert sketch_stats(engine.conn, FAMILY_PATTERNS["NFP"], 45, 5) is None
+    raw.close()
+    engine.close()
+
+
+def test_store_retries_events_without_prices(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=1, window_min=60)
+    now = datetime.utcnow()
+    lag = int((now - timedelta(days=60)).timestamp())
+    query = f"SELECT family, metric, horizon_min, country, period, n, total FROM {SKETCH_TABLE} ORDER BY ALL"
+    with duckdb.connect(db) as con:
+        # prix des 60 derniers jours pas encore ingérés
+        con.execute("CREATE TABLE held AS SELECT * FROM prices_1m WHERE timestamp >= ?", [lag])
+        con.execute("DELETE FROM prices_1m WHERE timestamp >= ?", [lag])
+        first = update_sketch_store(con, now=now)
+        con.execute("INSERT INTO prices_1m SELECT * FROM held")
+        second = update_sketch_store(con, now=now)
+        assert first > 0 and second > 0
+        incremental = con.execute(query).fetchall()
+        assert update_sketch_store(con, now=now, rebuild=True) == first + second
+        rebuilt = con.execute(query).fetchall()
+    assert [r[:6] for r in incremental] == [r[:6] for r in rebuilt]
+    assert np.allclose([r[6] for r in incremental], [r[6] for r in rebuilt])
@@ -0,0 +1,53 @@
+"""
+Cube des stats de famille : mêmes valeurs que le calcul brut de ForecastEngine,
+repli sur le calcul brut hors cube.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.event_families import FAMILY_PATTERNS
+from fx_impact_app.src.family_stats_cube import CUBE_TABLE, build_cube, lookup
+from fx_impact_app.src.forecaster_mvp import ForecastEngine
+from fx_impact_app.src.metrics import CACHE_REQUESTS
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def test_cube_matches_raw_engine(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=1, window_min=60)
+    combos = [("NFP", 30, 1, None), ("Unemployment", 60, 1, ["US", "EU"]),
+              ("Unemployment", 15, 1, ["EU"]), ("FOMC", 30, 1, None)]
+    raw = ForecastEngine(db, use_cube=False)
+    expected = [raw.calculate_family_stats(FAMILY_PATTERNS[f], h, y, c) for f, h, y, c in combos]
+    raw.close()
+
+    with duckdb.connect(db) as con:
+        n = build_cube(con)
+        assert n == con.execute(f"SELECT COUNT(*) FROM {CUBE_TABLE}").fetchone()[0]
+        assert lookup(con, FAMILY_PATTERNS["NFP"], 45, 1) is None
+        # pas de troncature silencieuse : 1.5 an ou 30.5 min → calcul brut
+        assert lookup(con, FAMILY_PATTERNS["NFP"], 30, 1.5) is None
+        assert lookup(con, FAMILY_PATTERNS["NFP"], 30.5, 1) is None
+        assert lookup(con, FAMILY_PATTERNS["NFP"], 30, 1, countries=[]) is None
+        assert lookup(con, FAMILY_PATTERNS["NFP"], 30.0, 1.0) is not None
+
+    engine = ForecastEngine(db)
+    assert engine.use_cube
+    hits = CACHE_REQUESTS.get(cache="family_cube", result="hit")
+    for (f, h, y, c), ref in zip(combos, expected):
+        got = engine.calculate_family_stats(FAMILY_PATTERNS[f], h, y, c)
+        assert got.keys() == ref.keys()
+        for k, v in ref.items():
+            assert got[k] == (pytest.approx(v) if isinstance(v, float) else v), (f, h, c, k)
+    assert CACHE_REQUESTS.get(cache="family_cube", result="hit") == hits + len(combos)
+    assert expected[0]["n_events"] > 0 and expected[-1]["n_events"] == 0
+
+    # combinaison hors cube : calcul brut
+    fallback = engine.calculate_family_stats(FAMILY_PATTERNS["NFP"], 45, 1)
+    engine.close()
+    assert fallback["horizon_min"] == 45 and fallback["n_events"] == expected[0]["n_events"]
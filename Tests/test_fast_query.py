@@ -0,0 +1,62 @@
+"""
+fast_query : conversions epoch, lecture en tableaux ; LatencyAnalyzer donne le
+même résultat que l'ancienne boucle sur fetchall.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.fast_query import epoch_seconds, epoch_sql, fetch_arrays, fetch_scalar, from_epoch
+from fx_impact_app.src.latency_analyzer import LatencyAnalyzer
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def test_epoch_round_trip():
+    con = duckdb.connect()
+    ts = pd.Timestamp("2024-03-08 13:30:00", tz="America/New_York")
+    s = epoch_seconds(ts)
+    assert s == epoch_seconds("2024-03-08 18:30:00") == epoch_seconds(s)
+    assert from_epoch(s) == pd.Timestamp("2024-03-08 18:30:00")
+    got = fetch_arrays(con, f"SELECT {epoch_sql('t')} AS ts, 1.5 AS x FROM (SELECT ?::TIMESTAMP AS t)",
+                       [from_epoch(s)])
+    assert got["ts"].dtype == np.int64 and got["ts"][0] == s
+    assert fetch_scalar(con, "SELECT 1 WHERE false") is None
+
+
+def _legacy_latency(con, event_time, threshold_pips=5.0, max_minutes=30):
+    baseline = con.execute("""
+        SELECT close FROM prices_1m WHERE datetime <= ? - INTERVAL '1 minute'
+        ORDER BY datetime DESC LIMIT 1
+    """, [event_time]).fetchone()[0]
+    rows = con.execute(f"""
+        SELECT datetime, close, high, low, EXTRACT(EPOCH FROM (datetime - ?)) / 60.0
+        FROM prices_1m WHERE datetime > ? AND datetime <= ? + INTERVAL '{max_minutes} minutes'
+        ORDER BY datetime
+    """, [event_time, event_time, event_time]).fetchall()
+    initial, peak, peak_time, direction = None, 0, 0, None
+    for row in rows:
+        movement = abs(row[1] - baseline) * 10000
+        if initial is None and movement >= threshold_pips:
+            initial, direction = row[4], 'up' if row[1] > baseline else 'down'
+        if movement > peak:
+            peak, peak_time = movement, row[4]
+    return initial, peak_time, round(peak, 1), direction
+
+
+def test_latency_matches_legacy_loop(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=1, window_min=60)
+    with LatencyAnalyzer(db) as analyzer:
+        events = analyzer.conn.execute(
+            "SELECT ts_utc, event_key FROM events WHERE ts_utc < now() ORDER BY ts_utc DESC LIMIT 30"
+        ).fetchall()
+        for ts, key in events:
+            got = analyzer.calculate_event_latency(ts, key)
+            ref = _legacy_latency(analyzer.conn, ts)
+            assert (got["initial_reaction_minutes"], got["peak_time_minutes"],
+                    got["peak_movement_pips"], got["direction"]) == ref
@@ -0,0 +1,90 @@
+"""
+forecast_api : endpoints JSON sur un warehouse synthétique, réponses en cache
+servies sans recalcul, latence des requêtes en cache.
+"""
+import http.client
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.event_families import FAMILY_PATTERNS
+from fx_impact_app.src.forecast_api import ForecastService, make_server
+from fx_impact_app.src.metrics import CACHE_REQUESTS
+from fx_impact_app.src.planner import compute_family_stats, load_precomputed_stats, predict_event
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def test_endpoints_and_cached_latency(tmp_path, monkeypatch):
+    db = str(tmp_path / "w.duckdb")
+    build_synthetic_warehouse(db, years=1, window_min=30)
+    monkeypatch.setenv("FX_DB_READ_ONLY", "1")
+    service = ForecastService(db)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    http_con = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=30)
+
+    def call(method, path, body=None):
+        http_con.request(method, path, body=json.dumps(body) if body is not None else None)
+        resp = http_con.getresponse()
+        return resp.status, json.loads(resp.read())
+
+    try:
+        # préchauffage : mêmes clés de cache que les requêtes HTTP (casse comprise)
+        assert service.warm(["NFP"]) == 1
+        hits = {c: CACHE_REQUESTS.get(cache=c, result="hit") for c in ("api_family_stats", "api_score")}
+        assert call("GET", "/family_stats?family=nfp")[0] == 200
+        assert call("GET", "/score?family=NFP")[0] == 200
+        assert {c: CACHE_REQUESTS.get(cache=c, result="hit") - h for c, h in hits.items()} == \
+            {"api_family_stats": 1, "api_score": 1}
+
+        status, stats = call("GET", "/family_stats?family=nfp&horizon=60")
+        assert status == 200 and stats["n_events"] > 0 and stats["family"] == "NFP"
+        status, score = call("GET", "/score?family=NFP&importance=3")
+        assert status == 200 and 0 <= score["score"] <= 100 and score["importance"] == 3
+        status, lat = call("GET", "/latency?event_key=nonfarm_payrolls&surprise=1.5")
+        assert status == 200 and lat["symbol"] == "EURUSD"
+
+        events = [{"ts_utc": "2024-03-08T13:30:00Z", "family": "NFP", "country": "US", "surprise": 60},
+                  {"ts_utc": "2024-03-08T13:35:00Z", "family": "NFP", "country": "US", "surprise": -20}]
+        status, plan = call("POST", "/plan", {"events": events, "deltas": [-1, 0, 1]})
+        assert status == 200 and len(plan["predictions"]) == 2 and len(plan["scenarios"]) == 3
+        assert plan["overlaps"] and 0 <= plan["tradability_score"] <= 100
+        assert plan["predictions"][0]["direction"] == 1 and plan["predictions"][1]["direction"] == -1
+        # mêmes règles que la page 4 (planner) : pré-calculé sinon latence × {1.5, 2, 3}
+        with duckdb.connect(db, read_only=True) as con:
+            precomputed = load_precomputed_stats(con)
+        page = predict_event("NFP", 60, precomputed,
+                             lambda: compute_family_stats(FAMILY_PATTERNS["NFP"], 3, db))
+        assert {k: plan["predictions"][0][k] for k in page} == page
+        computed = predict_event("NFP", 60, {}, lambda: compute_family_stats(FAMILY_PATTERNS["NFP"], 3, db))
+        assert computed["ttr_median"] == 2 * computed["latency_median"]
+        assert service.planner_stats("nfp", 3) == compute_family_stats(FAMILY_PATTERNS["NFP"], 3, db)
+
+        assert call("GET", "/family_stats")[0] == 400
+        assert call("GET", "/score?family=NFP&importance=x")[0] == 400
+        assert call("GET", "/latency?event_key=cpi&symbol=AUDNZD")[0] == 400
+        assert call("POST", "/plan", {"events": []})[0] == 400
+
+        hits = CACHE_REQUESTS.get(cache="api_family_stats", result="hit")
+        times = []
+        for _ in range(300):
+            t0 = time.perf_counter()
+            status, again = call("GET", "/family_stats?family=nfp&horizon=60")
+            times.append(time.perf_counter() - t0)
+        assert again == stats
+        assert CACHE_REQUESTS.get(cache="api_family_stats", result="hit") == hits + 300
+        # objectif : p99 < 10 ms en cache (keep-alive, sans Nagle : < 1 ms en local)
+        assert np.percentile(times, 99) < 0.010, np.percentile(times, 99)
+    finally:
+        http_con.close()
+        server.shutdown()
+        server.server_close()
+        service.close()
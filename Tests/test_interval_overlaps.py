@@ -0,0 +1,51 @@
+"""
+Balayage des chevauchements : mêmes paires que la comparaison exhaustive,
+groupes connexes, fenêtres issues des prédictions du planificateur.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.interval_overlaps import prediction_windows, sweep_overlaps
+
+
+def test_sweep_matches_brute_force():
+    rng = np.random.default_rng(7)
+    starts = rng.uniform(0, 600, 200)
+    ends = starts + rng.uniform(1, 45, 200)
+    res = sweep_overlaps(starts, ends)
+
+    expected = {}
+    for i in range(200):
+        for j in range(i + 1, 200):
+            ov = min(ends[i], ends[j]) - max(starts[i], starts[j])
+            if ov > 0:
+                expected[frozenset((i, j))] = ov
+    got = {frozenset((i, j)): m for i, j, m in res.pairs}
+    assert got.keys() == expected.keys()
+    for k, v in expected.items():
+        assert abs(got[k] - v) < 1e-9
+    # deux intervalles qui se chevauchent sont toujours dans le même groupe
+    assert all(res.group[i] == res.group[j] for i, j, _ in res.pairs)
+
+
+def test_groups_and_prediction_windows():
+    preds = [
+        {"event": {"ts_utc": "2025-01-10 13:30", "family": "NFP", "country": "US"},
+         "latency_p20": 1, "ttr_p80": 40},
+        {"event": {"ts_utc": "2025-01-10 13:30", "family": "Unemployment", "country": "US"},
+         "latency_p20": 2, "ttr_p80": 20},
+        {"event": {"ts_utc": "2025-01-10 15:00", "family": "ISM", "country": "US"},
+         "latency_p20": None, "latency_median": 3, "ttr_p80": 15},
+    ]
+    starts, ends, _ = prediction_windows(preds)
+    assert starts.tolist() == [1, 2, 93] and ends.tolist() == [40, 20, 105]
+    res = sweep_overlaps(starts, ends)
+    assert [(i, j) for i, j, _ in res.pairs] == [(0, 1)]
+    groups = res.groups()
+    assert len(groups) == 1 and groups[0]["members"] == [0, 1]
+    assert groups[0]["severity"] == "HIGH" and groups[0]["max_depth"] == 2
@@ -0,0 +1,120 @@
+"""
+job_runner : étapes à jour sautées, descendance relancée, échecs bloquants,
+tables écrites jamais partagées entre deux étapes en cours.
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.job_runner import RUNS_TABLE, Step, input_version, run_dag, topological_order
+from fx_impact_app.src.symbols import SYMBOLS, upsert_symbol_prices
+from run_nightly import nightly_steps
+
+
+def _db(path):
+    with duckdb.connect(str(path)) as con:
+        con.execute("CREATE TABLE events (event_key VARCHAR, actual DOUBLE)")
+        con.execute("INSERT INTO events VALUES ('nfp', 1.0), ('cpi', 2.0)")
+    return str(path)
+
+
+def _dag(calls, fail=(), sleep=0.0):
+    active, lock, overlaps = set(), threading.Lock(), []
+
+    def job(name, writes):
+        def run(db_path):
+            with lock:
+                if active & set(writes):
+                    overlaps.append(name)
+                active.update(writes)
+            time.sleep(sleep)
+            with lock:
+                active.difference_update(writes)
+            calls.append(name)
+            if name in fail:
+                raise RuntimeError("boom")
+        return run
+
+    spec = [
+        ("a", (), ("t_a",), (("events", ("event_key", "actual")),)),
+        ("b", (), ("t_b",), ()),
+        ("c", ("a",), ("shared",), ()),
+        ("d", ("a", "b"), ("shared",), ()),
+        ("e", ("c", "d"), (), ()),
+    ]
+    steps = [Step(n, job(n, w), deps=d, inputs=i, writes=w) for n, d, w, i in spec]
+    return steps, overlaps
+
+
+def test_skip_rerun_and_block(tmp_path):
+    db = _db(tmp_path / "w.duckdb")
+    quiet = lambda msg: None
+
+    calls = []
+    steps, overlaps = _dag(calls, sleep=0.05)
+    res = {r.name: r.status for r in run_dag(db, steps, workers=4, log=quiet)}
+    assert res == dict.fromkeys("abcde", "ok")
+    assert not overlaps                                 # c et d écrivent 'shared' : jamais ensemble
+    assert calls[-1] == "e" and calls.index("a") < calls.index("c")
+
+    calls.clear()
+    res = {r.name: r.status for r in run_dag(db, _dag(calls)[0], log=quiet)}
+    assert calls == [] and set(res.values()) == {"skipped"}
+
+    # b forcé → d puis e relancés ; a et c à jour
+    calls.clear()
+    run_dag(db, _dag(calls)[0], force=["b"], log=quiet)
+    assert sorted(calls) == ["b", "d", "e"]
+
+    # données brutes modifiées → a et toute sa descendance
+    with duckdb.connect(db) as con:
+        con.execute("UPDATE events SET actual = 3.0 WHERE event_key = 'cpi'")
+    calls.clear()
+    run_dag(db, _dag(calls)[0], log=quiet)
+    assert sorted(calls) == ["a", "c", "d", "e"]
+
+    # échec de c : e bloquée, d (branche indépendante) tourne quand même
+    calls.clear()
+    res = {r.name: r for r in run_dag(db, _dag(calls, fail=("c",))[0], force=["all"], log=quiet)}
+    assert res["c"].status == "failed" and "boom" in res["c"].error
+    assert res["d"].status == "ok" and res["e"].status == "blocked" and "e" not in calls
+
+    # le succès précédent de e reste la référence ; c réparé → c et e relancés
+    calls.clear()
+    res = {r.name: r.status for r in run_dag(db, _dag(calls)[0], log=quiet)}
+    assert sorted(calls) == ["c", "e"]
+    with duckdb.connect(db) as con:
+        assert con.execute(f"SELECT count(*) FROM {RUNS_TABLE} WHERE status = 'failed'").fetchone()[0] == 1
+
+
+def test_topological_order_rejects_cycles():
+    noop = lambda db_path: None
+    assert topological_order([Step("b", noop, deps=("a",)), Step("a", noop)]) == ["a", "b"]
+    for steps in ([Step("a", noop, deps=("b",)), Step("b", noop, deps=("a",))],
+                  [Step("a", noop, deps=("x",))]):
+        try:
+            topological_order(steps)
+        except ValueError:
+            continue
+        raise AssertionError("DAG invalide accepté")
+
+
+def test_nightly_reactions_track_every_symbol_table(tmp_path):
+    step = next(s for s in nightly_steps(tmp_path) if s.name == "reactions")
+    assert {sym.table for sym in SYMBOLS.values()} <= {t for t, _ in step.inputs}
+
+    with duckdb.connect(str(tmp_path / "n.duckdb")) as con:
+        con.execute("CREATE TABLE events (ts_utc TIMESTAMP, event_key VARCHAR, country VARCHAR, "
+                    "actual DOUBLE, forecast DOUBLE, previous DOUBLE)")
+        before = input_version(con, step, {})
+        bars = pd.DataFrame({"datetime": pd.date_range("2024-01-05 13:30", periods=5, freq="1min"),
+                             "close": 150.0})
+        upsert_symbol_prices(con, bars, "USDJPY")
+        assert input_version(con, step, {}) != before
@@ -0,0 +1,69 @@
+"""
+live_reaction : machine à états barre par barre (file, tail CSV) et rejeu de
+prices_1m concordant avec LatencyAnalyzer.calculate_event_latency.
+"""
+import queue
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.latency_analyzer import LatencyAnalyzer
+from fx_impact_app.src.live_reaction import (LiveReactionDetector, queue_source, replay, tail_source)
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+T0 = 1_709_904_600                          # 2024-03-08 13:30 UTC
+# pips par rapport à la référence (barre 13:29), une barre par minute
+PIPS = [0, 0, 2, 8, 15, 20, 12, 13, 25, 16, -4, -6]
+
+
+def _bars():
+    return [(T0 + (i - 1) * 60, 1.09 + p / 10_000) for i, p in enumerate(PIPS)]
+
+
+def test_transitions_from_queue_and_tail(tmp_path):
+    q = queue.Queue()
+    for bar in _bars():
+        q.put(bar)
+    q.put(None)
+    det = LiveReactionDetector([("nfp", T0), ("late", T0 + 3600)], threshold_pips=5, horizon_minutes=30)
+    states = [(t.state, round(t.minutes)) for t in det.run(queue_source(q)) if t.event_key == "nfp"]
+    assert states == [("armed", 1), ("reacting", 2), ("peaked", 5), ("reacting", 7),
+                      ("peaked", 8), ("reversed", 9), ("done", 10)]
+    (ev,) = [e for e in det.finished if e.event_key == "nfp"]
+    assert det.summary(ev)["peak_movement_pips"] == 25.0 and ev.direction == "up" and ev.latency_minutes == 2
+    assert det._pending and det._pending[0][2].event_key == "late"     # pas encore publié
+
+    csv = tmp_path / "bars.csv"
+    csv.write_text("datetime,close\n" + "".join(
+        f"{pd.Timestamp(ts, unit='s').isoformat()},{c}\n" for ts, c in _bars()))
+    det2 = LiveReactionDetector([("nfp", T0)], threshold_pips=5)
+    assert [t.state for t in det2.run(tail_source(csv, follow=False))] == [s for s, _ in states]
+
+
+def test_replay_matches_after_the_fact(tmp_path):
+    db = str(tmp_path / "w.duckdb")
+    build_synthetic_warehouse(db, years=0.5, window_min=45)
+    with duckdb.connect(db, read_only=True) as con:
+        start, end = con.execute("""
+            SELECT min(ts_utc), min(ts_utc) + INTERVAL 20 DAY FROM events
+            WHERE ts_utc >= (SELECT min(datetime) FROM prices_1m) + INTERVAL 1 HOUR
+        """).fetchone()
+        det, transitions = replay(con, start, end, threshold_pips=5, horizon_minutes=30)
+    assert transitions and not det.active
+    reacted = [ev for ev in det.finished if ev.latency_minutes is not None]
+    assert reacted
+
+    with LatencyAnalyzer(db) as la:
+        for ev in det.finished:
+            if not ev.history:
+                continue
+            expected = la.calculate_event_latency(pd.Timestamp(ev.ts, unit="s").to_pydatetime(), ev.event_key,
+                                                  threshold_pips=5, max_minutes=30)
+            got = det.summary(ev)
+            for k in ("initial_reaction_minutes", "peak_time_minutes", "peak_movement_pips", "direction"):
+                assert got[k] == expected[k], (ev.event_key, k, got[k], expected[k])
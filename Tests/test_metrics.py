@@ -0,0 +1,60 @@
+"""
+Métriques Prometheus : format texte, export fichier / HTTP, instrumentation ForecastEngine.
+"""
+import sys
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src import metrics
+from fx_impact_app.src.metrics import MetricsRegistry
+
+
+def test_render_counter_and_histogram():
+    reg = MetricsRegistry()
+    c = reg.counter("t_events_total", "doc", ["engine"])
+    h = reg.histogram("t_duration_seconds", "doc", ["op"], buckets=(0.1, 1.0))
+    c.inc(3, engine="forecast")
+    h.observe(0.05, op="x")
+    h.observe(0.5, op="x")
+    text = reg.render()
+    assert '# TYPE t_events_total counter' in text
+    assert 't_events_total{engine="forecast"} 3' in text
+    assert 't_duration_seconds_bucket{op="x",le="0.1"} 1' in text
+    assert 't_duration_seconds_bucket{op="x",le="+Inf"} 2' in text
+    assert 't_duration_seconds_count{op="x"} 2' in text
+
+
+def test_textfile_and_http(tmp_path):
+    reg = MetricsRegistry()
+    reg.gauge("t_rows_per_second", "doc", ["source"]).set(12.5, source="csv")
+    out = reg.write_textfile(str(tmp_path / "fx.prom"))
+    assert 't_rows_per_second{source="csv"} 12.5' in Path(out).read_text()
+    assert not list(tmp_path.glob(".*.tmp"))
+
+    srv = reg.start_http_server(0)
+    port = srv.server_address[1]
+    body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+    srv.shutdown()
+    assert "t_rows_per_second" in body
+
+
+def test_forecast_engine_is_instrumented(tmp_path):
+    from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+    from fx_impact_app.src.forecaster_mvp import ForecastEngine
+
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=0.5, window_min=60)
+    before_ev = metrics.EVENTS_PROCESSED.get(engine="forecast")
+    before_win = metrics.WINDOWS_FETCHED.get(engine="forecast")
+    before_n = metrics.COMPUTE_SECONDS.count(engine="forecast", op="family_stats")
+
+    engine = ForecastEngine(db)
+    stats = engine.calculate_family_stats("(?i)(non farm payrolls)", horizon_minutes=30, hist_years=1)
+    engine.close()
+
+    assert stats["n_events"] > 0
+    assert metrics.EVENTS_PROCESSED.get(engine="forecast") > before_ev
+    assert metrics.WINDOWS_FETCHED.get(engine="forecast") >= before_win + stats["n_events"]
+    assert metrics.COMPUTE_SECONDS.count(engine="forecast", op="family_stats") == before_n + 1
@@ -0,0 +1,62 @@
+"""
+prices_1s : seules les secondes proches d'un événement sont stockées (pipettes
+int32, dernier prix de la seconde), latence mesurée à la seconde.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src import prices_1s
+from fx_impact_app.src.latency_analyzer import LatencyAnalyzer
+
+
+def _db(path):
+    con = duckdb.connect(str(path))
+    con.execute("SET TimeZone='UTC'")
+    con.execute("CREATE TABLE events (ts_utc TIMESTAMP, country VARCHAR, event_key VARCHAR)")
+    con.execute("""INSERT INTO events VALUES
+        ('2024-03-08 13:30:00', 'US', 'nfp'),
+        ('2024-03-08 23:58:00', 'US', 'late'),
+        ('2024-03-12 12:30:00', 'US', 'cpi')""")
+    return con
+
+
+def _ticks():
+    # 2 jours de ticks toutes les 500 ms ; saut de +12 pips 7 s après le NFP
+    ts = pd.date_range("2024-03-08 00:00", "2024-03-10 00:00", freq="500ms", tz="UTC")
+    close = np.full(len(ts), 1.09000)
+    close[ts >= pd.Timestamp("2024-03-08 13:30:07", tz="UTC")] += 0.0012
+    return pd.DataFrame({"datetime": ts, "close": close})
+
+
+def test_ingest_bounded_and_latency(tmp_path):
+    con = _db(tmp_path / "w.duckdb")
+    n = prices_1s.ingest_ticks(con, _ticks())
+    # 2 fenêtres de 20 min (+1 s inclusive), la seconde déborde sur le jour suivant
+    assert n == 2 * (20 * 60 + 1)
+    assert con.execute("SELECT count(*), count(DISTINCT day) FROM prices_1s").fetchone() == (n, 2)
+    assert con.execute("SELECT typeof(px) FROM prices_1s LIMIT 1").fetchone()[0] == "INTEGER"
+    # dernier prix de la seconde 13:30:07 (ticks .0 et .5 identiques), relu via la vue
+    assert con.execute("SELECT close FROM prices_1s_v WHERE ts_utc = '2024-03-08 13:30:07'").fetchone()[0] \
+        == 1.0912
+    # ré-ingestion : remplace, ne duplique pas
+    assert prices_1s.ingest_ticks(con, _ticks()) == n
+    assert con.execute("SELECT count(*) FROM prices_1s").fetchone()[0] == n
+
+    out = prices_1s.measure_latency_seconds(
+        con, pd.to_datetime(["2024-03-08 13:30", "2024-03-08 23:58", "2024-03-12 12:30"]), threshold_pips=5)
+    assert out["latency_seconds"].tolist()[:1] == [7]
+    assert out.loc[0, "direction"] == "up" and out.loc[0, "peak_pips"] == 12.0
+    assert not out.loc[1, "had_reaction"] and out.loc[1, "ticks"] == 20 * 60 + 1
+    assert out.loc[2, "ticks"] == 0 and pd.isna(out.loc[2, "latency_seconds"])
+    con.close()
+
+    with LatencyAnalyzer(str(tmp_path / "w.duckdb")) as la:
+        got = la.calculate_event_latency_seconds(pd.to_datetime(["2024-03-08 13:30"]), threshold_pips=10)
+    assert got["latency_seconds"].tolist() == [7]
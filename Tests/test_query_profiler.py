@@ -0,0 +1,42 @@
+"""
+Profilage DuckDB : empreintes SQL, agrégats, EXPLAIN ANALYZE opt-in.
+"""
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.query_profiler import ProfiledConnection, QueryProfiler, fingerprint
+
+import duckdb
+
+
+def test_fingerprint_groups_literals_and_lists():
+    a = fingerprint("SELECT * FROM events WHERE event_key = 'cpi' AND ts_utc > '2024-01-01' LIMIT 10")
+    b = fingerprint("select *  from events where event_key='nfp' and ts_utc > '2023-05-01' limit 50")
+    assert a == b
+    assert fingerprint("SELECT 1 WHERE k IN ('a', 'b', 'c')") == fingerprint("SELECT 2 WHERE k IN ('x', 'y')")
+
+
+def test_aggregates_rows_and_explain():
+    prof = QueryProfiler(buffer_size=3, explain_threshold_ms=0.0)
+    con = ProfiledConnection(duckdb.connect(), prof)
+    con.execute("CREATE TABLE t AS SELECT range AS x FROM range(100)")
+    for lim in (5, 7, 9):
+        con.execute(f"SELECT x FROM t WHERE x < {lim}").fetchall()
+    df = con.execute("SELECT x FROM t WHERE x < ?", [20]).fetchdf()
+    assert len(df) == 20
+
+    aggs = {a["fingerprint"]: a for a in prof.aggregates()}
+    sel = aggs["select x from t where x<?"]
+    assert sel["count"] == 4 and sel["rows"] == 5 + 7 + 9 + 20
+    assert sel["p50_ms"] <= sel["p95_ms"] <= sel["max_ms"]
+    assert len(prof.recent()) == 3  # ring buffer borné
+    plan = prof.explains()[0]["explain"]
+    assert plan and not plan.startswith("EXPLAIN ANALYZE indisponible")
+
+    dumped = json.loads(prof.dump_json())
+    assert {"aggregates", "recent", "explains"} <= dumped.keys()
+    con.close()
@@ -0,0 +1,78 @@
+"""
+result_cache : LRU borné en octets, clé versionnée par la base, un seul calcul
+par clé entre threads, résultats des moteurs partagés entre instances.
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src import result_cache
+from fx_impact_app.src.event_families import FAMILY_PATTERNS
+from fx_impact_app.src.forecaster_mvp import ForecastEngine
+from fx_impact_app.src.metrics import CACHE_REQUESTS
+from fx_impact_app.src.result_cache import ResultCache, cached, data_version
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def test_lru_byte_budget_and_copies():
+    cache = ResultCache(max_bytes=3 * 8000 + 500)
+    for k in "abc":
+        cache.put(k, np.zeros(1000))
+    cache.get_or_compute("t", "a", lambda: None)        # a redevient le plus récent
+    cache.put("d", np.zeros(1000))                      # évince b
+    assert len(cache) == 3 and cache.nbytes == 3 * 8000
+    assert cache.get_or_compute("t", "b", lambda: "recalc") == "recalc"
+    cache.put("big", np.zeros(10_000))                  # plus gros que le budget : ignoré
+    assert cache.get_or_compute("t", "big", lambda: 1) == 1
+
+    out = cache.get_or_compute("t", "dict", lambda: {"x": [1]})
+    out["x"].append(2)
+    assert cache.get_or_compute("t", "dict", lambda: None) == {"x": [1]}
+
+
+def test_single_flight_and_version(tmp_path):
+    cache = ResultCache(max_bytes=1 << 20)
+    db = tmp_path / "w.duckdb"
+    with duckdb.connect(str(db)) as con:
+        con.execute("CREATE TABLE t AS SELECT 1 AS x")
+    calls = []
+
+    @cached("t", version=lambda db_path, n: data_version(db_path), cache=cache)
+    def slow(db_path, n):
+        calls.append(n)
+        time.sleep(0.1)
+        with duckdb.connect(str(db_path), read_only=True) as con:
+            return con.execute("SELECT sum(x) FROM t").fetchone()[0] * n
+
+    threads = [threading.Thread(target=slow, args=(db, 2)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == [2] and slow(db, 2) == 2
+    with duckdb.connect(str(db)) as con:
+        con.execute("INSERT INTO t VALUES (4)")             # nouvelle version de la base
+    assert slow(db, 2) == 10 and calls == [2, 2]
+    assert data_version(":memory:") is None
+
+
+def test_engine_results_shared(tmp_path):
+    db = str(tmp_path / "w.duckdb")
+    build_synthetic_warehouse(db, years=1, window_min=30)
+    result_cache.CACHE.clear()
+    pattern = FAMILY_PATTERNS["NFP"]
+    hits = lambda: CACHE_REQUESTS.get(cache="forecast_family_stats", result="hit")
+    before = hits()
+    with duckdb.connect(db) as con:
+        con.execute("DROP TABLE IF EXISTS family_stats_cube")
+    first = ForecastEngine(db).calculate_family_stats(pattern, 30, 3)
+    first["n_events"] = -1                              # copie : le cache n'est pas touché
+    second = ForecastEngine(db).calculate_family_stats(pattern, 30, 3)
+    assert hits() == before + 1 and second["n_events"] > 0
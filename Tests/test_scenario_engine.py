@@ -0,0 +1,64 @@
+"""
+Scénarios vectorisés : mêmes valeurs que la boucle scalaire de l'ancien tableau.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.scenario_engine import ScenarioInputs, delta_grid, evaluate_grid
+
+
+def _scalar(preds, delta):
+    impacts = []
+    for p in preds:
+        s = p["surprise"] + delta
+        impact = p["mfe_p80"] * (0.5 + 0.5 * min(abs(s) / 50.0, 2.0))
+        impacts.append(impact * (1 if s > 0 else -1))
+    return sum(impacts)
+
+
+def test_grid_matches_scalar_loop():
+    preds = [
+        {"surprise": 0.3, "mfe_p80": 12.0, "latency_median": 4, "ttr_median": 8},
+        {"surprise": -1.2, "mfe_p80": 20.0, "latency_median": 2, "ttr_median": 30},
+        {"surprise": 80.0, "mfe_p80": 5.0, "latency_median": 6, "ttr_median": 12},
+    ]
+    deltas = delta_grid(2.0, 0.1)
+    assert len(deltas) == 41 and 0.0 in deltas
+    grid = evaluate_grid(ScenarioInputs.from_predictions(preds), deltas)
+    for d, impact in zip(grid["delta"], grid["impact"]):
+        assert np.isclose(impact, _scalar(preds, d))
+    assert (grid["ttr_min"] == 8).all()
+    assert grid.iloc[::10]["delta"].tolist() == [-2.0, -1.0, 0.0, 1.0, 2.0]
+
+
+def test_event_prediction_is_delta_zero_row():
+    # prédiction du planificateur sur stats calculées (planner.predict_event)
+    from fx_impact_app.src.scenario_engine import predict_from_stats
+    stats = {"n_events": 12, "mfe_p80": 18.0, "latency_median": 3, "latency_p20": 1, "latency_p80": 6,
+             "ttr_median": 6, "ttr_p20": 4, "ttr_p80": 18}
+    preds = []
+    for surprise in (0.3, -1.2, 40.0, 130.0):
+        pred = {"surprise": surprise, **predict_from_stats(stats, surprise)}
+        row = evaluate_grid(ScenarioInputs.from_predictions([pred]), [0.0]).iloc[0]
+        assert np.isclose(row["impact"], pred["predicted_pips"] * pred["direction"])
+        preds.append(pred)
+    row = evaluate_grid(ScenarioInputs.from_predictions(preds), [0.0]).iloc[0]
+    assert np.isclose(row["impact"], sum(p["predicted_pips"] * p["direction"] for p in preds))
+
+
+def test_precomputed_headline_keeps_its_formula():
+    # familles pré-calculées : impact affiché = mfe_p80 × min(2, 1 + s/100) (× 1 si s <= 0.5)
+    from fx_impact_app.src.planner import predict_event
+    stats = {"n_events": 12, "mfe_p80": 18.0, "latency_median": 3, "latency_p20": 1, "latency_p80": 6,
+             "ttr_median": 6, "ttr_p20": 4, "ttr_p80": 18}
+    for surprise, factor in ((0.1, 1.0), (-3.0, 1.0), (40.0, 1.4), (130.0, 2.0)):
+        pred = predict_event("NFP", surprise, {"NFP": stats}, lambda: None)
+        assert pred["source"] == "precomputed_db"
+        assert np.isclose(pred["predicted_pips"], 18.0 * factor)
+    calc = predict_event("NFP", 0.1, {}, lambda: stats)
+    assert calc["source"] == "calculated" and np.isclose(calc["predicted_pips"], 18.0 * 0.501)
@@ -0,0 +1,45 @@
+"""
+Base de service : colonnes réduites, prix triés, mêmes résultats que le warehouse,
+ouverture en lecture seule.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.forecaster_mvp import ForecastEngine
+from fx_impact_app.src.query_profiler import profiled_connect
+from fx_impact_app.src.serving_db import EVENT_COLUMNS, build_serving_db
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def test_serving_db_matches_warehouse(tmp_path, monkeypatch):
+    src = build_synthetic_warehouse(str(tmp_path / "warehouse.duckdb"), years=0.5, window_min=60)
+    out = tmp_path / "serving.duckdb"
+    counts = build_serving_db(src, str(out))
+
+    with duckdb.connect(str(out), read_only=True) as con:
+        cols = [r[0] for r in con.execute("DESCRIBE events").fetchall()]
+        assert cols == list(EVENT_COLUMNS)
+        ts = con.execute("SELECT timestamp FROM prices_1m").fetchnumpy()["timestamp"]
+        assert (ts[1:] >= ts[:-1]).all()
+        assert counts["prices_1m"] == len(ts)
+
+    pattern = "(?i)(non farm payrolls)"
+    ref = ForecastEngine(src).calculate_family_stats(pattern, horizon_minutes=30, hist_years=1)
+
+    monkeypatch.setenv("FX_DB_READ_ONLY", "1")
+    engine = ForecastEngine(str(out))
+    got = engine.calculate_family_stats(pattern, horizon_minutes=30, hist_years=1)
+    engine.close()
+    assert got["n_events"] == ref["n_events"] > 0
+    assert got["mfe_p80"] == pytest.approx(ref["mfe_p80"])
+
+    con = profiled_connect(str(out))
+    with pytest.raises(duckdb.Error):
+        con.execute("DELETE FROM events")
+    con.close()
@@ -0,0 +1,117 @@
+"""
+Snapshots base + deltas Parquet : publication, synchronisation incrémentale, idempotence.
+"""
+import functools
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.prices_1s import ingest_ticks
+from fx_impact_app.src.snapshots import local_state, publish_base, publish_delta, sync_snapshot
+from fx_impact_app.src.symbols import upsert_symbol_prices
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+@pytest.fixture
+def published(tmp_path):
+    out = tmp_path / "pub"
+    out.mkdir()
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(out))
+    handler.log_message = lambda *a: None
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield out, f"http://127.0.0.1:{srv.server_address[1]}/manifest.json"
+    srv.shutdown()
+
+
+def _add_new_data(db, now):
+    with duckdb.connect(db) as con:
+        last = con.execute("SELECT max(datetime) FROM prices_1m").fetchone()[0]
+        con.execute("""
+            INSERT INTO prices_1m
+            SELECT epoch(d)::BIGINT, d, 1.1, 1.1, 1.1, 1.1, 0
+            FROM range(?::TIMESTAMPTZ + INTERVAL 1 MINUTE, ?::TIMESTAMPTZ + INTERVAL 61 MINUTE, INTERVAL 1 MINUTE) t(d)
+        """, [last, last])
+        # Un actual publié après coup sur un événement récent
+        con.execute("""
+            UPDATE events SET actual = 42.0
+            WHERE ts_utc = (SELECT max(ts_utc) FROM events WHERE ts_utc < ?)
+        """, [now])
+        # Nouveau symbole et prix à la seconde autour du dernier événement passé
+        bars = pd.date_range(last, periods=60, freq="1min")
+        upsert_symbol_prices(con, pd.DataFrame({"datetime": bars, "close": 1.27}), "GBPUSD")
+        ev = con.execute("SELECT max(ts_utc) FROM events WHERE ts_utc < ?", [now]).fetchone()[0]
+        ticks = pd.date_range(pd.Timestamp(ev) - pd.Timedelta(minutes=1), periods=300, freq="1s")
+        ingest_ticks(con, pd.DataFrame({"datetime": ticks, "close": 1.1}))
+
+
+def _counts(db):
+    with duckdb.connect(str(db), read_only=True) as con:
+        return (con.execute("SELECT COUNT(*) FROM prices_1m").fetchone()[0],
+                con.execute("SELECT COUNT(*) FROM events").fetchone()[0],
+                con.execute("SELECT COUNT(*) FROM events WHERE actual = 42.0").fetchone()[0])
+
+
+def _symbol_counts(db):
+    with duckdb.connect(str(db), read_only=True) as con:
+        return (con.execute("SELECT COUNT(*) FROM prices_1m_gbpusd_v").fetchone()[0],
+                con.execute("SELECT COUNT(*) FROM prices_1s_v").fetchone()[0])
+
+
+def test_sync_downloads_only_new_deltas(tmp_path, published):
+    out, manifest_url = published
+    src = build_synthetic_warehouse(str(tmp_path / "src.duckdb"), years=0.3, window_min=30)
+    t0 = datetime.now(timezone.utc).replace(microsecond=0)
+    publish_base(src, str(out), now=t0)
+
+    client = tmp_path / "app" / "warehouse.duckdb"
+    first = sync_snapshot(manifest_url, client)
+    assert first["base_downloaded"] and first["deltas_applied"] == 0
+
+    _add_new_data(src, t0)
+    delta = publish_delta(src, str(out), now=t0 + timedelta(hours=1))
+    assert delta is not None
+    # seul l'événement modifié repart (pas toute la fenêtre ni le calendrier futur)
+    assert [f["rows"] for f in delta["files"] if f["table"] == "events"] == [_counts(src)[2]]
+    # rien de changé depuis : pas de nouveau delta
+    assert publish_delta(src, str(out), now=t0 + timedelta(hours=2)) is None
+
+    second = sync_snapshot(manifest_url, client)
+    assert not second["base_downloaded"] and second["deltas_applied"] == 1
+    assert second["bytes"] < first["bytes"] / 5
+    assert _counts(client) == _counts(src)
+    assert _symbol_counts(client) == _symbol_counts(src) and min(_symbol_counts(src)) > 0
+    assert local_state(client)[1] == 1
+
+    # Déjà à jour : rien à télécharger
+    third = sync_snapshot(manifest_url, client)
+    assert third["bytes"] == 0 and third["deltas_applied"] == 0
+
+
+def test_corrupt_delta_leaves_db_untouched(tmp_path, published):
+    out, manifest_url = published
+    src = build_synthetic_warehouse(str(tmp_path / "src.duckdb"), years=0.3, window_min=30)
+    t0 = datetime.now(timezone.utc).replace(microsecond=0)
+    publish_base(src, str(out), now=t0)
+    client = tmp_path / "app" / "warehouse.duckdb"
+    sync_snapshot(manifest_url, client)
+    before = _counts(client)
+
+    _add_new_data(src, t0)
+    delta = publish_delta(src, str(out), now=t0 + timedelta(hours=1))
+    # Delta corrompu après publication : le checksum échoue, la base reste intacte
+    victim = out / delta["files"][-1]["file"]
+    victim.write_bytes(victim.read_bytes()[:-10] + b"0" * 10)
+    with pytest.raises(Exception):
+        sync_snapshot(manifest_url, client)
+    assert _counts(client) == before
+    assert local_state(client)[1] == 0
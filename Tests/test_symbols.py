@@ -0,0 +1,76 @@
+"""
+Multi-symboles : facteur de pip par symbole, table de prix par symbole, cube
+construit en parallèle (une passe événements) identique au calcul brut.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src import data_access
+from fx_impact_app.src.event_families import FAMILY_PATTERNS
+from fx_impact_app.src.family_stats_cube import CUBE_TABLE, build_cube_parallel, lookup
+from fx_impact_app.src.forecaster_mvp import ForecastEngine
+from fx_impact_app.src.latency_analyzer import LatencyAnalyzer
+from fx_impact_app.src.symbols import available_symbols, get_symbol, upsert_symbol_prices
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+
+
+def test_symbol_registry_and_upsert(tmp_path):
+    assert get_symbol(None).table == "prices_1m"
+    assert get_symbol("usd/jpy").pip_factor == 100
+    assert get_symbol("XAUUSD.FOREX").view == "prices_1m_xauusd_v"
+    with pytest.raises(ValueError):
+        get_symbol("AUDNZD")
+    with pytest.raises(ValueError):
+        data_access.price_view("5m", "USDJPY")
+
+    with duckdb.connect(str(tmp_path / "p.duckdb")) as con:
+        df = pd.DataFrame({"datetime": pd.date_range("2024-01-02 13:00", periods=5, freq="1min", tz="UTC"),
+                           "close": [150.0, 150.1, 150.2, 150.3, 150.4]})
+        assert upsert_symbol_prices(con, df, "USDJPY") == 5
+        assert upsert_symbol_prices(con, df.iloc[3:], "USDJPY") == 0
+        assert available_symbols(con) == ["USDJPY"]
+        assert data_access.ref_price(con, "2024-01-02 13:03", symbol="USDJPY") == 150.2
+
+
+def test_multi_symbol_stats(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=1, window_min=60,
+                                   symbols=("EURUSD", "USDJPY"))
+    nfp = FAMILY_PATTERNS["NFP"]
+    eur = ForecastEngine(db, use_cube=False)
+    jpy = ForecastEngine(db, use_cube=False, symbol="USDJPY")
+    ref_eur = eur.calculate_family_stats(nfp, 30, 1)
+    ref_jpy = jpy.calculate_family_stats(nfp, 30, 1)
+    eur.close()
+    jpy.close()
+    # même trajectoire en pips (sens opposé) : facteur de pip appliqué
+    assert ref_jpy["n_events"] == ref_eur["n_events"] > 0
+    for k in ("mfe_median", "mfe_p90", "latency_median", "ttr_mean"):
+        assert ref_jpy[k] == pytest.approx(ref_eur[k]), k
+
+    n = build_cube_parallel(db, workers=2)
+    with duckdb.connect(db, read_only=True) as con:
+        assert con.execute(f"SELECT COUNT(DISTINCT symbol) FROM {CUBE_TABLE}").fetchone()[0] == 2
+        assert n == con.execute(f"SELECT COUNT(*) FROM {CUBE_TABLE}").fetchone()[0]
+        assert lookup(con, nfp, 30, 1, symbol="GBPUSD") is None
+
+    engine = ForecastEngine(db, symbol="USDJPY")
+    assert engine.use_cube
+    got = engine.calculate_family_stats(nfp, 30, 1)
+    engine.close()
+    for k, v in ref_jpy.items():
+        assert got[k] == (pytest.approx(v) if isinstance(v, float) else v), k
+
+    with LatencyAnalyzer(db) as la_eur, LatencyAnalyzer(db, symbol="USDJPY") as la_jpy:
+        ts = pd.Timestamp(la_eur.conn.execute(
+            "SELECT max(ts_utc) FROM events WHERE event_key = 'non farm payrolls' AND actual IS NOT NULL"
+        ).fetchone()[0])
+        a = la_eur.calculate_event_latency(ts, "nfp")
+        b = la_jpy.calculate_event_latency(ts, "nfp")
+    assert b["peak_movement_pips"] == a["peak_movement_pips"] > 0
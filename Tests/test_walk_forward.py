@@ -0,0 +1,58 @@
+"""
+Walk-forward : prédiction avec les seuls événements antérieurs (pas ceux du même
+horodatage), métriques mensuelles = agrégat des erreurs par événement.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import backtest_latency_predictions as bt
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+from fx_impact_app.src.walk_forward import walk_forward
+
+
+def _frames(rows):
+    events = pd.DataFrame([{"ts_utc": r[0], "family": r[1]} for r in rows])
+    reactions = pd.DataFrame([{"latency_minutes": r[2], "peak_pips": r[3], "had_reaction": r[4],
+                               "bars_analyzed": 60} for r in rows])
+    return events, reactions
+
+
+def test_no_lookahead():
+    rows = [
+        ("2024-01-03 13:30", "CPI", 4.0, 10.0, True),
+        ("2024-01-01 13:30", "CPI", 2.0, 20.0, True),
+        ("2024-01-05 13:30", "CPI", 60.0, 1.0, False),
+        ("2024-01-05 13:30", "CPI", 3.0, 12.0, True),      # même horodatage : ne se voient pas
+        ("2024-02-01 13:30", "CPI", 8.0, 30.0, True),
+        ("2024-02-01 13:30", "NFP", 1.0, 40.0, True),
+    ]
+    scores, monthly = walk_forward(*_frames(rows), min_history=2)
+    cpi = scores[scores["family"] == "CPI"].reset_index(drop=True)
+    assert len(cpi) == 3 and (scores["family"] == "NFP").sum() == 0
+    assert cpi["predicted_latency"].tolist() == [3.0, 3.0, 3.0]          # (2 + 4) / 2, puis + 3 → 3
+    assert cpi["predicted_movement"].tolist()[:2] == [15.0, 15.0]
+    assert cpi["predicted_movement"].iloc[2] == np.mean([20.0, 10.0, 1.0, 12.0])
+
+    jan = monthly[(monthly["family"] == "CPI") & (monthly["month"] == "2024-01")].iloc[0]
+    assert jan["n_scored"] == 2 and jan["n_reaction"] == 1
+    assert jan["mae_latency"] == np.mean(cpi["error_minutes"].iloc[:2])
+    assert monthly["month"].is_monotonic_increasing
+
+
+def test_walk_forward_on_warehouse(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=1, window_min=90)
+    out = bt.run_walk_forward(min_empirical_score=0, db_path=db, output_dir=tmp_path)
+    assert out is not None
+    scores, monthly = out
+    assert monthly["n_scored"].sum() == len(scores)
+    per_family = scores.groupby("family")["error_minutes"].mean()
+    weighted = (monthly.assign(w=monthly["mae_latency"] * monthly["n_scored"])
+                .groupby("family")[["w", "n_scored"]].sum())
+    assert np.allclose(per_family, (weighted["w"] / weighted["n_scored"]).loc[per_family.index])
+    assert len(list(tmp_path.glob("walk_forward_monthly_*.csv"))) == 1
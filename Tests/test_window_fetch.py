@@ -0,0 +1,38 @@
+"""
+Fenêtres de prix groupées : même contenu qu'un filtre par événement, fenêtres
+chevauchantes et vides comprises.
+"""
+import sys
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+from fx_impact_app.src.window_fetch import fetch_windows, to_epoch_seconds
+
+
+def test_fetch_windows_matches_per_event_filter(tmp_path):
+    db = build_synthetic_warehouse(str(tmp_path / "w.duckdb"), years=0.5, window_min=60)
+    con = duckdb.connect(db, read_only=True)
+    events = con.execute("""
+        SELECT ts_utc FROM events WHERE ts_utc < now() ORDER BY ts_utc DESC LIMIT 12
+    """).fetchdf()["ts_utc"].tolist()
+    # fenêtre chevauchante (même événement) + fenêtre sans prix
+    events += [events[0], pd.Timestamp("2001-01-01", tz="UTC")]
+    starts = to_epoch_seconds(events)
+    batch = fetch_windows(con, starts, starts + 3600)
+
+    prices = con.execute("SELECT timestamp, close FROM prices_1m ORDER BY timestamp").fetchnumpy()
+    con.close()
+    assert len(batch) == len(events)
+    for i, t0 in enumerate(starts):
+        mask = (prices["timestamp"] >= t0) & (prices["timestamp"] <= t0 + 3600)
+        np.testing.assert_array_equal(batch.column(i, "timestamp"), prices["timestamp"][mask])
+        np.testing.assert_array_equal(batch.column(i, "close"), prices["close"][mask])
+    assert batch.rows(0) > 0 and batch.rows(len(events) - 2) == batch.rows(0)
+    assert batch.frame(len(events) - 1) is None
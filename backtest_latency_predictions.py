@@ -3,9 +3,26 @@
 Backtest Latency Predictions
 Valide les prédictions de latence vs réactions réelles du marché
 Version corrigée avec fix timezone robuste
+
+Mode batch (--batch) : événements groupés par famille, prédiction de latence
+calculée une fois par famille, réactions réelles lues en une requête groupée
+(window_fetch), familles éventuellement réparties sur plusieurs process
+(--workers). Sans la limite de 200 événements / 90 jours, il sert de
+validation complète sur plusieurs années :
+
+  python backtest_latency_predictions.py --batch --workers 4
+
+Mode walk-forward (--walk-forward) : chaque événement n'est prédit qu'avec les
+réactions des événements antérieurs de sa famille (fx_impact_app.src.walk_forward),
+en un seul passage chronologique ; erreurs par famille et par mois :
+
+  python backtest_latency_predictions.py --walk-forward --min-score 0
 """
 
+import argparse
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import pandas as pd
 import duckdb
@@ -17,6 +34,9 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from fx_impact_app.src.latency_analyzer import LatencyAnalyzer
+from fx_impact_app.src.query_profiler import profiled_connect
+from fx_impact_app.src.walk_forward import MIN_HISTORY, walk_forward
+from fx_impact_app.src.window_fetch import fetch_windows, to_epoch_seconds
 
 
 def get_db_path():
@@ -124,6 +144,39 @@ def measure_actual_market_reaction(event_ts, threshold_pips=5.0, window_minutes=
         return None
 
 
+def measure_actual_market_reactions(conn, event_times, threshold_pips=5.0, window_minutes=60):
+    """
+    Version groupée de measure_actual_market_reaction : toutes les fenêtres
+    [ts, ts + window] lues en une requête sur `conn`.
+
+    Returns:
+        DataFrame (une ligne par événement, même ordre) avec les clés de
+        measure_actual_market_reaction ; bars_analyzed = 0 si aucun prix.
+    """
+    starts = to_epoch_seconds(event_times)
+    batch = fetch_windows(conn, starts, starts + window_minutes * 60)
+    rows = []
+    for i in range(len(starts)):
+        close = batch.column(i, "close").astype(float)
+        if len(close) == 0:
+            rows.append({'latency_minutes': None, 'peak_minutes': None, 'peak_pips': None,
+                         'direction': 'NONE', 'had_reaction': False, 'bars_analyzed': 0})
+            continue
+        delta = close - close[0]
+        movement = np.abs(delta) * 10000
+        hit = np.flatnonzero(movement >= threshold_pips)
+        latency = int(hit[0]) if len(hit) else window_minutes
+        rows.append({
+            'latency_minutes': latency,
+            'peak_minutes': int(np.argmax(movement)),
+            'peak_pips': float(movement.max()),
+            'direction': ('UP' if delta[hit[0]] > 0 else 'DOWN') if len(hit) else 'NONE',
+            'had_reaction': latency < window_minutes,
+            'bars_analyzed': len(close)
+        })
+    return pd.DataFrame(rows)
+
+
 def detect_event_family(event_key):
     """
     Détecte la famille d'un événement via patterns multi-mots
@@ -312,6 +365,13 @@ def run_backtest(num_events=200, min_empirical_score=60):
         print("❌ Aucune réaction mesurable détectée")
         return None
     
+    summarize_results(results_df)
+    
+    return results_df
+
+
+def summarize_results(results_df, output_dir=project_root):
+    """Affiche les métriques du backtest et sauvegarde les résultats en CSV"""
     # Calculer métriques globales
     print(f"\n{'='*60}")
     print("📊 RÉSULTATS BACKTESTING")
@@ -353,16 +413,219 @@ def run_backtest(num_events=200, min_empirical_score=60):
     print()
     
     # Sauvegarder résultats
-    output_file = project_root / f'backtest_results_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    output_file = Path(output_dir) / f'backtest_results_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.csv'
     results_df.to_csv(output_file, index=False)
     print(f"✅ Résultats sauvegardés: {output_file}\n")
     
+    return output_file
+
+
+def _load_backtest_events(db_path, min_empirical_score, days_back=None, num_events=None):
+    """Événements à valider (tous par défaut : pas de limite de nombre ni de période)"""
+    period = f"AND e.ts_utc >= CURRENT_DATE - INTERVAL '{int(days_back)} days'" if days_back else ""
+    limit = f"LIMIT {int(num_events)}" if num_events else ""
+    with profiled_connect(str(db_path)) as conn:
+        return conn.execute(f"""
+        SELECT 
+            e.ts_utc,
+            e.event_key,
+            e.country,
+            e.actual,
+            e.previous,
+            e.forecast,
+            ef.empirical_score,
+            ef.avg_movement_pips,
+            ef.avg_latency_min
+        FROM events e
+        JOIN event_families ef 
+            ON e.event_key = ef.event_key 
+            AND e.country = ef.country
+        WHERE ef.empirical_score >= {float(min_empirical_score)}
+            AND e.actual IS NOT NULL
+            AND e.previous IS NOT NULL
+            AND e.country IN ('US', 'EU', 'GB', 'JP')
+            {period}
+        ORDER BY e.ts_utc DESC
+        {limit}
+        """).df()
+
+
+def _read_only_worker():
+    # Plusieurs process sur le même fichier DuckDB : lecture seule obligatoire
+    os.environ["FX_DB_READ_ONLY"] = "1"
+
+
+def backtest_families(db_path, groups, threshold_pips=5.0, window_minutes=60):
+    """
+    Backtest d'un lot de familles [(family, pattern, events_df), ...] sur une
+    seule connexion : une prédiction par famille, une requête de fenêtres pour
+    tous les événements du lot.
+    """
+    analyzer = LatencyAnalyzer(str(db_path))
+    results = []
+    with analyzer:
+        predicted = {}
+        for family, pattern, _ in groups:
+            stats = analyzer.calculate_family_latency_stats(pattern, threshold_pips, 5, 730)
+            if stats.get('events_analyzed') and 'initial_reaction' in stats:
+                predicted[family] = stats['initial_reaction']['mean_minutes']
+        
+        kept = [(family, df) for family, _, df in groups if family in predicted]
+        if not kept:
+            return results
+        events = pd.concat([df.assign(family=family) for family, df in kept], ignore_index=True)
+        reactions = measure_actual_market_reactions(
+            analyzer.conn, events['ts_utc'], threshold_pips, window_minutes
+        )
+    
+    for event, reaction in zip(events.itertuples(index=False), reactions.itertuples(index=False)):
+        if reaction.bars_analyzed == 0:
+            continue
+        predicted_latency = predicted[event.family]
+        results.append({
+            'timestamp': event.ts_utc,
+            'event_key': event.event_key,
+            'country': event.country,
+            'family': event.family,
+            'empirical_score': event.empirical_score,
+            'surprise_pct': calculate_surprise(event.actual, event.previous),
+            'predicted_latency': predicted_latency,
+            'actual_latency': reaction.latency_minutes,
+            'error_minutes': abs(predicted_latency - reaction.latency_minutes),
+            'predicted_movement': event.avg_movement_pips,
+            'actual_movement': reaction.peak_pips,
+            'had_reaction': reaction.had_reaction,
+            'row_order': event.row_order
+        })
+    return results
+
+
+def run_backtest_batch(min_empirical_score=60, days_back=None, num_events=None, workers=1,
+                       threshold_pips=5.0, window_minutes=60, db_path=None, output_dir=project_root):
+    """
+    Backtest groupé par famille (voir docstring du module).
+    
+    Args:
+        days_back / num_events: None = tout l'historique disponible
+        workers: nombre de process (familles réparties entre eux)
+    
+    Returns:
+        DataFrame avec résultats (mêmes colonnes que run_backtest)
+    """
+    db_path = db_path or get_db_path()
+    print(f"\n{'='*60}")
+    print("🔍 BACKTESTING PRÉDICTIONS DE LATENCE (batch)")
+    print(f"{'='*60}\n")
+    
+    events_df = _load_backtest_events(db_path, min_empirical_score, days_back, num_events)
+    print(f"✅ {len(events_df)} événements chargés\n")
+    if len(events_df) == 0:
+        print("❌ Aucun événement trouvé avec ces critères")
+        return None
+    
+    events_df['row_order'] = np.arange(len(events_df))
+    detected = events_df['event_key'].map(detect_event_family)
+    events_df['family'] = detected.str[0]
+    events_df['pattern'] = detected.str[1]
+    groups = [(family, df['pattern'].iloc[0], df.drop(columns=['family', 'pattern']))
+              for family, df in events_df.dropna(subset=['family']).groupby('family', sort=True)]
+    print(f"Analyse de {len(groups)} familles ({workers} process)...\n")
+    
+    if workers > 1 and len(groups) > 1:
+        # Répartition des familles par volume décroissant (round-robin)
+        groups.sort(key=lambda g: len(g[2]), reverse=True)
+        lots = [groups[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_read_only_worker) as pool:
+            parts = pool.map(backtest_families, [db_path] * len(lots), lots,
+                             [threshold_pips] * len(lots), [window_minutes] * len(lots))
+            results = [r for part in parts for r in part]
+    else:
+        results = backtest_families(db_path, groups, threshold_pips, window_minutes)
+    
+    results_df = pd.DataFrame(results)
+    if len(results_df) == 0:
+        print("❌ Aucune réaction mesurable détectée")
+        return None
+    # Ordre de chargement (ts_utc décroissant), indépendant de la répartition par process
+    results_df = results_df.sort_values('row_order').drop(columns='row_order').reset_index(drop=True)
+    summarize_results(results_df, output_dir)
     return results_df
 
 
+def run_walk_forward(min_empirical_score=60, days_back=None, num_events=None, min_history=MIN_HISTORY,
+                     threshold_pips=5.0, window_minutes=60, db_path=None, output_dir=project_root):
+    """
+    Évaluation walk-forward (voir docstring du module) : réactions réelles lues
+    en une requête groupée, puis un passage chronologique.
+    
+    Returns:
+        (scores, monthly) : une ligne par événement noté, métriques par famille × mois
+    """
+    db_path = db_path or get_db_path()
+    print(f"\n{'='*60}")
+    print("🔍 WALK-FORWARD PRÉDICTIONS DE LATENCE")
+    print(f"{'='*60}\n")
+    
+    events_df = _load_backtest_events(db_path, min_empirical_score, days_back, num_events)
+    events_df['family'] = events_df['event_key'].map(detect_event_family).str[0]
+    events_df = events_df.dropna(subset=['family']).reset_index(drop=True)
+    print(f"✅ {len(events_df)} événements chargés\n")
+    if len(events_df) == 0:
+        print("❌ Aucun événement trouvé avec ces critères")
+        return None
+    
+    with profiled_connect(str(db_path)) as conn:
+        reactions = measure_actual_market_reactions(
+            conn, events_df['ts_utc'], threshold_pips, window_minutes
+        )
+    scores, monthly = walk_forward(events_df, reactions, min_history)
+    if len(scores) == 0:
+        print(f"❌ Aucune famille avec {min_history} réactions antérieures")
+        return None
+    
+    print(f"Événements notés: {len(scores)} / {len(events_df)} (historique min. {min_history} réactions)\n")
+    print(f"LATENCE: MAE {scores['error_minutes'].mean():.2f} min, "
+          f"RMSE {np.sqrt((scores['error_minutes']**2).mean()):.2f} min")
+    print(f"MOUVEMENT: MAE {scores['error_movement'].mean():.2f} pips\n")
+    
+    print("PAR FAMILLE:")
+    by_family = scores.groupby('family').agg(
+        Count=('error_minutes', 'size'),
+        MAE_latency=('error_minutes', 'mean'),
+        MAE_movement=('error_movement', 'mean'),
+        Taux_reaction=('had_reaction', 'mean'),
+    ).round(2)
+    print(by_family.to_string())
+    print()
+    
+    stamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+    scores.to_csv(Path(output_dir) / f'walk_forward_events_{stamp}.csv', index=False)
+    monthly_file = Path(output_dir) / f'walk_forward_monthly_{stamp}.csv'
+    monthly.to_csv(monthly_file, index=False)
+    print(f"✅ Résultats sauvegardés: {monthly_file}\n")
+    return scores, monthly
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest des prédictions de latence")
+    parser.add_argument("--batch", action="store_true", help="mode groupé par famille (historique complet)")
+    parser.add_argument("--workers", type=int, default=1, help="process en mode batch")
+    parser.add_argument("--min-score", type=float, default=60, help="score empirique minimum")
+    parser.add_argument("--days-back", type=int, default=None, help="batch : limiter la période (jours)")
+    parser.add_argument("--num-events", type=int, default=None, help="batch : limiter le nombre d'événements")
+    parser.add_argument("--walk-forward", action="store_true",
+                        help="prédictions avec l'historique antérieur seulement, erreurs par famille × mois")
+    parser.add_argument("--min-history", type=int, default=MIN_HISTORY,
+                        help="walk-forward : réactions antérieures minimum pour noter une famille")
+    args = parser.parse_args()
+    
     # Lancer backtesting
-    results = run_backtest(num_events=200, min_empirical_score=60)
+    if args.walk_forward:
+        results = run_walk_forward(args.min_score, args.days_back, args.num_events, args.min_history)
+    elif args.batch:
+        results = run_backtest_batch(args.min_score, args.days_back, args.num_events, args.workers)
+    else:
+        results = run_backtest(num_events=200, min_empirical_score=args.min_score)
     
     if results is not None:
         print("✅ Backtesting terminé avec succès!")
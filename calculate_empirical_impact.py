@@ -8,115 +8,171 @@ Métriques calculées:
 2. Fréquence de réaction (%)
 3. Latence moyenne (minutes)
 4. Score composite d'impact
+
+Tout est calculé par un seul pipeline DuckDB (empirical_impact_sql) :
+événements × prix 1m, fonctions fenêtre, GROUP BY event_key/country, puis
+UPDATE de event_families en une instruction (update_empirical_impacts).
 """
 
 import duckdb
 import pandas as pd
-from datetime import datetime, timedelta
-import numpy as np
 
 def get_db_path():
     return "fx_impact_app/data/warehouse.duckdb"
 
+# Fenêtre d'analyse par défaut : 3 ans d'historique (depuis le 1er sept. 2022)
+SINCE = "2022-09-01"
+THRESHOLD_PIPS = 5.0
+WINDOW_MINUTES = 60
+
+EMPIRICAL_COLUMNS = {
+    'empirical_score': 'DOUBLE',
+    'empirical_impact': 'VARCHAR',
+    'avg_movement_pips': 'DOUBLE',
+    'reaction_rate': 'DOUBLE',
+    'avg_latency_min': 'DOUBLE',
+    'analyzed_occurrences': 'INTEGER',
+}
+
+TRADABLE_TARGETS = "SELECT DISTINCT event_key, country FROM event_families WHERE is_tradable = TRUE"
+
+
+def empirical_impact_sql(targets_sql=TRADABLE_TARGETS, threshold_pips=THRESHOLD_PIPS,
+                         window_minutes=WINDOW_MINUTES, since=SINCE):
+    """
+    Pipeline DuckDB unique : une ligne de stats par (event_key, country) de targets_sql.
+
+    - occurrences : events avec actual, depuis `since`
+    - fenêtres [ts, ts + window] jointes aux prix 1m par bucket de la taille de la
+      fenêtre (chaque fenêtre couvre au plus 2 buckets → jointure par hachage sur
+      timestamp // bucket + filtre résiduel, plutôt qu'un range join)
+    - fonctions fenêtre par occurrence : prix de référence = première minute,
+      rang de la minute = latence (minutes depuis l'événement)
+    - par occurrence : mouvement max et premier franchissement du seuil
+      (occurrence analysée si ≥ 2 minutes de prix)
+    - GROUP BY event_key, country, puis score / niveau (calculate_impact_score et
+      classify_impact_level, réécrits en SQL)
+    """
+    w = int(window_minutes) * 60
+    thr = float(threshold_pips)
+    return f"""
+    WITH targets AS ({targets_sql}),
+    ev AS (
+        SELECT row_number() OVER () AS occ, e.event_key, e.country,
+               CAST(floor(epoch(e.ts_utc)) AS BIGINT) AS t0,
+               CASE WHEN e.previous IS NOT NULL AND e.previous <> 0
+                    THEN abs((e.actual - e.previous) / e.previous) * 100 ELSE 0 END AS surprise
+        FROM events e
+        JOIN targets t ON e.event_key = t.event_key AND e.country = t.country
+        WHERE e.actual IS NOT NULL
+          AND e.ts_utc >= '{since}'
+    ),
+    win AS (
+        SELECT occ, t0, unnest(range(t0 // {w}, (t0 + {w}) // {w} + 1)) AS bucket
+        FROM ev
+    ),
+    px AS (
+        SELECT w.occ, p.timestamp, p.close
+        FROM prices_1m p
+        JOIN win w ON p.timestamp // {w} = w.bucket
+        WHERE p.timestamp BETWEEN w.t0 AND w.t0 + {w}
+          AND p.timestamp BETWEEN (SELECT min(t0) FROM ev) AND (SELECT max(t0) + {w} FROM ev)
+    ),
+    moves AS (
+        SELECT occ,
+               row_number() OVER o - 1 AS minute,
+               abs(close - first_value(close) OVER o) * 10000 AS move
+        FROM px
+        WINDOW o AS (PARTITION BY occ ORDER BY timestamp)
+    ),
+    occ_stats AS (
+        SELECT occ,
+               count(*) AS n_prices,
+               max(move) AS max_move,
+               CAST(min(minute) FILTER (WHERE move >= {thr}) AS DOUBLE) AS latency
+        FROM moves
+        GROUP BY occ
+    ),
+    per_key AS (
+        SELECT ev.event_key, ev.country,
+               count(*)                                     AS occurrences,
+               count(o.occ)                                 AS analyzed,
+               avg(o.max_move)                              AS avg_movement,
+               median(o.max_move)                           AS median_movement,
+               max(o.max_move)                              AS max_movement,
+               count(o.latency) / nullif(count(o.occ), 0)   AS reaction_rate,
+               avg(o.latency)                               AS avg_latency,
+               median(o.latency)                            AS median_latency,
+               avg(ev.surprise) FILTER (WHERE o.occ IS NOT NULL) AS avg_surprise
+        FROM ev
+        LEFT JOIN occ_stats o ON o.occ = ev.occ AND o.n_prices >= 2
+        GROUP BY ev.event_key, ev.country
+    ),
+    scored AS (
+        SELECT *,
+               CASE WHEN analyzed < 5 THEN 0 ELSE round(
+                   least(avg_movement, 40)
+                   + reaction_rate * 30
+                   + CASE WHEN avg_latency > 0 THEN greatest(0, 30 - avg_latency) ELSE 0 END, 2)
+               END AS empirical_score
+        FROM per_key
+    )
+    SELECT *,
+           CASE WHEN empirical_score >= 70 THEN 'HIGH'
+                WHEN empirical_score >= 40 THEN 'MEDIUM'
+                ELSE 'LOW' END AS empirical_impact
+    FROM scored
+    """
+
+
+def measure_all_event_impacts(conn, targets_sql=TRADABLE_TARGETS, params=None, **kwargs):
+    """Stats empiriques de tous les (event_key, country) ciblés, en une requête (DataFrame)."""
+    return conn.execute(empirical_impact_sql(targets_sql, **kwargs), params or []).fetchdf()
+
+
 def measure_event_impact(conn, event_key, country, threshold_pips=5.0, window_minutes=60):
     """Mesure l'impact réel d'un event_key spécifique"""
-    
-    # Récupérer toutes les occurrences de cet événement
-    query = f"""
-    SELECT ts_utc, actual, previous
-    FROM events
-    WHERE event_key = ?
-        AND country = ?
-        AND actual IS NOT NULL
-        AND ts_utc >= '2022-09-01'
-    ORDER BY ts_utc DESC
-    """
-    
-    events = conn.execute(query, [event_key, country]).fetchall()
-    
-    if len(events) == 0:
-        return None
-    
-    reactions = []
-    
-    for event_ts, actual, previous in events:
-        # Convertir timestamp
-        if isinstance(event_ts, str):
-            event_dt = pd.to_datetime(event_ts)
-        else:
-            event_dt = event_ts
-        
-        end_dt = event_dt + timedelta(minutes=window_minutes)
-        
-        # Récupérer les prix
-        # Note: timestamp dans prices_1m est en epoch Unix (INT64)
-        event_epoch = int(event_dt.timestamp())
-        end_epoch = int(end_dt.timestamp())
-        
-        try:
-            price_query = f"""
-            SELECT timestamp, close
-            FROM prices_1m
-            WHERE timestamp >= {event_epoch}
-                AND timestamp <= {end_epoch}
-            ORDER BY timestamp ASC
-            """
-            
-            prices = conn.execute(price_query).fetchall()
-            
-            if len(prices) < 2:
-                continue
-            
-            # Prix de référence (première minute)
-            ref_price = prices[0][1]
-            
-            # Calculer le mouvement maximum
-            max_movement = 0
-            latency = None
-            
-            for i, (ts, price) in enumerate(prices):
-                movement_pips = abs(price - ref_price) * 10000
-                
-                if movement_pips > max_movement:
-                    max_movement = movement_pips
-                
-                # Détecter première réaction au-dessus du seuil
-                if latency is None and movement_pips >= threshold_pips:
-                    latency = i  # minutes depuis l'événement
-            
-            # Calculer la surprise
-            surprise = 0
-            if previous is not None and previous != 0:
-                surprise = abs((actual - previous) / previous) * 100
-            
-            reactions.append({
-                'max_movement': max_movement,
-                'latency': latency if latency is not None else window_minutes,
-                'had_reaction': latency is not None,
-                'surprise': surprise
-            })
-            
-        except Exception as e:
-            continue
-    
-    if len(reactions) == 0:
+    df = measure_all_event_impacts(
+        conn, "SELECT CAST(? AS VARCHAR) AS event_key, CAST(? AS VARCHAR) AS country",
+        [event_key, country], threshold_pips=threshold_pips, window_minutes=window_minutes,
+    )
+    if len(df) == 0 or df['analyzed'].iloc[0] == 0:
         return None
-    
-    # Calculer les statistiques
-    df = pd.DataFrame(reactions)
-    
+    row = df.iloc[0]
+    none_if_nan = lambda v: None if pd.isna(v) else float(v)
     return {
-        'occurrences': len(events),
-        'analyzed': len(reactions),
-        'avg_movement': df['max_movement'].mean(),
-        'median_movement': df['max_movement'].median(),
-        'max_movement': df['max_movement'].max(),
-        'reaction_rate': df['had_reaction'].sum() / len(df),
-        'avg_latency': df[df['had_reaction']]['latency'].mean() if df['had_reaction'].sum() > 0 else None,
-        'median_latency': df[df['had_reaction']]['latency'].median() if df['had_reaction'].sum() > 0 else None,
-        'avg_surprise': df['surprise'].mean()
+        'occurrences': int(row['occurrences']),
+        'analyzed': int(row['analyzed']),
+        'avg_movement': float(row['avg_movement']),
+        'median_movement': float(row['median_movement']),
+        'max_movement': float(row['max_movement']),
+        'reaction_rate': float(row['reaction_rate']),
+        'avg_latency': none_if_nan(row['avg_latency']),
+        'median_latency': none_if_nan(row['median_latency']),
+        'avg_surprise': float(row['avg_surprise'])
     }
 
+
+def update_empirical_impacts(conn, min_analyzed=5, **kwargs):
+    """
+    Met à jour les colonnes empiriques de event_families en UNE instruction
+    (UPDATE ... FROM pipeline). Renvoie les (event_key, country) mis à jour.
+    """
+    return conn.execute(f"""
+        UPDATE event_families AS f
+        SET empirical_score = s.empirical_score,
+            empirical_impact = s.empirical_impact,
+            avg_movement_pips = round(s.avg_movement, 2),
+            reaction_rate = round(s.reaction_rate, 3),
+            avg_latency_min = CASE WHEN s.avg_latency <> 0 THEN round(s.avg_latency, 2) END,
+            analyzed_occurrences = s.analyzed
+        FROM ({empirical_impact_sql(**kwargs)}) AS s
+        WHERE f.event_key = s.event_key
+          AND f.country = s.country
+          AND s.analyzed >= {int(min_analyzed)}
+        RETURNING f.event_key, f.country
+    """).fetchall()
+
 def calculate_impact_score(stats):
     """Calcule un score composite d'impact empirique (0-100)"""
     
@@ -150,10 +206,10 @@ def classify_impact_level(score):
     else:
         return 'LOW'
 
-def calculate_all_empirical_impacts():
+def calculate_all_empirical_impacts(db_path=None):
     """Calcule l'impact empirique pour tous les événements"""
     
-    conn = duckdb.connect(get_db_path())
+    conn = duckdb.connect(db_path or get_db_path())
     
     print("="*80)
     print("  CALCUL IMPACT EMPIRIQUE - ANALYSE DES DONNÉES RÉELLES")
@@ -163,128 +219,23 @@ def calculate_all_empirical_impacts():
     # 1. Ajouter les colonnes si elles n'existent pas
     print("📊 Ajout des colonnes empiriques...")
     
-    try:
-        conn.execute("""
-            ALTER TABLE event_families 
-            ADD COLUMN empirical_score DOUBLE
-        """)
-    except:
-        pass  # Colonne existe déjà
-    
-    try:
-        conn.execute("""
-            ALTER TABLE event_families 
-            ADD COLUMN empirical_impact VARCHAR
-        """)
-    except:
-        pass
-    
-    try:
-        conn.execute("""
-            ALTER TABLE event_families 
-            ADD COLUMN avg_movement_pips DOUBLE
-        """)
-    except:
-        pass
-    
-    try:
-        conn.execute("""
-            ALTER TABLE event_families 
-            ADD COLUMN reaction_rate DOUBLE
-        """)
-    except:
-        pass
-    
-    try:
-        conn.execute("""
-            ALTER TABLE event_families 
-            ADD COLUMN avg_latency_min DOUBLE
-        """)
-    except:
-        pass
-    
-    try:
-        conn.execute("""
-            ALTER TABLE event_families 
-            ADD COLUMN analyzed_occurrences INTEGER
-        """)
-    except:
-        pass
+    for column, sql_type in EMPIRICAL_COLUMNS.items():
+        conn.execute(f"ALTER TABLE event_families ADD COLUMN IF NOT EXISTS {column} {sql_type}")
     
     print("✅ Colonnes prêtes")
     print()
     
-    # 2. Récupérer tous les événements à analyser
-    print("📥 Chargement des événements...")
-    
-    events_to_analyze = conn.execute("""
-        SELECT event_key, country, family, impact_level
-        FROM event_families
-        WHERE is_tradable = TRUE
-        ORDER BY family, event_key
-    """).fetchall()
-    
-    print(f"   {len(events_to_analyze)} événements à analyser")
+    # 2. Événements à analyser
+    n_targets = conn.execute(f"SELECT COUNT(*) FROM ({TRADABLE_TARGETS})").fetchone()[0]
+    print(f"📥 {n_targets} événements à analyser")
     print()
     
-    # 3. Analyser chaque événement
+    # 3. Analyse + mise à jour en une seule instruction SQL
     print("🔬 Analyse en cours...")
-    print()
     
-    results = []
-    analyzed = 0
-    skipped = 0
-    
-    for i, (event_key, country, family, theoretical_impact) in enumerate(events_to_analyze, 1):
-        if i % 20 == 0:
-            print(f"   Progression: {i}/{len(events_to_analyze)} ({i/len(events_to_analyze)*100:.1f}%)")
-        
-        # Mesurer l'impact réel
-        stats = measure_event_impact(conn, event_key, country)
-        
-        if stats is None or stats['analyzed'] < 5:
-            skipped += 1
-            continue
-        
-        # Calculer le score
-        score = calculate_impact_score(stats)
-        empirical_level = classify_impact_level(score)
-        
-        # Mettre à jour la base
-        conn.execute("""
-            UPDATE event_families
-            SET 
-                empirical_score = ?,
-                empirical_impact = ?,
-                avg_movement_pips = ?,
-                reaction_rate = ?,
-                avg_latency_min = ?,
-                analyzed_occurrences = ?
-            WHERE event_key = ? AND country = ?
-        """, [
-            score,
-            empirical_level,
-            round(stats['avg_movement'], 2),
-            round(stats['reaction_rate'], 3),
-            round(stats['avg_latency'], 2) if stats['avg_latency'] else None,
-            stats['analyzed'],
-            event_key,
-            country
-        ])
-        
-        results.append({
-            'event_key': event_key,
-            'country': country,
-            'family': family,
-            'theoretical_impact': theoretical_impact,
-            'empirical_impact': empirical_level,
-            'score': score,
-            'avg_movement': stats['avg_movement'],
-            'reaction_rate': stats['reaction_rate'],
-            'avg_latency': stats['avg_latency']
-        })
-        
-        analyzed += 1
+    updated = update_empirical_impacts(conn)
+    analyzed = len(set(updated))
+    skipped = n_targets - analyzed
     
     print(f"\n✅ Analyse terminée:")
     print(f"   Analysés: {analyzed}")
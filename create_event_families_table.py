@@ -10,17 +10,201 @@ Exclut automatiquement:
 - Données hebdomadaires peu volatiles
 """
 
+import re
+
 import duckdb
-import json
-from datetime import datetime
+import numpy as np
+import pandas as pd
 
 def get_db_path():
     return "fx_impact_app/data/warehouse.duckdb"
 
-def create_event_families_table():
+# Exclus automatiquement (sauf exceptions ci-dessous)
+NON_TRADABLE_KEYWORDS = [
+    'auction', 'bill auction', 'bond auction', 'note auction',
+    'btp auction', 'bund auction', 'gilt auction', 'oat auction',
+    'btf auction', 'letras auction', 'jgb auction', 'tips auction',
+    'speech', 'remarks', 'testimony', 'statement', 'minutes',
+    'meeting minutes', 'outlook report', 'bulletin', 'report',
+    'eia', 'api crude', 'baker hughes', 'redbook',
+    'stock investment by foreigners', 'foreign bond investment',
+    'mba', 'mortgage'
+]
+# Exceptions: garder FOMC minutes et certains statements
+NON_TRADABLE_EXCEPTIONS = ['fomc minutes', 'press conference']
+
+# Événements tradables par famille (première famille qui matche, dans l'ordre)
+TRADABLE_EVENTS = {
+    'NFP': {
+        'keywords': ['non farm payrolls', 'nonfarm payrolls private', 'government payrolls', 'manufacturing payrolls'],
+        'impact': 'HIGH',
+        'exclude': ['hmrc payrolls']  # UK moins impactant
+    },
+    'CPI': {
+        'keywords': ['cpi', 'consumer price index'],
+        'impact': 'HIGH',
+        'exclude': ['baden wuerttemberg', 'bavaria', 'brandenburg', 'hesse', 'saxony', 
+                   'north rhine westphalia', 'brc shop price', 'halifax house price',
+                   'house price index', 'producer price index', 'wage price index',
+                   'tokyo', 'gdp price index', 'pce price index', 'globaldairytrade']
+    },
+    'Inflation': {
+        'keywords': ['inflation rate', 'core inflation rate', 'harmonised inflation rate'],
+        'impact': 'HIGH',
+        'exclude': ['inflation expectations', 'michigan inflation']
+    },
+    'GDP': {
+        'keywords': ['gdp growth rate', 'gross domestic product'],
+        'impact': 'HIGH',
+        'exclude': ['atlanta fed gdpnow', 'gdp capital expenditure', 'gdp consumption',
+                   'gdp deflator', 'gdp sales', 'gdp external demand', 'gdp private consumption',
+                   'niesr monthly gdp', 'gdp price index', 'full year gdp']
+    },
+    'PMI': {
+        'keywords': ['manufacturing pmi', 'services pmi', 'composite pmi'],
+        'impact': 'HIGH',
+        'exclude': ['construction pmi', 'ai group', 'chicago pmi']
+    },
+    'Retail_Sales': {
+        'keywords': ['retail sales'],
+        'impact': 'HIGH',
+        'exclude': ['brc retail sales monitor']
+    },
+    'Unemployment': {
+        'keywords': ['unemployment rate'],
+        'impact': 'HIGH',
+        'exclude': ['unemployment change', 'unemployment benefit', 'u 6 unemployment']
+    },
+    'Interest_Rate': {
+        'keywords': ['interest rate decision'],
+        'impact': 'HIGH',
+        'exclude': ['interest rate projection']
+    },
+    'Jobless_Claims': {
+        'keywords': ['initial jobless claims', 'continuing jobless claims'],
+        'impact': 'MEDIUM',
+        'exclude': ['jobless claims 4 week']
+    },
+    'Industrial_Production': {
+        'keywords': ['industrial production'],
+        'impact': 'MEDIUM',
+        'exclude': ['industrial production mom']
+    },
+    'Trade_Balance': {
+        'keywords': ['trade balance'],
+        'impact': 'MEDIUM',
+        'exclude': ['goods trade balance']
+    },
+    'Consumer_Confidence': {
+        'keywords': ['consumer confidence', 'michigan consumer sentiment', 'cb consumer confidence'],
+        'impact': 'MEDIUM',
+        'exclude': ['business confidence', 'anz', 'nab', 'nzier', 'westpac']
+    },
+    'Wages': {
+        'keywords': ['average hourly earnings', 'average earnings'],
+        'impact': 'MEDIUM',
+        'exclude': ['employment cost wages', 'employment wages', 'real earnings', 'average cash earnings']
+    },
+    'FOMC_Minutes': {
+        'keywords': ['fomc minutes'],
+        'impact': 'HIGH',
+        'exclude': []
+    },
+    'Fed_Speech': {
+        'keywords': ['fed chair', 'fed president', 'fed vice chair'],
+        'impact': 'MEDIUM',
+        'exclude': []
+    },
+    'ECB_Decision': {
+        'keywords': ['ecb interest rate decision', 'ecb press conference'],
+        'impact': 'HIGH',
+        'exclude': ['ecb general council', 'ecb non monetary']
+    },
+    'Building_Permits': {
+        'keywords': ['building permits', 'housing starts'],
+        'impact': 'MEDIUM',
+        'exclude': []
+    },
+    'Durable_Goods': {
+        'keywords': ['durable goods orders'],
+        'impact': 'MEDIUM',
+        'exclude': ['durable goods orders ex']
+    },
+    'Factory_Orders': {
+        'keywords': ['factory orders'],
+        'impact': 'LOW',
+        'exclude': ['factory orders ex']
+    }
+}
+
+
+def _compile_terms(terms):
+    """
+    Une seule regex pour tous les mots-clés : lookahead à chaque position, termes
+    du plus long au plus court. À une position donnée, le terme trouvé est le
+    plus long ; les autres termes qui commencent là en sont des préfixes, ajoutés
+    via `prefixes`. On obtient ainsi tous les termes présents (même chevauchants)
+    en une passe par clé.
+    """
+    ordered = sorted(set(terms), key=lambda t: (-len(t), t))
+    index = {t: i for i, t in enumerate(ordered)}
+    regex = re.compile("(?=(" + "|".join(re.escape(t) for t in ordered) + "))")
+    prefixes = {t: [index[u] for u in ordered if t.startswith(u)] for t in ordered}
+    return regex, index, prefixes
+
+
+def _term_matrix(keys, regex, prefixes, n_terms):
+    """Matrice booléenne (clés × termes) : terme contenu dans la clé (en minuscules)."""
+    found = pd.Series(keys, dtype=object).str.lower().str.findall(regex)
+    rows, cols = [], []
+    for i, hits in enumerate(found):
+        for hit in set(hits):
+            cols.extend(prefixes[hit])
+            rows.extend([i] * len(prefixes[hit]))
+    matrix = np.zeros((len(found), n_terms), dtype=bool)
+    matrix[rows, cols] = True
+    return matrix
+
+
+def classify_event_keys(keys, tradable_events=None, non_tradable_keywords=None,
+                        exceptions=None):
+    """
+    Classe toutes les clés en une passe : DataFrame (même index que keys) avec
+    family, impact_level (None si non classée) et excluded (non tradable).
+
+    Même règle que la double boucle historique : exclusion si un mot-clé non
+    tradable est présent (hors exceptions), sinon première famille dont un
+    keyword est présent et aucun exclude.
+    """
+    tradable_events = TRADABLE_EVENTS if tradable_events is None else tradable_events
+    non_tradable_keywords = NON_TRADABLE_KEYWORDS if non_tradable_keywords is None else non_tradable_keywords
+    exceptions = NON_TRADABLE_EXCEPTIONS if exceptions is None else exceptions
+    
+    families = list(tradable_events)
+    terms = list(non_tradable_keywords) + list(exceptions)
+    for config in tradable_events.values():
+        terms += config['keywords'] + config['exclude']
+    regex, index, prefixes = _compile_terms(terms)
+    keys = pd.Series(keys)
+    m = _term_matrix(keys.to_numpy(), regex, prefixes, len(index))
+    
+    def any_of(words):
+        cols = [index[w] for w in words]
+        return m[:, cols].any(axis=1) if cols else np.zeros(len(m), dtype=bool)
+    
+    excluded = any_of(non_tradable_keywords) & ~any_of(exceptions)
+    ok = np.column_stack([any_of(c['keywords']) & ~any_of(c['exclude'])
+                          for c in tradable_events.values()])
+    has_family = ~excluded & ok.any(axis=1)
+    family = np.where(has_family, np.array(families, dtype=object)[ok.argmax(axis=1)], None)
+    impact = np.array([tradable_events[f]['impact'] if f else None for f in family], dtype=object)
+    return pd.DataFrame({'family': family, 'impact_level': impact, 'excluded': excluded},
+                        index=keys.index)
+
+def create_event_families_table(db_path=None):
     """Crée et remplit la table event_families"""
     
-    conn = duckdb.connect(get_db_path())
+    conn = duckdb.connect(db_path or get_db_path())
     
     print("="*80)
     print("  CRÉATION TABLE EVENT_FAMILIES")
@@ -50,190 +234,40 @@ def create_event_families_table():
     print("✅ Table créée")
     print()
     
-    # 2. Définir les événements tradables par famille
-    tradable_events = {
-        'NFP': {
-            'keywords': ['non farm payrolls', 'nonfarm payrolls private', 'government payrolls', 'manufacturing payrolls'],
-            'impact': 'HIGH',
-            'exclude': ['hmrc payrolls']  # UK moins impactant
-        },
-        'CPI': {
-            'keywords': ['cpi', 'consumer price index'],
-            'impact': 'HIGH',
-            'exclude': ['baden wuerttemberg', 'bavaria', 'brandenburg', 'hesse', 'saxony', 
-                       'north rhine westphalia', 'brc shop price', 'halifax house price',
-                       'house price index', 'producer price index', 'wage price index',
-                       'tokyo', 'gdp price index', 'pce price index', 'globaldairytrade']
-        },
-        'Inflation': {
-            'keywords': ['inflation rate', 'core inflation rate', 'harmonised inflation rate'],
-            'impact': 'HIGH',
-            'exclude': ['inflation expectations', 'michigan inflation']
-        },
-        'GDP': {
-            'keywords': ['gdp growth rate', 'gross domestic product'],
-            'impact': 'HIGH',
-            'exclude': ['atlanta fed gdpnow', 'gdp capital expenditure', 'gdp consumption',
-                       'gdp deflator', 'gdp sales', 'gdp external demand', 'gdp private consumption',
-                       'niesr monthly gdp', 'gdp price index', 'full year gdp']
-        },
-        'PMI': {
-            'keywords': ['manufacturing pmi', 'services pmi', 'composite pmi'],
-            'impact': 'HIGH',
-            'exclude': ['construction pmi', 'ai group', 'chicago pmi']
-        },
-        'Retail_Sales': {
-            'keywords': ['retail sales'],
-            'impact': 'HIGH',
-            'exclude': ['brc retail sales monitor']
-        },
-        'Unemployment': {
-            'keywords': ['unemployment rate'],
-            'impact': 'HIGH',
-            'exclude': ['unemployment change', 'unemployment benefit', 'u 6 unemployment']
-        },
-        'Interest_Rate': {
-            'keywords': ['interest rate decision'],
-            'impact': 'HIGH',
-            'exclude': ['interest rate projection']
-        },
-        'Jobless_Claims': {
-            'keywords': ['initial jobless claims', 'continuing jobless claims'],
-            'impact': 'MEDIUM',
-            'exclude': ['jobless claims 4 week']
-        },
-        'Industrial_Production': {
-            'keywords': ['industrial production'],
-            'impact': 'MEDIUM',
-            'exclude': ['industrial production mom']
-        },
-        'Trade_Balance': {
-            'keywords': ['trade balance'],
-            'impact': 'MEDIUM',
-            'exclude': ['goods trade balance']
-        },
-        'Consumer_Confidence': {
-            'keywords': ['consumer confidence', 'michigan consumer sentiment', 'cb consumer confidence'],
-            'impact': 'MEDIUM',
-            'exclude': ['business confidence', 'anz', 'nab', 'nzier', 'westpac']
-        },
-        'Wages': {
-            'keywords': ['average hourly earnings', 'average earnings'],
-            'impact': 'MEDIUM',
-            'exclude': ['employment cost wages', 'employment wages', 'real earnings', 'average cash earnings']
-        },
-        'FOMC_Minutes': {
-            'keywords': ['fomc minutes'],
-            'impact': 'HIGH',
-            'exclude': []
-        },
-        'Fed_Speech': {
-            'keywords': ['fed chair', 'fed president', 'fed vice chair'],
-            'impact': 'MEDIUM',
-            'exclude': []
-        },
-        'ECB_Decision': {
-            'keywords': ['ecb interest rate decision', 'ecb press conference'],
-            'impact': 'HIGH',
-            'exclude': ['ecb general council', 'ecb non monetary']
-        },
-        'Building_Permits': {
-            'keywords': ['building permits', 'housing starts'],
-            'impact': 'MEDIUM',
-            'exclude': []
-        },
-        'Durable_Goods': {
-            'keywords': ['durable goods orders'],
-            'impact': 'MEDIUM',
-            'exclude': ['durable goods orders ex']
-        },
-        'Factory_Orders': {
-            'keywords': ['factory orders'],
-            'impact': 'LOW',
-            'exclude': ['factory orders ex']
-        }
-    }
-    
-    # 3. Récupérer tous les event_key de la base
+    # 2. Récupérer tous les event_key de la base
     print("📥 Récupération des événements...")
     
     all_events = conn.execute("""
         SELECT DISTINCT event_key, country
         FROM events
         WHERE actual IS NOT NULL
-    """).fetchall()
+    """).fetchdf()
     
     print(f"   {len(all_events)} événements uniques avec actual")
     print()
     
-    # 4. Classifier et insérer
+    # 3. Classifier (une passe sur les clés distinctes) et insérer en bloc
     print("🔍 Classification des événements...")
     
-    classified = 0
-    tradable = 0
-    non_tradable = 0
+    labels = classify_event_keys(all_events['event_key'])
+    rows = all_events.join(labels)
+    non_tradable = int(rows['excluded'].sum())
+    rows = rows[rows['family'].notna()]
+    tradable = len(rows)
     
-    for event_key, country in all_events:
-        event_lower = event_key.lower()
-        
-        # Exclure automatiquement les non-tradables
-        non_tradable_keywords = [
-            'auction', 'bill auction', 'bond auction', 'note auction',
-            'btp auction', 'bund auction', 'gilt auction', 'oat auction',
-            'btf auction', 'letras auction', 'jgb auction', 'tips auction',
-            'speech', 'remarks', 'testimony', 'statement', 'minutes',
-            'meeting minutes', 'outlook report', 'bulletin', 'report',
-            'eia', 'api crude', 'baker hughes', 'redbook',
-            'stock investment by foreigners', 'foreign bond investment',
-            'mba', 'mortgage'
-        ]
-        
-        is_excluded = False
-        for keyword in non_tradable_keywords:
-            if keyword in event_lower:
-                # Exceptions: garder FOMC minutes et certains statements
-                if 'fomc minutes' in event_lower:
-                    continue
-                if 'press conference' in event_lower:
-                    continue
-                    
-                is_excluded = True
-                non_tradable += 1
-                break
-        
-        if is_excluded:
-            continue
-        
-        # Classifier dans une famille
-        family_found = None
-        impact = None
-        
-        for family, config in tradable_events.items():
-            # Vérifier les exclusions spécifiques
-            if any(excl in event_lower for excl in config['exclude']):
-                continue
-            
-            # Vérifier les keywords
-            if any(kw in event_lower for kw in config['keywords']):
-                family_found = family
-                impact = config['impact']
-                break
-        
-        if family_found:
-            conn.execute("""
-                INSERT INTO event_families (event_key, family, country, is_tradable, impact_level)
-                VALUES (?, ?, ?, TRUE, ?)
-            """, [event_key, family_found, country, impact])
-            
-            classified += 1
-            tradable += 1
+    conn.register("tmp_event_families", rows)
+    conn.execute("""
+        INSERT INTO event_families (event_key, family, country, is_tradable, impact_level)
+        SELECT event_key, family, country, TRUE, impact_level FROM tmp_event_families
+    """)
+    conn.unregister("tmp_event_families")
     
     print(f"✅ Classification terminée:")
     print(f"   Événements classifiés et tradables: {tradable}")
     print(f"   Événements exclus (auctions, etc.): {non_tradable}")
     print()
     
-    # 5. Statistiques par famille
+    # 4. Statistiques par famille
     print("="*80)
     print("  STATISTIQUES PAR FAMILLE")
     print("="*80)
@@ -259,7 +293,7 @@ def create_event_families_table():
     for family, impact, count, countries in stats:
         print(f"{family:25} [{impact:6}] {count:4} événements | {countries} pays")
     
-    # 6. Compter les occurrences totales
+    # 5. Compter les occurrences totales
     print()
     print("="*80)
     print("  OCCURRENCES TOTALES PAR FAMILLE")
@@ -292,7 +326,7 @@ def create_event_families_table():
     print()
     print(f"TOTAL OCCURRENCES TRADABLES: {total_occ}")
     
-    # 7. Exemples d'événements par famille
+    # 6. Exemples d'événements par famille
     print()
     print("="*80)
     print("  EXEMPLES D'ÉVÉNEMENTS PAR FAMILLE (top 3)")
@@ -314,7 +348,7 @@ def create_event_families_table():
         for event_key, country in examples:
             print(f"  [{country}] {event_key}")
     
-    # 8. Créer un index pour les requêtes rapides
+    # 7. Créer un index pour les requêtes rapides
     print()
     print("📇 Création des index...")
     conn.execute("CREATE INDEX idx_family ON event_families(family)")
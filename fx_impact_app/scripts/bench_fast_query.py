@@ -0,0 +1,115 @@
+# fx_impact_app/scripts/bench_fast_query.py
+"""
+Allocation et temps par événement : lecture référence + fenêtre de prix.
+
+Compare, sur les mêmes événements :
+  - fetchdf : ancien chemin de ForecastEngine (DataFrame, pd.to_datetime,
+    tz_localize, .values / .iloc)
+  - numpy   : chemin fast_query (fetch_scalar + fetch_arrays, epoch int64)
+
+Mesures : pic tracemalloc moyen par événement (octets) et temps moyen (ms).
+
+Usage:
+  python -m fx_impact_app.scripts.bench_fast_query
+  python -m fx_impact_app.scripts.bench_fast_query --db /chemin/warehouse.duckdb --events 200
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from fx_impact_app.src.fast_query import epoch_seconds, epoch_sql, fetch_arrays, fetch_scalar, from_epoch  # noqa: E402
+from fx_impact_app.src.query_profiler import profiled_connect  # noqa: E402
+from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse  # noqa: E402
+
+
+def legacy_window(con, event_ts, horizon: int) -> np.ndarray:
+    """Ancien chemin : fetchdf puis conversions pandas."""
+    event_ts_naive = pd.Timestamp(event_ts).tz_localize(None) if pd.Timestamp(event_ts).tzinfo else pd.Timestamp(event_ts)
+    ref = con.execute(f"""
+        SELECT close as ref_price FROM prices_1m_v
+        WHERE ts_utc < '{event_ts_naive}' ORDER BY ts_utc DESC LIMIT 1
+    """).fetchdf()
+    ref_price = ref['ref_price'].iloc[0]
+    end = event_ts_naive + timedelta(minutes=horizon)
+    df = con.execute(f"""
+        SELECT ts_utc, close, (close - {ref_price}) * 10000 as pips FROM prices_1m_v
+        WHERE ts_utc >= '{event_ts_naive}' AND ts_utc <= '{end}' ORDER BY ts_utc
+    """).fetchdf()
+    df['ts_utc'] = pd.to_datetime(df['ts_utc']).dt.tz_localize(None)
+    offsets = np.array([(df['ts_utc'].iloc[i] - event_ts_naive).total_seconds() / 60 for i in range(len(df))])
+    return offsets + df['pips'].values * 0
+
+
+def numpy_window(con, event_ts, horizon: int) -> np.ndarray:
+    """Chemin fast_query : scalaire + tableaux, temps en epoch secondes."""
+    event_s = epoch_seconds(event_ts)
+    start = from_epoch(event_s)
+    ref_price = fetch_scalar(con, """
+        SELECT close FROM prices_1m_v WHERE ts_utc < ? ORDER BY ts_utc DESC LIMIT 1
+    """, [start])
+    px = fetch_arrays(con, f"""
+        SELECT {epoch_sql('ts_utc')} AS ts, close FROM prices_1m_v
+        WHERE ts_utc >= ? AND ts_utc <= ? ORDER BY ts_utc
+    """, [start, start + timedelta(minutes=horizon)])
+    return (px['ts'] - event_s) / 60.0 + (px['close'] - ref_price) * 0
+
+
+def measure(fn: Callable, con, events: List, horizon: int) -> Dict[str, float]:
+    peaks, times = [], []
+    for ts in events:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        fn(con, ts, horizon)
+        times.append((time.perf_counter() - t0) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"peak_bytes": statistics.mean(peaks), "ms": statistics.median(times)}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Allocation par événement : fetchdf vs fetchnumpy")
+    ap.add_argument("--db", help="warehouse DuckDB (défaut : synthétique temporaire)")
+    ap.add_argument("--events", type=int, default=100)
+    ap.add_argument("--horizon", type=int, default=30)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = args.db or build_synthetic_warehouse(str(Path(tmp) / "bench.duckdb"), years=1, window_min=60)
+        con = profiled_connect(db)
+        try:
+            events = [r[0] for r in con.execute("""
+                SELECT ts_utc FROM events
+                WHERE ts_utc < now() AND ts_utc >= (SELECT MIN(ts_utc) + INTERVAL 1 DAY FROM events)
+                ORDER BY ts_utc LIMIT ?
+            """, [args.events]).fetchall()]
+            for fn in (legacy_window, numpy_window):       # échauffement
+                fn(con, events[0], args.horizon)
+            res = {name: measure(fn, con, events, args.horizon)
+                   for name, fn in (("fetchdf", legacy_window), ("numpy", numpy_window))}
+        finally:
+            con.close()
+
+    for name, r in res.items():
+        print(f"{name:8s} peak={r['peak_bytes'] / 1024:8.1f} Ko  median={r['ms']:6.2f} ms  ({len(events)} événements)")
+    ratio = res["fetchdf"]["peak_bytes"] / max(res["numpy"]["peak_bytes"], 1)
+    print(f"allocation par événement : ÷{ratio:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,254 @@
+# fx_impact_app/scripts/bench_pages.py
+"""
+Benchmark headless des pages Streamlit (streamlit.testing AppTest).
+
+Pour chaque page :
+  - chargement à froid (caches st.cache_data / st.cache_resource vidés)
+  - rerun « caché » (même état, caches chauds)
+  - clic sur les boutons principaux (+ rerun caché après chaque action)
+
+Les temps (wall-clock, ms) sont ajoutés à un CSV pour suivi release par release.
+
+Usage:
+  python -m fx_impact_app.scripts.bench_pages --release v3.1
+  python -m fx_impact_app.scripts.bench_pages --pages 4_Planificateur 2_Backtest --repeat 5
+  python -m fx_impact_app.scripts.bench_pages --db /chemin/warehouse.duckdb   # DB réelle
+
+Par défaut, un warehouse synthétique est généré dans un dossier temporaire
+(cf. fx_impact_app.src.synthetic_warehouse) et exposé via DUCKDB_PATH.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+APP_DIR = ROOT / "fx_impact_app" / "streamlit_app"
+DEFAULT_OUT = ROOT / "bench" / "page_timings.csv"
+
+CSV_FIELDS = ["release", "run_at", "db", "page", "step", "phase", "wall_ms", "n_exceptions"]
+
+Action = Callable[["AppTest"], None]  # noqa: F821  (type AppTest importé à l'exécution)
+
+
+@dataclass
+class Step:
+    """Action utilisateur mesurée. `prepare` (non chronométré) positionne les widgets."""
+    name: str
+    act: Action
+    prepare: Optional[Action] = None
+
+
+@dataclass
+class PageSpec:
+    script: str
+    steps: List[Step] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return Path(self.script).stem
+
+
+# ------------------------------------------------------------
+# Helpers widgets
+# ------------------------------------------------------------
+def _click(label: str) -> Action:
+    def act(at) -> None:
+        for b in at.button:
+            if b.label == label:
+                b.click()
+                return
+        raise LookupError(f"bouton introuvable: {label!r}")
+    return act
+
+
+def _planner_period(at) -> None:
+    """Planificateur : mode Période sur 30 jours pour avoir plusieurs événements."""
+    at.radio(key="date_mode").set_value("Période").run()
+    at.date_input(key="date_to").set_value(date.today() + timedelta(days=30))
+
+
+def _planner_select_two(at) -> None:
+    """Coche les deux premiers événements et force une surprise non nulle."""
+    checks = [c for c in at.checkbox if str(c.key).startswith("check_")][:2]
+    for c in checks:
+        c.check()
+    at.run()
+    for ni in at.number_input:
+        if str(ni.key).startswith("hyp_"):
+            ni.set_value(float(ni.value) + 0.5)
+
+
+PAGES: List[PageSpec] = [
+    PageSpec("Home.py"),
+    PageSpec("pages/0b_Impact-Planner.py", [Step("calculer_scores", _click("🚀 Calculer les Scores"))]),
+    PageSpec("pages/1_Calendrier-Trading.py", [Step("analyser_periode", _click("🔍 Analyser la Période"))]),
+    PageSpec("pages/2_Backtest-Strategie.py", [Step("lancer_backtest", _click("🚀 Lancer le Backtest"))]),
+    PageSpec("pages/3_Analyseur-Surprise.py"),
+    PageSpec("pages/4_Planificateur-Multi-Evenements.py", [
+        Step("charger_evenements", _click("🔍 Charger Événements"), prepare=_planner_period),
+        Step("selection_2_evenements", lambda at: None, prepare=_planner_select_two),
+    ]),
+    PageSpec("pages/5_Analyse-Latence.py", [
+        Step("analyser", _click("Analyser")),
+        Step("predire_latence", _click("Prédire la Latence")),
+    ]),
+    PageSpec("pages/99_API_Status.py"),
+]
+
+
+# ------------------------------------------------------------
+# Mesure
+# ------------------------------------------------------------
+def _timed_run(at, timeout: float) -> float:
+    t0 = time.perf_counter()
+    at.run(timeout=timeout)
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def _clear_streamlit_caches() -> None:
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def bench_page(spec: PageSpec, repeat: int = 3, timeout: float = 120.0) -> List[dict]:
+    """Mesure une page ; renvoie une ligne par (step, phase)."""
+    from streamlit.testing.v1 import AppTest
+
+    rows: List[dict] = []
+
+    def record(step: str, phase: str, ms: float, at) -> None:
+        rows.append({
+            "page": spec.name, "step": step, "phase": phase,
+            "wall_ms": round(ms, 1), "n_exceptions": len(at.exception),
+        })
+
+    def cached(step: str, at) -> None:
+        samples = [_timed_run(at, timeout) for _ in range(max(repeat, 1))]
+        record(step, "cached", statistics.median(samples), at)
+
+    _clear_streamlit_caches()
+    at = AppTest.from_file(str(APP_DIR / spec.script), default_timeout=timeout)
+    record("load", "run", _timed_run(at, timeout), at)
+    cached("load", at)
+
+    for step in spec.steps:
+        try:
+            if step.prepare:
+                step.prepare(at)
+                at.run(timeout=timeout)
+            step.act(at)
+        except Exception as e:  # widget absent (page en erreur, données vides…)
+            print(f"  ⚠ {spec.name}/{step.name}: {e}")
+            rows.append({"page": spec.name, "step": step.name, "phase": "skipped",
+                         "wall_ms": None, "n_exceptions": len(at.exception)})
+            continue
+        record(step.name, "run", _timed_run(at, timeout), at)
+        cached(step.name, at)
+
+    for exc in at.exception:
+        print(f"  ⚠ exception dans {spec.name}: {str(exc.message)[:200]}")
+    return rows
+
+
+def _git_release() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "describe", "--always", "--dirty", "--tags"],
+            cwd=ROOT, capture_output=True, text=True, timeout=10,
+        )
+        return out.stdout.strip() or "dev"
+    except Exception:
+        return "dev"
+
+
+def write_rows(out_csv: Path, rows: List[dict]) -> None:
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not out_csv.exists()
+    with out_csv.open("a", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        if new_file:
+            w.writeheader()
+        w.writerows(rows)
+
+
+def print_table(rows: List[dict]) -> None:
+    print(f"\n{'page':38} {'step':24} {'phase':8} {'ms':>10} {'exc':>4}")
+    print("-" * 88)
+    for r in rows:
+        ms = "-" if r["wall_ms"] is None else f"{r['wall_ms']:.1f}"
+        print(f"{r['page']:38} {r['step']:24} {r['phase']:8} {ms:>10} {r['n_exceptions']:>4}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark headless des pages Streamlit (AppTest).")
+    ap.add_argument("--db", default=None, help="DuckDB à utiliser (défaut: warehouse synthétique temporaire)")
+    ap.add_argument("--serving", action="store_true",
+                    help="Mesure sur la base de service construite depuis le warehouse (cf. serving_db)")
+    ap.add_argument("--years", type=float, default=2.0, help="Historique du warehouse synthétique (années)")
+    ap.add_argument("--pages", nargs="*", default=None, help="Filtre sur le nom de page (préfixe)")
+    ap.add_argument("--repeat", type=int, default=3, help="Reruns cachés par étape (médiane)")
+    ap.add_argument("--timeout", type=float, default=120.0, help="Timeout AppTest par run (s)")
+    ap.add_argument("--release", default=None, help="Libellé de release (défaut: git describe)")
+    ap.add_argument("--out", default=str(DEFAULT_OUT), help="CSV de sortie (ajout)")
+    args = ap.parse_args(argv)
+
+    tmpdir = None
+    db_path = args.db
+    if db_path is None:
+        sys.path.insert(0, str(ROOT))
+        from fx_impact_app.src.synthetic_warehouse import build_synthetic_warehouse
+        tmpdir = tempfile.TemporaryDirectory(prefix="fx_bench_")
+        db_path = build_synthetic_warehouse(str(Path(tmpdir.name) / "warehouse.duckdb"), years=args.years)
+        print(f"📦 Warehouse synthétique: {db_path}")
+    if args.serving:
+        sys.path.insert(0, str(ROOT))
+        from fx_impact_app.src.serving_db import build_serving_db
+        if tmpdir is None:
+            tmpdir = tempfile.TemporaryDirectory(prefix="fx_bench_")
+        serving = Path(tmpdir.name) / "serving.duckdb"
+        build_serving_db(db_path, str(serving))
+        db_path = serving.as_posix()
+        print(f"📦 Base de service: {db_path}")
+    os.environ["DUCKDB_PATH"] = str(Path(db_path).resolve())
+
+    # Les pages font des imports relatifs à la racine / à src
+    os.chdir(ROOT)
+    for p in (ROOT, ROOT / "fx_impact_app" / "src"):
+        if str(p) not in sys.path:
+            sys.path.insert(0, str(p))
+
+    specs = [s for s in PAGES if not args.pages or any(s.name.startswith(f) for f in args.pages)]
+    release = args.release or _git_release()
+    run_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    rows: List[dict] = []
+    for spec in specs:
+        print(f"⏱️  {spec.name}")
+        for r in bench_page(spec, repeat=args.repeat, timeout=args.timeout):
+            r.update({"release": release, "run_at": run_at, "db": ("synthetic" if args.db is None else "custom")
+                      + ("+serving" if args.serving else "")})
+            rows.append(r)
+
+    print_table(rows)
+    write_rows(Path(args.out), rows)
+    print(f"\n✅ {len(rows)} mesures ajoutées à {args.out} (release={release})")
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,15 @@
 # fx_impact_app/scripts/ingest_eodhd_calendar.py
 from __future__ import annotations
-import argparse, os
+import argparse, os, time
 from datetime import date, datetime
 import pandas as pd
 from fx_impact_app.src.config import get_db_path
 from fx_impact_app.src.eodhd_client import (
     fetch_calendar_json as eod_fetch,
     calendar_to_events_df as eod_norm,
-    upsert_events as eod_upsert,
+    upsert_events_df as eod_upsert,
 )
+from fx_impact_app.src.metrics import record_ingest, write_textfile
 
 def d(s: str) -> str:
     return pd.Timestamp(s).date().isoformat()
@@ -25,6 +26,7 @@ def main():
     if not args.api_key:
         raise SystemExit("Missing EODHD_API_KEY (env var or --api-key).")
 
+    t0 = time.perf_counter()
     d1, d2 = d(args.d1), d(args.d2)
     items = eod_fetch(d1, d2, countries=args.countries, importance=args.importance, api_key=args.api_key)
     print(f"Fetched raw items: {len(items)}")
@@ -37,6 +39,8 @@ def main():
 
     db = get_db_path()
     n = eod_upsert(df, db_path=db)
+    record_ingest("eodhd_calendar", n, time.perf_counter() - t0)
+    write_textfile()
     print(f"Upserted rows into events: {n} (DB={db})")
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 # fx_impact_app/scripts/ingest_prices_csv.py
 from __future__ import annotations
 import argparse
+import time
 from pathlib import Path
 from zoneinfo import ZoneInfo
 import pandas as pd
@@ -265,6 +266,51 @@ def upsert_prices(con: duckdb.DuckDBPyConnection, df: pd.DataFrame) -> tuple[int
     """).fetchone()[0]
     return n_before, (n_after - n_before)
 
+def ingest_seconds(df: pd.DataFrame, db_path: str, before_min: int | None,
+                   after_min: int | None, t0: float) -> None:
+    """Ticks → prices_1s (±N minutes autour des événements de la table events)."""
+    from fx_impact_app.src import prices_1s
+    from fx_impact_app.src.metrics import record_ingest, write_textfile
+    before = prices_1s.WINDOW_BEFORE_MIN if before_min is None else before_min
+    after = prices_1s.WINDOW_AFTER_MIN if after_min is None else after_min
+
+    with duckdb.connect(db_path) as con:
+        con.execute("SET TimeZone='UTC'")
+        n_ins = prices_1s.ingest_ticks(con, df, before_min=before, after_min=after)
+        stats = con.execute(f"""
+            SELECT COUNT(*) AS n, COUNT(DISTINCT CAST(ts_utc AS DATE)) AS days, min(ts_utc) AS min_ts, max(ts_utc) AS max_ts
+            FROM {prices_1s.VIEW}
+        """).df().iloc[0].to_dict()
+
+    record_ingest("prices_1s", n_ins, time.perf_counter() - t0)
+    write_textfile()
+
+    print("\n✅ Ingestion 1 s terminée")
+    print(f"DB                : {db_path}")
+    print(f"Lignes lues       : {len(df)}")
+    print(f"Secondes écrites  : {n_ins} (fenêtres -{before} / +{after} min autour des événements)")
+    print(f"{prices_1s.VIEW} (vue) : {stats}")
+
+def ingest_symbol(df: pd.DataFrame, db_path: str, sym, t0: float) -> None:
+    """Barres 1m d'un autre symbole que EUR/USD → prices_1m_<code> (cf. symbols)."""
+    from fx_impact_app.src.symbols import upsert_symbol_prices
+    from fx_impact_app.src.metrics import record_ingest, write_textfile
+
+    with duckdb.connect(db_path) as con:
+        n_ins = upsert_symbol_prices(con, df, sym)
+        stats = con.execute(f"""
+            SELECT COUNT(*) AS n, min(ts_utc) AS min_ts, max(ts_utc) AS max_ts FROM {sym.view}
+        """).df().iloc[0].to_dict()
+
+    record_ingest(f"prices_csv_{sym.code.lower()}", n_ins, time.perf_counter() - t0)
+    write_textfile()
+
+    print(f"\n✅ Ingestion {sym.code} terminée")
+    print(f"DB                : {db_path}")
+    print(f"Lignes lues       : {len(df)}")
+    print(f"Lignes insérées   : {n_ins}")
+    print(f"{sym.view} (vue) : {stats}")
+
 # -----------------------------
 # CLI
 # -----------------------------
@@ -276,10 +322,20 @@ def main():
     ap.add_argument("--assume-tz", type=str, default=None,
                     help="Si datetimes sans TZ, préciser le fuseau (ex: 'Europe/Zurich'); sinon on suppose UTC.")
     ap.add_argument("--db", type=str, default=None, help="Chemin DuckDB (défaut: config.get_db_path())")
+    ap.add_argument("--symbol", type=str, default=None,
+                    help="Symbole (EURUSD, GBPUSD, USDJPY, XAUUSD ; défaut EURUSD → prices_1m)")
+    ap.add_argument("--resolution", choices=["1m", "1s"], default="1m",
+                    help="1s : ticks / barres seconde → prices_1s, seulement autour des événements")
+    ap.add_argument("--before-min", type=int, default=None,
+                    help="1s : minutes conservées avant chaque événement (défaut prices_1s.WINDOW_BEFORE_MIN)")
+    ap.add_argument("--after-min", type=int, default=None,
+                    help="1s : minutes conservées après chaque événement (défaut prices_1s.WINDOW_AFTER_MIN)")
     args = ap.parse_args()
 
     from fx_impact_app.src.config import get_db_path
+    from fx_impact_app.src.metrics import record_ingest, write_textfile
     db_path = args.db or get_db_path()
+    t0 = time.perf_counter()
 
     csv_path = Path(args.csv_path)
     if not csv_path.exists():
@@ -295,6 +351,16 @@ def main():
         print("❌ CSV lu mais aucune ligne exploitable (datetime/prix).")
         return
 
+    if args.resolution == "1s":
+        ingest_seconds(df, db_path, args.before_min, args.after_min, t0)
+        return
+
+    from fx_impact_app.src.symbols import DEFAULT_SYMBOL, get_symbol
+    sym = get_symbol(args.symbol)
+    if sym.code != DEFAULT_SYMBOL:
+        ingest_symbol(df, db_path, sym, t0)
+        return
+
     with duckdb.connect(db_path) as con:
         con.execute("PRAGMA threads=2")
         con.execute("PRAGMA preserve_insertion_order=false")
@@ -306,6 +372,9 @@ def main():
             FROM prices_1m_v
         """).df().iloc[0].to_dict()
 
+    record_ingest("prices_csv", n_ins, time.perf_counter() - t0)
+    write_textfile()
+
     print("\n✅ Ingestion terminée")
     print(f"DB                : {db_path}")
     print(f"Lignes lues       : {len(df)}")
@@ -2,6 +2,7 @@
 from __future__ import annotations
 import argparse
 import os
+import time
 from dataclasses import dataclass
 from typing import Tuple
 
@@ -201,7 +202,8 @@ def _fetch_intraday(win: IntradayWindow, api_key: str) -> pd.DataFrame:
 # -------------------------------
 def main():
     ap = argparse.ArgumentParser(description="Backfill intraday prices around an event using EODHD.")
-    ap.add_argument("--symbol", required=True, help="Ex: EURUSD.FOREX")
+    ap.add_argument("--symbol", required=True,
+                    help="Ex: EURUSD.FOREX (EURUSD → prices_1m, autres symboles → prices_1m_<code>)")
     ap.add_argument("--event-ts", required=True, help='UTC, ex: "2025-10-01 14:15"')
     ap.add_argument("--window-min", type=int, default=180, help="± minutes (défaut 180 = ±3h)")
     ap.add_argument("--db", default=None, help="DuckDB path (défaut: config.get_db_path())")
@@ -209,7 +211,12 @@ def main():
 
     # DB path
     from fx_impact_app.src.config import get_db_path
+    from fx_impact_app.src.metrics import record_ingest, write_textfile
+    from fx_impact_app.src.symbols import (DEFAULT_SYMBOL, ensure_symbol_table, get_symbol,
+                                           upsert_symbol_prices)
     db_path = args.db or get_db_path()
+    sym = get_symbol(args.symbol)
+    t0 = time.perf_counter()
 
     # Fenêtre UTC
     event_utc = pd.to_datetime(args.event_ts, utc=True)
@@ -232,19 +239,27 @@ def main():
         con.execute("PRAGMA threads=2")
         con.execute("PRAGMA preserve_insertion_order=false")
 
-        target = _ensure_storage(con)
-        n_before, n_ins = _upsert_prices(con, df, target)
+        if sym.code == DEFAULT_SYMBOL:
+            target = _ensure_storage(con)
+            n_before, n_ins = _upsert_prices(con, df, target)
+        else:
+            ensure_symbol_table(con, sym)
+            n_before = con.execute(f"SELECT COUNT(*) FROM {sym.table}").fetchone()[0]
+            n_ins = upsert_symbol_prices(con, df, sym)
 
-        vstats = con.execute("""
+        vstats = con.execute(f"""
             SELECT COUNT(*) AS n, min(ts_utc) AS min_ts, max(ts_utc) AS max_ts
-            FROM prices_1m_v
+            FROM {sym.view}
         """).df().iloc[0].to_dict()
 
+    record_ingest("prices_eodhd", n_ins, time.perf_counter() - t0)
+    write_textfile()
+
     print("\n✅ Ingestion terminée")
     print(f"Lignes récupérées : {len(df)}")
     print(f"Lignes avant ins. : {n_before}")
     print(f"Lignes insérées   : {n_ins}")
-    print(f"prices_1m_v (vue) : {vstats}")
+    print(f"{sym.view} (vue) : {vstats}")
 
 
 if __name__ == "__main__":
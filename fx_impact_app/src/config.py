@@ -51,6 +51,15 @@ def get_db_path() -> str:
     root = Path(__file__).resolve().parents[1]  # .../fx_impact_app
     return (root / "data" / "warehouse.duckdb").as_posix()
 
+def db_read_only() -> bool:
+    """
+    Connexions DuckDB en lecture seule (FX_DB_READ_ONLY=1).
+    L'app Streamlit l'active au démarrage (download_database.ensure_database) :
+    elle sert la base de service sans jamais y écrire. Les scripts d'ingestion /
+    pré-calcul restent en lecture-écriture (variable absente).
+    """
+    return os.environ.get("FX_DB_READ_ONLY", "").strip().lower() in ("1", "true", "yes")
+
 def get_eod_key(default: Optional[str] = None) -> Optional[str]:
     """Renvoie la clé EODHD sous forme de chaîne (ou None si absente)."""
     v = os.environ.get("EODHD_API_KEY")
@@ -0,0 +1,184 @@
+# fx_impact_app/src/data_access.py
+"""
+Requêtes récurrentes nommées, à paramètres liés.
+
+Les moteurs et pages construisaient leur SQL en f-string (dates, listes de
+pays, regex, jusqu'au ref_price de ForecastEngine) : un texte différent par
+appel, des guillemets à échapper à la main. Ici chaque requête récurrente est
+un texte SQL fixe à paramètres nommés ($since, $countries...), lié par DuckDB :
+
+  events_by_family   événements d'une ou plusieurs familles (event_family_map),
+                     ts en epoch secondes + colonnes de calendar_range
+  events_by_pattern  idem, repli regex (pattern hors FAMILY_PATTERNS, pas de map)
+  calendar_range     événements d'une période (pays, importance minimale)
+  ref_price          dernier close strictement avant $ts
+  price_at           dernier close à $ts ou avant (prix d'entrée du backtest)
+  price_window       closes de [$start, $end], ts en epoch secondes
+
+Le texte d'une requête ne dépend que de (nom, timeframe, symbole) : il est
+construit une fois (statement, lru_cache) et réutilisé pour tous les événements.
+Hors EUR/USD, seul le timeframe 1m existe (vue du symbole, cf. symbols).
+
+Note : le client Python de DuckDB n'expose pas de handle de requête préparée ;
+PREPARE/EXECUTE côté SQL n'accepte pas de paramètres liés et, mesuré sur une
+fenêtre de prix, n'est pas plus rapide que execute(sql, params) (le plan est
+refait à chaque EXECUTE). On s'en tient donc aux paramètres liés.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    from .family_map import MAP_TABLE, family_for_pattern, map_covers
+    from .fast_query import epoch_sql, fetch_arrays
+    from .symbols import DEFAULT_SYMBOL, get_symbol
+except ImportError:
+    from family_map import MAP_TABLE, family_for_pattern, map_covers
+    from fast_query import epoch_sql, fetch_arrays
+    from symbols import DEFAULT_SYMBOL, get_symbol
+
+# timeframe → vue normalisée (cf. db_init.create_price_views)
+PRICE_VIEWS = {
+    "1m": "prices_1m_v",
+    "5m": "prices_5m_v",
+    "m15": "prices_m15_v",
+    "m30": "prices_m30_v",
+    "1h": "prices_1h_v",
+    "h4": "prices_h4_v",
+}
+
+FAR_FUTURE = datetime(9999, 12, 31)
+
+_EVENT_COLUMNS = "ts_utc, event_key, country, importance_n, actual, forecast, previous"
+
+_EVENTS_WHERE = """
+    WHERE ts_utc >= $since AND ts_utc <= $until
+      AND country IN (SELECT unnest($countries))
+      AND COALESCE(importance_n, 0) >= $min_importance
+"""
+
+_SQL: Dict[str, str] = {
+    "events_by_family": f"""
+        SELECT {{ts}} AS ts, {_EVENT_COLUMNS}
+        FROM events
+        {_EVENTS_WHERE}
+          AND event_key IN (
+              SELECT event_key FROM {MAP_TABLE}
+              WHERE family IN (SELECT unnest($families))
+                AND (full_match OR NOT $full_match)
+          )
+        ORDER BY ts_utc
+    """,
+    "events_by_pattern": f"""
+        SELECT {{ts}} AS ts, {_EVENT_COLUMNS}
+        FROM events
+        {_EVENTS_WHERE}
+          AND CASE WHEN $full_match THEN regexp_full_match(event_key, $pattern)
+                   ELSE regexp_matches(event_key, $pattern) END
+        ORDER BY ts_utc
+    """,
+    "calendar_range": f"""
+        SELECT {_EVENT_COLUMNS}
+        FROM events
+        {_EVENTS_WHERE}
+        ORDER BY ts_utc
+    """,
+    "ref_price": """
+        SELECT close FROM {view}
+        WHERE ts_utc < $ts
+        ORDER BY ts_utc DESC
+        LIMIT 1
+    """,
+    "price_at": """
+        SELECT close FROM {view}
+        WHERE ts_utc <= $ts
+        ORDER BY ts_utc DESC
+        LIMIT 1
+    """,
+    "price_window": """
+        SELECT {ts} AS ts, close
+        FROM {view}
+        WHERE ts_utc >= $start AND ts_utc <= $end
+        ORDER BY ts_utc
+    """,
+}
+
+
+def price_view(timeframe: str = "1m", symbol: Optional[str] = None) -> str:
+    sym = get_symbol(symbol)
+    if sym.code != DEFAULT_SYMBOL:
+        if timeframe != "1m":
+            raise ValueError(f"{sym.code} : seul le timeframe 1m est stocké (demandé: {timeframe!r})")
+        return sym.view
+    try:
+        return PRICE_VIEWS[timeframe]
+    except KeyError:
+        raise ValueError(f"timeframe inconnu: {timeframe!r} (attendu: {', '.join(PRICE_VIEWS)})") from None
+
+
+@lru_cache(maxsize=None)
+def statement(name: str, timeframe: str = "1m", symbol: Optional[str] = None) -> str:
+    """Texte SQL de la requête `name` (construit une fois par (nom, timeframe, symbole))."""
+    if name not in _SQL:
+        raise KeyError(f"requête inconnue: {name!r}")
+    return _SQL[name].format(view=price_view(timeframe, symbol), ts=epoch_sql("ts_utc"))
+
+
+def run(con, name: str, params: Mapping[str, Any], timeframe: str = "1m",
+        symbol: Optional[str] = None):
+    """Exécute la requête nommée ; renvoie le résultat DuckDB (fetchdf/fetchnumpy/fetchone)."""
+    return con.execute(statement(name, timeframe, symbol), dict(params))
+
+
+def _event_params(since, until, countries, min_importance) -> Dict[str, Any]:
+    return {
+        "since": since,
+        "until": FAR_FUTURE if until is None else until,
+        "countries": list(countries),
+        "min_importance": int(min_importance),
+    }
+
+
+def events_for_family(con, patterns: Union[str, Sequence[str]], since, until=None,
+                      countries: Sequence[str] = ("US",), min_importance: int = 0,
+                      full_match: bool = True):
+    """
+    Événements des familles `patterns` (regex de FAMILY_PATTERNS) entre since et
+    until. full_match=True : sémantique `event_key ~ pattern` ; False :
+    recherche. Passe par event_family_map quand elle existe, que tous les
+    patterns sont des familles connues et qu'elle a été classée avec leurs
+    patterns actuels, sinon par la regex (combinée par OR).
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    params = _event_params(since, until, countries, min_importance)
+    params["full_match"] = bool(full_match)
+    families = [family_for_pattern(p) for p in patterns]
+    if families and None not in families and map_covers(con, families):
+        params["families"] = families
+        return run(con, "events_by_family", params)
+    params["pattern"] = (patterns[0] if len(patterns) == 1
+                         else "|".join(p.replace("(?i)", "") for p in patterns))
+    return run(con, "events_by_pattern", params)
+
+
+def calendar_range(con, since, until, countries: Sequence[str], min_importance: int = 0):
+    """Événements de [since, until] pour `countries`, importance >= min_importance."""
+    return run(con, "calendar_range", _event_params(since, until, countries, min_importance))
+
+
+def ref_price(con, ts, timeframe: str = "1m", inclusive: bool = False,
+              symbol: Optional[str] = None) -> Optional[float]:
+    """Dernier close avant ts (strictement, ou à ts inclus si inclusive)."""
+    row = run(con, "price_at" if inclusive else "ref_price", {"ts": ts}, timeframe, symbol).fetchone()
+    return None if row is None else row[0]
+
+
+def price_window(con, start, end, timeframe: str = "1m",
+                 symbol: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """Closes de [start, end] : tableaux {'ts' (epoch secondes), 'close'}."""
+    return fetch_arrays(con, statement("price_window", timeframe, symbol), {"start": start, "end": end})
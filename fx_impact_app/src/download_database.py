@@ -1,49 +1,189 @@
 """
-Script pour télécharger warehouse.duckdb depuis Google Drive
-Utilisé au démarrage de l'app Streamlit Cloud
+Script pour télécharger warehouse.duckdb au démarrage de l'app Streamlit Cloud.
+
+Sources (par ordre de priorité) :
+  DB_SNAPSHOT_URL   manifeste de snapshots (base + deltas Parquet, cf. snapshots)
+                    → seuls les deltas manquants sont téléchargés et appliqués
+  DB_MANIFEST_URL   manifeste JSON {"url", "size", "sha256"} publié avec la base
+                    → téléchargement HTTP reprenable, chunks parallèles, vérifié,
+                      rename atomique (cf. http_download)
+  DB_DOWNLOAD_URL   URL directe (+ DB_SHA256 / DB_SIZE optionnels), même chemin
+  GDRIVE_DB_FILE_ID Google Drive via gdown (ancien comportement, sans reprise),
+                    écrit dans un .part puis renommé atomiquement
+
+Le SHA-256 vérifié est mémorisé dans `warehouse.duckdb.sha256` : au démarrage
+suivant, une base déjà présente n'est re-téléchargée que si le manifeste publie
+une autre version (ou si la taille ne correspond pas : fichier tronqué).
 """
+import argparse
+import json
 import os
-import gdown
+import threading
 from pathlib import Path
+from typing import Optional
 
-def download_database():
-    """
-    Télécharge warehouse.duckdb depuis Google Drive si absent localement
-    """
-    # Chemin vers la base de données
-    db_path = Path(__file__).parent.parent / "data" / "warehouse.duckdb"
-    
-    # Si la base existe déjà, ne pas re-télécharger
-    if db_path.exists():
-        print(f"✅ Base de données déjà présente: {db_path}")
-        return str(db_path)
-    
-    print("📥 Téléchargement de warehouse.duckdb depuis Google Drive...")
-    
-    # Créer le dossier data s'il n'existe pas
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    
+try:
+    from .config import get_db_path
+    from . import http_download
+except ImportError:
+    from config import get_db_path
+    import http_download
+
+
+def _sidecar(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + ".sha256")
+
+
+def _resolve_manifest() -> Optional["http_download.Manifest"]:
+    manifest_url = os.getenv("DB_MANIFEST_URL", "").strip()
+    if manifest_url:
+        return http_download.fetch_manifest(manifest_url)
+    url = os.getenv("DB_DOWNLOAD_URL", "").strip()
+    if url:
+        size = os.getenv("DB_SIZE", "").strip()
+        return http_download.Manifest(url=url, size=int(size) if size.isdigit() else None,
+                                      sha256=os.getenv("DB_SHA256", "").strip().lower() or None)
+    return None
+
+
+def _is_current(db_path: Path, manifest: "http_download.Manifest") -> bool:
+    """La base locale correspond-elle au manifeste ? (taille, puis SHA mémorisé)."""
+    if manifest.size is not None and db_path.stat().st_size != manifest.size:
+        return False
+    if not manifest.sha256:
+        return True
+    sidecar = _sidecar(db_path)
+    if sidecar.exists():
+        return sidecar.read_text(encoding="utf-8").strip() == manifest.sha256
+    # Base présente sans trace de vérification : on hache une fois
+    try:
+        digest = http_download.verify(db_path, manifest.size, manifest.sha256)
+    except http_download.ChecksumError:
+        return False
+    sidecar.write_text(digest, encoding="utf-8")
+    return True
+
+
+def _progress(done: int, total: Optional[int]) -> None:
+    if total:
+        print(f"   {done / (1024*1024):.1f} / {total / (1024*1024):.1f} MB", flush=True)
+
+
+def _download_gdrive(db_path: Path) -> None:
     # URL Google Drive
     # Format: https://drive.google.com/file/d/FILE_ID/view?usp=sharing
     # FILE_ID extrait: 1Kr4t_X-D12rex48s-FfdxR4UhxR7h-g-
     gdrive_file_id = os.getenv("GDRIVE_DB_FILE_ID", "1Kr4t_X-D12rex48s-FfdxR4UhxR7h-g-")
-    
+    import gdown
+
+    part = db_path.with_name(db_path.name + ".part")
+    gdown.download(f"https://drive.google.com/uc?id={gdrive_file_id}", str(part), quiet=False)
+    if not part.exists() or part.stat().st_size == 0:
+        raise IOError("téléchargement Google Drive vide")
+    expected = os.getenv("DB_SHA256", "").strip().lower() or None
+    digest = http_download.verify(part, None, expected)
+    os.replace(part, db_path)
+    _sidecar(db_path).write_text(digest, encoding="utf-8")
+
+
+def _sync_snapshot(manifest_url: str, db_path: Path) -> str:
+    try:
+        from .snapshots import sync_snapshot
+    except ImportError:
+        from snapshots import sync_snapshot
+    try:
+        r = sync_snapshot(manifest_url, db_path)
+    except Exception as e:
+        if db_path.exists():
+            # Publication injoignable (hors ligne) : on garde la base locale
+            print(f"⚠️ Snapshot indisponible ({e}), base locale conservée: {db_path}")
+            return str(db_path)
+        raise
+    print(f"✅ Base à jour (seq {r['seq']}, base téléchargée: {r['base_downloaded']}, "
+          f"deltas: {r['deltas_applied']}, {r['bytes'] / (1024*1024):.1f} MB)")
+    return str(db_path)
+
+
+def download_database(force: bool = False):
+    """
+    Télécharge warehouse.duckdb si absent, tronqué ou obsolète vis-à-vis du manifeste.
+    """
+    # Chemin vers la base de données (DUCKDB_PATH prioritaire, cf. config)
+    db_path = Path(get_db_path())
+
+    snapshot_url = os.getenv("DB_SNAPSHOT_URL", "").strip()
+    if snapshot_url:
+        return _sync_snapshot(snapshot_url, db_path)
+
+    try:
+        manifest = _resolve_manifest()
+    except Exception as e:
+        if db_path.exists() and not force:
+            # Manifeste injoignable (hors ligne) : on garde la base locale
+            print(f"⚠️ Manifeste indisponible ({e}), base locale conservée: {db_path}")
+            return str(db_path)
+        raise
+
+    if db_path.exists() and not force:
+        if manifest is None or _is_current(db_path, manifest):
+            print(f"✅ Base de données déjà présente: {db_path}")
+            return str(db_path)
+        print("♻️ Base locale tronquée ou obsolète : nouveau téléchargement")
+
+    # Créer le dossier data s'il n'existe pas
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
     try:
-        # Télécharger depuis Google Drive
-        gdown.download(
-            f"https://drive.google.com/uc?id={gdrive_file_id}",
-            str(db_path),
-            quiet=False
-        )
+        if manifest is not None:
+            print(f"📥 Téléchargement de {db_path.name} depuis {manifest.url} ...")
+            http_download.download(manifest.url, db_path, size=manifest.size,
+                                   sha256=manifest.sha256, progress=_progress)
+            _sidecar(db_path).write_text(
+                manifest.sha256 or http_download.sha256_file(db_path), encoding="utf-8")
+        else:
+            print("📥 Téléchargement de warehouse.duckdb depuis Google Drive...")
+            _download_gdrive(db_path)
         print(f"✅ Base de données téléchargée: {db_path}")
         print(f"📊 Taille: {db_path.stat().st_size / (1024*1024):.1f} MB")
-        
+
     except Exception as e:
         print(f"❌ Erreur lors du téléchargement: {e}")
         raise
-    
+
     return str(db_path)
 
+_BOOTSTRAP_LOCK = threading.Lock()
+_BOOTSTRAPPED: Optional[str] = None
+
+
+def ensure_database():
+    """
+    Bootstrap de la base une seule fois par process.
+    Les pages l'appellent à chaque rerun : après le premier succès, simple lecture
+    d'une variable (pas de stat disque, pas d'import gdown, pas de print).
+    Place aussi le process de l'app en lecture seule (FX_DB_READ_ONLY, sauf si
+    déjà défini, p. ex. FX_DB_READ_ONLY=0 pour saisir des forecasts en local).
+    """
+    global _BOOTSTRAPPED
+    os.environ.setdefault("FX_DB_READ_ONLY", "1")
+    if _BOOTSTRAPPED is not None:
+        return _BOOTSTRAPPED
+    with _BOOTSTRAP_LOCK:
+        if _BOOTSTRAPPED is None:
+            _BOOTSTRAPPED = download_database()
+    return _BOOTSTRAPPED
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Télécharge / publie warehouse.duckdb")
+    ap.add_argument("--force", action="store_true", help="re-télécharge même si la base est à jour")
+    ap.add_argument("--manifest", metavar="DB", help="affiche le manifeste JSON à publier pour DB")
+    ap.add_argument("--url", help="url à inscrire dans le manifeste (défaut : nom du fichier)")
+    args = ap.parse_args()
+    if args.manifest:
+        print(json.dumps(http_download.build_manifest(args.manifest, args.url), indent=2))
+    else:
+        download_database(force=args.force)
+
+
 if __name__ == "__main__":
-    # Test du script
-    download_database()
+    main()
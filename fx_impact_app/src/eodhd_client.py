@@ -7,6 +7,13 @@ import pandas as pd
 import requests
 import duckdb
 
+try:
+    from .events_summary import refresh_events_summary
+    from .family_map import update_family_map
+except ImportError:
+    from events_summary import refresh_events_summary
+    from family_map import update_family_map
+
 EOD_BASE = "https://eodhd.com/api/economic-events"
 
 
@@ -261,7 +268,9 @@ def upsert_events(con: duckdb.DuckDBPyConnection, df: pd.DataFrame) -> int:
         WHEN NOT MATCHED THEN INSERT ({", ".join(_DB_COLS)})
         VALUES ({", ".join("t."+c for c in _DB_COLS)});
     """)
+    update_family_map(con, "tmp_eodhd_events")
     con.unregister("tmp_eodhd_events")
+    refresh_events_summary(con)
     return len(df)
 
 
@@ -0,0 +1,91 @@
+# fx_impact_app/src/events_summary.py
+"""
+Résumé journalier de la table events (petite table pré-calculée).
+
+La page d'accueil affichait des COUNT(*) sur toute la table events à chaque
+chargement. On maintient à la place `events_daily_summary` (un jour × pays par
+ligne, quelques milliers de lignes), rafraîchie après chaque ingestion
+(eodhd_client.upsert_events, te_client.upsert_events).
+
+« Aujourd'hui » se lit dans le résumé (jour UTC). « Cette semaine » garde la
+sémantique d'origine, événements à venir dans ]maintenant, maintenant + 7 j[ :
+une fenêtre glissante qui ne tombe pas sur des jours entiers, comptée par
+une requête sur l'intervalle de ts_utc (quelques centaines de lignes lues).
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Sequence
+
+SUMMARY_TABLE = "events_daily_summary"
+HOME_COUNTRIES: Sequence[str] = ("US", "EU", "GB")
+
+
+def refresh_events_summary(con) -> int:
+    """(Re)construit events_daily_summary depuis events. Renvoie le nombre de lignes."""
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {SUMMARY_TABLE} AS
+        SELECT
+            CAST(ts_utc AS DATE)  AS day,
+            country,
+            COUNT(*)              AS n_events,
+            COUNT(forecast)       AS n_with_forecast,
+            COUNT(actual)         AS n_with_actual,
+            CURRENT_TIMESTAMP     AS refreshed_at
+        FROM events
+        WHERE ts_utc IS NOT NULL
+        GROUP BY 1, 2
+    """)
+    return int(con.execute(f"SELECT COUNT(*) FROM {SUMMARY_TABLE}").fetchone()[0])
+
+
+def has_summary(con) -> bool:
+    row = con.execute(
+        "SELECT 1 FROM information_schema.tables WHERE lower(table_name) = ? LIMIT 1",
+        [SUMMARY_TABLE],
+    ).fetchone()
+    return row is not None
+
+
+def home_metrics(con, today: Optional[date] = None,
+                 countries: Sequence[str] = HOME_COUNTRIES,
+                 now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Métriques de la page d'accueil : total, with_forecast, week, today.
+    Lit events_daily_summary si présente, sinon agrège events (ancien comportement).
+    now : instant UTC naïf (défaut : maintenant) ; today : jour UTC (défaut : now.date()).
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    today = today or now.date()
+    source = SUMMARY_TABLE if has_summary(con) else None
+
+    if source:
+        sql = f"""
+            SELECT
+                COALESCE(SUM(n_events), 0),
+                COALESCE(SUM(n_with_forecast), 0),
+                COALESCE(SUM(n_events) FILTER (WHERE day = ?), 0)
+            FROM {SUMMARY_TABLE}
+            WHERE list_contains(?, country)
+        """
+    else:
+        sql = """
+            SELECT
+                COUNT(*),
+                COUNT(forecast),
+                COUNT(*) FILTER (WHERE CAST(ts_utc AS DATE) = ?)
+            FROM events
+            WHERE list_contains(?, country)
+        """
+    total, with_fc, today_n = con.execute(sql, [today, list(countries)]).fetchone()
+    week = con.execute("""
+        SELECT COUNT(*) FROM events
+        WHERE ts_utc > ? AND ts_utc < ? AND list_contains(?, country)
+    """, [now, now + timedelta(days=7), list(countries)]).fetchone()[0]
+    return {
+        "total": int(total),
+        "with_forecast": int(with_fc),
+        "week": int(week),
+        "today": int(today_n),
+        "from_summary": bool(source),
+    }
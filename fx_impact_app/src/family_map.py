@@ -0,0 +1,143 @@
+# fx_impact_app/src/family_map.py
+"""
+Table d'appartenance event_key → famille, maintenue à l'ingestion.
+
+Les requêtes filtrées par famille évaluaient une regex par ligne d'events
+(`event_key ~ pattern` dans ForecastEngine, pages 2 et 3, chaînes ILIKE dans
+LatencyAnalyzer, LIKE '%terme%' dans precompute_family_stats). On matérialise
+à la place :
+
+  event_family_map(event_key, country, family, full_match)
+    - une ligne par (clé, pays, famille de FAMILY_PATTERNS) dont la regex
+      trouve une correspondance dans la clé (regexp_matches)
+    - full_match : la regex couvre toute la clé (= sémantique de `~` en DuckDB,
+      celle de ForecastEngine) ; les filtres `~` joignent sur full_match
+    - une ligne family NULL pour les clés sans famille (déjà classées)
+
+Mise à jour incrémentale (update_family_map) : seules les (event_key, country)
+absentes de la table sont classées, à chaque upsert d'events (eodhd_client,
+te_client), application de snapshot, construction du warehouse synthétique ou
+de la base de service. Si FAMILY_PATTERNS change, la table est reconstruite
+(patterns mémorisés dans _event_family_map_patterns).
+
+Les filtres deviennent une semi-jointure par égalité sur cette petite table
+(map_predicate) ; sans table (base ancienne, lecture seule), avec une table
+classée par d'anciens patterns (pas encore reconstruite) ou pour un pattern
+hors FAMILY_PATTERNS, les appelants gardent leur filtre regex.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+try:
+    from .event_families import FAMILY_PATTERNS
+except ImportError:
+    from event_families import FAMILY_PATTERNS
+
+MAP_TABLE = "event_family_map"
+PATTERNS_TABLE = "_event_family_map_patterns"
+
+
+def family_for_pattern(pattern: str, patterns: Mapping[str, str] = FAMILY_PATTERNS) -> Optional[str]:
+    """Nom de la famille dont `pattern` est la regex (None si pattern ad hoc)."""
+    for family, p in patterns.items():
+        if p == pattern:
+            return family
+    return None
+
+
+def _table_exists(con, name: str) -> bool:
+    row = con.execute(
+        "SELECT 1 FROM information_schema.tables WHERE lower(table_name) = ? "
+        "AND table_catalog = current_database() AND table_schema = current_schema() LIMIT 1",
+        [name.lower()],
+    ).fetchone()
+    return row is not None
+
+
+def has_family_map(con) -> bool:
+    return _table_exists(con, MAP_TABLE)
+
+
+def _stored_patterns(con) -> Dict[str, str]:
+    if not _table_exists(con, PATTERNS_TABLE):
+        return {}
+    return dict(con.execute(f"SELECT family, pattern FROM {PATTERNS_TABLE}").fetchall())
+
+
+def map_covers(con, families: Sequence[str],
+               patterns: Mapping[str, str] = FAMILY_PATTERNS) -> bool:
+    """
+    La table existe et a été classée avec les patterns actuels de `families`
+    (base construite avant une modification de FAMILY_PATTERNS → False).
+    """
+    if not has_family_map(con):
+        return False
+    stored = _stored_patterns(con)
+    return all(f in patterns and stored.get(f) == patterns[f] for f in families)
+
+
+def update_family_map(con, source: str = "events",
+                      patterns: Mapping[str, str] = FAMILY_PATTERNS) -> int:
+    """
+    Classe les (event_key, country) de `source` (table ou relation enregistrée
+    avec ces colonnes) absentes de event_family_map. Reconstruit tout si les
+    patterns ont changé. Renvoie le nombre de clés nouvellement classées.
+    """
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MAP_TABLE} (
+            event_key  VARCHAR NOT NULL,
+            country    VARCHAR,
+            family     VARCHAR,
+            full_match BOOLEAN
+        )
+    """)
+    if _stored_patterns(con) != dict(patterns):
+        con.execute(f"DELETE FROM {MAP_TABLE}")
+        con.execute(f"CREATE OR REPLACE TABLE {PATTERNS_TABLE} (family VARCHAR, pattern VARCHAR)")
+        con.executemany(f"INSERT INTO {PATTERNS_TABLE} VALUES (?, ?)", list(patterns.items()))
+        source = "events"
+
+    before = con.execute(f"SELECT COUNT(DISTINCT (event_key, country)) FROM {MAP_TABLE}").fetchone()[0]
+    con.execute(f"""
+        INSERT INTO {MAP_TABLE}
+        WITH new_keys AS (
+            SELECT DISTINCT s.event_key, s.country
+            FROM {source} s
+            WHERE s.event_key IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM {MAP_TABLE} m
+                  WHERE m.event_key = s.event_key
+                    AND m.country IS NOT DISTINCT FROM s.country
+              )
+        )
+        SELECT k.event_key, k.country, f.family,
+               CASE WHEN f.family IS NOT NULL THEN regexp_full_match(k.event_key, f.pattern) END
+        FROM new_keys k
+        LEFT JOIN {PATTERNS_TABLE} f ON regexp_matches(k.event_key, f.pattern)
+    """)
+    after = con.execute(f"SELECT COUNT(DISTINCT (event_key, country)) FROM {MAP_TABLE}").fetchone()[0]
+    return int(after - before)
+
+
+def map_predicate(con, patterns: Union[str, Sequence[str]], full_match: bool = True,
+                  column: str = "event_key") -> Optional[Tuple[str, List[str]]]:
+    """
+    Prédicat SQL (+ paramètres) « column appartient à l'une des familles de
+    `patterns` » par semi-jointure sur event_family_map. full_match=True
+    reproduit `column ~ pattern`, False une recherche (regexp_matches).
+    None si la table est absente, classée avec d'autres patterns que ceux de
+    FAMILY_PATTERNS, ou si un pattern n'est pas une famille connue : l'appelant
+    garde alors son filtre regex.
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    families = [family_for_pattern(p) for p in patterns]
+    if not families or None in families or not map_covers(con, families):
+        return None
+    placeholders = ", ".join("?" for _ in families)
+    exact = " AND full_match" if full_match else ""
+    sql = (f"{column} IN (SELECT event_key FROM {MAP_TABLE} "
+           f"WHERE family IN ({placeholders}){exact})")
+    return sql, list(families)  # type: ignore[arg-type]
+
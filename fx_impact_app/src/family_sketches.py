@@ -0,0 +1,310 @@
+# fx_impact_app/src/family_sketches.py
+"""
+Store de sketches de quantiles (KLL) pour les stats de famille.
+
+Les percentiles de famille (médiane, p20/p80/p90 de MFE, latence, TTR)
+demandaient de rematérialiser toutes les réactions par événement puis
+np.percentile. On persiste à la place, dans `family_sketches` :
+
+  famille × métrique (mfe, latency, ttr, direction) × horizon × pays × mois
+    → n, somme, somme des carrés, sketch KLL (BLOB, cf. quantile_sketch)
+
+  - mise à jour incrémentale (update_sketch_store) : seules les réactions des
+    événements postérieurs au filigrane (_family_sketches_state) sont calculées
+    (family_stats_cube.compute_reactions) et insérées, O(1) amorti par valeur ;
+    un événement n'est pris qu'une fois sa fenêtre la plus longue écoulée
+  - événements sans barres de prix au moment de la mise à jour (ingestion
+    des prix en retard) : gardés dans _family_sketches_pending et recalculés
+    aux mises à jour suivantes, le filigrane ne les fait pas perdre
+  - roll-up (rollup / sketch_stats) : fusion des sketches des pays et mois
+    demandés, sans relire l'historique des prix
+
+Les sketches sont exacts tant qu'une cellule fusionnée compte moins de k
+(200) valeurs, soit le cas courant pour une famille ; au-delà, erreur de rang
+~1.7 %. Moyennes et écart-type viennent des sommes (exacts). La coupure
+hist_years se fait au mois (mois de la date de coupure inclus en entier) :
+sketch_stats est une approximation des stats brutes, utilisée par
+ForecastEngine(use_sketches=True) pour les combinaisons absentes du cube.
+
+Usage (nocturne, après l'ingestion) :
+  python -m fx_impact_app.src.family_sketches --db fx_impact_app/data/warehouse.duckdb [--rebuild]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .event_families import FAMILY_PATTERNS
+    from .family_map import family_for_pattern
+    from .family_stats_cube import CUBE_HORIZONS, DEFAULT_COUNTRIES, compute_reactions
+    from .quantile_sketch import DEFAULT_K, KLLSketch
+    from . import data_access
+except ImportError:
+    from event_families import FAMILY_PATTERNS
+    from family_map import family_for_pattern
+    from family_stats_cube import CUBE_HORIZONS, DEFAULT_COUNTRIES, compute_reactions
+    from quantile_sketch import DEFAULT_K, KLLSketch
+    import data_access
+
+SKETCH_TABLE = "family_sketches"
+STATE_TABLE = "_family_sketches_state"
+PENDING_TABLE = "_family_sketches_pending"
+METRICS: Sequence[str] = ("mfe", "latency", "ttr", "direction")   # colonnes de compute_reactions
+
+_KEY = ("family", "metric", "horizon_min", "country", "period")
+
+
+def has_sketch_store(con) -> bool:
+    row = con.execute(
+        "SELECT 1 FROM information_schema.tables WHERE lower(table_name) = ? "
+        "AND table_catalog = current_database() LIMIT 1",
+        [SKETCH_TABLE],
+    ).fetchone()
+    return row is not None
+
+
+def _ensure_tables(con) -> None:
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SKETCH_TABLE} (
+            family      VARCHAR NOT NULL,
+            metric      VARCHAR NOT NULL,
+            horizon_min INTEGER NOT NULL,
+            country     VARCHAR NOT NULL,
+            period      DATE    NOT NULL,
+            n           BIGINT,
+            total       DOUBLE,
+            total_sq    DOUBLE,
+            sketch      BLOB,
+            PRIMARY KEY (family, metric, horizon_min, country, period)
+        )
+    """)
+    con.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (watermark TIMESTAMP)")
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {PENDING_TABLE} (
+            family  VARCHAR NOT NULL,
+            country VARCHAR,
+            epoch   BIGINT  NOT NULL,
+            period  DATE    NOT NULL
+        )
+    """)
+
+
+def _watermark(con) -> Optional[datetime]:
+    row = con.execute(f"SELECT MAX(watermark) FROM {STATE_TABLE}").fetchone()
+    return None if row is None else row[0]
+
+
+def _new_events(con, families: Mapping[str, str], since: Optional[datetime],
+                until: datetime) -> pd.DataFrame:
+    """(family, country, period, epoch) des événements de ]since, until]."""
+    countries = [r[0] for r in con.execute(
+        "SELECT DISTINCT country FROM events WHERE country IS NOT NULL").fetchall()]
+    start = datetime(1970, 1, 1) if since is None else since + timedelta(seconds=1)
+    frames = []
+    for family, pattern in families.items():
+        df = data_access.events_for_family(con, pattern, since=start, until=until,
+                                           countries=countries).fetchdf()
+        if len(df):
+            frames.append(pd.DataFrame({"family": family, "country": df["country"].to_numpy(),
+                                        "epoch": df["ts"].to_numpy(dtype=np.int64)}))
+    if not frames:
+        return pd.DataFrame(columns=["family", "country", "epoch", "period"])
+    out = pd.concat(frames, ignore_index=True)
+    out["period"] = pd.to_datetime(out["epoch"], unit="s").dt.to_period("M").dt.start_time.dt.date
+    return out
+
+
+def _pending(con) -> pd.DataFrame:
+    """Événements passés sans réaction calculable (pas encore de prix)."""
+    df = con.execute(f"SELECT family, country, epoch, period FROM {PENDING_TABLE}").fetchdf()
+    df["period"] = pd.to_datetime(df["period"]).dt.date
+    return df
+
+
+def _load(con, keys: Iterable[Tuple]) -> Dict[Tuple, Dict[str, object]]:
+    keys = list(keys)
+    if not keys:
+        return {}
+    rel = pd.DataFrame(keys, columns=list(_KEY))
+    con.register("_fx_sketch_keys", rel)
+    try:
+        rows = con.execute(f"""
+            SELECT s.family, s.metric, s.horizon_min, s.country, s.period, s.n, s.total, s.total_sq, s.sketch
+            FROM {SKETCH_TABLE} s
+            JOIN _fx_sketch_keys k USING (family, metric, horizon_min, country, period)
+        """).fetchall()
+    finally:
+        con.unregister("_fx_sketch_keys")
+    return {tuple(r[:5]): {"n": r[5], "total": r[6], "total_sq": r[7],
+                           "sketch": KLLSketch.from_bytes(r[8])} for r in rows}
+
+
+def update_sketch_store(con, families: Mapping[str, str] = FAMILY_PATTERNS,
+                        horizons: Sequence[int] = CUBE_HORIZONS,
+                        now: Optional[datetime] = None, rebuild: bool = False,
+                        k: int = DEFAULT_K) -> int:
+    """
+    Ajoute aux sketches les réactions des événements postérieurs au filigrane
+    (tout l'historique si rebuild) et des événements en attente de prix.
+    Renvoie le nombre d'événements ajoutés.
+    """
+    now = now or datetime.utcnow()
+    if rebuild:
+        con.execute(f"DROP TABLE IF EXISTS {SKETCH_TABLE}")
+        con.execute(f"DROP TABLE IF EXISTS {STATE_TABLE}")
+        con.execute(f"DROP TABLE IF EXISTS {PENDING_TABLE}")
+    _ensure_tables(con)
+    until = now - timedelta(minutes=max(horizons))         # fenêtres complètes seulement
+    events = _new_events(con, families, _watermark(con), until)
+    pending = _pending(con)
+    if len(pending):
+        events = pd.concat([pending, events[pending.columns]], ignore_index=True)
+    unresolved = events.iloc[:0]
+
+    if len(events):
+        uniq, idx = np.unique(events["epoch"].to_numpy(dtype=np.int64), return_inverse=True)
+        reactions = compute_reactions(con, uniq, horizons)
+        # aucune réaction à aucun horizon : prix pas encore là, on réessaiera
+        missing = np.all([np.isnan(reactions[h][:, 0]) for h in horizons], axis=0)
+        unresolved = events[missing[idx]]
+        events = events[~missing[idx]]                      # index d'origine : idx[grp.index]
+        cells: Dict[Tuple, np.ndarray] = {}
+        for (family, country, period), grp in events.groupby(["family", "country", "period"]):
+            members = idx[grp.index.to_numpy()]
+            for h in horizons:
+                r = reactions[h][members]
+                r = r[~np.isnan(r[:, 0])]
+                if len(r):
+                    for j, metric in enumerate(METRICS):
+                        cells[(family, metric, int(h), country, period)] = r[:, j]
+
+        state = _load(con, cells)
+        rows: List[Dict[str, object]] = []
+        for key, values in cells.items():
+            cur = state.get(key) or {"n": 0, "total": 0.0, "total_sq": 0.0, "sketch": KLLSketch(k)}
+            sk: KLLSketch = cur["sketch"]                                  # type: ignore[assignment]
+            sk.update_many(values)
+            rows.append({**dict(zip(_KEY, key)),
+                         "n": int(cur["n"]) + len(values),                # type: ignore[arg-type]
+                         "total": float(cur["total"]) + float(values.sum()),  # type: ignore[arg-type]
+                         "total_sq": float(cur["total_sq"]) + float((values ** 2).sum()),  # type: ignore[arg-type]
+                         "sketch": sk.to_bytes()})
+        if rows:
+            con.register("_fx_sketch_rows", pd.DataFrame(rows))
+            try:
+                con.execute(f"""
+                    INSERT OR REPLACE INTO {SKETCH_TABLE}
+                    SELECT family, metric, CAST(horizon_min AS INTEGER), country, CAST(period AS DATE),
+                           n, total, total_sq, sketch
+                    FROM _fx_sketch_rows
+                """)
+            finally:
+                con.unregister("_fx_sketch_rows")
+
+    con.execute(f"DELETE FROM {PENDING_TABLE}")
+    if len(unresolved):
+        con.register("_fx_sketch_pending", unresolved.reset_index(drop=True))
+        try:
+            con.execute(f"""
+                INSERT INTO {PENDING_TABLE}
+                SELECT family, country, CAST(epoch AS BIGINT), CAST(period AS DATE) FROM _fx_sketch_pending
+            """)
+        finally:
+            con.unregister("_fx_sketch_pending")
+    con.execute(f"DELETE FROM {STATE_TABLE}")
+    con.execute(f"INSERT INTO {STATE_TABLE} VALUES (?)", [until])
+    return int(len(np.unique(events["epoch"]))) if len(events) else 0
+
+
+def rollup(con, family: str, horizon_minutes: int, countries: Optional[Iterable[str]] = None,
+           since: Optional[datetime] = None) -> Dict[str, Dict[str, object]]:
+    """
+    Fusion des cellules (pays × mois depuis le mois de `since`) d'une famille et
+    d'un horizon : {métrique: {n, total, total_sq, sketch}} ({} si aucune cellule).
+    """
+    first = pd.Timestamp(since or datetime(1970, 1, 1)).to_period("M").start_time.date()
+    rows = con.execute(f"""
+        SELECT metric, n, total, total_sq, sketch
+        FROM {SKETCH_TABLE}
+        WHERE family = ? AND horizon_min = ? AND period >= ?
+          AND country IN (SELECT unnest(?))
+    """, [family, int(horizon_minutes), first, sorted(set(countries or DEFAULT_COUNTRIES))]).fetchall()
+    out: Dict[str, Dict[str, object]] = {}
+    for metric, n, total, total_sq, blob in rows:
+        cell = out.setdefault(metric, {"n": 0, "total": 0.0, "total_sq": 0.0, "sketch": None})
+        cell["n"] += n                                                     # type: ignore[operator]
+        cell["total"] += total                                             # type: ignore[operator]
+        cell["total_sq"] += total_sq                                       # type: ignore[operator]
+        sk = KLLSketch.from_bytes(blob)
+        cell["sketch"] = sk if cell["sketch"] is None else cell["sketch"].merge(sk)  # type: ignore[union-attr]
+    return out
+
+
+def sketch_stats(con, pattern: str, horizon_minutes: int, hist_years: int,
+                 countries: Optional[Iterable[str]] = None, timeframe: str = "1m",
+                 now: Optional[datetime] = None) -> Optional[Dict]:
+    """
+    Stats au format de ForecastEngine.calculate_family_stats depuis les
+    sketches ; None si le pattern n'est pas une famille connue, si l'horizon
+    n'est pas stocké ou hors timeframe 1m.
+    """
+    family = family_for_pattern(pattern)
+    if family is None or timeframe != "1m":
+        return None
+    if con.execute(f"SELECT 1 FROM {SKETCH_TABLE} WHERE horizon_min = ? LIMIT 1",
+                   [int(horizon_minutes)]).fetchone() is None:
+        return None
+    since = (now or datetime.utcnow()) - timedelta(days=hist_years * 365)
+    cells = rollup(con, family, horizon_minutes, countries, since)
+    n = int(cells["mfe"]["n"]) if "mfe" in cells else 0                   # type: ignore[call-overload]
+    base = {"family": pattern, "horizon_min": horizon_minutes, "n_events": n}
+    ctx = {"timeframe": timeframe,
+           "countries": list(countries) if countries is not None else list(DEFAULT_COUNTRIES),
+           "hist_years": hist_years}
+    if n == 0:
+        return {**base, **ctx}
+
+    def mean(metric: str) -> float:
+        return float(cells[metric]["total"]) / n                          # type: ignore[arg-type]
+
+    def pct(metric: str, p: float) -> float:
+        return float(cells[metric]["sketch"].percentile(p))              # type: ignore[union-attr]
+
+    n_up = (n + float(cells["direction"]["total"])) / 2                   # direction ∈ {-1, +1}
+    mfe_var = max(float(cells["mfe"]["total_sq"]) / n - mean("mfe") ** 2, 0.0)  # type: ignore[arg-type]
+    return {
+        **base,
+        "p_up": n_up / n,
+        "p_down": (n - n_up) / n,
+        "mfe_median": pct("mfe", 50), "mfe_p80": pct("mfe", 80), "mfe_p90": pct("mfe", 90),
+        "mfe_mean": mean("mfe"), "mfe_std": float(np.sqrt(mfe_var)),
+        "latency_median": pct("latency", 50), "latency_p20": pct("latency", 20),
+        "latency_p80": pct("latency", 80), "latency_mean": mean("latency"),
+        "ttr_median": pct("ttr", 50), "ttr_p20": pct("ttr", 20),
+        "ttr_p80": pct("ttr", 80), "ttr_mean": mean("ttr"),
+        **ctx,
+    }
+
+
+def main() -> None:
+    import duckdb
+
+    ap = argparse.ArgumentParser(description="Met à jour les sketches de quantiles par famille (job nocturne)")
+    ap.add_argument("--db", required=True, help="base DuckDB (warehouse) à enrichir")
+    ap.add_argument("--rebuild", action="store_true", help="repartir de zéro (tout l'historique)")
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    with duckdb.connect(args.db) as con:
+        n = update_sketch_store(con, rebuild=args.rebuild)
+        cells = con.execute(f"SELECT COUNT(*) FROM {SKETCH_TABLE}").fetchone()[0]
+    print(f"✅ {SKETCH_TABLE} : {n:,} événements ajoutés, {cells:,} cellules en {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+# fx_impact_app/src/family_stats_cube.py
+"""
+Cube pré-calculé des stats de famille (ForecastEngine.calculate_family_stats).
+
+Calendrier, Impact Planner, Backtest et Planificateur appellent
+calculate_family_stats avec la combinaison (horizon, hist_years, pays) choisie
+par les sliders ; chaque mouvement relançait le calcul événement par événement.
+Un job nocturne matérialise à la place la table `family_stats_cube` :
+
+  familles (FAMILY_PATTERNS) × horizons {15, 30, 60, 120}
+                             × hist_years {1..5} × ensembles de pays
+
+et par symbole (cf. symbols) : une ligne par combinaison, clé (symbol, pattern,
+horizon_min, hist_years, countries, timeframe), mêmes colonnes que le dict renvoyé par le moteur. Toute combinaison
+du cube devient une lecture par clé ; les autres (autre horizon, autre
+ensemble de pays...) retombent sur le calcul brut.
+
+Construction : la réaction d'un événement (MFE, latence, TTR, direction) ne
+dépend que de son horodatage et de l'horizon. On lit donc une seule fois
+  - le prix de référence de chaque horodatage distinct (ASOF JOIN),
+  - la fenêtre de prix la plus longue (120 min) de chaque horodatage (window_fetch),
+puis chaque horizon est un préfixe de cette fenêtre. Les agrégats par famille /
+historique / pays ne sont que des masques sur ces réactions.
+
+Multi-symboles : la passe sur les événements (et la liste des horodatages
+distincts) est faite une fois et partagée ; seules les réactions dépendent du
+symbole (table de prix, facteur de pip). build_cube_parallel les calcule dans
+un process par symbole (connexions en lecture seule), puis écrit le cube.
+
+Sémantique identique au moteur : même filtre `event_key ~ pattern` (ou
+event_family_map, cf. family_map), même
+coupure `ts_utc >= 'AAAA-MM-JJ'` (now - hist_years × 365 j, à la date du build),
+pays absents → ['US'], mêmes seuils de latence (5 pips) et de TTR (retour sous
+50 % du pic, de signe opposé), mêmes percentiles NumPy.
+
+Usage (nocturne, après l'ingestion ; par défaut tous les symboles présents) :
+  python -m fx_impact_app.src.family_stats_cube --db fx_impact_app/data/warehouse.duckdb
+  python -m fx_impact_app.src.family_stats_cube --db ... --symbols EURUSD USDJPY --workers 2
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .event_families import FAMILY_PATTERNS
+    from .family_map import map_predicate
+    from .symbols import DEFAULT_SYMBOL, available_symbols, get_symbol
+    from .window_fetch import fetch_windows, to_epoch_seconds
+except ImportError:
+    from event_families import FAMILY_PATTERNS
+    from family_map import map_predicate
+    from symbols import DEFAULT_SYMBOL, available_symbols, get_symbol
+    from window_fetch import fetch_windows, to_epoch_seconds
+
+CUBE_TABLE = "family_stats_cube"
+CUBE_HORIZONS: Sequence[int] = (15, 30, 60, 120)
+CUBE_HIST_YEARS: Sequence[int] = (1, 2, 3, 4, 5)
+CUBE_COUNTRY_SETS: Sequence[Tuple[str, ...]] = (
+    ("US",), ("EU",), ("GB",), ("JP",), ("CH",),
+    ("EU", "US"),
+    ("CH", "EU", "GB", "JP", "US"),
+)
+DEFAULT_COUNTRIES: Sequence[str] = ("US",)     # countries=None dans ForecastEngine
+
+LATENCY_PIPS = 5.0
+REVERSAL_RATIO = 0.5
+
+STAT_COLUMNS: Sequence[str] = (
+    "n_events", "p_up", "p_down",
+    "mfe_median", "mfe_p80", "mfe_p90", "mfe_mean", "mfe_std",
+    "latency_median", "latency_p20", "latency_p80", "latency_mean",
+    "ttr_median", "ttr_p20", "ttr_p80", "ttr_mean",
+)
+
+
+def countries_key(countries: Optional[Iterable[str]]) -> str:
+    """Clé canonique d'un ensemble de pays (ordre et doublons indifférents)."""
+    return ",".join(sorted(set(countries or DEFAULT_COUNTRIES)))
+
+
+def event_reaction(offsets_min: np.ndarray, pips: np.ndarray,
+                   horizon_minutes: float) -> Optional[Tuple[float, float, float, int]]:
+    """
+    (mfe, latence, ttr, direction) d'une fenêtre [ts, ts + horizon], comme
+    ForecastEngine._calculate_single_event_stats. None si moins de 3 barres.
+    """
+    if len(pips) < 3:
+        return None
+    a = np.abs(pips)
+    mfe = float(a.max())
+    direction = 1 if int((pips > 0).sum()) > int((pips < 0).sum()) else -1
+
+    hit = np.flatnonzero(a >= LATENCY_PIPS)
+    latency = float(offsets_min[hit[0]]) if len(hit) else 0.0
+    if latency == 0:
+        latency = float(horizon_minutes)
+
+    peak = int(np.argmax(a))
+    tail = pips[peak + 1:]
+    back = np.flatnonzero((np.abs(tail) < a[peak] * REVERSAL_RATIO)
+                          & (np.sign(tail) != np.sign(pips[peak])))
+    ttr = float(offsets_min[peak + 1 + back[0]]) if len(back) else float(horizon_minutes)
+    return mfe, latency, ttr, direction
+
+
+def summarize(reactions: np.ndarray) -> Dict[str, float]:
+    """Agrégats d'un tableau (n, 4) de réactions [mfe, latence, ttr, direction]."""
+    mfe, lat, ttr, direction = reactions.T
+    return {
+        "n_events": int(len(reactions)),
+        "p_up": float(np.mean(direction > 0)),
+        "p_down": float(np.mean(direction < 0)),
+        "mfe_median": float(np.median(mfe)),
+        "mfe_p80": float(np.percentile(mfe, 80)),
+        "mfe_p90": float(np.percentile(mfe, 90)),
+        "mfe_mean": float(np.mean(mfe)),
+        "mfe_std": float(np.std(mfe)),
+        "latency_median": float(np.median(lat)),
+        "latency_p20": float(np.percentile(lat, 20)),
+        "latency_p80": float(np.percentile(lat, 80)),
+        "latency_mean": float(np.mean(lat)),
+        "ttr_median": float(np.median(ttr)),
+        "ttr_p20": float(np.percentile(ttr, 20)),
+        "ttr_p80": float(np.percentile(ttr, 80)),
+        "ttr_mean": float(np.mean(ttr)),
+    }
+
+
+def _cutoffs(now: datetime, hist_years: Sequence[int]) -> Dict[int, str]:
+    return {y: (now - timedelta(days=y * 365)).strftime("%Y-%m-%d") for y in hist_years}
+
+
+def _family_events(con, families: Mapping[str, str], cutoffs: Dict[int, str]) -> pd.DataFrame:
+    """Événements de chaque famille depuis la plus ancienne coupure (une ligne par match)."""
+    oldest = min(cutoffs.values())
+    flags = ", ".join(f"ts_utc >= '{c}' AS in_{y}" for y, c in cutoffs.items())
+    frames = []
+    for family, pattern in families.items():
+        family_filter, params = map_predicate(con, pattern) or ("event_key ~ ?", [pattern])
+        df = con.execute(f"""
+            SELECT ts_utc, country, {flags}
+            FROM events
+            WHERE ts_utc >= '{oldest}'
+              AND {family_filter}
+        """, params).fetchdf()
+        if len(df):
+            df["pattern"] = pattern
+            frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["ts_utc", "country", *(f"in_{y}" for y in cutoffs),
+                                     "pattern", "epoch"])
+    out = pd.concat(frames, ignore_index=True)
+    out["epoch"] = to_epoch_seconds(out["ts_utc"])
+    return out
+
+
+def _ref_prices(con, epochs: np.ndarray, table: str = "prices_1m") -> np.ndarray:
+    """Dernier close strictement avant chaque horodatage (NaN si aucun)."""
+    rel = pd.DataFrame({"i": np.arange(len(epochs), dtype=np.int64), "ts": epochs})
+    con.register("_fx_cube_events", rel)
+    try:
+        data = con.execute(f"""
+            SELECT e.i, p.close
+            FROM _fx_cube_events e
+            ASOF JOIN {table} p ON e.ts > p.timestamp
+        """).fetchnumpy()
+    finally:
+        con.unregister("_fx_cube_events")
+    ref = np.full(len(epochs), np.nan)
+    ref[np.asarray(data["i"], dtype=np.int64)] = np.asarray(data["close"], dtype=float)
+    return ref
+
+
+def compute_reactions(con, epochs: np.ndarray, horizons: Sequence[int],
+                      symbol: Optional[str] = None) -> Dict[int, np.ndarray]:
+    """
+    Réactions par horizon pour des horodatages distincts (epoch s) :
+    {horizon: tableau (n, 4)}, ligne NaN quand le moteur renverrait None.
+    Pips à l'échelle du symbole (EUR/USD par défaut).
+    """
+    sym = get_symbol(symbol)
+    n = len(epochs)
+    out = {h: np.full((n, 4), np.nan) for h in horizons}
+    if n == 0:
+        return out
+    ref = _ref_prices(con, epochs, sym.table)
+    batch = fetch_windows(con, epochs, epochs + max(horizons) * 60, table=sym.table)
+    for i in range(n):
+        if np.isnan(ref[i]):
+            continue
+        ts = batch.column(i, "timestamp")
+        offsets = (ts - epochs[i]) / 60.0
+        pips = sym.to_pips(batch.column(i, "close").astype(float) - ref[i])
+        for h in horizons:
+            k = int(np.searchsorted(ts, epochs[i] + h * 60, side="right"))
+            r = event_reaction(offsets[:k], pips[:k], h)
+            if r is not None:
+                out[h][i] = r
+    return out
+
+
+def _events_pass(con, families: Mapping[str, str], cutoffs: Dict[int, str]):
+    """Événements des familles + horodatages distincts (communs à tous les symboles)."""
+    events = _family_events(con, families, cutoffs)
+    uniq, idx = np.unique(events["epoch"].to_numpy(dtype=np.int64), return_inverse=True)
+    return events, uniq, idx
+
+
+def _cube_rows(families: Mapping[str, str], events: pd.DataFrame, idx: np.ndarray,
+               reactions: Mapping[str, Dict[int, np.ndarray]], horizons: Sequence[int],
+               hist_years: Sequence[int], country_sets: Sequence[Sequence[str]],
+               now: datetime) -> pd.DataFrame:
+    name_of = {p: f for f, p in families.items()}
+    rows: List[Dict[str, object]] = []
+    for pattern in families.values():
+        fam = (events["pattern"] == pattern).to_numpy()
+        for cset in country_sets:
+            in_set = fam & events["country"].isin(list(cset)).to_numpy()
+            for y in hist_years:
+                members = idx[in_set & events[f"in_{y}"].to_numpy(dtype=bool)]
+                for symbol, by_horizon in reactions.items():
+                    for h in horizons:
+                        r = by_horizon[h][members]
+                        r = r[~np.isnan(r[:, 0])]
+                        stats = summarize(r) if len(r) else dict.fromkeys(STAT_COLUMNS, 0.0)
+                        stats["n_events"] = int(len(r))
+                        rows.append({"symbol": symbol, "family": name_of[pattern], "pattern": pattern,
+                                     "horizon_min": int(h), "hist_years": int(y),
+                                     "countries": countries_key(cset), "timeframe": "1m",
+                                     **stats, "built_at": now})
+
+    return pd.DataFrame(rows, columns=["symbol", "family", "pattern", "horizon_min", "hist_years",
+                                       "countries", "timeframe", *STAT_COLUMNS, "built_at"])
+
+
+def _write_cube(con, df: pd.DataFrame) -> int:
+    con.register("_fx_cube_rows", df)
+    try:
+        con.execute(f"""
+            CREATE OR REPLACE TABLE {CUBE_TABLE} AS
+            SELECT * EXCLUDE (n_events, horizon_min, hist_years, built_at),
+                   CAST(n_events AS INTEGER)    AS n_events,
+                   CAST(horizon_min AS INTEGER) AS horizon_min,
+                   CAST(hist_years AS INTEGER)  AS hist_years,
+                   CAST(built_at AS TIMESTAMP)  AS built_at
+            FROM _fx_cube_rows
+            ORDER BY symbol, pattern, countries, hist_years, horizon_min
+        """)
+    finally:
+        con.unregister("_fx_cube_rows")
+    return len(df)
+
+
+def build_cube(con, families: Mapping[str, str] = FAMILY_PATTERNS,
+               horizons: Sequence[int] = CUBE_HORIZONS,
+               hist_years: Sequence[int] = CUBE_HIST_YEARS,
+               country_sets: Sequence[Sequence[str]] = CUBE_COUNTRY_SETS,
+               now: Optional[datetime] = None,
+               symbols: Sequence[str] = (DEFAULT_SYMBOL,)) -> int:
+    """(Re)construit family_stats_cube sur `con` (lecture-écriture). Renvoie le nombre de lignes."""
+    now = now or datetime.utcnow()
+    events, uniq, idx = _events_pass(con, families, _cutoffs(now, hist_years))
+    reactions = {get_symbol(s).code: compute_reactions(con, uniq, horizons, s) for s in symbols}
+    return _write_cube(con, _cube_rows(families, events, idx, reactions, horizons,
+                                       hist_years, country_sets, now))
+
+
+def _symbol_reactions(db_path: str, symbol: str, epochs: np.ndarray,
+                      horizons: Sequence[int]) -> Dict[int, np.ndarray]:
+    import duckdb
+
+    # Plusieurs process sur le même fichier DuckDB : lecture seule obligatoire
+    with duckdb.connect(db_path, read_only=True) as con:
+        return compute_reactions(con, epochs, horizons, symbol)
+
+
+def build_cube_parallel(db_path: str, symbols: Optional[Sequence[str]] = None,
+                        workers: Optional[int] = None,
+                        families: Mapping[str, str] = FAMILY_PATTERNS,
+                        horizons: Sequence[int] = CUBE_HORIZONS,
+                        hist_years: Sequence[int] = CUBE_HIST_YEARS,
+                        country_sets: Sequence[Sequence[str]] = CUBE_COUNTRY_SETS,
+                        now: Optional[datetime] = None) -> int:
+    """
+    Comme build_cube, à partir d'un fichier : une passe sur les événements, puis
+    les réactions de chaque symbole dans un process (symbols=None : tous ceux
+    dont la table de prix existe), puis écriture du cube.
+    """
+    import duckdb
+
+    now = now or datetime.utcnow()
+    with duckdb.connect(db_path, read_only=True) as con:
+        codes = [get_symbol(s).code for s in symbols] if symbols else available_symbols(con)
+        events, uniq, idx = _events_pass(con, families, _cutoffs(now, hist_years))
+
+    n = len(codes)
+    workers = max(1, min(workers or os.cpu_count() or 1, n))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_symbol_reactions, [db_path] * n, codes, [uniq] * n,
+                                  [tuple(horizons)] * n))
+    else:
+        parts = [_symbol_reactions(db_path, c, uniq, horizons) for c in codes]
+
+    df = _cube_rows(families, events, idx, dict(zip(codes, parts)), horizons,
+                    hist_years, country_sets, now)
+    with duckdb.connect(db_path) as con:
+        return _write_cube(con, df)
+
+
+def has_cube(con) -> bool:
+    # Un cube d'avant la colonne symbol est ignoré (calcul brut) jusqu'au prochain build
+    row = con.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_catalog = current_database() AND table_schema = current_schema()
+          AND lower(table_name) = ? AND column_name = 'symbol'
+        LIMIT 1
+    """, [CUBE_TABLE]).fetchone()
+    return row is not None
+
+
+def _exact_int(value) -> Optional[int]:
+    """Entier exact (3, 3.0, np.int64(3)) → int ; sinon None (2.5, '3', NaN)."""
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return int(value)
+    return None
+
+
+def lookup(con, pattern: str, horizon_minutes: int, hist_years: int,
+           countries: Optional[Iterable[str]] = None, timeframe: str = "1m",
+           symbol: Optional[str] = None) -> Optional[Dict]:
+    """
+    Stats de la combinaison au format de ForecastEngine.calculate_family_stats,
+    None si elle n'est pas dans le cube (→ calcul brut) : horizon / historique
+    non entiers (hist_years=2.5) ou liste de pays vide ne sont jamais arrondis
+    vers une ligne voisine.
+    """
+    horizon, years = _exact_int(horizon_minutes), _exact_int(hist_years)
+    if horizon is None or years is None:
+        return None
+    if countries is not None:
+        countries = list(countries)
+        if not countries:
+            return None
+    row = con.execute(f"""
+        SELECT {", ".join(STAT_COLUMNS)}
+        FROM {CUBE_TABLE}
+        WHERE symbol = ? AND pattern = ? AND horizon_min = ? AND hist_years = ?
+          AND countries = ? AND timeframe = ?
+        LIMIT 1
+    """, [get_symbol(symbol).code, pattern, horizon, years,
+          countries_key(countries), timeframe]).fetchone()
+    if row is None:
+        return None
+    stats = dict(zip(STAT_COLUMNS, row))
+    stats["n_events"] = int(stats["n_events"])
+    return {
+        "family": pattern,
+        "horizon_min": horizon_minutes,
+        **stats,
+        "timeframe": timeframe,
+        "countries": countries if countries is not None else list(DEFAULT_COUNTRIES),
+        "hist_years": hist_years,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Construit le cube des stats de famille (job nocturne)")
+    ap.add_argument("--db", required=True, help="base DuckDB (warehouse) à enrichir")
+    ap.add_argument("--symbols", nargs="*", default=None,
+                    help="symboles (défaut : tous ceux dont la table de prix existe)")
+    ap.add_argument("--workers", type=int, default=None, help="process (défaut : un par symbole, ≤ cœurs)")
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    n = build_cube_parallel(args.db, args.symbols, args.workers)
+    print(f"✅ {CUBE_TABLE} : {n:,} combinaisons en {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
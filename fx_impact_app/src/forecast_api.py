@@ -0,0 +1,424 @@
+# fx_impact_app/src/forecast_api.py
+"""
+API HTTP locale (bibliothèque standard) pour les bots d'exécution : stats de
+famille, scores, latences et plans multi-événements en JSON, sans passer par
+les pages Streamlit.
+
+  GET  /health
+  GET  /family_stats?family=NFP&horizon=30&hist_years=3&countries=US,EU&timeframe=1m&symbol=EURUSD
+  GET  /score?family=NFP&importance=3            (mêmes paramètres que /family_stats)
+  GET  /latency?event_key=cpi_yoy&surprise=0.3&threshold=5&symbol=EURUSD
+  POST /plan  {"events": [{"ts_utc": "2024-03-08T13:30:00Z", "family": "NFP",
+                           "country": "US", "surprise": 50}, ...],
+               "years_back": 3, "deltas": [-1, 0, 1], "symbol": "EURUSD"}
+  GET  /metrics                                   (exposition Prometheus)
+
+`family` : nom de FAMILY_PATTERNS (casse indifférente) ou regex brute.
+
+Données : une seule base ouverte en lecture seule pour tout le process
+(FX_DB_READ_ONLY=1 → toutes les connexions des moteurs partagent la même
+instance DuckDB) ; un ForecastEngine / LatencyAnalyzer par symbole, créés une
+fois. Les calculs passent sous un verrou (connexions non partagées entre
+threads) ; les réponses sont mises en cache dans result_cache (clé :
+endpoint + paramètres + version de la base), donc une requête en cache ne
+touche ni DuckDB ni le verrou : décodage, copie du dict, json.dumps.
+Au démarrage, les stats et scores de toutes les familles sont préchauffés
+dans un thread (--no-warm pour s'en passer).
+
+Métriques : fx_api_requests_total{endpoint,status},
+fx_api_request_duration_seconds{endpoint} (histogramme, p99 à lire dessus).
+
+  python -m fx_impact_app.src.forecast_api --db fx_impact_app/data/serving.duckdb --port 8765
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .config import get_db_path
+    from .event_families import FAMILY_PATTERNS
+    from .forecaster_mvp import ForecastEngine
+    from .interval_overlaps import prediction_windows, sweep_overlaps
+    from .latency_analyzer import LatencyAnalyzer
+    from .metrics import REGISTRY
+    from .planner import family_stats_from_engines, load_precomputed_stats, predict_event
+    from .result_cache import cached, data_version
+    from .scenario_engine import ScenarioInputs, calculate_tradability_score, evaluate_grid
+    from .scoring_engine import ScoringEngine
+    from .symbols import DEFAULT_SYMBOL, get_symbol
+except ImportError:
+    from config import get_db_path
+    from event_families import FAMILY_PATTERNS
+    from forecaster_mvp import ForecastEngine
+    from interval_overlaps import prediction_windows, sweep_overlaps
+    from latency_analyzer import LatencyAnalyzer
+    from metrics import REGISTRY
+    from planner import family_stats_from_engines, load_precomputed_stats, predict_event
+    from result_cache import cached, data_version
+    from scenario_engine import ScenarioInputs, calculate_tradability_score, evaluate_grid
+    from scoring_engine import ScoringEngine
+    from symbols import DEFAULT_SYMBOL, get_symbol
+
+DEFAULT_PORT = 8765
+
+API_REQUESTS = REGISTRY.counter(
+    "fx_api_requests_total", "Requetes de l'API de prevision", ["endpoint", "status"])
+API_SECONDS = REGISTRY.histogram(
+    "fx_api_request_duration_seconds", "Duree des requetes de l'API de prevision", ["endpoint"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5, 30))
+
+
+class ApiError(ValueError):
+    """Requête invalide (→ HTTP 400)."""
+
+
+def _version(service: "ForecastService", *args, **kwargs):
+    return data_version(service.db_path)
+
+
+def resolve_family(family: Optional[str]) -> str:
+    """Nom de FAMILY_PATTERNS (casse indifférente) → regex ; sinon regex telle quelle."""
+    if not family:
+        raise ApiError("paramètre family manquant")
+    if family in FAMILY_PATTERNS:
+        return FAMILY_PATTERNS[family]
+    for name, pattern in FAMILY_PATTERNS.items():
+        if name.lower() == family.lower():
+            return pattern
+    return family
+
+
+def family_name(family: str) -> str:
+    """Nom canonique de FAMILY_PATTERNS (casse indifférente), sinon family tel quel."""
+    for name in FAMILY_PATTERNS:
+        if name.lower() == family.lower():
+            return name
+    return family
+
+
+class ForecastService:
+    """Moteurs partagés (un par symbole) + réponses en cache ; utilisable sans HTTP."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or get_db_path()
+        self._lock = threading.Lock()
+        self._forecast: Dict[str, ForecastEngine] = {}
+        self._latency: Dict[str, LatencyAnalyzer] = {}
+        self._scoring = ScoringEngine()
+
+    def _forecast_engine(self, symbol: str) -> ForecastEngine:
+        if symbol not in self._forecast:
+            self._forecast[symbol] = ForecastEngine(self.db_path, symbol=symbol)
+        return self._forecast[symbol]
+
+    def _latency_analyzer(self, symbol: str) -> LatencyAnalyzer:
+        if symbol not in self._latency:
+            self._latency[symbol] = LatencyAnalyzer(self.db_path, symbol=symbol)
+        return self._latency[symbol]
+
+    # Méthodes publiques : arguments normalisés (nom canonique, défauts explicites,
+    # pays en tuple) puis méthode @cached à signature positionnelle fixe, pour que
+    # HTTP, warm() et les appels directs tombent sur la même clé de cache.
+    @staticmethod
+    def _stats_key(family: Optional[str], horizon: int, hist_years: int,
+                   countries: Optional[Sequence[str]], timeframe: str, symbol: Optional[str]) -> tuple:
+        if not family:
+            raise ApiError("paramètre family manquant")
+        return (family_name(family), int(horizon), int(hist_years),
+                tuple(c.upper() for c in countries) if countries else None,
+                timeframe, get_symbol(symbol).code)
+
+    def family_stats(self, family: str, horizon: int = 30, hist_years: int = 3,
+                     countries: Optional[Sequence[str]] = None, timeframe: str = "1m",
+                     symbol: Optional[str] = None) -> Dict[str, Any]:
+        return self._family_stats(*self._stats_key(family, horizon, hist_years, countries, timeframe, symbol))
+
+    def score(self, family: str, importance: int = 2, horizon: int = 30, hist_years: int = 3,
+              countries: Optional[Sequence[str]] = None, timeframe: str = "1m",
+              symbol: Optional[str] = None) -> Dict[str, Any]:
+        key = self._stats_key(family, horizon, hist_years, countries, timeframe, symbol)
+        return self._score(int(importance), *key)
+
+    @cached("api_family_stats", version=_version)
+    def _family_stats(self, family: str, horizon: int, hist_years: int, countries: Optional[tuple],
+                      timeframe: str, code: str) -> Dict[str, Any]:
+        pattern = resolve_family(family)
+        with self._lock:
+            stats = self._forecast_engine(code).calculate_family_stats(
+                pattern, horizon, hist_years, list(countries) if countries else None, timeframe)
+        return {**stats, "pattern": pattern, "family": family, "symbol": code}
+
+    @cached("api_score", version=_version)
+    def _score(self, importance: int, family: str, horizon: int, hist_years: int,
+               countries: Optional[tuple], timeframe: str, code: str) -> Dict[str, Any]:
+        stats = self._family_stats(family, horizon, hist_years, countries, timeframe, code)
+        return {"family": family, "symbol": code, "importance": importance,
+                **self._scoring.calculate_score(stats, importance)}
+
+    @cached("api_latency", version=_version)
+    def latency(self, event_key: str, surprise: Optional[float] = None, threshold: float = 5.0,
+                symbol: Optional[str] = None) -> Dict[str, Any]:
+        if not event_key:
+            raise ApiError("paramètre event_key manquant")
+        code = get_symbol(symbol).code
+        with self._lock:
+            out = self._latency_analyzer(code).predict_latency_for_event(event_key, surprise, threshold)
+        return {"symbol": code, **out}
+
+    @cached("api_precomputed_stats", version=_version)
+    def precomputed_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Stats pré-calculées de event_families (EUR/USD), comme le planificateur."""
+        with self._lock:
+            return load_precomputed_stats(self._forecast_engine(DEFAULT_SYMBOL).conn)
+
+    def planner_stats(self, family: str, years_back: int = 3,
+                      symbol: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Stats de famille du planificateur (planner.family_stats_from_engines)."""
+        if not family:
+            raise ApiError("paramètre family manquant")
+        return self._planner_stats(family_name(family), int(years_back), get_symbol(symbol).code)
+
+    @cached("api_planner_stats", version=_version)
+    def _planner_stats(self, family: str, years_back: int, code: str) -> Optional[Dict[str, Any]]:
+        pattern = resolve_family(family)
+        with self._lock:
+            return family_stats_from_engines(self._latency_analyzer(code), self._forecast_engine(code),
+                                             pattern, years_back)
+
+    @cached("api_plan", version=_version)
+    def plan(self, events: Sequence[Dict[str, Any]], years_back: int = 3,
+             deltas: Optional[Sequence[float]] = None, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Plan multi-événements, mêmes règles que 4_Planificateur (planner) :
+        stats pré-calculées de event_families (EUR/USD) sinon latence
+        LatencyAnalyzer, TTR = latence × {1.5, 2, 3}, MFE P80 à 60 min ;
+        impact = planner.predict_event, fenêtres [latence P20, TTR P80],
+        chevauchements par balayage, score de tradabilité.
+        """
+        if not events:
+            raise ApiError("events vide")
+        code = get_symbol(symbol).code
+        precomputed = self.precomputed_stats() if code == DEFAULT_SYMBOL else {}
+        predictions: List[Dict[str, Any]] = []
+        skipped: List[Dict[str, Any]] = []
+        for ev in events:
+            if "ts_utc" not in ev or "family" not in ev:
+                raise ApiError("chaque événement doit avoir ts_utc et family")
+            surprise = float(ev.get("surprise") or 0.0)
+            family = ev["family"]
+            pred = predict_event(family_name(family), surprise, precomputed,
+                                 lambda: self.planner_stats(family, years_back, symbol=code))
+            if pred is None:
+                skipped.append({"event": ev, "reason": "aucun historique"})
+                continue
+            predictions.append({
+                "event": {"ts_utc": ev["ts_utc"], "family": family, "country": ev.get("country", "")},
+                "surprise": surprise,
+                **pred,
+            })
+        out: Dict[str, Any] = {"predictions": predictions, "skipped": skipped}
+        if not predictions:
+            return out
+
+        starts, ends, origin = prediction_windows(predictions)
+        result = sweep_overlaps(starts, ends)
+        overlaps = [{
+            "event1": i, "event2": j, "overlap_minutes": minutes, "severity": result.severity(minutes),
+        } for i, j, minutes in result.pairs]
+        ts = pd.to_datetime([p["event"]["ts_utc"] for p in predictions], utc=True)
+        time_span = (ts.max() - ts.min()).total_seconds() / 3600
+
+        inputs = ScenarioInputs.from_predictions(predictions)
+        combined = evaluate_grid(inputs, [0.0]).iloc[0]
+        out.update({
+            "origin": origin.isoformat(),
+            "windows": [{"start_min": float(s), "end_min": float(e)} for s, e in zip(starts, ends)],
+            "combined": {
+                "impact": float(combined["impact"]),
+                "direction": int(combined["direction"]),
+                "latency_weighted": float(combined["latency_weighted"]),
+                "ttr_min": float(combined["ttr_min"]),
+                "n_up": int(combined["n_up"]),
+            },
+            "time_span_hours": time_span,
+            "overlaps": overlaps,
+            "groups": result.groups(),
+            "tradability_score": calculate_tradability_score(predictions, overlaps, time_span),
+        })
+        if deltas:
+            out["scenarios"] = evaluate_grid(inputs, [float(d) for d in deltas]).to_dict("records")
+        return out
+
+    def warm(self, families: Optional[Sequence[str]] = None) -> int:
+        """
+        Précalcule stats et scores avec les paramètres par défaut des endpoints
+        (mêmes clés de cache que /family_stats et /score) ; renvoie le nombre de familles.
+        """
+        n = 0
+        for family in families or FAMILY_PATTERNS:
+            try:
+                self.score(family)
+                n += 1
+            except Exception:
+                pass    # famille sans données exploitables : calculée à la demande
+        return n
+
+    def close(self) -> None:
+        with self._lock:
+            for engine in list(self._forecast.values()) + list(self._latency.values()):
+                engine.close()
+            self._forecast.clear()
+            self._latency.clear()
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (pd.Timestamp, datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"non sérialisable : {type(obj).__name__}")
+
+
+def _arg(params: Dict[str, List[str]], name: str, cast=str, default=None):
+    values = params.get(name)
+    if not values or values[0] == "":
+        return default
+    try:
+        return cast(values[0])
+    except ValueError:
+        raise ApiError(f"paramètre {name} invalide : {values[0]!r}") from None
+
+
+def _countries(params: Dict[str, List[str]]) -> Optional[tuple]:
+    raw = _arg(params, "countries")
+    return tuple(c.strip().upper() for c in raw.split(",") if c.strip()) if raw else None
+
+
+def _stats_kwargs(params: Dict[str, List[str]]) -> Dict[str, Any]:
+    return {
+        "horizon": _arg(params, "horizon", int, 30),
+        "hist_years": _arg(params, "hist_years", int, 3),
+        "countries": _countries(params),
+        "timeframe": _arg(params, "timeframe", str, "1m"),
+        "symbol": _arg(params, "symbol"),
+    }
+
+
+def make_handler(service: ForecastService):
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"           # keep-alive : une connexion par bot
+        disable_nagle_algorithm = True          # en-têtes et corps écrits séparément : pas d'ACK retardé
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self, endpoint: str, call) -> None:
+            t0 = time.perf_counter()
+            try:
+                status, payload = 200, call()
+            except ApiError as e:
+                status, payload = 400, {"error": str(e)}
+            except ValueError as e:                     # symbole inconnu, regex invalide...
+                status, payload = 400, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            self._send(status, json.dumps(payload, default=_json_default).encode("utf-8"))
+            API_SECONDS.observe(time.perf_counter() - t0, endpoint=endpoint)
+            API_REQUESTS.inc(endpoint=endpoint, status=str(status))
+
+        def do_GET(self) -> None:  # noqa: N802
+            url = urlsplit(self.path)
+            params = parse_qs(url.query)
+            path = url.path.rstrip("/") or "/"
+            if path == "/health":
+                self._dispatch("health", lambda: {"status": "ok", "db": service.db_path})
+            elif path == "/metrics":
+                self._send(200, REGISTRY.render().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+            elif path == "/family_stats":
+                self._dispatch("family_stats", lambda: service.family_stats(
+                    _arg(params, "family"), **_stats_kwargs(params)))
+            elif path == "/score":
+                self._dispatch("score", lambda: service.score(
+                    _arg(params, "family"), _arg(params, "importance", int, 2), **_stats_kwargs(params)))
+            elif path == "/latency":
+                self._dispatch("latency", lambda: service.latency(
+                    _arg(params, "event_key"), _arg(params, "surprise", float),
+                    _arg(params, "threshold", float, 5.0), _arg(params, "symbol")))
+            else:
+                self._send(404, b'{"error": "not found"}')
+
+        def do_POST(self) -> None:  # noqa: N802
+            path = urlsplit(self.path).path.rstrip("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if path != "/plan":
+                self._send(404, b'{"error": "not found"}')
+                return
+
+            def call():
+                try:
+                    body = json.loads(raw or b"{}")
+                except json.JSONDecodeError as e:
+                    raise ApiError(f"JSON invalide : {e}") from None
+                if not isinstance(body, dict):
+                    raise ApiError("corps attendu : objet JSON")
+                return service.plan(body.get("events") or [], int(body.get("years_back", 3)),
+                                    body.get("deltas"), body.get("symbol"))
+
+            self._dispatch("plan", call)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return _Handler
+
+
+def make_server(service: ForecastService, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="API HTTP locale de prévision (JSON)")
+    ap.add_argument("--db", default=None, help="base DuckDB (défaut : DUCKDB_PATH / warehouse)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--no-warm", action="store_true", help="pas de préchauffage des familles")
+    args = ap.parse_args()
+
+    # Lecture seule (comme l'app) : toutes les connexions partagent une instance DuckDB
+    os.environ["FX_DB_READ_ONLY"] = "1"
+    service = ForecastService(args.db)
+    if not args.no_warm:
+        threading.Thread(target=service.warm, name="fx-api-warm", daemon=True).start()
+    server = make_server(service, args.host, args.port)
+    print(f"API de prévision sur http://{args.host}:{server.server_address[1]} ({service.db_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,43 @@ Forecaster MVP - Version enrichie avec Latence et TTR
 Calcule les statistiques d'impact pour chaque famille d'événements
 """
 
-import duckdb
 import numpy as np
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
+try:
+    from .query_profiler import profiled_connect
+    from .metrics import COMPUTE_SECONDS, EVENTS_PROCESSED, WINDOWS_FETCHED, cache_result
+    from . import family_stats_cube
+    from . import family_sketches
+    from . import data_access
+    from .fast_query import epoch_seconds, from_epoch
+    from .symbols import DEFAULT_SYMBOL, get_symbol
+    from .result_cache import cached_method
+except ImportError:
+    from query_profiler import profiled_connect
+    from metrics import COMPUTE_SECONDS, EVENTS_PROCESSED, WINDOWS_FETCHED, cache_result
+    import family_stats_cube
+    import family_sketches
+    import data_access
+    from fast_query import epoch_seconds, from_epoch
+    from symbols import DEFAULT_SYMBOL, get_symbol
+    from result_cache import cached_method
+
 class ForecastEngine:
     """Moteur de calcul des statistiques d'impact des événements macro"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, use_cube: bool = True, use_sketches: bool = False,
+                 symbol: Optional[str] = None):
         self.db_path = db_path
-        self.conn = duckdb.connect(db_path, read_only=False)
+        self.conn = profiled_connect(db_path)
+        # Symbole (cf. symbols) : table de prix et facteur de pip
+        self.symbol = get_symbol(symbol)
+        # Cube nocturne (family_stats_cube) : présence vérifiée une fois par moteur
+        self.use_cube = use_cube and family_stats_cube.has_cube(self.conn)
+        # Sketches de quantiles (family_sketches) : stats approchées hors cube, opt-in, EUR/USD
+        self.use_sketches = (use_sketches and self.symbol.code == DEFAULT_SYMBOL
+                             and family_sketches.has_sketch_store(self.conn))
     
     def calculate_family_stats(
         self,
@@ -24,26 +50,41 @@ class ForecastEngine:
         timeframe: str = '1m'
     ) -> Dict:
         """Calcule toutes les stats pour une famille d'événements"""
-        
+        if self.use_cube:
+            stats = family_stats_cube.lookup(
+                self.conn, family_pattern, horizon_minutes, hist_years, countries, timeframe,
+                self.symbol.code
+            )
+            cache_result("family_cube", stats is not None)
+            if stats is not None:
+                return stats if stats['n_events'] > 0 else self._empty_stats(family_pattern)
+        if self.use_sketches:
+            stats = family_sketches.sketch_stats(
+                self.conn, family_pattern, horizon_minutes, hist_years, countries, timeframe
+            )
+            cache_result("family_sketches", stats is not None)
+            if stats is not None:
+                return stats if stats['n_events'] > 0 else self._empty_stats(family_pattern)
+        with COMPUTE_SECONDS.time(engine="forecast", op="family_stats"):
+            return self._calculate_family_stats(
+                family_pattern, horizon_minutes, hist_years, countries, timeframe
+            )
+    
+    @cached_method("forecast_family_stats")
+    def _calculate_family_stats(self, family_pattern, horizon_minutes, hist_years, countries, timeframe):
         if countries is None:
             countries = ['US']
         
         cutoff_date = datetime.utcnow() - timedelta(days=hist_years * 365)
-        country_filter = "', '".join(countries)
+        cutoff_date = cutoff_date.replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # CORRECTION: Utiliser ~ au lieu de REGEXP pour DuckDB
-        query_events = f"""
-        SELECT ts_utc, event_key, country, importance_n
-        FROM events
-        WHERE ts_utc >= '{cutoff_date.strftime('%Y-%m-%d')}'
-          AND country IN ('{country_filter}')
-          AND event_key ~ '{family_pattern}'
-        ORDER BY ts_utc
-        """
+        # Famille connue : égalité sur event_family_map, sinon regex (~ = match complet)
+        event_times = data_access.events_for_family(
+            self.conn, family_pattern, since=cutoff_date, countries=countries
+        ).fetchnumpy()['ts']
+        EVENTS_PROCESSED.inc(len(event_times), engine="forecast")
         
-        events_df = self.conn.execute(query_events).fetchdf()
-        
-        if len(events_df) == 0:
+        if len(event_times) == 0:
             return self._empty_stats(family_pattern)
         
         all_impacts = []
@@ -51,9 +92,9 @@ class ForecastEngine:
         all_ttrs = []
         directions = []
         
-        for _, event in events_df.iterrows():
+        for event_s in event_times:
             stats = self._calculate_single_event_stats(
-                event['ts_utc'], horizon_minutes, timeframe
+                event_s, horizon_minutes, timeframe
             )
             
             if stats is not None:
@@ -95,71 +136,30 @@ class ForecastEngine:
         }
     
     def _calculate_single_event_stats(self, event_ts, horizon_minutes, timeframe):
-        """Calcule MFE, latence et TTR pour un événement unique"""
-        
-        # Normaliser event_ts (enlever timezone info si présente)
-        import pandas as pd
-        if hasattr(event_ts, 'tz_localize'):
-            event_ts_naive = event_ts.tz_localize(None) if event_ts.tzinfo else event_ts
-        else:
-            event_ts_naive = pd.Timestamp(event_ts).tz_localize(None) if pd.Timestamp(event_ts).tzinfo else pd.Timestamp(event_ts)
+        """Calcule MFE, latence et TTR pour un événement unique (event_ts : timestamp ou epoch s)"""
         
-        query_ref = f"""
-        SELECT close as ref_price
-        FROM prices_{timeframe}_v
-        WHERE ts_utc < '{event_ts_naive}'
-        ORDER BY ts_utc DESC
-        LIMIT 1
-        """
+        # Temps en epoch secondes (UTC) ; bornes de requête en timestamps naïfs UTC
+        event_s = epoch_seconds(event_ts)
+        event_ts_naive = from_epoch(event_s)
         
-        ref_result = self.conn.execute(query_ref).fetchdf()
-        if len(ref_result) == 0:
+        ref_price = data_access.ref_price(self.conn, event_ts_naive, timeframe, symbol=self.symbol.code)
+        if ref_price is None:
             return None
         
-        ref_price = ref_result['ref_price'].iloc[0]
         end_ts_naive = event_ts_naive + timedelta(minutes=horizon_minutes)
         
-        query_prices = f"""
-        SELECT ts_utc, close, (close - {ref_price}) * 10000 as pips
-        FROM prices_{timeframe}_v
-        WHERE ts_utc >= '{event_ts_naive}' AND ts_utc <= '{end_ts_naive}'
-        ORDER BY ts_utc
-        """
+        prices = data_access.price_window(self.conn, event_ts_naive, end_ts_naive, timeframe,
+                                          symbol=self.symbol.code)
+        WINDOWS_FETCHED.inc(engine="forecast")
         
-        prices_df = self.conn.execute(query_prices).fetchdf()
-        
-        if len(prices_df) < 3:
+        # MFE, direction, latence (1er |pips| >= 5) et TTR (retour sous 50 % du pic)
+        reaction = family_stats_cube.event_reaction(
+            (prices['ts'] - event_s) / 60.0, self.symbol.to_pips(prices['close'] - ref_price), horizon_minutes
+        )
+        if reaction is None:
             return None
         
-        # Normaliser les timestamps du DataFrame
-        prices_df['ts_utc'] = pd.to_datetime(prices_df['ts_utc']).dt.tz_localize(None)
-        
-        pips = prices_df['pips'].values
-        mfe = float(np.max(np.abs(pips)))
-        direction = 1 if np.sum(pips > 0) > np.sum(pips < 0) else -1
-        
-        # Latence
-        latency_minutes = 0
-        for idx, pip_val in enumerate(pips):
-            if abs(pip_val) >= 5.0:
-                time_diff = prices_df['ts_utc'].iloc[idx] - event_ts_naive
-                latency_minutes = time_diff.total_seconds() / 60
-                break
-        if latency_minutes == 0:
-            latency_minutes = horizon_minutes
-        
-        # TTR
-        ttr_minutes = horizon_minutes
-        peak_idx = np.argmax(np.abs(pips))
-        peak_value = pips[peak_idx]
-        reversal_threshold = abs(peak_value) * 0.5
-        
-        for idx in range(peak_idx + 1, len(pips)):
-            if abs(pips[idx]) < reversal_threshold and np.sign(pips[idx]) != np.sign(peak_value):
-                time_diff = prices_df['ts_utc'].iloc[idx] - event_ts_naive
-                ttr_minutes = time_diff.total_seconds() / 60
-                break
-        
+        mfe, latency_minutes, ttr_minutes, direction = reaction
         return {
             'mfe': mfe,
             'latency': latency_minutes,
@@ -0,0 +1,251 @@
+# fx_impact_app/src/http_download.py
+"""
+Téléchargement HTTP reprenable, vérifié et atomique (stdlib uniquement).
+
+  dest.part        fichier temporaire, pré-alloué à la taille finale
+  dest.part.json   état de reprise : url, taille, sha256, progression par chunk
+
+Principe :
+  1. sonde `Range: bytes=0-0` → si 206 + Content-Range, le serveur accepte les
+     plages : on découpe en N chunks téléchargés en parallèle (threads), chacun
+     écrivant à son offset dans dest.part ; la progression est sauvegardée
+     régulièrement dans l'état, ce qui permet de reprendre après interruption.
+  2. sinon (200 sans plages) : flux unique, sans reprise possible.
+  3. vérification taille + SHA-256 du manifeste, puis os.replace(dest.part, dest).
+     dest n'est donc jamais visible tronqué ; un checksum faux supprime le .part.
+
+Manifeste publié à côté du fichier (JSON) :
+  {"url": "warehouse.duckdb", "size": 123, "sha256": "..."}
+  (url relative résolue par rapport à l'URL du manifeste)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+DEFAULT_CHUNKS = 4
+MIN_CHUNK_BYTES = 1 << 20        # pas de découpage en dessous de 1 MiB par chunk
+READ_BLOCK = 1 << 16
+STATE_SAVE_EVERY_S = 1.0
+USER_AGENT = "fx-impact-downloader/1.0"
+
+
+class ChecksumError(ValueError):
+    """Le fichier téléchargé ne correspond pas au manifeste (taille ou SHA-256)."""
+
+
+@dataclass
+class Manifest:
+    url: str
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+
+
+def _request(url: str, headers: Optional[Dict[str, str]] = None, method: str = "GET"):
+    req = urllib.request.Request(url, method=method, headers={"User-Agent": USER_AGENT, **(headers or {})})
+    return urllib.request.urlopen(req, timeout=60)
+
+
+def fetch_manifest(manifest_url: str) -> Manifest:
+    with _request(manifest_url) as r:
+        data = json.loads(r.read().decode("utf-8"))
+    if "url" not in data:
+        raise ValueError(f"manifeste sans 'url' : {manifest_url}")
+    return Manifest(
+        url=urljoin(manifest_url, data["url"]),
+        size=int(data["size"]) if data.get("size") is not None else None,
+        sha256=str(data["sha256"]).lower() if data.get("sha256") else None,
+    )
+
+
+def build_manifest(path: str, url: Optional[str] = None) -> Dict[str, object]:
+    """Manifeste à publier à côté du fichier (url relative par défaut)."""
+    p = Path(path)
+    return {"url": url or p.name, "size": p.stat().st_size, "sha256": sha256_file(p)}
+
+
+def sha256_file(path, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(block), b""):
+            h.update(buf)
+    return h.hexdigest()
+
+
+def probe_ranges(url: str) -> Tuple[bool, Optional[int]]:
+    """(le serveur accepte les plages ?, taille totale si connue)."""
+    with _request(url, {"Range": "bytes=0-0"}) as r:
+        content_range = r.headers.get("Content-Range", "")
+        if r.status == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1].strip()
+            return True, int(total) if total.isdigit() else None
+        length = r.headers.get("Content-Length")
+        return False, int(length) if length and length.isdigit() else None
+
+
+def _split(size: int, n_chunks: int) -> List[List[int]]:
+    """[start, end_inclus, next_offset] par chunk."""
+    n = max(1, min(n_chunks, size // MIN_CHUNK_BYTES or 1))
+    step = -(-size // n)
+    return [[s, min(s + step, size) - 1, s] for s in range(0, size, step)]
+
+
+class _State:
+    """État de reprise persistant (dest.part.json), partagé entre les workers."""
+
+    def __init__(self, path: Path, url: str, size: int, sha256: Optional[str], chunks: List[List[int]]):
+        self.path = path
+        self.url, self.size, self.sha256 = url, size, sha256
+        self.chunks = chunks
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+    @classmethod
+    def load_or_new(cls, path: Path, part: Path, url: str, size: int, sha256: Optional[str],
+                    n_chunks: int) -> "_State":
+        if path.exists() and part.exists() and part.stat().st_size == size:
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                if data.get("url") == url and data.get("size") == size and data.get("sha256") == sha256:
+                    return cls(path, url, size, sha256, [list(c) for c in data["chunks"]])
+            except (ValueError, KeyError):
+                pass
+        return cls(path, url, size, sha256, _split(size, n_chunks))
+
+    def advance(self, i: int, offset: int) -> None:
+        with self._lock:
+            self.chunks[i][2] = offset
+            if time.monotonic() - self._last_save >= STATE_SAVE_EVERY_S:
+                self._save_locked()
+
+    def save(self) -> None:
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"url": self.url, "size": self.size, "sha256": self.sha256,
+                                   "chunks": self.chunks}), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._last_save = time.monotonic()
+
+    def remaining(self) -> int:
+        return sum(end + 1 - nxt for _, end, nxt in self.chunks)
+
+
+def _fetch_chunk(url: str, part: Path, state: _State, i: int) -> None:
+    start, end, nxt = state.chunks[i]
+    if nxt > end:
+        return
+    with _request(url, {"Range": f"bytes={nxt}-{end}"}) as r:
+        if r.status != 206:
+            raise IOError(f"plage {nxt}-{end} refusée (HTTP {r.status})")
+        # non bufferisé : l'offset enregistré dans l'état n'est jamais en avance sur le disque
+        with open(part, "r+b", buffering=0) as f:
+            f.seek(nxt)
+            while nxt <= end:
+                buf = r.read(min(READ_BLOCK, end + 1 - nxt))
+                if not buf:
+                    break
+                f.write(buf)
+                nxt += len(buf)
+                state.advance(i, nxt)
+    if nxt <= end:
+        raise IOError(f"connexion coupée sur la plage {i} ({nxt}/{end + 1})")
+
+
+def _fetch_stream(url: str, part: Path, progress: Optional[Callable[[int, Optional[int]], None]],
+                  size: Optional[int]) -> None:
+    done = 0
+    with _request(url) as r, open(part, "wb") as f:
+        for buf in iter(lambda: r.read(READ_BLOCK), b""):
+            f.write(buf)
+            done += len(buf)
+            if progress:
+                progress(done, size)
+
+
+def download(url: str, dest, size: Optional[int] = None, sha256: Optional[str] = None,
+             chunks: int = DEFAULT_CHUNKS,
+             progress: Optional[Callable[[int, Optional[int]], None]] = None) -> str:
+    """
+    Télécharge `url` vers `dest` (reprise, chunks parallèles, vérification, rename atomique).
+    Lève ChecksumError si la taille / le SHA-256 ne correspondent pas.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part = dest.with_name(dest.name + ".part")
+    state_path = dest.with_name(dest.name + ".part.json")
+    sha256 = sha256.lower() if sha256 else None
+
+    ranges_ok, remote_size = probe_ranges(url)
+    if size is not None and remote_size is not None and remote_size != size:
+        raise ChecksumError(f"taille distante {remote_size} ≠ manifeste {size}")
+    size = size if size is not None else remote_size
+
+    if ranges_ok and size:
+        state = _State.load_or_new(state_path, part, url, size, sha256, chunks)
+        if not part.exists() or part.stat().st_size != size:
+            with open(part, "wb") as f:
+                f.truncate(size)
+        state.save()
+
+        errors: List[BaseException] = []
+        stop = threading.Event()
+
+        def _run(i: int) -> None:
+            try:
+                _fetch_chunk(url, part, state, i)
+            except BaseException as e:  # noqa: BLE001 - remonté après join
+                errors.append(e)
+
+        def _report() -> None:
+            while not stop.wait(0.5):
+                progress(size - state.remaining(), size)  # type: ignore[misc]
+
+        workers = [threading.Thread(target=_run, args=(i,), daemon=True) for i in range(len(state.chunks))]
+        reporter = threading.Thread(target=_report, daemon=True) if progress else None
+        for t in workers + ([reporter] if reporter else []):
+            t.start()
+        for t in workers:
+            t.join()
+        stop.set()
+        state.save()
+        if errors:
+            raise errors[0]
+        if progress:
+            progress(size, size)
+    else:
+        # Pas de plages : flux unique, on repart de zéro
+        state_path.unlink(missing_ok=True)
+        _fetch_stream(url, part, progress, size)
+
+    try:
+        verify(part, size, sha256)
+    except ChecksumError:
+        part.unlink(missing_ok=True)
+        state_path.unlink(missing_ok=True)
+        raise
+    os.replace(part, dest)
+    state_path.unlink(missing_ok=True)
+    return dest.as_posix()
+
+
+def verify(path, size: Optional[int] = None, sha256: Optional[str] = None) -> str:
+    """Vérifie taille puis SHA-256 ; renvoie le SHA-256 calculé."""
+    path = Path(path)
+    actual_size = path.stat().st_size
+    if size is not None and actual_size != size:
+        raise ChecksumError(f"{path.name} : taille {actual_size} ≠ {size}")
+    digest = sha256_file(path)
+    if sha256 and digest != sha256.lower():
+        raise ChecksumError(f"{path.name} : sha256 {digest} ≠ {sha256}")
+    return digest
@@ -0,0 +1,125 @@
+# fx_impact_app/src/interval_overlaps.py
+"""
+Chevauchements de fenêtres de réaction par balayage (sweep line), O(n log n).
+
+Fenêtre d'un événement (minutes) : [ts + latency_p20, ts + ttr_p80]
+  → du début probable de la réaction à la fin probable du mouvement.
+
+sweep_overlaps(starts, ends) :
+  - tri par début, puis balayage avec un tas des fins actives : chaque intervalle
+    n'est comparé qu'aux fenêtres encore ouvertes (paires émises en
+    O(n log n + P), P = nombre de chevauchements réels)
+  - groupes = composantes connexes (max cumulé des fins, NumPy)
+  - profondeur = nombre de fenêtres ouvertes simultanément
+  - sévérité d'une paire : HIGH au-delà de `high_minutes` de recouvrement
+
+Utilisé par 4_Planificateur (detect_overlaps, timeline) ; l'API travaille sur des
+tableaux pour traiter une semaine entière (dizaines de publications) d'un coup.
+"""
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+HIGH_OVERLAP_MINUTES = 10.0
+
+
+@dataclass
+class OverlapResult:
+    starts: np.ndarray
+    ends: np.ndarray
+    group: np.ndarray                       # id de groupe par intervalle (ordre d'entrée)
+    depth: np.ndarray                       # fenêtres ouvertes à l'ouverture de chaque intervalle
+    pairs: List[Tuple[int, int, float]] = field(default_factory=list)   # (i, j, minutes), i ouvert avant j
+    high_minutes: float = HIGH_OVERLAP_MINUTES
+
+    def severity(self, minutes: float) -> str:
+        return "HIGH" if minutes > self.high_minutes else "MEDIUM"
+
+    def groups(self) -> List[Dict[str, object]]:
+        """Groupes d'au moins 2 fenêtres qui se chevauchent (ordre chronologique)."""
+        out: List[Dict[str, object]] = []
+        if len(self.group) == 0:
+            return out
+        pair_max: Dict[int, float] = {}
+        for i, _, minutes in self.pairs:
+            g = int(self.group[i])
+            pair_max[g] = max(pair_max.get(g, 0.0), minutes)
+        order = np.argsort(self.group, kind="stable")
+        cuts = np.flatnonzero(np.diff(self.group[order])) + 1
+        for members in np.split(order, cuts):
+            if len(members) < 2:
+                continue
+            g = int(self.group[members[0]])
+            worst = pair_max.get(g, 0.0)
+            out.append({
+                "group": g,
+                "members": members.tolist(),
+                "start": float(self.starts[members].min()),
+                "end": float(self.ends[members].max()),
+                "max_depth": int(self.depth[members].max()),
+                "max_overlap_minutes": worst,
+                "severity": self.severity(worst),
+            })
+        return out
+
+
+def sweep_overlaps(starts: Sequence[float], ends: Sequence[float],
+                   high_minutes: float = HIGH_OVERLAP_MINUTES,
+                   with_pairs: bool = True) -> OverlapResult:
+    """Chevauchements des intervalles [starts[i], ends[i]) (mêmes unités, ici minutes)."""
+    s = np.asarray(starts, dtype=float)
+    e = np.maximum(np.asarray(ends, dtype=float), s)
+    n = len(s)
+    order = np.argsort(s, kind="stable")
+
+    group = np.zeros(n, dtype=np.int64)
+    if n:
+        s_sorted, e_sorted = s[order], e[order]
+        run_end = np.maximum.accumulate(e_sorted)
+        new_group = np.empty(n, dtype=bool)
+        new_group[0] = True
+        new_group[1:] = s_sorted[1:] >= run_end[:-1]
+        group[order] = np.cumsum(new_group) - 1
+
+    depth = np.ones(n, dtype=np.int64)
+    pairs: List[Tuple[int, int, float]] = []
+    active: List[Tuple[float, int]] = []          # tas (fin, index)
+    for j in order:
+        sj, ej = s[j], e[j]
+        while active and active[0][0] <= sj:
+            heapq.heappop(active)
+        depth[j] = len(active) + 1
+        if with_pairs:
+            for ei, i in active:
+                pairs.append((int(i), int(j), float(min(ei, ej) - sj)))
+        heapq.heappush(active, (ej, int(j)))
+
+    return OverlapResult(s, e, group, depth, pairs, high_minutes)
+
+
+def prediction_windows(predictions: Sequence[Dict[str, object]],
+                       origin: Optional[pd.Timestamp] = None) -> Tuple[np.ndarray, np.ndarray, pd.Timestamp]:
+    """
+    Fenêtres [ts + latency_p20, ts + ttr_p80] en minutes depuis `origin`
+    (défaut : premier événement) pour les prédictions du planificateur.
+    """
+    ts = pd.to_datetime(pd.Series([p["event"]["ts_utc"] for p in predictions]), utc=True)  # type: ignore[index]
+    origin = ts.min() if origin is None else pd.Timestamp(origin)
+    if origin.tzinfo is None:
+        origin = origin.tz_localize("UTC")
+    t = ((ts - origin).dt.total_seconds() / 60.0).to_numpy()
+    lat = np.array([_num(p, "latency_p20", "latency_median") for p in predictions], dtype=float)
+    ttr = np.array([_num(p, "ttr_p80", "ttr_median") for p in predictions], dtype=float)
+    return t + lat, t + ttr, origin
+
+
+def _num(p: Dict[str, object], key: str, fallback: str) -> float:
+    v = p.get(key)
+    if v is None or (isinstance(v, float) and np.isnan(v)):
+        v = p.get(fallback, 0.0)
+    return float(v or 0.0)  # type: ignore[arg-type]
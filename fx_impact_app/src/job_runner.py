@@ -0,0 +1,236 @@
+# fx_impact_app/src/job_runner.py
+"""
+Exécution d'un DAG de jobs batch sur le warehouse (cf. run_nightly.py).
+
+Chaque étape (Step) déclare :
+  deps    étapes dont elle lit les sorties
+  inputs  données brutes lues : (table, colonnes) → empreinte
+          count(*) + bit_xor(hash(colonnes)), quelques ms par million de lignes
+  writes  tables écrites : deux étapes qui écrivent la même table ne tournent
+          jamais en même temps (conflits de transaction DuckDB)
+  version à incrémenter quand le code de l'étape change
+
+Version d'entrée d'une étape = hash(version, empreintes des inputs, run_id du
+dernier succès de chaque dépendance). Elle est comparée à celle du dernier
+succès enregistré dans _job_runs : identique → étape sautée. Une dépendance
+relancée (nouveau run_id) relance donc toute sa descendance, même si les
+données brutes n'ont pas bougé.
+
+Ordonnancement : les étapes prêtes (dépendances terminées, tables écrites
+libres) partent dans un pool de threads ; DuckDB libère le GIL pendant les
+requêtes et toutes les connexions du process partagent la même instance de
+base (duckdb.connect sur le même fichier). Une étape en échec bloque sa
+descendance sans arrêter les branches indépendantes.
+
+Durées : une ligne de log par étape, _job_runs (historique), métriques
+fx_job_step_duration_seconds / fx_job_step_runs_total.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+import duckdb
+
+try:
+    from .metrics import REGISTRY
+except ImportError:
+    from metrics import REGISTRY
+
+RUNS_TABLE = "_job_runs"
+
+JOB_STEP_SECONDS = REGISTRY.gauge(
+    "fx_job_step_duration_seconds", "Duree du dernier run de chaque etape batch", ["step"])
+JOB_STEP_RUNS = REGISTRY.counter(
+    "fx_job_step_runs_total", "Etapes batch (status=ok|skipped|failed|blocked)", ["step", "status"])
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    run: Callable[[str], object]                        # run(db_path)
+    deps: Tuple[str, ...] = ()
+    inputs: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+    writes: Tuple[str, ...] = ()
+    version: str = "1"
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str                 # ok | skipped | failed | blocked
+    seconds: float = 0.0
+    input_version: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _table_exists(con, name: str) -> bool:
+    return con.execute("""
+        SELECT 1 FROM information_schema.tables
+        WHERE table_catalog = current_database() AND table_schema = current_schema()
+          AND lower(table_name) = lower(?)
+        LIMIT 1
+    """, [name]).fetchone() is not None
+
+
+def ensure_runs_table(con) -> None:
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+            run_id        VARCHAR,
+            step          VARCHAR,
+            input_version VARCHAR,
+            status        VARCHAR,
+            started_at    TIMESTAMP,
+            seconds       DOUBLE,
+            error         VARCHAR
+        )
+    """)
+
+
+def table_fingerprint(con, table: str, columns: Sequence[str]) -> str:
+    """Empreinte des colonnes d'une table ('absent' si elle n'existe pas)."""
+    if not _table_exists(con, table):
+        return "absent"
+    n, h = con.execute(f"SELECT count(*), bit_xor(hash({', '.join(columns)})) FROM {table}").fetchone()
+    return f"{n}:{h}"
+
+
+def last_success(con) -> Dict[str, Tuple[str, str]]:
+    """{étape: (input_version, run_id)} du dernier succès de chaque étape."""
+    rows = con.execute(f"""
+        SELECT step, input_version, run_id
+        FROM {RUNS_TABLE}
+        WHERE status = 'ok'
+        QUALIFY row_number() OVER (PARTITION BY step ORDER BY started_at DESC) = 1
+    """).fetchall()
+    return {step: (version, run_id) for step, version, run_id in rows}
+
+
+def input_version(con, step: Step, done: Mapping[str, Tuple[str, str]]) -> str:
+    payload = {
+        "version": step.version,
+        "inputs": {t: table_fingerprint(con, t, cols) for t, cols in step.inputs},
+        "deps": {d: done.get(d, (None, None))[1] for d in step.deps},
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def topological_order(steps: Sequence[Step]) -> List[str]:
+    """Noms des étapes, chaque étape après ses dépendances ; ValueError si DAG invalide."""
+    names = [s.name for s in steps]
+    if len(set(names)) != len(names):
+        raise ValueError(f"étapes en double : {names}")
+    known = set(names)
+    for s in steps:
+        missing = [d for d in s.deps if d not in known]
+        if missing:
+            raise ValueError(f"{s.name} : dépendances inconnues {missing}")
+    order: List[str] = []
+    pending = {s.name: set(s.deps) for s in steps}
+    while pending:
+        ready = [n for n, d in pending.items() if not d]
+        if not ready:
+            raise ValueError(f"cycle dans le DAG : {sorted(pending)}")
+        for n in ready:
+            del pending[n]
+        for d in pending.values():
+            d.difference_update(ready)
+        order += ready
+    return order
+
+
+def _record(con, run_id: str, r: StepResult, started_at: datetime) -> None:
+    con.execute(f"INSERT INTO {RUNS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [run_id, r.name, r.input_version, r.status, started_at, r.seconds, r.error])
+
+
+def _timed(step: Step, db_path: str) -> Tuple[float, Optional[str]]:
+    """(durée, erreur) : l'exception est rendue sous forme de texte, avec sa durée."""
+    t0 = time.perf_counter()
+    try:
+        step.run(db_path)
+        return time.perf_counter() - t0, None
+    except Exception as e:
+        return time.perf_counter() - t0, f"{type(e).__name__}: {e}"
+
+
+def run_dag(db_path: str, steps: Sequence[Step], force: Iterable[str] = (),
+            only: Optional[Iterable[str]] = None, workers: int = 4,
+            log: Callable[[str], None] = print) -> List[StepResult]:
+    """
+    Exécute le DAG. force : étapes relancées même à jour ("all" : toutes) ;
+    only : sous-ensemble à exécuter (leurs dépendances hors sous-ensemble sont
+    considérées à jour). Renvoie un StepResult par étape, dans l'ordre de fin.
+    """
+    order = topological_order(steps)
+    workers = max(1, workers)
+    by_name = {s.name: s for s in steps}
+    force = set(force)
+    selected = set(only) if only is not None else set(by_name)
+    unknown = (force - {"all"} | selected) - set(by_name)
+    if unknown:
+        raise ValueError(f"étapes inconnues : {sorted(unknown)}")
+
+    con = duckdb.connect(db_path)
+    ensure_runs_table(con)
+    done = last_success(con)
+    results: Dict[str, StepResult] = {}
+    remaining = [n for n in order if n in selected]    # ordre topologique : une passe suffit
+    running: Dict[Future, Tuple[Step, str, str, datetime]] = {}
+    busy: Set[str] = set()
+
+    def finish(r: StepResult) -> None:
+        results[r.name] = r
+        JOB_STEP_RUNS.inc(step=r.name, status=r.status)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fx-job") as pool:
+            while remaining or running:
+                for name in list(remaining):
+                    step = by_name[name]
+                    deps = [d for d in step.deps if d in selected]
+                    if any(results.get(d) and results[d].status in ("failed", "blocked") for d in deps):
+                        remaining.remove(name)
+                        finish(StepResult(name, "blocked"))
+                        log(f"⛔ {name} : dépendance en échec")
+                        continue
+                    if (len(running) >= workers or not all(d in results for d in deps)
+                            or busy & set(step.writes)):
+                        continue
+                    remaining.remove(name)
+                    version = input_version(con, step, done)
+                    if name not in force and "all" not in force and done.get(name, (None,))[0] == version:
+                        finish(StepResult(name, "skipped", input_version=version))
+                        log(f"= {name} : à jour ({version})")
+                        continue
+                    log(f"▶ {name}")
+                    busy |= set(step.writes)
+                    started = datetime.now(timezone.utc).replace(tzinfo=None)
+                    running[pool.submit(_timed, step, db_path)] = (step, version, uuid.uuid4().hex, started)
+
+                if not running:
+                    break
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    step, version, run_id, started = running.pop(fut)
+                    busy -= set(step.writes)
+                    seconds, error = fut.result()
+                    if error is None:
+                        r = StepResult(step.name, "ok", seconds, version)
+                        done[step.name] = (version, run_id)
+                        log(f"✓ {step.name} : {seconds:.1f} s")
+                    else:
+                        r = StepResult(step.name, "failed", seconds, version, error)
+                        log(f"✗ {step.name} : {error} ({seconds:.1f} s)")
+                    JOB_STEP_SECONDS.set(r.seconds, step=step.name)
+                    _record(con, run_id, r, started)
+                    finish(r)
+    finally:
+        con.close()
+    return list(results.values())
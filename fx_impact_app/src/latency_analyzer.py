@@ -1,21 +1,40 @@
 """
 Module d'analyse de latence de réaction du marché EUR/USD aux annonces économiques
 """
-import duckdb
+import numpy as np
 from pathlib import Path
 from typing import Dict, List, Optional
 import statistics
 
+try:
+    from .query_profiler import profiled_connect
+    from .metrics import COMPUTE_SECONDS, EVENTS_PROCESSED, WINDOWS_FETCHED
+    from .family_map import map_predicate
+    from .fast_query import fetch_arrays, fetch_scalar
+    from .prices_1s import measure_latency_seconds
+    from .symbols import DEFAULT_SYMBOL, get_symbol
+    from .result_cache import cached_method
+except ImportError:
+    from query_profiler import profiled_connect
+    from metrics import COMPUTE_SECONDS, EVENTS_PROCESSED, WINDOWS_FETCHED
+    from family_map import map_predicate
+    from fast_query import fetch_arrays, fetch_scalar
+    from prices_1s import measure_latency_seconds
+    from symbols import DEFAULT_SYMBOL, get_symbol
+    from result_cache import cached_method
+
 class LatencyAnalyzer:
     """Analyse la latence de réaction du marché aux événements économiques"""
     
-    def __init__(self, db_path: str = "fx_impact_app/data/warehouse.duckdb"):
+    def __init__(self, db_path: str = "fx_impact_app/data/warehouse.duckdb", symbol: Optional[str] = None):
         self.db_path = Path(db_path)
         self.conn = None
+        # Symbole (cf. symbols) : table de prix 1m et facteur de pip
+        self.symbol = get_symbol(symbol)
     
     def connect(self):
         if self.conn is None:
-            self.conn = duckdb.connect(str(self.db_path))
+            self.conn = profiled_connect(str(self.db_path))
     
     def close(self):
         if self.conn:
@@ -34,45 +53,42 @@ class LatencyAnalyzer:
         """Calcule les métriques de latence pour un événement spécifique"""
         self.connect()
         
-        baseline_result = self.conn.execute("""
-            SELECT close FROM prices_1m
+        baseline_price = fetch_scalar(self.conn, f"""
+            SELECT close FROM {self.symbol.table}
             WHERE datetime <= ? - INTERVAL '1 minute'
             ORDER BY datetime DESC LIMIT 1
-        """, [event_time]).fetchone()
+        """, [event_time])
         
-        if not baseline_result:
+        if baseline_price is None:
             return {"error": "No baseline price"}
         
-        baseline_price = baseline_result[0]
-        
-        post_prices = self.conn.execute(f"""
-            SELECT datetime, close, high, low,
-                   EXTRACT(EPOCH FROM (datetime - ?)) / 60.0 as minutes_after
-            FROM prices_1m
-            WHERE datetime > ? AND datetime <= ? + INTERVAL '{max_minutes} minutes'
+        post_prices = fetch_arrays(self.conn, f"""
+            SELECT close,
+                   EXTRACT(EPOCH FROM (datetime - $t)) / 60.0 as minutes_after
+            FROM {self.symbol.table}
+            WHERE datetime > $t AND datetime <= $t + to_minutes(CAST($max_minutes AS INTEGER))
             ORDER BY datetime
-        """, [event_time, event_time, event_time]).fetchall()
+        """, {"t": event_time, "max_minutes": max_minutes})
+        WINDOWS_FETCHED.inc(engine="latency")
         
-        if not post_prices:
+        close = post_prices["close"]
+        if len(close) == 0:
             return {"error": "No post-event data"}
         
+        minutes = post_prices["minutes_after"]
+        movement = np.abs(self.symbol.to_pips(close - baseline_price))
+        
+        # Première barre au-dessus du seuil ; pic = premier maximum (> 0)
         initial_reaction = None
-        peak_movement = 0
-        peak_time = 0
         direction = None
+        hit = np.flatnonzero(movement >= threshold_pips)
+        if len(hit):
+            initial_reaction = float(minutes[hit[0]])
+            direction = 'up' if close[hit[0]] > baseline_price else 'down'
         
-        for row in post_prices:
-            minutes = row[4]
-            close = row[1]
-            movement = abs(close - baseline_price) * 10000
-            
-            if initial_reaction is None and movement >= threshold_pips:
-                initial_reaction = minutes
-                direction = 'up' if close > baseline_price else 'down'
-            
-            if movement > peak_movement:
-                peak_movement = movement
-                peak_time = minutes
+        peak_idx = int(np.argmax(movement))
+        peak_movement = float(movement[peak_idx]) if movement[peak_idx] > 0 else 0
+        peak_time = float(minutes[peak_idx]) if movement[peak_idx] > 0 else 0
         
         return {
             "event_key": event_key,
@@ -82,24 +98,46 @@ class LatencyAnalyzer:
             "direction": direction
         }
     
+    def calculate_event_latency_seconds(self, event_times, threshold_pips: float = 5.0):
+        """Latence à la seconde (table prices_1s, fenêtres autour des événements) ; DataFrame par événement"""
+        if self.symbol.code != DEFAULT_SYMBOL:
+            raise ValueError(f"prices_1s ne stocke que {DEFAULT_SYMBOL} (symbole: {self.symbol.code})")
+        self.connect()
+        with COMPUTE_SECONDS.time(engine="latency", op="event_latency_1s"):
+            out = measure_latency_seconds(self.conn, event_times, threshold_pips=threshold_pips)
+        WINDOWS_FETCHED.inc(len(out), engine="latency_1s")
+        return out
+    
     def calculate_family_latency_stats(self, family_pattern: str, threshold_pips: float = 5.0,
                                       min_events: int = 10, lookback_days: int = 365) -> Dict:
         """Calcule les statistiques de latence moyennes pour une famille d'événements"""
+        with COMPUTE_SECONDS.time(engine="latency", op="family_latency_stats"):
+            return self._calculate_family_latency_stats(family_pattern, threshold_pips, min_events, lookback_days)
+    
+    @cached_method("latency_family_stats")
+    def _calculate_family_latency_stats(self, family_pattern: str, threshold_pips: float,
+                                        min_events: int, lookback_days: int) -> Dict:
         self.connect()
         
-        # Construire conditions OR pour patterns multiples
-        keywords = family_pattern.split('|')
-        conditions = ' OR '.join([f"event_key ILIKE '%{kw.strip()}%'" for kw in keywords])
+        # Famille de FAMILY_PATTERNS : appartenance via event_family_map (regex
+        # recherchée dans la clé) ; sinon mots-clés séparés par | en ILIKE
+        mapped = map_predicate(self.conn, family_pattern, full_match=False)
+        if mapped:
+            conditions, params = mapped
+        else:
+            keywords = family_pattern.split('|')
+            conditions = ' OR '.join([f"event_key ILIKE '%{kw.strip()}%'" for kw in keywords])
+            params = []
         
         query = f"""
             SELECT ts_utc, event_key, actual, previous
             FROM events
             WHERE ({conditions})
                 AND actual IS NOT NULL
-                AND ts_utc >= CURRENT_DATE - INTERVAL '{lookback_days} days'
+                AND ts_utc >= CURRENT_DATE - to_days(CAST(? AS INTEGER))
             ORDER BY ts_utc DESC
         """
-        events = self.conn.execute(query).fetchall()
+        events = self.conn.execute(query, params + [lookback_days]).fetchall()
         
         if len(events) < min_events:
             return {"error": f"Insufficient data: {len(events)} events (minimum {min_events})"}
@@ -108,6 +146,7 @@ class LatencyAnalyzer:
         peak_times = []
         peak_movements = []
         
+        EVENTS_PROCESSED.inc(min(len(events), 50), engine="latency")
         for event in events[:50]:
             result = self.calculate_event_latency(event[0], event[1], threshold_pips)
             
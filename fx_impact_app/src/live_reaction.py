@@ -0,0 +1,341 @@
+# fx_impact_app/src/live_reaction.py
+"""
+Détection en direct de la réaction du marché aux événements, barre par barre.
+
+LatencyAnalyzer.calculate_event_latency ne travaille qu'après coup, sur les
+prix stockés. Ici un détecteur incrémental consomme les barres 1 minute une à
+une (file, fichier suivi en tail, ou rejeu depuis prices_1m) et maintient
+l'état de chaque événement actif en O(1) par barre et par événement :
+
+  pending ──(1re barre après ts)──▶ armed ──(|pips| >= seuil)──▶ reacting
+  reacting ──(repli de pullback_ratio depuis le pic)──▶ peaked
+  peaked ──(nouveau plus haut)──▶ reacting
+  reacting / peaked ──(|pips| < pic × 0.5, signe opposé)──▶ reversed
+  tout état ──(barre au-delà de ts + horizon, ou fin du flux)──▶ done
+
+Chaque changement d'état est émis (Transition) au moment de la barre qui le
+provoque. Conventions de calculate_event_latency, pour que rejeu et calcul
+après coup concordent :
+  - référence = dernière clôture à ts - 1 min ou avant
+  - barres prises en compte : ts < barre <= ts + horizon
+  - pips = Δclôture × facteur du symbole ; pic = premier maximum de |pips|
+Le retournement suit family_stats_cube (REVERSAL_RATIO).
+
+Rejeu local :
+  python -m fx_impact_app.src.live_reaction replay --db warehouse.duckdb --start 2024-03-08 --end 2024-03-09
+Flux CSV (datetime,close) suivi en continu :
+  python -m fx_impact_app.src.live_reaction tail --db warehouse.duckdb --file bars.csv
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import queue
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+try:
+    from .family_stats_cube import REVERSAL_RATIO
+    from .fast_query import epoch_seconds, fetch_arrays
+    from .query_profiler import profiled_connect
+    from .symbols import get_symbol
+except ImportError:
+    from family_stats_cube import REVERSAL_RATIO
+    from fast_query import epoch_seconds, fetch_arrays
+    from query_profiler import profiled_connect
+    from symbols import get_symbol
+
+PENDING, ARMED, REACTING, PEAKED, REVERSED, DONE = "pending", "armed", "reacting", "peaked", "reversed", "done"
+
+DEFAULT_THRESHOLD_PIPS = 5.0
+DEFAULT_HORIZON_MIN = 30
+PULLBACK_RATIO = 0.3                # pic confirmé après un repli de 30 %
+
+Bar = Tuple[int, float]             # (epoch s, clôture)
+
+
+@dataclass
+class Transition:
+    event_key: str
+    event_ts: int                   # epoch s
+    state: str                      # nouvel état
+    previous: str
+    bar_ts: int
+    minutes: float                  # depuis l'événement
+    pips: float                     # mouvement signé à cette barre
+    peak_pips: float                # |pips| maximal jusqu'ici
+    direction: Optional[str]        # 'up' / 'down' (première barre au-dessus du seuil)
+
+
+@dataclass
+class EventState:
+    event_key: str
+    ts: int
+    state: str = PENDING
+    baseline: Optional[float] = None
+    latency_minutes: Optional[float] = None
+    direction: Optional[str] = None
+    peak_pips: float = 0.0          # |pips| max
+    peak_signed: float = 0.0
+    peak_minutes: float = 0.0
+    last_pips: float = 0.0
+    history: List[Transition] = field(default_factory=list)
+
+
+class LiveReactionDetector:
+    """État de réaction de chaque événement, mis à jour à chaque barre (on_bar)."""
+
+    def __init__(self, events: Iterable[Tuple[str, object]] = (), threshold_pips: float = DEFAULT_THRESHOLD_PIPS,
+                 horizon_minutes: int = DEFAULT_HORIZON_MIN, symbol: Optional[str] = None,
+                 pullback_ratio: float = PULLBACK_RATIO, reversal_ratio: float = REVERSAL_RATIO):
+        self.threshold_pips = threshold_pips
+        self.horizon_s = horizon_minutes * 60
+        self.symbol = get_symbol(symbol)
+        self.pullback_ratio = pullback_ratio
+        self.reversal_ratio = reversal_ratio
+        self._pending: List[Tuple[int, int, EventState]] = []     # tas (ts, ordre, état)
+        self._seq = 0
+        self.active: Dict[Tuple[str, int], EventState] = {}
+        self.finished: List[EventState] = []
+        self._last: Optional[Bar] = None            # deux dernières barres : référence
+        self._before_last: Optional[Bar] = None     # à l'armement (ts - 1 min ou avant)
+        for key, ts in events:
+            self.add_event(key, ts)
+
+    def add_event(self, event_key: str, ts) -> EventState:
+        ev = EventState(event_key, epoch_seconds(ts))
+        heapq.heappush(self._pending, (ev.ts, self._seq, ev))
+        self._seq += 1
+        return ev
+
+    def _emit(self, ev: EventState, state: str, bar_ts: int, out: List[Transition]) -> None:
+        t = Transition(ev.event_key, ev.ts, state, ev.state, bar_ts, (bar_ts - ev.ts) / 60.0,
+                       ev.last_pips, ev.peak_pips, ev.direction)
+        ev.state = state
+        ev.history.append(t)
+        out.append(t)
+
+    def _baseline(self, ts: int) -> Optional[float]:
+        for bar in (self._last, self._before_last):
+            if bar is not None and bar[0] <= ts - 60:
+                return bar[1]
+        return None
+
+    def on_bar(self, bar_ts, close: float) -> List[Transition]:
+        """Barre suivante (ordre chronologique) → transitions provoquées."""
+        bar_ts = epoch_seconds(bar_ts)
+        out: List[Transition] = []
+
+        # fin d'horizon : avant d'appliquer la barre
+        for key, ev in list(self.active.items()):
+            if bar_ts > ev.ts + self.horizon_s:
+                self._finish(key, ev, bar_ts, out)
+
+        while self._pending and self._pending[0][0] < bar_ts:
+            _, _, ev = heapq.heappop(self._pending)
+            if bar_ts > ev.ts + self.horizon_s:     # flux démarré trop tard
+                ev.state = DONE
+                self.finished.append(ev)
+                continue
+            ev.baseline = self._baseline(ev.ts)
+            if ev.baseline is None:                 # pas de prix avant l'événement
+                self._emit(ev, DONE, bar_ts, out)
+                self.finished.append(ev)
+                continue
+            self._emit(ev, ARMED, bar_ts, out)
+            self.active[(ev.event_key, ev.ts)] = ev
+
+        for ev in self.active.values():
+            self._update(ev, bar_ts, close, out)
+
+        self._before_last, self._last = self._last, (bar_ts, float(close))
+        return out
+
+    def _update(self, ev: EventState, bar_ts: int, close: float, out: List[Transition]) -> None:
+        pips = float(self.symbol.to_pips(close - ev.baseline))
+        move = abs(pips)
+        ev.last_pips = pips
+        new_peak = move > ev.peak_pips
+        if new_peak:
+            ev.peak_pips, ev.peak_signed, ev.peak_minutes = move, pips, (bar_ts - ev.ts) / 60.0
+
+        if ev.state == ARMED:
+            if move >= self.threshold_pips:
+                ev.latency_minutes = (bar_ts - ev.ts) / 60.0
+                ev.direction = "up" if pips > 0 else "down"
+                self._emit(ev, REACTING, bar_ts, out)
+            return
+        if ev.state == REVERSED:
+            return
+        if (move < ev.peak_pips * self.reversal_ratio and pips != 0
+                and (pips > 0) != (ev.peak_signed > 0)):
+            self._emit(ev, REVERSED, bar_ts, out)
+        elif ev.state == REACTING and move <= ev.peak_pips * (1 - self.pullback_ratio):
+            self._emit(ev, PEAKED, bar_ts, out)
+        elif ev.state == PEAKED and new_peak:
+            self._emit(ev, REACTING, bar_ts, out)
+
+    def _finish(self, key, ev: EventState, bar_ts: int, out: List[Transition]) -> None:
+        self._emit(ev, DONE, bar_ts, out)
+        del self.active[key]
+        self.finished.append(ev)
+
+    def close(self) -> List[Transition]:
+        """Fin du flux : les événements actifs passent à done."""
+        out: List[Transition] = []
+        bar_ts = self._last[0] if self._last else 0
+        for key, ev in list(self.active.items()):
+            self._finish(key, ev, bar_ts, out)
+        return out
+
+    def run(self, bars: Iterable[Bar], on_transition: Optional[Callable[[Transition], None]] = None
+            ) -> Iterator[Transition]:
+        """Consomme `bars` ; transitions renvoyées au fil de l'eau (et passées à on_transition)."""
+        for ts, close in bars:
+            for t in self.on_bar(ts, close):
+                if on_transition:
+                    on_transition(t)
+                yield t
+        for t in self.close():
+            if on_transition:
+                on_transition(t)
+            yield t
+
+    def summary(self, ev: EventState) -> Dict[str, object]:
+        """Mêmes champs que LatencyAnalyzer.calculate_event_latency."""
+        return {
+            "event_key": ev.event_key,
+            "initial_reaction_minutes": ev.latency_minutes,
+            "peak_time_minutes": ev.peak_minutes if ev.peak_pips > 0 else 0,
+            "peak_movement_pips": round(ev.peak_pips, 1),
+            "direction": ev.direction,
+            "state": ev.state,
+        }
+
+
+# ─── Sources de barres ────────────────────────────────────────────────────────
+
+def queue_source(q: "queue.Queue", timeout: Optional[float] = None) -> Iterator[Bar]:
+    """Barres (ts, close) lues dans une file jusqu'à la sentinelle None (ou timeout)."""
+    while True:
+        try:
+            item = q.get(timeout=timeout)
+        except queue.Empty:
+            return
+        if item is None:
+            return
+        yield item
+
+
+def tail_source(path, poll_seconds: float = 0.5, follow: bool = True,
+                stop: Optional[Callable[[], bool]] = None) -> Iterator[Bar]:
+    """
+    Lignes `datetime,close` d'un CSV alimenté en continu (en-tête ignoré) ;
+    follow=False : lit jusqu'à la fin puis s'arrête.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        while True:
+            chunk = f.readline()
+            if chunk:
+                buf += chunk
+                if not buf.endswith("\n"):          # ligne en cours d'écriture
+                    continue
+                line, buf = buf.strip(), ""
+                if not line or line[0].isalpha():
+                    continue
+                ts, close = line.split(",")[:2]
+                yield epoch_seconds(pd.Timestamp(ts)), float(close)
+            elif not follow or (stop and stop()):
+                return
+            else:
+                time.sleep(poll_seconds)
+
+
+def replay_bars(con, start, end, symbol: Optional[str] = None) -> Iterator[Bar]:
+    """Barres 1 minute de prices_1m (ou de la table du symbole) sur [start, end]."""
+    sym = get_symbol(symbol)
+    data = fetch_arrays(con, f"""
+        SELECT timestamp, close FROM {sym.table}
+        WHERE timestamp BETWEEN ? AND ? AND close IS NOT NULL
+        ORDER BY timestamp
+    """, [epoch_seconds(start), epoch_seconds(end)])
+    return zip(data["timestamp"].astype(int).tolist(), data["close"].astype(float).tolist())
+
+
+def _naive_utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert(None) if ts.tzinfo is not None else ts
+
+
+def events_between(con, start, end, countries: Optional[Sequence[str]] = None) -> List[Tuple[str, int]]:
+    """(event_key, epoch s) des événements du calendrier sur [start, end]."""
+    where, params = "ts_utc BETWEEN ? AND ?", [_naive_utc(start), _naive_utc(end)]
+    if countries:
+        where += " AND country IN (SELECT unnest(?))"
+        params.append(list(countries))
+    rows = con.execute(f"""
+        SELECT DISTINCT event_key, epoch_us(ts_utc) // 1000000 FROM events
+        WHERE {where} ORDER BY 2, 1
+    """, params).fetchall()
+    return [(k, int(t)) for k, t in rows]
+
+
+def replay(con, start, end, threshold_pips: float = DEFAULT_THRESHOLD_PIPS,
+           horizon_minutes: int = DEFAULT_HORIZON_MIN, symbol: Optional[str] = None,
+           countries: Optional[Sequence[str]] = None) -> Tuple[LiveReactionDetector, List[Transition]]:
+    """Rejoue les barres stockées sur [start, end] pour les événements de la période."""
+    det = LiveReactionDetector(events_between(con, start, end, countries), threshold_pips,
+                               horizon_minutes, symbol)
+    end_bars = pd.Timestamp(end) + pd.Timedelta(minutes=horizon_minutes + 1)
+    start_bars = pd.Timestamp(start) - pd.Timedelta(minutes=5)
+    return det, list(det.run(replay_bars(con, start_bars, end_bars, symbol)))
+
+
+def _print(t: Transition) -> None:
+    at = datetime.fromtimestamp(t.bar_ts, tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
+    print(f"{at}  {t.event_key:<30} {t.previous:>8} → {t.state:<8} "
+          f"+{t.minutes:4.0f} min  {t.pips:+6.1f} pips  pic {t.peak_pips:5.1f}  {t.direction or ''}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Détection en direct des réactions aux événements")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("replay", "tail"):
+        p = sub.add_parser(name)
+        p.add_argument("--db", default=str(Path(__file__).resolve().parents[1] / "data" / "warehouse.duckdb"))
+        p.add_argument("--symbol", default=None)
+        p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PIPS)
+        p.add_argument("--horizon", type=int, default=DEFAULT_HORIZON_MIN)
+        p.add_argument("--countries", nargs="*", default=None)
+    sub.choices["replay"].add_argument("--start", required=True)
+    sub.choices["replay"].add_argument("--end", required=True)
+    sub.choices["tail"].add_argument("--file", required=True, help="CSV datetime,close alimenté en continu")
+    sub.choices["tail"].add_argument("--days", type=int, default=1, help="événements des N prochains jours")
+    args = ap.parse_args()
+
+    with profiled_connect(args.db, read_only=True) as con:
+        if args.cmd == "replay":
+            det, _ = replay(con, args.start, args.end, args.threshold, args.horizon, args.symbol, args.countries)
+            for t in (t for ev in det.finished for t in ev.history):
+                _print(t)
+            return
+        now = pd.Timestamp.now(tz="UTC")
+        events = events_between(con, now - pd.Timedelta(minutes=args.horizon),
+                                now + pd.Timedelta(days=args.days), args.countries)
+    det = LiveReactionDetector(events, args.threshold, args.horizon, args.symbol)
+    print(f"{len(events)} événements suivis, flux {args.file}")
+    try:
+        for _ in det.run(tail_source(args.file), _print):
+            pass
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# fx_impact_app/src/metrics.py
+"""
+Métriques des moteurs de calcul (compteurs, jauges, histogrammes) au format
+texte Prometheus (exposition 0.0.4), sans dépendance externe.
+
+Export :
+  - fichier  : FX_METRICS_TEXTFILE=/var/lib/node_exporter/fx_impact.prom
+               (écriture atomique ; appelé en fin de script via write_textfile(),
+                et automatiquement à la sortie du process)
+  - HTTP     : FX_METRICS_PORT=9108 [FX_METRICS_ADDR=127.0.0.1]
+               → GET /metrics (serveur démarré une fois par process)
+
+Métriques :
+  fx_events_processed_total{engine}                 événements traités
+  fx_price_windows_fetched_total{engine}            fenêtres de prix lues
+  fx_cache_requests_total{cache,result}             hits / misses de cache
+  fx_compute_duration_seconds{engine,op}            durée des calculs (histogramme)
+  fx_precompute_family_duration_seconds{family}     pré-calcul par famille (histogramme)
+  fx_precompute_family_last_duration_seconds{family}
+  fx_ingest_rows_total{source}                      lignes ingérées
+  fx_ingest_rows_per_second{source}                 débit du dernier run
+"""
+from __future__ import annotations
+
+import atexit
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelKey = Tuple[str, ...]
+
+
+def _fmt_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels attendus {self.labelnames}, reçus {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("un compteur ne peut que croître")
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = float(value)
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # par label : [compte par bucket (non cumulé)..., somme, compte]
+        self._values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        k = self._key(labels)
+        i = next(i for i, b in enumerate(self.buckets) if value <= b)
+        with self._lock:
+            row = self._values.get(k)
+            if row is None:
+                row = self._values[k] = [0.0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def count(self, **labels: str) -> float:
+        row = self._values.get(self._key(labels))
+        return row[-1] if row else 0.0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        out: List[str] = []
+        for k, row in items:
+            acc = 0.0
+            for b, n in zip(self.buckets, row):
+                acc += n
+                le = 'le="%s"' % _fmt_value(b)
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, k, le)} {_fmt_value(acc)}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, k)} {_fmt_value(row[-2])}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, k)} {_fmt_value(row[-1])}")
+        return out
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _get_or_create(self, cls, name: str, doc: str, labelnames: Sequence[str], **kw) -> _Metric:
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, doc, labelnames, **kw)
+            elif m.kind != cls.kind or m.labelnames != tuple(labelnames):
+                raise ValueError(f"métrique {name} déjà déclarée différemment")
+            return m
+
+    def counter(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, doc, labelnames)  # type: ignore[return-value]
+
+    def gauge(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, doc, labelnames)  # type: ignore[return-value]
+
+    def histogram(self, name: str, doc: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, doc, labelnames, buckets=buckets)  # type: ignore[return-value]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[n] for n in sorted(self._metrics)]
+        return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+    def write_textfile(self, path: Optional[str] = None) -> Optional[str]:
+        """Écrit l'exposition Prometheus (tmp + os.replace). Défaut : FX_METRICS_TEXTFILE."""
+        path = path or os.environ.get("FX_METRICS_TEXTFILE")
+        if not path:
+            return None
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, target)
+        return target.as_posix()
+
+    def start_http_server(self, port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Sert GET /metrics dans un thread daemon (idempotent)."""
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((addr, int(port)), _Handler)
+        threading.Thread(target=self._server.serve_forever, name="fx-metrics-http", daemon=True).start()
+        return self._server
+
+
+def _shared_registry() -> MetricsRegistry:
+    """Une seule instance même si le module est importé sous plusieurs noms."""
+    for name in ("metrics", "src.metrics", "fx_impact_app.src.metrics"):
+        mod = sys.modules.get(name)
+        reg = getattr(mod, "REGISTRY", None) if mod is not None else None
+        if reg is not None:
+            return reg
+    return MetricsRegistry()
+
+
+REGISTRY = _shared_registry()
+
+EVENTS_PROCESSED = REGISTRY.counter(
+    "fx_events_processed_total", "Evenements traites par les moteurs de calcul", ["engine"])
+WINDOWS_FETCHED = REGISTRY.counter(
+    "fx_price_windows_fetched_total", "Fenetres de prix lues en base", ["engine"])
+CACHE_REQUESTS = REGISTRY.counter(
+    "fx_cache_requests_total", "Acces cache (result=hit|miss)", ["cache", "result"])
+COMPUTE_SECONDS = REGISTRY.histogram(
+    "fx_compute_duration_seconds", "Duree des calculs des moteurs", ["engine", "op"])
+PRECOMPUTE_FAMILY_SECONDS = REGISTRY.histogram(
+    "fx_precompute_family_duration_seconds", "Duree du pre-calcul par famille", ["family"])
+PRECOMPUTE_FAMILY_LAST = REGISTRY.gauge(
+    "fx_precompute_family_last_duration_seconds", "Duree du dernier pre-calcul par famille", ["family"])
+INGEST_ROWS = REGISTRY.counter(
+    "fx_ingest_rows_total", "Lignes ingerees", ["source"])
+INGEST_ROWS_PER_SEC = REGISTRY.gauge(
+    "fx_ingest_rows_per_second", "Debit d'ingestion du dernier run", ["source"])
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_ingest(source: str, rows: int, seconds: float) -> None:
+    INGEST_ROWS.inc(max(int(rows), 0), source=source)
+    INGEST_ROWS_PER_SEC.set(rows / seconds if seconds > 0 else 0.0, source=source)
+
+
+def write_textfile(path: Optional[str] = None) -> Optional[str]:
+    return REGISTRY.write_textfile(path)
+
+
+def _autostart() -> None:
+    port = os.environ.get("FX_METRICS_PORT")
+    if port and port.strip().isdigit():
+        try:
+            REGISTRY.start_http_server(int(port), os.environ.get("FX_METRICS_ADDR", "127.0.0.1"))
+        except OSError:
+            pass  # port déjà pris (autre process / rerun) : pas bloquant
+    if os.environ.get("FX_METRICS_TEXTFILE") and not getattr(REGISTRY, "_atexit_registered", False):
+        atexit.register(lambda: REGISTRY.write_textfile())
+        REGISTRY._atexit_registered = True  # type: ignore[attr-defined]
+
+
+_autostart()
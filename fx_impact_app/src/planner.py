@@ -0,0 +1,124 @@
+# fx_impact_app/src/planner.py
+"""
+Règles de prédiction du planificateur multi-événements, partagées par la page
+4_Planificateur et l'API (forecast_api /plan).
+
+Stats d'une famille (family_stats_from_engines) :
+  - latence : LatencyAnalyzer (seuil 5 pips, 5 événements minimum, historique
+    years_back × 365 jours), médiane / P20 / P80 de la réaction initiale
+  - TTR = latence médiane × 2 (P20 : × 1.5, P80 : × 3)
+  - MFE P80 : ForecastEngine à l'horizon 60 min
+Prédiction d'un événement (predict_event) : stats pré-calculées de
+event_families (precompute_family_stats, EUR/USD) si la famille y est, impact
+= precomputed_impact ; sinon stats calculées, impact = scaled_impact (formule
+de la grille de scénarios, cf. scenario_engine).
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from .metrics import cache_result
+    from .result_cache import cached, data_version
+    from .scenario_engine import precomputed_impact, predict_from_stats
+except ImportError:
+    from metrics import cache_result
+    from result_cache import cached, data_version
+    from scenario_engine import precomputed_impact, predict_from_stats
+
+PLAN_HORIZON_MIN = 60
+LATENCY_THRESHOLD_PIPS = 5.0
+LATENCY_MIN_EVENTS = 5
+DEFAULT_MFE_P80 = 10.0
+
+
+def family_stats_from_engines(analyzer, engine, pattern: str, years_back: int) -> Optional[Dict[str, Any]]:
+    """
+    Stats latence (LatencyAnalyzer) + MFE (ForecastEngine) d'une famille.
+    {'n_events': 0} sans historique, None si la structure renvoyée est
+    incomplète ; les erreurs des moteurs remontent.
+    """
+    latency_stats = analyzer.calculate_family_latency_stats(
+        family_pattern=pattern,
+        threshold_pips=LATENCY_THRESHOLD_PIPS,
+        min_events=LATENCY_MIN_EVENTS,
+        lookback_days=years_back * 365,
+    )
+    if not latency_stats or not isinstance(latency_stats, dict):
+        return None
+    if latency_stats.get('events_analyzed', 0) == 0:
+        return {'n_events': 0}
+    initial = latency_stats.get('initial_reaction')
+    if not initial:
+        return None
+
+    mfe_stats = engine.calculate_family_stats(pattern, horizon_minutes=PLAN_HORIZON_MIN,
+                                              hist_years=years_back, countries=None)
+    latency = initial['median_minutes']
+    return {
+        'n_events': latency_stats['events_analyzed'],
+        'latency_median': latency,
+        'latency_p20': initial.get('p20_minutes', latency * 0.5),
+        'latency_p80': initial.get('p80_minutes', latency * 1.5),
+        # TTR = latence × 2 (formule empirique)
+        'ttr_median': latency * 2,
+        'ttr_p20': latency * 1.5,
+        'ttr_p80': latency * 3,
+        'mfe_p80': mfe_stats.get('mfe_p80', DEFAULT_MFE_P80),
+    }
+
+
+@cached("planner_family_stats",
+        version=lambda pattern, years_back, db_path, symbol=None: data_version(db_path))
+def compute_family_stats(pattern: str, years_back: int, db_path: str,
+                         symbol: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """family_stats_from_engines avec des moteurs ouverts pour l'appel (cache partagé)."""
+    try:
+        from .forecaster_mvp import ForecastEngine
+        from .latency_analyzer import LatencyAnalyzer
+    except ImportError:
+        from forecaster_mvp import ForecastEngine
+        from latency_analyzer import LatencyAnalyzer
+
+    with LatencyAnalyzer(db_path, symbol=symbol) as analyzer:
+        engine = ForecastEngine(db_path, symbol=symbol)
+        try:
+            return family_stats_from_engines(analyzer, engine, pattern, years_back)
+        finally:
+            engine.close()
+
+
+def load_precomputed_stats(con) -> Dict[str, Dict[str, Any]]:
+    """Stats pré-calculées par famille (colonnes latency_* de event_families) ; {} si absentes."""
+    cols = {r[0] for r in con.execute(
+        "SELECT column_name FROM information_schema.columns WHERE lower(table_name) = 'event_families'"
+    ).fetchall()}
+    if 'latency_median' not in cols:
+        return {}
+    rows = con.execute("""
+        SELECT DISTINCT family, latency_median, latency_p20, latency_p80,
+               ttr_median, ttr_p20, ttr_p80, mfe_p80, n_events_latency
+        FROM event_families WHERE latency_median IS NOT NULL
+    """).fetchall()
+    return {row[0]: {
+        'latency_median': row[1], 'latency_p20': row[2], 'latency_p80': row[3],
+        'ttr_median': row[4], 'ttr_p20': row[5], 'ttr_p80': row[6],
+        'mfe_p80': row[7] if row[7] else DEFAULT_MFE_P80, 'n_events': row[8],
+    } for row in rows}
+
+
+def predict_event(family: str, surprise: float, precomputed: Dict[str, Dict[str, Any]],
+                  family_stats: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    Prédiction d'un événement : stats pré-calculées de la famille (nom avec
+    espaces → underscores), sinon family_stats() ; None sans historique.
+    """
+    key = family.replace(' ', '_')
+    cache_result("precomputed_stats", key in precomputed)
+    if key in precomputed:
+        return {**predict_from_stats(precomputed[key], surprise, precomputed_impact),
+                'source': 'precomputed_db'}
+    stats = family_stats()
+    if not stats or stats['n_events'] == 0:
+        return None
+    return {**predict_from_stats(stats, surprise), 'source': 'calculated'}
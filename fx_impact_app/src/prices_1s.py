@@ -0,0 +1,195 @@
+# fx_impact_app/src/prices_1s.py
+"""
+Prix à la seconde autour des événements, pour mesurer la latence sous la minute.
+
+Les réactions NFP / CPI se jouent dans la première minute : avec prices_1m la
+latence est quantifiée à la minute (`latency = i`). On stocke donc des prix à la
+seconde, mais seulement dans ±N minutes autour des événements du calendrier
+(WINDOW_BEFORE_MIN / WINDOW_AFTER_MIN) : volume et coût de requête bornés par
+le nombre d'événements, pas par la durée de l'historique.
+
+Table prices_1s (compacte, « partitionnée » par jour) :
+  day  DATE     jour UTC (clé de partition : tri (day, sec) → zone maps)
+  sec  INTEGER  seconde du jour [0, 86400)
+  px   INTEGER  dernier prix de la seconde en pipettes (prix × 100 000)
+Vue prices_1s_v (ts_utc TIMESTAMP, close DOUBLE) pour la lecture directe.
+
+Ingestion : ingest_ticks (ticks ou barres 1 s, ramenés au dernier prix de
+chaque seconde), p. ex. `ingest_prices_csv.py ticks.csv --resolution 1s`.
+
+Mesure (measure_latency_seconds) : comme window_fetch, fenêtres lues en une
+requête (jointure par jour, ≤ 2 jours par fenêtre) ; prix de référence = dernier
+prix avant l'événement dans la fenêtre stockée, latence = première seconde où
+|prix - référence| >= seuil.
+"""
+from __future__ import annotations
+
+import itertools
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .window_fetch import to_epoch_seconds
+except ImportError:
+    from window_fetch import to_epoch_seconds
+
+TABLE = "prices_1s"
+VIEW = "prices_1s_v"
+PX_SCALE = 100_000                  # pipettes par unité de prix (EUR/USD : 5 décimales)
+PIPETTES_PER_PIP = 10
+WINDOW_BEFORE_MIN = 5
+WINDOW_AFTER_MIN = 15
+DAY_S = 86_400
+
+_COUNTER = itertools.count()
+
+
+def ensure_table(con) -> None:
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            day DATE    NOT NULL,
+            sec INTEGER NOT NULL,
+            px  INTEGER NOT NULL
+        )
+    """)
+    con.execute(f"""
+        CREATE OR REPLACE VIEW {VIEW} AS
+        SELECT CAST(day AS TIMESTAMP) + to_seconds(sec) AS ts_utc,
+               px / {float(PX_SCALE)} AS close
+        FROM {TABLE}
+    """)
+
+
+def encode_px(close) -> np.ndarray:
+    return np.rint(np.asarray(close, dtype=float) * PX_SCALE).astype(np.int32)
+
+
+def event_windows(con, before_min: int = WINDOW_BEFORE_MIN, after_min: int = WINDOW_AFTER_MIN,
+                  countries: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Intervalles [ts - before, ts + after] (epoch s) autour des événements, fusionnés et triés."""
+    where = "WHERE ts_utc IS NOT NULL"
+    params: list = []
+    if countries:
+        where += " AND country IN (SELECT unnest(?))"
+        params.append(list(countries))
+    ts = con.execute(f"SELECT DISTINCT epoch_us(ts_utc) // 1000000 FROM events {where} ORDER BY 1",
+                     params).fetchnumpy()
+    t = np.asarray(next(iter(ts.values())), dtype=np.int64)
+    if len(t) == 0:
+        return t, t
+    starts, ends = t - before_min * 60, t + after_min * 60
+    # fusion des fenêtres qui se recouvrent (t trié → starts triés)
+    run_end = np.maximum.accumulate(ends)
+    new = np.ones(len(t), dtype=bool)
+    new[1:] = starts[1:] > run_end[:-1]
+    return starts[new], np.maximum.reduceat(ends, np.flatnonzero(new))
+
+
+def ingest_ticks(con, df: pd.DataFrame, before_min: int = WINDOW_BEFORE_MIN,
+                 after_min: int = WINDOW_AFTER_MIN, countries: Optional[Sequence[str]] = None) -> int:
+    """
+    Insère les prix de `df` (colonnes datetime, close) situés dans une fenêtre
+    d'événement, au dernier prix de chaque seconde ; remplace les secondes déjà
+    présentes. Renvoie le nombre de secondes écrites.
+    """
+    ensure_table(con)
+    if df.empty:
+        return 0
+    t = to_epoch_seconds(df["datetime"])
+    close = df["close"].to_numpy(dtype=float)
+    starts, ends = event_windows(con, before_min, after_min, countries)
+    if len(starts) == 0:
+        return 0
+    k = np.searchsorted(starts, t, side="right") - 1
+    keep = (k >= 0) & (t <= ends[np.clip(k, 0, None)])
+    if not keep.any():
+        return 0
+    t, close = t[keep], close[keep]
+    order = np.argsort(t, kind="stable")
+    t, close = t[order], close[order]
+    last = np.r_[t[1:] != t[:-1], True]             # dernier prix de chaque seconde
+    t, close = t[last], close[last]
+
+    rows = pd.DataFrame({
+        "day": pd.to_datetime(t // DAY_S * DAY_S, unit="s").date,
+        "sec": (t % DAY_S).astype(np.int32),
+        "px": encode_px(close),
+    })
+    rel = f"_fx_ticks_{next(_COUNTER)}"
+    con.register(rel, rows)
+    try:
+        con.execute(f"DELETE FROM {TABLE} p USING {rel} n WHERE p.day = n.day AND p.sec = n.sec")
+        con.execute(f"INSERT INTO {TABLE} SELECT CAST(day AS DATE), sec, px FROM {rel} ORDER BY day, sec")
+    finally:
+        con.unregister(rel)
+    return len(rows)
+
+
+def measure_latency_seconds(con, event_times, threshold_pips: float = 5.0,
+                            before_min: int = WINDOW_BEFORE_MIN,
+                            after_min: int = WINDOW_AFTER_MIN) -> pd.DataFrame:
+    """
+    Latence à la seconde pour chaque événement (même ordre que event_times).
+
+    Colonnes : latency_seconds (None sans réaction), peak_seconds, peak_pips,
+    direction ('up' / 'down' / None), had_reaction, ticks (0 : pas de données 1 s).
+    """
+    t = to_epoch_seconds(event_times)
+    n = len(t)
+    t0, t1 = t - before_min * 60, t + after_min * 60
+    d0, d1 = t0 // DAY_S, t1 // DAY_S
+    reps = d1 - d0 + 1
+    first = np.repeat(np.cumsum(reps) - reps, reps)
+    win = pd.DataFrame({
+        "win_id": np.repeat(np.arange(n, dtype=np.int64), reps),
+        "day": pd.to_datetime((np.repeat(d0, reps) + (np.arange(int(reps.sum())) - first)) * DAY_S,
+                              unit="s").date,
+        "t0": np.repeat(t0, reps),
+        "t1": np.repeat(t1, reps),
+    })
+    rel = f"_fx_windows_1s_{next(_COUNTER)}"
+    con.register(rel, win)
+    try:
+        data = con.execute(f"""
+            SELECT w.win_id,
+                   (CAST(p.day AS DATE) - DATE '1970-01-01') * {DAY_S} + p.sec AS ts,
+                   p.px
+            FROM {TABLE} p
+            JOIN {rel} w ON p.day = CAST(w.day AS DATE)
+            WHERE (CAST(p.day AS DATE) - DATE '1970-01-01') * {DAY_S} + p.sec BETWEEN w.t0 AND w.t1
+            ORDER BY w.win_id, ts
+        """).fetchnumpy()
+    finally:
+        con.unregister(rel)
+
+    win_id = np.asarray(data["win_id"], dtype=np.int64)
+    ts = np.asarray(data["ts"], dtype=np.int64)
+    px = np.asarray(data["px"], dtype=np.int64)
+    bounds = np.searchsorted(win_id, np.arange(n + 1), side="left")
+    threshold = threshold_pips * PIPETTES_PER_PIP
+
+    rows = []
+    for i in range(n):
+        a, b = bounds[i], bounds[i + 1]
+        s, p = ts[a:b], px[a:b]
+        split = int(np.searchsorted(s, t[i], side="left"))      # [a, split) : avant l'événement
+        if split == 0 or split == len(s):
+            rows.append({"latency_seconds": None, "peak_seconds": None, "peak_pips": None,
+                         "direction": None, "had_reaction": False, "ticks": int(b - a)})
+            continue
+        delta = p[split:] - p[split - 1]
+        move = np.abs(delta)
+        hit = np.flatnonzero(move >= threshold)
+        peak = int(np.argmax(move))
+        rows.append({
+            "latency_seconds": int(s[split + hit[0]] - t[i]) if len(hit) else None,
+            "peak_seconds": int(s[split + peak] - t[i]),
+            "peak_pips": float(move[peak]) / PIPETTES_PER_PIP,
+            "direction": ("up" if delta[hit[0]] > 0 else "down") if len(hit) else None,
+            "had_reaction": bool(len(hit)),
+            "ticks": int(b - a),
+        })
+    return pd.DataFrame(rows, columns=["latency_seconds", "peak_seconds", "peak_pips",
+                                       "direction", "had_reaction", "ticks"])
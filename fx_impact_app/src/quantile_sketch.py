@@ -0,0 +1,128 @@
+# fx_impact_app/src/quantile_sketch.py
+"""
+Sketch de quantiles KLL (Karnin–Lang–Liberty), NumPy pur, fusionnable.
+
+Structure : une pile de compacteurs ; le niveau h contient des valeurs de poids
+2^h. Quand le sketch dépasse sa capacité, le plus bas niveau plein est trié et
+une valeur sur deux (décalage alterné) monte au niveau supérieur : mémoire
+O(k log(n/k)), mise à jour O(1) amortie, erreur de rang ~1.7 % pour k = 200.
+
+Tant que n < k, rien n'est compacté (niveau 0 seul) et
+quantile() est exact : même interpolation linéaire que np.percentile. Au-delà,
+chaque valeur est placée au centre de sa masse cumulée puis interpolée.
+
+merge() concatène les niveaux puis compacte : l'ordre des fusions (pays,
+périodes) ne change pas la garantie d'erreur. to_bytes()/from_bytes()
+sérialisent en BLOB (en-tête int64 + valeurs float64).
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, List, Sequence, Union
+
+import numpy as np
+
+DEFAULT_K = 200
+_C = 2.0 / 3.0          # décroissance des capacités vers les niveaux bas
+
+
+class KLLSketch:
+    """Sketch de quantiles fusionnable ; n = nombre de valeurs insérées."""
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = int(k)
+        self.n = 0
+        self.levels: List[List[float]] = [[]]
+        self._flips = 0
+
+    # ------------------------------------------------------------------ capacité
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return max(2, int(math.ceil(self.k * _C ** depth)))
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def size(self) -> int:
+        return sum(len(lv) for lv in self.levels)
+
+    # ------------------------------------------------------------------ mise à jour
+    def update(self, x: float) -> None:
+        self.levels[0].append(float(x))
+        self.n += 1
+        if self.size() >= self._max_size():
+            self._compress()
+
+    def update_many(self, values: Iterable[float]) -> None:
+        """Insère les valeurs une à une (NaN ignorés)."""
+        for x in np.asarray(list(values), dtype=float).ravel():
+            if not np.isnan(x):
+                self.update(x)
+
+    def _compress(self) -> None:
+        while self.size() >= self._max_size():
+            for h, lv in enumerate(self.levels):
+                if len(lv) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append([])
+                    items = sorted(lv)
+                    keep = [items.pop()] if len(items) % 2 else []
+                    offset = self._flips % 2
+                    self._flips += 1
+                    self.levels[h + 1].extend(items[offset::2])
+                    self.levels[h] = keep
+                    break
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fusionne `other` dans ce sketch (en place) et le renvoie."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, lv in enumerate(other.levels):
+            self.levels[h].extend(lv)
+        self.n += other.n
+        self._compress()
+        return self
+
+    # ------------------------------------------------------------------ requêtes
+    def _weighted(self):
+        values = np.concatenate([np.asarray(lv, dtype=float) for lv in self.levels])
+        weights = np.concatenate([np.full(len(lv), 2.0 ** h) for h, lv in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], weights[order]
+
+    def quantile(self, q: Union[float, Sequence[float]]):
+        """Quantile(s) q ∈ [0, 1] ; NaN si vide. Exact (np.percentile) tant que non compacté."""
+        qs = np.atleast_1d(np.asarray(q, dtype=float))
+        if self.size() == 0:
+            out = np.full(len(qs), np.nan)
+        else:
+            values, weights = self._weighted()
+            total = weights.sum()
+            centers = np.cumsum(weights) - weights + (weights - 1) / 2.0
+            out = np.interp(qs * (total - 1), centers, values)
+        return float(out[0]) if np.ndim(q) == 0 else out
+
+    def percentile(self, p: Union[float, Sequence[float]]):
+        return self.quantile(np.asarray(p, dtype=float) / 100.0)
+
+    # ------------------------------------------------------------------ (dé)sérialisation
+    def to_bytes(self) -> bytes:
+        header = np.array([self.k, self.n, self._flips, len(self.levels),
+                           *(len(lv) for lv in self.levels)], dtype=np.int64)
+        data = np.concatenate([np.asarray(lv, dtype=np.float64) for lv in self.levels])
+        return header.tobytes() + data.tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "KLLSketch":
+        blob = bytes(blob)
+        k, n, flips, n_levels = np.frombuffer(blob, dtype=np.int64, count=4)
+        sizes = np.frombuffer(blob, dtype=np.int64, count=int(n_levels), offset=32)
+        data = np.frombuffer(blob, dtype=np.float64, offset=8 * (4 + int(n_levels)))
+        sk = cls(int(k))
+        sk.n, sk._flips = int(n), int(flips)
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+        sk.levels = [data[a:b].tolist() for a, b in zip(bounds[:-1], bounds[1:])]
+        return sk
+
+    def __repr__(self) -> str:
+        return f"KLLSketch(k={self.k}, n={self.n}, retained={self.size()}, levels={len(self.levels)})"
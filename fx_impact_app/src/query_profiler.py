@@ -0,0 +1,396 @@
+# fx_impact_app/src/query_profiler.py
+"""
+Instrumentation des requêtes DuckDB (durée, lignes, empreinte SQL normalisée).
+
+- profiled_connect(...) renvoie une connexion DuckDB « proxy » : chaque execute()
+  est chronométré ; le temps de fetch et le nombre de lignes sont ajoutés lorsque
+  le résultat est lu (fetchone/fetchall/fetchdf/df/fetchnumpy/arrow...).
+- Les mesures vont dans un profileur unique par process :
+    * ring buffer des N dernières requêtes (FX_QUERY_PROFILE_BUFFER, défaut 500)
+    * agrégats par empreinte SQL : count, total, p50, p95, max, lignes
+- Mode opt-in EXPLAIN ANALYZE : FX_QUERY_EXPLAIN_MS=<seuil ms> capture le plan des
+  SELECT plus lents que le seuil (ré-exécution, donc à réserver au diagnostic).
+- FX_QUERY_PROFILE=0 désactive tout (profiled_connect renvoie la connexion brute).
+- FX_QUERY_PROFILE_JSON=<chemin> : dump JSON automatique en fin de process.
+
+Usage:
+  from query_profiler import profiled_connect, get_profiler
+  con = profiled_connect(get_db_path(), read_only=True)
+  con.execute("SELECT ...", [x]).fetchdf()
+  get_profiler().aggregates()
+"""
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+import duckdb
+
+try:
+    from .config import db_read_only
+except ImportError:
+    from config import db_read_only
+
+_SAMPLES_PER_FINGERPRINT = 2048
+_SQL_PREVIEW_CHARS = 500
+
+# ------------------------------------------------------------
+# Empreinte SQL
+# ------------------------------------------------------------
+_RE_COMMENT_LINE = re.compile(r"--[^\n]*")
+_RE_COMMENT_BLOCK = re.compile(r"/\*.*?\*/", re.S)
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?:e[-+]?\d+)?(?![\w.])", re.I)
+_RE_PARAM = re.compile(r"\$\d+|\?")
+_RE_IN_LIST = re.compile(r"\(\?(?:,\?)+\)")
+_RE_OR_CHAIN = re.compile(r"(\([^()]*\) ?or ?)+\([^()]*\)")
+_RE_WS = re.compile(r"\s+")
+_RE_PUNCT_WS = re.compile(r" ?([=<>!,()]) ?")
+
+
+@functools.lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    """
+    Normalise une requête pour regrouper les variantes :
+    littéraux → ?, listes IN (?,?,...) → (?+), chaînes OR répétées → (...)+,
+    commentaires supprimés, espaces compactés (et retirés autour de = < > , ( )), minuscules.
+    """
+    s = _RE_COMMENT_BLOCK.sub(" ", sql)
+    s = _RE_COMMENT_LINE.sub(" ", s)
+    s = _RE_STRING.sub("?", s)
+    s = _RE_NUMBER.sub("?", s)
+    s = _RE_PARAM.sub("?", s)
+    s = _RE_WS.sub(" ", s).strip().lower()
+    s = _RE_PUNCT_WS.sub(r"\1", s)
+    s = _RE_IN_LIST.sub("(?+)", s)
+    s = _RE_OR_CHAIN.sub("(...)+", s)
+    return s
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    """Percentile « nearest rank » sur une liste triée (q dans [0, 100])."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(q / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+def _caller() -> str:
+    """Premier frame hors de ce module (fichier:ligne fonction)."""
+    f = sys._getframe(2)
+    here = __file__
+    while f is not None and f.f_code.co_filename == here:
+        f = f.f_back
+    if f is None:
+        return "?"
+    return f"{Path(f.f_code.co_filename).name}:{f.f_lineno} {f.f_code.co_name}"
+
+
+# ------------------------------------------------------------
+# Profileur
+# ------------------------------------------------------------
+@dataclass
+class QueryRecord:
+    fingerprint: str
+    sql: str
+    caller: str
+    started_at: str
+    duration_ms: float
+    rows: Optional[int] = None
+    explain: Optional[str] = None
+
+
+@dataclass
+class _FingerprintStats:
+    count: int = 0
+    total_ms: float = 0.0
+    rows: int = 0
+    last_caller: str = ""
+    example_sql: str = ""
+    samples: Deque[QueryRecord] = field(default_factory=lambda: deque(maxlen=_SAMPLES_PER_FINGERPRINT))
+
+
+class QueryProfiler:
+    """Ring buffer + agrégats par empreinte. Thread-safe (les reruns Streamlit sont multi-threads)."""
+
+    def __init__(self, buffer_size: int = 500, explain_threshold_ms: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._recent: Deque[QueryRecord] = deque(maxlen=buffer_size)
+        self._stats: Dict[str, _FingerprintStats] = {}
+        self.explain_threshold_ms = explain_threshold_ms
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    # -- enregistrement ---------------------------------------------------
+    def record(self, sql: str, duration_ms: float, rows: Optional[int] = None,
+               caller: Optional[str] = None) -> QueryRecord:
+        fp = fingerprint(sql)
+        rec = QueryRecord(
+            fingerprint=fp,
+            sql=sql.strip()[:_SQL_PREVIEW_CHARS],
+            caller=caller or _caller(),
+            started_at=datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            duration_ms=duration_ms,
+            rows=rows,
+        )
+        with self._lock:
+            st = self._stats.get(fp)
+            if st is None:
+                st = self._stats[fp] = _FingerprintStats(example_sql=rec.sql)
+            st.count += 1
+            st.total_ms += duration_ms
+            st.rows += rows or 0
+            st.last_caller = rec.caller
+            st.samples.append(rec)
+            self._recent.append(rec)
+        return rec
+
+    def add_fetch(self, rec: QueryRecord, fetch_ms: float, rows: int) -> None:
+        """Ajoute le temps de lecture et les lignes au record d'un execute()."""
+        with self._lock:
+            rec.duration_ms += fetch_ms
+            rec.rows = (rec.rows or 0) + rows
+            st = self._stats.get(rec.fingerprint)
+            if st is not None:
+                st.total_ms += fetch_ms
+                st.rows += rows
+
+    def should_explain(self, rec: QueryRecord) -> bool:
+        thr = self.explain_threshold_ms
+        if thr is None or rec.explain is not None or rec.duration_ms < thr:
+            return False
+        head = rec.fingerprint.lstrip("( ")
+        return head.startswith("select") or head.startswith("with")
+
+    # -- lecture ----------------------------------------------------------
+    def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._recent)
+        if n is not None:
+            items = items[-n:]
+        return [asdict(r) for r in reversed(items)]
+
+    def aggregates(self) -> List[Dict[str, Any]]:
+        """Agrégats par empreinte, triés par temps total décroissant."""
+        with self._lock:
+            snap = [(fp, st.count, st.total_ms, st.rows, st.last_caller, st.example_sql,
+                     sorted(r.duration_ms for r in st.samples))
+                    for fp, st in self._stats.items()]
+        out = []
+        for fp, count, total, rows, caller, example, durs in snap:
+            out.append({
+                "fingerprint": fp,
+                "count": count,
+                "total_ms": round(total, 2),
+                "mean_ms": round(total / count, 2) if count else 0.0,
+                "p50_ms": round(_percentile(durs, 50), 2),
+                "p95_ms": round(_percentile(durs, 95), 2),
+                "max_ms": round(durs[-1], 2) if durs else 0.0,
+                "rows": rows,
+                "last_caller": caller,
+                "example_sql": example,
+            })
+        out.sort(key=lambda d: d["total_ms"], reverse=True)
+        return out
+
+    def explains(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            recs = [r for st in self._stats.values() for r in st.samples if r.explain]
+        return [asdict(r) for r in sorted(recs, key=lambda r: r.duration_ms, reverse=True)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "dumped_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "explain_threshold_ms": self.explain_threshold_ms,
+            "aggregates": self.aggregates(),
+            "recent": self.recent(),
+            "explains": self.explains(),
+        }
+
+    def dump_json(self, path: Optional[str] = None) -> str:
+        """Sérialise le profil ; écrit dans `path` si fourni. Renvoie le JSON."""
+        payload = json.dumps(self.to_dict(), ensure_ascii=False, indent=2, default=str)
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_text(payload, encoding="utf-8")
+        return payload
+
+    def reset(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._stats.clear()
+            self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _env_float(name: str) -> Optional[float]:
+    v = os.environ.get(name)
+    try:
+        return float(v) if v not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _shared_profiler() -> QueryProfiler:
+    """
+    Ce module est importé sous plusieurs noms (query_profiler, src.query_profiler,
+    fx_impact_app.src.query_profiler) selon la page : on partage une seule instance.
+    """
+    for name in ("query_profiler", "src.query_profiler", "fx_impact_app.src.query_profiler"):
+        mod = sys.modules.get(name)
+        prof = getattr(mod, "_PROFILER", None) if mod is not None else None
+        if prof is not None:
+            return prof
+    return QueryProfiler(
+        buffer_size=int(_env_float("FX_QUERY_PROFILE_BUFFER") or 500),
+        explain_threshold_ms=_env_float("FX_QUERY_EXPLAIN_MS"),
+    )
+
+
+_PROFILER = _shared_profiler()
+
+
+def get_profiler() -> QueryProfiler:
+    return _PROFILER
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get("FX_QUERY_PROFILE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+# ------------------------------------------------------------
+# Proxies DuckDB
+# ------------------------------------------------------------
+def _count_rows(res: Any) -> int:
+    if res is None:
+        return 0
+    if isinstance(res, dict):  # fetchnumpy
+        return len(next(iter(res.values()), ()))
+    if hasattr(res, "num_rows"):  # arrow
+        return int(res.num_rows)
+    if isinstance(res, tuple):  # fetchone
+        return 1
+    try:
+        return len(res)
+    except TypeError:
+        return 0
+
+
+_FULL_FETCH = ("fetchall", "fetchdf", "df", "fetch_df", "fetchnumpy", "fetch_arrow_table", "arrow", "pl")
+_PARTIAL_FETCH = ("fetchone", "fetchmany", "fetch_df_chunk")
+
+
+class ProfiledResult:
+    """Résultat d'execute() : chronomètre les fetch et compte les lignes."""
+
+    def __init__(self, conn: "ProfiledConnection", raw: Any, rec: QueryRecord, query: str, params: Any):
+        self._conn = conn
+        self._raw = raw
+        self._rec = rec
+        self._query = query
+        self._params = params
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._raw, name)
+        if name in _FULL_FETCH or name in _PARTIAL_FETCH:
+            def fetch(*args, **kwargs):
+                t0 = time.perf_counter()
+                res = attr(*args, **kwargs)
+                prof = self._conn._profiler
+                prof.add_fetch(self._rec, (time.perf_counter() - t0) * 1000.0, _count_rows(res))
+                if name in _FULL_FETCH and prof.should_explain(self._rec):
+                    self._conn._explain(self._rec, self._query, self._params)
+                return res
+            return fetch
+        return attr
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class ProfiledConnection:
+    """Proxy fin autour de duckdb.DuckDBPyConnection (API identique)."""
+
+    def __init__(self, raw: duckdb.DuckDBPyConnection, profiler: Optional[QueryProfiler] = None):
+        self._raw = raw
+        self._profiler = profiler or get_profiler()
+
+    def execute(self, query: str, parameters: Any = None, *args, **kwargs) -> ProfiledResult:
+        caller = _caller()
+        t0 = time.perf_counter()
+        if parameters is None:
+            raw = self._raw.execute(query, *args, **kwargs)
+        else:
+            raw = self._raw.execute(query, parameters, *args, **kwargs)
+        rec = self._profiler.record(query, (time.perf_counter() - t0) * 1000.0, caller=caller)
+        return ProfiledResult(self, raw, rec, query, parameters)
+
+    def executemany(self, query: str, parameters: Any = None, *args, **kwargs) -> ProfiledResult:
+        caller = _caller()
+        t0 = time.perf_counter()
+        raw = self._raw.executemany(query, parameters or [], *args, **kwargs)
+        rec = self._profiler.record(query, (time.perf_counter() - t0) * 1000.0, caller=caller)
+        return ProfiledResult(self, raw, rec, query, None)
+
+    def cursor(self) -> "ProfiledConnection":
+        return ProfiledConnection(self._raw.cursor(), self._profiler)
+
+    def _explain(self, rec: QueryRecord, query: str, params: Any) -> None:
+        try:
+            q = "EXPLAIN ANALYZE " + query
+            rows = self._raw.execute(q, params).fetchall() if params is not None else self._raw.execute(q).fetchall()
+            rec.explain = "\n".join(str(r[-1]) for r in rows)
+        except Exception as e:  # plan non capturable : on n'interrompt jamais la page
+            rec.explain = f"EXPLAIN ANALYZE indisponible: {e}"
+
+    @property
+    def raw(self) -> duckdb.DuckDBPyConnection:
+        return self._raw
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+    def __enter__(self) -> "ProfiledConnection":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._raw.close()
+
+
+def profiled_connect(database: str = ":memory:", read_only: Optional[bool] = None, **kwargs) -> Any:
+    """
+    duckdb.connect() instrumenté (ou brut si FX_QUERY_PROFILE=0).
+    read_only=None : mode du process (config.db_read_only), pour qu'une même base
+    ne soit jamais ouverte avec deux configurations différentes.
+    """
+    if read_only is None:
+        read_only = database != ":memory:" and db_read_only()
+    raw = duckdb.connect(database, read_only=read_only, **kwargs)
+    if not profiling_enabled():
+        return raw
+    return ProfiledConnection(raw)
+
+
+def _dump_at_exit() -> None:
+    path = os.environ.get("FX_QUERY_PROFILE_JSON")
+    if path and _PROFILER.aggregates():
+        try:
+            _PROFILER.dump_json(path)
+        except Exception:
+            pass
+
+
+if not getattr(_PROFILER, "_atexit_registered", False):
+    atexit.register(_dump_at_exit)
+    _PROFILER._atexit_registered = True  # type: ignore[attr-defined]
@@ -0,0 +1,235 @@
+# fx_impact_app/src/result_cache.py
+"""
+Cache de résultats partagé par tout le process (toutes les sessions Streamlit).
+
+Les caches en st.session_state étaient par session et sans borne : dix
+utilisateurs calculaient dix fois les mêmes stats NFP et en gardaient chacun
+une copie. Ici une seule instance par process (comme le REGISTRY de metrics,
+même si le module est importé sous plusieurs noms) :
+
+  - budget en octets (FX_RESULT_CACHE_MB, 256 par défaut), éviction LRU ;
+    taille estimée par entrée (DataFrame : memory_usage(deep=True), ndarray :
+    nbytes, dict / list / tuple : somme des éléments)
+  - clé = (nom, paramètres du calcul, version des données) : une base
+    modifiée (fichier ou WAL DuckDB réécrit, snapshot appliqué) change la
+    version, les anciennes entrées ne sont plus lues et sortent par LRU
+  - un seul calcul par clé : les sessions qui demandent la même clé pendant
+    le calcul attendent son résultat au lieu de le recalculer
+  - les valeurs sont copiées (copy.deepcopy) à l'entrée et à la sortie :
+    une page qui modifie son résultat ne touche pas celui des autres
+
+Décorateurs :
+  @cached("backtest_prices", version=lambda times, db_path: data_version(db_path))
+  def f(times, db_path): ...
+
+  class ForecastEngine:
+      @cached_method("forecast_family_stats")      # version : self.db_path, self.symbol
+      def _calculate_family_stats(self, ...): ...
+
+Base non fichier (':memory:') → data_version None → pas de cache.
+Métriques : fx_cache_requests_total{cache,result}, fx_result_cache_bytes,
+fx_result_cache_entries, fx_result_cache_evictions_total.
+"""
+from __future__ import annotations
+
+import copy
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .metrics import REGISTRY, cache_result
+except ImportError:
+    from metrics import REGISTRY, cache_result
+
+DEFAULT_MAX_MB = 256
+
+CACHE_BYTES = REGISTRY.gauge("fx_result_cache_bytes", "Taille estimee du cache de resultats partage")
+CACHE_ENTRIES = REGISTRY.gauge("fx_result_cache_entries", "Entrees du cache de resultats partage")
+CACHE_EVICTIONS = REGISTRY.counter("fx_result_cache_evictions_total", "Entrees evincees (LRU)")
+
+
+def sizeof(value: Any) -> int:
+    """Taille estimée en octets (récursive sur les conteneurs usuels)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def freeze(value: Any) -> Hashable:
+    """Paramètres → clé hashable (listes → tuples, dicts triés, ndarray → tuple)."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(freeze(v) for v in value))
+    if isinstance(value, (np.ndarray, pd.Index, pd.Series)):
+        return tuple(freeze(v) for v in np.asarray(value).tolist())
+    if isinstance(value, Path):
+        return value.as_posix()
+    hash(value)                                             # TypeError si non hashable
+    return value
+
+
+def data_version(db_path) -> Optional[Tuple[int, ...]]:
+    """(mtime, taille) du fichier DuckDB et de son WAL ; None si pas un fichier."""
+    path = Path(str(db_path))
+    try:
+        st = path.stat()
+    except (OSError, ValueError):
+        return None
+    try:
+        wal = os.stat(f"{path}.wal")
+        wal_v = (wal.st_mtime_ns, wal.st_size)
+    except OSError:
+        wal_v = (0, 0)
+    return (st.st_mtime_ns, st.st_size) + wal_v
+
+
+class ResultCache:
+    """LRU thread-safe borné en octets ; une entrée plus grosse que le budget n'est pas gardée."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, threading.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, _, expires = entry
+            if expires is not None and time.monotonic() >= expires:
+                self._drop(key)
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def _drop(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        size = sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            while self._bytes + size > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                CACHE_EVICTIONS.inc()
+            expires = time.monotonic() + ttl if ttl is not None else None
+            self._entries[key] = (copy.deepcopy(value), size, expires)
+            self._bytes += size
+            CACHE_BYTES.set(self._bytes)
+            CACHE_ENTRIES.set(len(self._entries))
+
+    def get_or_compute(self, name: str, key: Hashable, compute: Callable[[], Any],
+                       ttl: Optional[float] = None) -> Any:
+        """Valeur en cache (copie) ou compute() ; un seul calcul à la fois par clé."""
+        hit, value = self._lookup(key)
+        if not hit:
+            with self._lock:
+                inflight = self._inflight.setdefault(key, threading.Lock())
+            with inflight:
+                hit, value = self._lookup(key)              # calculé pendant l'attente ?
+                if not hit:
+                    try:
+                        value = compute()
+                        self.put(key, value, ttl)
+                    finally:
+                        with self._lock:
+                            self._inflight.pop(key, None)
+                    cache_result(name, False)
+                    return value
+        cache_result(name, True)
+        return copy.deepcopy(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            CACHE_BYTES.set(0)
+            CACHE_ENTRIES.set(0)
+
+
+def _shared_cache() -> ResultCache:
+    """Une seule instance même si le module est importé sous plusieurs noms."""
+    for name in ("result_cache", "src.result_cache", "fx_impact_app.src.result_cache"):
+        mod = sys.modules.get(name)
+        cache = getattr(mod, "CACHE", None) if mod is not None else None
+        if cache is not None:
+            return cache
+    mb = os.environ.get("FX_RESULT_CACHE_MB", "").strip()
+    return ResultCache(int(float(mb) * 2**20) if mb else DEFAULT_MAX_MB * 2**20)
+
+
+CACHE = _shared_cache()
+
+
+def cached(name: str, version: Optional[Callable[..., Any]] = None, ttl: Optional[float] = None,
+           cache: Optional[ResultCache] = None):
+    """
+    Décorateur : résultat partagé, clé = (name, arguments, version(*args, **kwargs)).
+    version renvoie None → appel direct, sans cache (données non versionnables).
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            v = version(*args, **kwargs) if version is not None else ()
+            if v is None:
+                return fn(*args, **kwargs)
+            key = (name, freeze(args), freeze(kwargs), v)
+            return (cache if cache is not None else CACHE).get_or_compute(name, key, lambda: fn(*args, **kwargs), ttl)
+        return wrapper
+    return deco
+
+
+def engine_version(engine) -> Optional[Tuple]:
+    """Version d'un moteur (ForecastEngine, LatencyAnalyzer) : base, symbole, données."""
+    v = data_version(engine.db_path)
+    if v is None:
+        return None
+    return (Path(str(engine.db_path)).resolve().as_posix(), engine.symbol.code) + v
+
+
+def cached_method(name: str, ttl: Optional[float] = None, cache: Optional[ResultCache] = None):
+    """Comme cached pour une méthode de moteur : self remplacé par engine_version(self)."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            v = engine_version(self)
+            if v is None:
+                return fn(self, *args, **kwargs)
+            key = (name, freeze(args), freeze(kwargs), v)
+            return (cache if cache is not None else CACHE).get_or_compute(name, key, lambda: fn(self, *args, **kwargs), ttl)
+        return wrapper
+    return deco
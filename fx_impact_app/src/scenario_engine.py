@@ -0,0 +1,154 @@
+# fx_impact_app/src/scenario_engine.py
+"""
+Scénarios de surprise vectorisés pour le planificateur multi-événements.
+
+Les stats de famille (MFE P80, latence, TTR) sont prises une fois par événement
+(celles des prédictions affichées) ; une grille arbitraire de variations de
+surprise (p. ex. 41 deltas × N événements) est ensuite évaluée en une opération
+NumPy (matrice deltas × événements), sans repasser par predict_impact /
+LatencyAnalyzer / ForecastEngine.
+
+Formule d'impact de la grille (celle des stats calculées du planificateur) :
+  impact = mfe_p80 × (0.5 + 0.5 × min(|surprise| / 50, 2))
+  direction = +1 si surprise > 0, sinon -1
+L'impact affiché pour une famille pré-calculée (event_families) garde sa
+formule propre (precomputed_impact) : pour ces événements, la ligne delta = 0
+de la grille suit la formule ci-dessus et peut différer de l'impact affiché.
+
+Score de tradabilité d'une session (calculate_tradability_score) : partagé par
+le planificateur et l'API (forecast_api /plan).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+SURPRISE_SCALE = 50.0
+MAX_SURPRISE_FACTOR = 2.0
+
+
+def scaled_impact(mfe_p80, surprise):
+    """Impact (pips, non signé) pour une surprise ; scalaires ou tableaux."""
+    factor = np.minimum(np.abs(surprise) / SURPRISE_SCALE, MAX_SURPRISE_FACTOR)
+    return np.asarray(mfe_p80) * (0.5 + 0.5 * factor)
+
+
+def surprise_direction(surprise):
+    return np.where(np.asarray(surprise) > 0, 1, -1)
+
+
+def precomputed_impact(mfe_p80, surprise):
+    """Impact affiché pour une famille pré-calculée : mfe_p80 × min(2, 1 + s/100), × 1 si s <= 0.5."""
+    factor = np.where(np.asarray(surprise) > 0.5,
+                      np.minimum(MAX_SURPRISE_FACTOR, 1.0 + np.asarray(surprise) / 100), 1.0)
+    return np.asarray(mfe_p80) * factor
+
+
+PREDICTION_FIELDS = ("latency_median", "latency_p20", "latency_p80", "ttr_median", "ttr_p20", "ttr_p80")
+
+
+def predict_from_stats(stats: Dict[str, object], surprise: float,
+                       impact: Callable = scaled_impact) -> Dict[str, object]:
+    """
+    Prédiction d'un événement à partir des stats de sa famille. Avec la
+    formule par défaut (scaled_impact), c'est la ligne delta = 0 de
+    evaluate_grid pour cet événement.
+    """
+    return {
+        'predicted_pips': float(impact(stats['mfe_p80'], surprise)),
+        'direction': int(surprise_direction(surprise)),
+        **{k: stats[k] for k in PREDICTION_FIELDS},
+        'n_similar': stats['n_events'],
+        'mfe_p80': stats['mfe_p80'],
+    }
+
+
+@dataclass
+class ScenarioInputs:
+    surprise: np.ndarray
+    mfe_p80: np.ndarray
+    latency_median: np.ndarray
+    ttr_median: np.ndarray
+
+    @classmethod
+    def from_predictions(cls, predictions: Sequence[Dict[str, object]]) -> "ScenarioInputs":
+        def col(key: str, default: float = 0.0) -> np.ndarray:
+            return np.array([float(p.get(key) if p.get(key) is not None else default)  # type: ignore[arg-type]
+                             for p in predictions], dtype=float)
+        return cls(col("surprise"), col("mfe_p80", 10.0), col("latency_median"), col("ttr_median"))
+
+
+def evaluate_grid(inputs: ScenarioInputs, deltas: Sequence[float]) -> pd.DataFrame:
+    """
+    Une ligne par delta : impact combiné signé, |impact|, latence moyenne et
+    pondérée par l'impact, TTR minimal, nombre d'événements haussiers.
+    """
+    d = np.asarray(deltas, dtype=float)
+    if len(inputs.surprise) == 0:
+        return pd.DataFrame({"delta": d})
+    s = inputs.surprise[None, :] + d[:, None]                  # (deltas, événements)
+    impact = scaled_impact(inputs.mfe_p80[None, :], s)
+    signed = impact * surprise_direction(s)
+    total = impact.sum(axis=1)
+    weighted_latency = np.divide((impact * inputs.latency_median[None, :]).sum(axis=1), total,
+                                 out=np.full(len(d), inputs.latency_median.mean()), where=total > 0)
+    combined = signed.sum(axis=1)
+    return pd.DataFrame({
+        "delta": d,
+        "impact": combined,
+        "abs_impact": np.abs(combined),
+        "direction": np.where(combined > 0, 1, -1),
+        "latency_mean": np.full(len(d), inputs.latency_median.mean()),
+        "latency_weighted": weighted_latency,
+        "ttr_min": np.full(len(d), inputs.ttr_median.min()),
+        "n_up": (signed > 0).sum(axis=1),
+    })
+
+
+def delta_grid(span: float = 2.0, step: float = 0.1) -> np.ndarray:
+    """Grille symétrique [-span, span] (41 points par défaut), 0 inclus exactement."""
+    n = int(round(span / step))
+    return np.round(np.arange(-n, n + 1) * step, 10)
+
+
+def calculate_tradability_score(predictions: Sequence[Dict[str, object]],
+                                overlaps: List[Dict[str, object]], time_span: float) -> int:
+    """Calcule un score de tradabilité de 0-100 pour la session (time_span en heures)"""
+    score = 50  # Base
+
+    # Bonus : nombre d'événements
+    if len(predictions) == 2:
+        score += 10
+    elif len(predictions) >= 3:
+        score += 5
+
+    # Bonus : cohérence directionnelle
+    directions = [p['direction'] for p in predictions]
+    if len(set(directions)) == 1:
+        score += 20  # Amplification
+    else:
+        score -= 10  # Antagonisme
+
+    # Bonus : impact total significatif
+    total_impact = sum(abs(p['predicted_pips'] * p['direction']) for p in predictions)  # type: ignore[operator]
+    if total_impact > 20:
+        score += 15
+    elif total_impact > 10:
+        score += 10
+
+    # Malus : chevauchements
+    high_overlaps = len([o for o in overlaps if o['severity'] == 'HIGH'])
+    score -= high_overlaps * 10
+
+    # Malus : événements trop espacés
+    if time_span > 3:
+        score -= 15
+
+    # Bonus : fenêtre compacte
+    if time_span < 1:
+        score += 10
+
+    return max(0, min(100, score))
@@ -0,0 +1,155 @@
+# fx_impact_app/src/serving_db.py
+"""
+Base de service compacte pour l'app Streamlit, construite depuis le warehouse.
+
+L'app n'a besoin que de :
+  events            ts_utc, country, event_key, actual, forecast, previous, unit, importance_n
+  prices_1m         timestamp (epoch s, entier), datetime, high, low, close
+                    triés par timestamp → zone maps (min/max par row group) efficaces
+                    sur les filtres de fenêtre
+  prices_1m_v       vue (ts_utc, close, ...) utilisée par ForecastEngine / backtest
+  prices_1m_<code>  idem pour les autres symboles présents (cf. symbols), + vue _v
+  event_families    stats par famille (déjà pré-calculées)
+  family_stats_cube stats famille × horizon × historique × pays (job nocturne)
+  family_sketches   sketches de quantiles famille × métrique × horizon × pays × mois
+  events_daily_summary  agrégats de la page d'accueil
+  event_family_map  appartenance event_key → famille (filtres par égalité)
+
+Les tables brutes / compat / backups et les colonnes inutilisées ne sont pas copiées.
+Les chaînes (country, event_key, unit, family...) sont stockées avec compression
+dictionnaire forcée (PRAGMA force_compression) : quelques centaines de valeurs
+distinctes pour des centaines de milliers de lignes.
+
+La base produite est ouverte en lecture seule par l'app (cf. config.db_read_only).
+
+Usage :
+  python -m fx_impact_app.src.serving_db --src fx_impact_app/data/warehouse.duckdb \
+                                         --out fx_impact_app/data/serving.duckdb
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Sequence
+
+import duckdb
+
+try:
+    from .events_summary import refresh_events_summary
+    from .family_map import update_family_map
+    from .symbols import DEFAULT_SYMBOL, SYMBOLS
+except ImportError:
+    from events_summary import refresh_events_summary
+    from family_map import update_family_map
+    from symbols import DEFAULT_SYMBOL, SYMBOLS
+
+EVENT_COLUMNS: Sequence[str] = (
+    "ts_utc", "country", "event_key", "actual", "forecast", "previous", "unit", "importance_n",
+)
+PRICE_COLUMNS: Sequence[str] = ("timestamp", "datetime", "high", "low", "close")
+META_TABLE = "_serving_meta"
+
+
+def _columns(con, schema: str, table: str) -> Sequence[str]:
+    return [r[0] for r in con.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_catalog = ? AND lower(table_name) = lower(?) ORDER BY ordinal_position",
+        [schema, table]).fetchall()]
+
+
+def _select_list(available: Sequence[str], wanted: Sequence[str], table: str) -> str:
+    missing = [c for c in wanted if c not in available]
+    if missing:
+        raise RuntimeError(f"{table} : colonnes manquantes dans le warehouse : {missing}")
+    return ", ".join(wanted)
+
+
+def build_serving_db(src_path: str, out_path: str) -> Dict[str, int]:
+    """Construit out_path (écriture dans un .tmp puis rename atomique). Renvoie les volumes."""
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+
+    counts: Dict[str, int] = {}
+    con = duckdb.connect(str(tmp))
+    try:
+        con.execute(f"ATTACH '{Path(src_path).as_posix()}' AS src (READ_ONLY)")
+        con.execute("PRAGMA force_compression='dictionary'")
+
+        ev_cols = _select_list(_columns(con, "src", "events"), EVENT_COLUMNS, "events")
+        con.execute(f"""
+            CREATE TABLE events AS
+            SELECT {ev_cols} FROM src.events
+            WHERE ts_utc IS NOT NULL
+            ORDER BY ts_utc, country, event_key
+        """)
+
+        if _columns(con, "src", "event_families"):
+            con.execute("CREATE TABLE event_families AS SELECT * FROM src.event_families "
+                        "ORDER BY event_key, country")
+        if _columns(con, "src", "family_stats_cube"):
+            con.execute("CREATE TABLE family_stats_cube AS SELECT * FROM src.family_stats_cube")
+        if _columns(con, "src", "family_sketches"):
+            con.execute("CREATE TABLE family_sketches AS SELECT * FROM src.family_sketches")
+
+        # Les prix sont numériques : compression automatique (bitpacking / ALP)
+        con.execute("PRAGMA force_compression='auto'")
+        price_tables = []
+        for code, sym in SYMBOLS.items():
+            available = _columns(con, "src", sym.table)
+            if not available and code != DEFAULT_SYMBOL:
+                continue
+            pr_cols = _select_list(available, PRICE_COLUMNS, sym.table)
+            con.execute(f"""
+                CREATE TABLE {sym.table} AS
+                SELECT {pr_cols} FROM src.{sym.table}
+                WHERE timestamp IS NOT NULL
+                ORDER BY timestamp
+            """)
+            con.execute(f"""
+                CREATE VIEW {sym.view} AS
+                SELECT CAST(datetime AS TIMESTAMP) AS ts_utc, high, low, close
+                FROM {sym.table}
+                WHERE datetime IS NOT NULL
+            """)
+            price_tables.append(sym.table)
+
+        refresh_events_summary(con)
+        update_family_map(con)
+        con.execute("DETACH src")
+
+        for t in ("events", *price_tables, "event_families", "family_stats_cube", "family_sketches",
+                  "events_daily_summary", "event_family_map"):
+            try:
+                counts[t] = int(con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0])
+            except duckdb.CatalogException:
+                pass
+        con.execute(f"CREATE TABLE {META_TABLE} (built_at TIMESTAMPTZ, source VARCHAR, tbl VARCHAR, n_rows BIGINT)")
+        built_at = datetime.now(timezone.utc)
+        con.executemany(f"INSERT INTO {META_TABLE} VALUES (?, ?, ?, ?)",
+                        [[built_at, Path(src_path).name, t, n] for t, n in counts.items()])
+        con.execute("CHECKPOINT")
+    finally:
+        con.close()
+    os.replace(tmp, out)
+    return counts
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Construit la base de service (lecture seule) de l'app")
+    ap.add_argument("--src", required=True, help="warehouse.duckdb source")
+    ap.add_argument("--out", required=True, help="base de service à produire")
+    args = ap.parse_args()
+    counts = build_serving_db(args.src, args.out)
+    src_mb = Path(args.src).stat().st_size / 1e6
+    out_mb = Path(args.out).stat().st_size / 1e6
+    for t, n in counts.items():
+        print(f"   {t:<22} {n:>10,} lignes")
+    print(f"✅ {args.out} : {out_mb:.1f} MB (source {src_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+# fx_impact_app/src/snapshots.py
+"""
+Snapshots incrémentaux du warehouse déployé : une base + des deltas Parquet.
+
+Publication (côté recherche) :
+  snapshots/
+    manifest.json
+    base-<id>.duckdb                        copie complète (contient _snapshot_state)
+    deltas/000001-events-<since>_<until>.parquet
+    deltas/000001-prices_1m-<since>_<until>.parquet
+    deltas/000001-event_families.parquet
+    state/events-rows.parquet               (clé, hash de ligne) publiés, côté publication seulement
+
+  manifest.json :
+    {"format": 1,
+     "base":   {"id", "file", "size", "sha256", "created_at"},
+     "deltas": [{"seq", "base_id", "created_at", "watermarks": {table: iso},
+                 "files": [{"table", "mode", "file", "size", "sha256", "rows"}]}]}
+
+Tables suivies (SNAPSHOT_TABLES) :
+  - prices_1m, prices_1m_<code>  append : lignes de datetime > dernier watermark
+                    (max datetime publié), une table par symbole de SYMBOLS
+  - prices_1s       append : idem sur (day, sec), fenêtres à la seconde autour des événements
+  - events          upsert : lignes de ts_utc >= dernière publication - lookback
+                    (les `actual` sont renseignés après coup, les forecasts révisés)
+                    nouvelles ou modifiées depuis la publication précédente : le
+                    hash de chaque ligne de la fenêtre est gardé dans state/, les
+                    lignes inchangées (calendrier futur compris) ne repartent pas
+  - event_families  replace : petite table dérivée, republiée entière
+  - family_stats_cube  replace : cube nocturne (family_stats_cube), idem
+  - family_sketches    replace : sketches de quantiles (family_sketches), idem
+
+Client (déploiement) : sync_snapshot(manifest_url, db_path)
+  - pas de base locale, ou base d'une autre lignée → télécharge la base (vérifiée)
+  - sinon télécharge uniquement les deltas de seq > seq locale, puis les applique
+    tous dans UNE transaction (DELETE des clés présentes + INSERT BY NAME),
+    met à jour _snapshot_state, events_daily_summary et event_family_map
+    (et recrée les vues des tables de prix créées par un delta).
+  La bande passante d'un redéploiement est donc proportionnelle aux nouvelles données.
+
+On publie la base de service (serving_db) plutôt que le warehouse complet :
+c'est elle que l'app ouvre, et les deltas suivent alors ses colonnes.
+
+CLI :
+  python -m fx_impact_app.src.snapshots publish-base  --db warehouse.duckdb --out snapshots/
+  python -m fx_impact_app.src.snapshots publish-delta --db warehouse.duckdb --out snapshots/
+  python -m fx_impact_app.src.snapshots sync --manifest-url https://.../manifest.json --db warehouse.duckdb
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin
+
+import duckdb
+
+try:
+    from . import http_download, prices_1s
+    from .events_summary import refresh_events_summary
+    from .family_map import update_family_map
+    from .symbols import DEFAULT_SYMBOL, SYMBOLS, Symbol, ensure_symbol_table
+except ImportError:
+    import http_download
+    import prices_1s
+    from events_summary import refresh_events_summary
+    from family_map import update_family_map
+    from symbols import DEFAULT_SYMBOL, SYMBOLS, Symbol, ensure_symbol_table
+
+MANIFEST_NAME = "manifest.json"
+HASHES_DIR = "state"
+STATE_TABLE = "_snapshot_state"
+FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    name: str
+    mode: str                       # append | upsert | replace
+    key: Tuple[str, ...] = ()
+    ts_col: Optional[str] = None
+    lookback_days: int = 0
+
+
+def _prices_spec(sym: Symbol) -> TableSpec:
+    # prices_1m : datetime TIMESTAMPTZ ; tables des autres symboles : TIMESTAMP UTC naïf
+    ts = "datetime" if sym.code == DEFAULT_SYMBOL else "timezone('UTC', datetime)"
+    return TableSpec(sym.table, "append", ("datetime",), ts)
+
+
+SNAPSHOT_TABLES: Sequence[TableSpec] = (
+    TableSpec("events", "upsert", ("ts_utc", "country", "event_key"), "ts_utc", lookback_days=14),
+    *(_prices_spec(sym) for sym in SYMBOLS.values()),
+    TableSpec(prices_1s.TABLE, "append", ("day", "sec"),
+              "timezone('UTC', CAST(day AS TIMESTAMP) + to_seconds(sec))"),
+    TableSpec("event_families", "replace"),
+    TableSpec("family_stats_cube", "replace"),
+    TableSpec("family_sketches", "replace"),
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _stamp(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _table_exists(con, name: str) -> bool:
+    return con.execute(
+        "SELECT 1 FROM information_schema.tables WHERE lower(table_name) = lower(?) LIMIT 1", [name]
+    ).fetchone() is not None
+
+
+def _file_entry(path: Path, out_dir: Path, **extra) -> Dict[str, object]:
+    return {"file": path.relative_to(out_dir).as_posix(), "size": path.stat().st_size,
+            "sha256": http_download.sha256_file(path), **extra}
+
+
+def load_manifest(out_dir) -> Dict[str, object]:
+    p = Path(out_dir) / MANIFEST_NAME
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+
+
+def _write_manifest(out_dir: Path, manifest: Dict[str, object]) -> None:
+    tmp = out_dir / f".{MANIFEST_NAME}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, out_dir / MANIFEST_NAME)
+
+
+# ---------------------------------------------------------------------------
+# Publication
+# ---------------------------------------------------------------------------
+def _watermarks(con, now: datetime) -> Dict[str, str]:
+    marks: Dict[str, str] = {}
+    for spec in SNAPSHOT_TABLES:
+        if spec.mode == "append":
+            # table absente (symbole pas encore ingéré) : rien de publié, tout partira au delta
+            mx = (con.execute(f"SELECT max({spec.ts_col}) FROM {spec.name}").fetchone()[0]
+                  if _table_exists(con, spec.name) else None)
+            marks[spec.name] = (mx or datetime(1970, 1, 1, tzinfo=timezone.utc)).isoformat()
+        else:
+            marks[spec.name] = now.isoformat()
+    return marks
+
+
+def _hashes_path(out_dir: Path, table: str) -> Path:
+    return out_dir / HASHES_DIR / f"{table}-rows.parquet"
+
+
+def _write_row_hashes(con, out_dir: Path, now: datetime) -> None:
+    """(clé, hash de ligne) des fenêtres upsert du prochain delta, lignes publiées à `now`."""
+    (out_dir / HASHES_DIR).mkdir(exist_ok=True)
+    for spec in SNAPSHOT_TABLES:
+        if spec.mode != "upsert" or not _table_exists(con, spec.name):
+            continue
+        path = _hashes_path(out_dir, spec.name)
+        tmp = path.with_name(path.name + ".tmp")
+        con.execute(f"""
+            COPY (SELECT {", ".join(spec.key)}, hash(t) AS row_hash FROM {spec.name} t
+                  WHERE {spec.ts_col} >= ?)
+            TO '{tmp.as_posix()}' (FORMAT PARQUET, COMPRESSION ZSTD)
+        """, [now - timedelta(days=spec.lookback_days)])
+        os.replace(tmp, path)
+
+
+def _changed_rows(spec: TableSpec, hashes: Path) -> str:
+    """Lignes de la fenêtre upsert absentes de l'état publié ou modifiées depuis."""
+    cond = " AND ".join(f"p.{k} IS NOT DISTINCT FROM t.{k}" for k in spec.key)
+    return (f"SELECT t.* FROM {spec.name} t WHERE t.{spec.ts_col} >= ? AND NOT EXISTS ("
+            f"SELECT 1 FROM read_parquet('{hashes.as_posix()}') p WHERE {cond} AND p.row_hash = hash(t)) "
+            f"ORDER BY t.{spec.ts_col}")
+
+
+def publish_base(db_path: str, out_dir: str, now: Optional[datetime] = None) -> Dict[str, object]:
+    """Copie complète du warehouse comme nouvelle base ; réinitialise la liste des deltas."""
+    now = now or _utcnow()
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    base_id = _stamp(now)
+    target = out / f"base-{base_id}.duckdb"
+
+    with duckdb.connect(db_path) as src:
+        src.execute("CHECKPOINT")
+        marks = _watermarks(src, now)
+        _write_row_hashes(src, out, now)
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.copy2(db_path, tmp)
+    with duckdb.connect(str(tmp)) as con:
+        con.execute(f"CREATE OR REPLACE TABLE {STATE_TABLE} (base_id VARCHAR, seq INTEGER, applied_at TIMESTAMPTZ)")
+        con.execute(f"INSERT INTO {STATE_TABLE} VALUES (?, 0, ?)", [base_id, now])
+        con.execute("CHECKPOINT")
+    os.replace(tmp, target)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "base": {"id": base_id, "created_at": now.isoformat(), "watermarks": marks,
+                 **_file_entry(target, out)},
+        "deltas": [],
+    }
+    _write_manifest(out, manifest)
+    return manifest
+
+
+def publish_delta(db_path: str, out_dir: str, now: Optional[datetime] = None) -> Optional[Dict[str, object]]:
+    """
+    Exporte en Parquet ce qui a changé depuis la dernière publication.
+    Renvoie l'entrée ajoutée au manifeste (None si rien de neuf).
+    """
+    now = now or _utcnow()
+    out = Path(out_dir)
+    manifest = load_manifest(out)
+    if not manifest.get("base"):
+        raise RuntimeError(f"aucune base publiée dans {out} (lancer publish-base d'abord)")
+    deltas: List[Dict[str, object]] = manifest["deltas"]  # type: ignore[assignment]
+    last = deltas[-1] if deltas else manifest["base"]
+    prev_marks: Dict[str, str] = last["watermarks"]  # type: ignore[index]
+    seq = len(deltas) + 1
+    (out / "deltas").mkdir(exist_ok=True)
+
+    files: List[Dict[str, object]] = []
+    with duckdb.connect(db_path, read_only=True) as con:
+        marks = _watermarks(con, now)
+        for spec in SNAPSHOT_TABLES:
+            if not _table_exists(con, spec.name):
+                continue
+            since = datetime.fromisoformat(prev_marks.get(spec.name, "1970-01-01T00:00:00+00:00"))
+            if spec.mode == "replace":
+                query, params, name = f"SELECT * FROM {spec.name}", [], f"{seq:06d}-{spec.name}.parquet"
+            else:
+                op = ">" if spec.mode == "append" else ">="
+                since -= timedelta(days=spec.lookback_days)
+                hashes = _hashes_path(out, spec.name)
+                if spec.mode == "upsert" and hashes.exists():
+                    query = _changed_rows(spec, hashes)
+                else:
+                    query = f"SELECT * FROM {spec.name} WHERE {spec.ts_col} {op} ? ORDER BY {spec.ts_col}"
+                params = [since]
+                name = f"{seq:06d}-{spec.name}-{_stamp(since)}_{_stamp(now)}.parquet"
+            rows = con.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+            if rows == 0:
+                continue
+            path = out / "deltas" / name
+            con.execute(f"COPY ({query}) TO '{path.as_posix()}' (FORMAT PARQUET, COMPRESSION ZSTD)", params)
+            files.append(_file_entry(path, out, table=spec.name, mode=spec.mode, rows=int(rows),
+                                     key=list(spec.key)))
+
+    # Seule la table dérivée a été réexportée : pas de nouvelle donnée, pas de delta
+    if not any(f["mode"] != "replace" for f in files):
+        for f in files:
+            (out / str(f["file"])).unlink(missing_ok=True)
+        return None
+
+    entry = {"seq": seq, "base_id": manifest["base"]["id"], "created_at": now.isoformat(),  # type: ignore[index]
+             "watermarks": marks, "files": files}
+    deltas.append(entry)
+    _write_manifest(out, manifest)
+    # Après le manifeste : une interruption ici fait seulement republier ces lignes
+    with duckdb.connect(db_path, read_only=True) as con:
+        _write_row_hashes(con, out, now)
+    return entry
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+def local_state(db_path) -> Optional[Tuple[str, int]]:
+    """(base_id, seq) de la base locale, None si absente / pas issue d'un snapshot."""
+    if not Path(db_path).exists():
+        return None
+    try:
+        with duckdb.connect(str(db_path), read_only=True) as con:
+            if not _table_exists(con, STATE_TABLE):
+                return None
+            row = con.execute(f"SELECT base_id, max(seq) FROM {STATE_TABLE} GROUP BY base_id "
+                              f"ORDER BY 2 DESC LIMIT 1").fetchone()
+    except duckdb.Error:
+        return None
+    return (row[0], int(row[1])) if row else None
+
+
+def _fetch_json(url: str) -> Dict[str, object]:
+    with http_download._request(url) as r:
+        return json.loads(r.read().decode("utf-8"))
+
+
+def _ensure_price_views(con, tables) -> None:
+    """Vues de lecture des tables de prix arrivées par un delta (absentes de la base)."""
+    for sym in SYMBOLS.values():
+        if sym.table in tables and sym.code != DEFAULT_SYMBOL:
+            ensure_symbol_table(con, sym)
+    if prices_1s.TABLE in tables:
+        prices_1s.ensure_table(con)
+
+
+def apply_deltas(db_path, deltas: Sequence[Dict[str, object]], files_dir: Path) -> int:
+    """Applique les deltas (fichiers déjà vérifiés dans files_dir) en une transaction."""
+    applied = 0
+    created = set()
+    con = duckdb.connect(str(db_path))
+    try:
+        con.execute("BEGIN TRANSACTION")
+        for delta in deltas:
+            for f in delta["files"]:  # type: ignore[union-attr]
+                table, mode = f["table"], f["mode"]
+                src = f"read_parquet('{(files_dir / f['file']).as_posix()}')"
+                if mode == "replace" or not _table_exists(con, table):
+                    if mode != "replace":
+                        created.add(table)
+                    con.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {src}")
+                    continue
+                key = f.get("key") or []
+                if key:
+                    cond = " AND ".join(f"{table}.{k} IS NOT DISTINCT FROM d.{k}" for k in key)
+                    con.execute(f"DELETE FROM {table} USING {src} AS d WHERE {cond}")
+                con.execute(f"INSERT INTO {table} BY NAME SELECT * FROM {src}")
+            con.execute(f"INSERT INTO {STATE_TABLE} VALUES (?, ?, ?)",
+                        [delta["base_id"], delta["seq"], _utcnow()])
+            applied += 1
+        if applied:
+            update_family_map(con)
+            refresh_events_summary(con)
+        _ensure_price_views(con, created)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.close()
+    return applied
+
+
+def sync_snapshot(manifest_url: str, db_path, chunks: int = http_download.DEFAULT_CHUNKS) -> Dict[str, object]:
+    """
+    Met la base locale au niveau du manifeste publié.
+    Renvoie {"base_downloaded", "deltas_applied", "bytes", "seq"}.
+    """
+    db_path = Path(db_path)
+    manifest = _fetch_json(manifest_url)
+    base = manifest["base"]
+    state = local_state(db_path)
+    report = {"base_downloaded": False, "deltas_applied": 0, "bytes": 0, "seq": 0}
+
+    if state is None or state[0] != base["id"]:  # type: ignore[index]
+        http_download.download(urljoin(manifest_url, base["file"]), db_path,  # type: ignore[index]
+                               size=base["size"], sha256=base["sha256"], chunks=chunks)  # type: ignore[index]
+        report["base_downloaded"] = True
+        report["bytes"] += int(base["size"])  # type: ignore[index]
+        state = (base["id"], 0)  # type: ignore[index]
+
+    pending = [d for d in manifest["deltas"]  # type: ignore[union-attr]
+               if d["base_id"] == state[0] and int(d["seq"]) > state[1]]
+    report["seq"] = state[1]
+    if not pending:
+        return report
+
+    with tempfile.TemporaryDirectory(prefix="fx_snapshot_", dir=db_path.parent) as tmp:
+        tmp_dir = Path(tmp)
+        for delta in pending:
+            for f in delta["files"]:
+                http_download.download(urljoin(manifest_url, f["file"]), tmp_dir / f["file"],
+                                       size=f["size"], sha256=f["sha256"], chunks=1)
+                report["bytes"] += int(f["size"])
+        report["deltas_applied"] = apply_deltas(db_path, pending, tmp_dir)
+    report["seq"] = int(pending[-1]["seq"])
+    return report
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Snapshots base + deltas Parquet du warehouse")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("publish-base", "publish-delta"):
+        p = sub.add_parser(name)
+        p.add_argument("--db", required=True)
+        p.add_argument("--out", required=True)
+    p = sub.add_parser("sync")
+    p.add_argument("--manifest-url", required=True)
+    p.add_argument("--db", required=True)
+    args = ap.parse_args()
+
+    if args.cmd == "publish-base":
+        m = publish_base(args.db, args.out)
+        print(f"✅ base {m['base']['id']} publiée ({m['base']['size'] / 1e6:.1f} MB)")
+    elif args.cmd == "publish-delta":
+        d = publish_delta(args.db, args.out)
+        if d is None:
+            print("ℹ️ rien de neuf depuis la dernière publication")
+        else:
+            size = sum(f["size"] for f in d["files"])
+            print(f"✅ delta {d['seq']} publié : {len(d['files'])} fichiers, {size / 1e3:.1f} kB")
+    else:
+        r = sync_snapshot(args.manifest_url, args.db)
+        print(f"✅ seq {r['seq']} | base téléchargée: {r['base_downloaded']} | "
+              f"deltas appliqués: {r['deltas_applied']} | {r['bytes'] / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# fx_impact_app/src/symbols.py
+"""
+Symboles suivis et échelle de pip par symbole.
+
+Tout était câblé sur EUR/USD (pips = Δprix × 10 000, table prices_1m unique).
+Chaque symbole a maintenant :
+  - son facteur de pip (pips par unité de prix : 10 000 pour EUR/USD, 100 pour
+    USD/JPY, 10 pour l'or en convention 0,1 $ = 1 pip)
+  - sa table de barres 1 minute : le stockage est partitionné par symbole.
+    EUR/USD garde prices_1m / prices_1m_v (schéma et requêtes existants
+    inchangés) ; les autres ont prices_1m_<code> / prices_1m_<code>_v, même
+    schéma (timestamp epoch s, datetime, OHLCV).
+
+Le calendrier (events) est commun : une même passe sur les événements sert à
+tous les symboles (cf. family_stats_cube.build_cube).
+"""
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+from typing import Dict, List, Union
+
+import pandas as pd
+
+DEFAULT_SYMBOL = "EURUSD"
+
+_COUNTER = itertools.count()
+
+
+@dataclass(frozen=True)
+class Symbol:
+    code: str           # EURUSD
+    eodhd: str          # code EODHD intraday
+    pip_factor: int     # pips par unité de prix
+
+    @property
+    def table(self) -> str:
+        return "prices_1m" if self.code == DEFAULT_SYMBOL else f"prices_1m_{self.code.lower()}"
+
+    @property
+    def view(self) -> str:
+        return f"{self.table}_v"
+
+    def to_pips(self, delta):
+        return delta * self.pip_factor
+
+
+SYMBOLS: Dict[str, Symbol] = {s.code: s for s in (
+    Symbol("EURUSD", "EURUSD.FOREX", 10_000),
+    Symbol("GBPUSD", "GBPUSD.FOREX", 10_000),
+    Symbol("USDJPY", "USDJPY.FOREX", 100),
+    Symbol("XAUUSD", "XAUUSD.FOREX", 10),
+)}
+
+
+def get_symbol(name: Union[str, Symbol, None] = None) -> Symbol:
+    """'EURUSD', 'eur/usd', 'EURUSD.FOREX' ou None (défaut) → Symbol ; ValueError si inconnu."""
+    if isinstance(name, Symbol):
+        return name
+    code = (name or DEFAULT_SYMBOL).split(".")[0].replace("/", "").strip().upper()
+    try:
+        return SYMBOLS[code]
+    except KeyError:
+        raise ValueError(f"symbole inconnu: {name!r} (attendu: {', '.join(SYMBOLS)})") from None
+
+
+def _table_exists(con, name: str) -> bool:
+    return con.execute("""
+        SELECT 1 FROM information_schema.tables
+        WHERE table_catalog = current_database() AND table_schema = current_schema()
+          AND lower(table_name) = lower(?)
+        LIMIT 1
+    """, [name]).fetchone() is not None
+
+
+def available_symbols(con) -> List[str]:
+    """Symboles dont la table de prix existe dans la base."""
+    return [code for code, s in SYMBOLS.items() if _table_exists(con, s.table)]
+
+
+def ensure_symbol_table(con, symbol) -> Symbol:
+    """Crée la table et la vue 1 minute d'un symbole (hors EUR/USD, géré par l'ingestion historique)."""
+    sym = get_symbol(symbol)
+    if sym.code == DEFAULT_SYMBOL:
+        return sym
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {sym.table} (
+            timestamp BIGINT,
+            datetime  TIMESTAMP,
+            open DOUBLE, high DOUBLE, low DOUBLE, close DOUBLE,
+            volume BIGINT
+        )
+    """)
+    con.execute(f"""
+        CREATE OR REPLACE VIEW {sym.view} AS
+        SELECT CAST(datetime AS TIMESTAMP) AS ts_utc, open, high, low, close, volume
+        FROM {sym.table}
+        WHERE datetime IS NOT NULL
+    """)
+    return sym
+
+
+def upsert_symbol_prices(con, df: pd.DataFrame, symbol) -> int:
+    """
+    Insère les barres de `df` (datetime UTC, close, OHLCV optionnels) dans la
+    table du symbole, sans doublon de timestamp. Renvoie le nombre de lignes insérées.
+    """
+    sym = ensure_symbol_table(con, symbol)
+    if sym.code == DEFAULT_SYMBOL:
+        raise ValueError("EURUSD : passer par l'ingestion prices_1m existante")
+    dt = pd.to_datetime(df["datetime"], utc=True)
+    rows = pd.DataFrame({
+        "timestamp": (dt - pd.Timestamp("1970-01-01", tz="UTC")) // pd.Timedelta(seconds=1),
+        "datetime": dt.dt.tz_localize(None),
+        "close": df["close"].astype(float),
+    })
+    for c in ("open", "high", "low"):
+        rows[c] = df[c].astype(float) if c in df.columns else rows["close"]
+    rows["volume"] = df["volume"] if "volume" in df.columns else None
+
+    rel = f"_fx_symbol_prices_{next(_COUNTER)}"
+    con.register(rel, rows)
+    try:
+        before = con.execute(f"SELECT COUNT(*) FROM {sym.table}").fetchone()[0]
+        con.execute(f"""
+            INSERT INTO {sym.table}
+            SELECT n.timestamp, n.datetime, n.open, n.high, n.low, n.close, CAST(n.volume AS BIGINT)
+            FROM {rel} n
+            WHERE NOT EXISTS (SELECT 1 FROM {sym.table} p WHERE p.timestamp = n.timestamp)
+            ORDER BY n.timestamp
+        """)
+        return con.execute(f"SELECT COUNT(*) FROM {sym.table}").fetchone()[0] - before
+    finally:
+        con.unregister(rel)
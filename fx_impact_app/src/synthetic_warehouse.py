@@ -0,0 +1,318 @@
+# fx_impact_app/src/synthetic_warehouse.py
+"""
+Warehouse DuckDB synthétique (déterministe) pour benchmarks et tests.
+
+Reproduit le schéma utilisé par les pages Streamlit :
+  - events (calendrier US/EU/GB, passé + futur)
+  - prices_1m (timestamp epoch, datetime, OHLCV) autour des événements passés
+  - prices_1m_v (vue normalisée, cf. db_init.create_price_views)
+  - prices_1m_<code> / _v pour les autres symboles demandés (cf. symbols) :
+    même trajectoire en pips que EUR/USD, de sens opposé pour les paires USD/xxx
+  - event_families (classification + stats pré-calculées latence/empirique)
+  - event_family_map (appartenance event_key → famille, cf. family_map)
+
+Usage:
+  python -m fx_impact_app.src.synthetic_warehouse /tmp/bench.duckdb --years 2
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+try:
+    from .events_summary import refresh_events_summary
+    from .family_map import update_family_map
+    from .symbols import DEFAULT_SYMBOL, ensure_symbol_table, get_symbol
+except ImportError:
+    from events_summary import refresh_events_summary
+    from family_map import update_family_map
+    from symbols import DEFAULT_SYMBOL, ensure_symbol_table, get_symbol
+
+# (event_key, country, famille event_families, heure UTC, fréquence, impact pips typique)
+#   fréquence : 'monthly:<jour>' | 'weekly:<weekday>' | 'quarterly:<jour>' | 'fomc'
+SYNTHETIC_EVENTS: List[Tuple[str, str, str, str, str, float]] = [
+    ("non farm payrolls", "US", "NFP", "12:30", "monthly:first_friday", 35.0),
+    ("unemployment rate", "US", "Unemployment", "12:30", "monthly:first_friday", 20.0),
+    ("average hourly earnings mom", "US", "Wages", "12:30", "monthly:first_friday", 15.0),
+    ("cpi", "US", "CPI", "12:30", "monthly:12", 30.0),
+    ("core inflation rate mom", "US", "Inflation", "12:30", "monthly:12", 25.0),
+    ("retail sales mom", "US", "Retail_Sales", "12:30", "monthly:15", 18.0),
+    ("ppi mom", "US", "PPI", "12:30", "monthly:14", 10.0),
+    ("initial jobless claims", "US", "Jobless_Claims", "12:30", "weekly:3", 8.0),
+    ("ism manufacturing pmi", "US", "PMI", "14:00", "monthly:1", 12.0),
+    ("michigan consumer sentiment", "US", "Consumer_Confidence", "14:00", "monthly:25", 8.0),
+    ("durable goods orders mom", "US", "Durable_Goods", "12:30", "monthly:26", 9.0),
+    ("building permits", "US", "Building_Permits", "12:30", "monthly:18", 6.0),
+    ("gdp growth rate qoq adv", "US", "GDP", "12:30", "quarterly:28", 22.0),
+    ("fed interest rate decision", "US", "Interest_Rate", "18:00", "fomc", 40.0),
+    ("inflation rate yoy flash", "EU", "Inflation", "09:00", "monthly:2", 12.0),
+    ("hcob manufacturing pmi", "EU", "PMI", "08:00", "monthly:1", 8.0),
+    ("unemployment rate", "EU", "Unemployment", "09:00", "monthly:3", 5.0),
+    ("gdp growth rate qoq", "EU", "GDP", "09:00", "quarterly:30", 10.0),
+    ("ecb interest rate decision", "EU", "ECB_Decision", "12:15", "fomc", 35.0),
+    ("inflation rate yoy", "GB", "Inflation", "06:00", "monthly:17", 8.0),
+    ("boe interest rate decision", "GB", "Interest_Rate", "11:00", "fomc", 20.0),
+]
+
+_FOMC_MONTHS = (1, 3, 5, 6, 7, 9, 11, 12)
+
+# Niveau de prix synthétique des symboles dérivés de la trajectoire EUR/USD
+_SYMBOL_BASE = {"GBPUSD": 1.27, "USDJPY": 150.0, "XAUUSD": 2300.0}
+
+
+def _event_dates(freq: str, start: datetime, end: datetime) -> List[datetime]:
+    """Dates (minuit UTC) d'un événement récurrent entre start et end."""
+    kind, _, arg = freq.partition(":")
+    out: List[datetime] = []
+    if kind == "weekly":
+        d = start + timedelta(days=(int(arg) - start.weekday()) % 7)
+        while d <= end:
+            out.append(d)
+            d += timedelta(days=7)
+        return out
+
+    y, m = start.year, start.month
+    while datetime(y, m, 1, tzinfo=timezone.utc) <= end:
+        if kind == "monthly" and arg == "first_friday":
+            d = datetime(y, m, 1, tzinfo=timezone.utc)
+            d += timedelta(days=(4 - d.weekday()) % 7)
+        elif kind == "monthly":
+            d = datetime(y, m, int(arg), tzinfo=timezone.utc)
+        elif kind == "quarterly" and m in (1, 4, 7, 10):
+            d = datetime(y, m, int(arg), tzinfo=timezone.utc)
+        elif kind == "fomc" and m in _FOMC_MONTHS:
+            d = datetime(y, m, 1, tzinfo=timezone.utc) + timedelta(days=16)
+            d += timedelta(days=(2 - d.weekday()) % 7)
+        else:
+            d = None
+        if d is not None and start <= d <= end:
+            # pas de publication le week-end
+            while d.weekday() >= 5:
+                d += timedelta(days=1)
+            out.append(d)
+        m += 1
+        if m > 12:
+            y, m = y + 1, 1
+    return out
+
+
+def build_events(
+    now: datetime, years: float = 2.0, future_days: int = 30, seed: int = 42
+) -> pd.DataFrame:
+    """Calendrier synthétique (même colonnes que la table events)."""
+    rng = np.random.default_rng(seed)
+    start = (now - timedelta(days=int(365 * years))).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = now + timedelta(days=future_days)
+
+    rows = []
+    for key, country, _fam, hhmm, freq, impact in SYNTHETIC_EVENTS:
+        hh, mm = (int(x) for x in hhmm.split(":"))
+        prev = float(rng.normal(2.0, 1.0))
+        for d in _event_dates(freq, start, end):
+            ts = d.replace(hour=hh, minute=mm)
+            forecast = round(prev + float(rng.normal(0, 0.2)), 2)
+            actual = round(forecast + float(rng.normal(0, 0.3)), 2) if ts < now else None
+            rows.append({
+                "ts_utc": ts,
+                "country": country,
+                "event_title": key.title(),
+                "event_key": key,
+                "label": key.title(),
+                "type": "synthetic",
+                "estimate": forecast,
+                "forecast": forecast,
+                "previous": round(prev, 2),
+                "actual": actual,
+                "unit": "%",
+                "importance_n": 3 if impact >= 20 else 2,
+            })
+            if actual is not None:
+                prev = actual
+    df = pd.DataFrame(rows)
+    df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True)
+    return df.sort_values("ts_utc").reset_index(drop=True)
+
+
+def build_prices(
+    events: pd.DataFrame, now: datetime, window_min: int = 180, seed: int = 7
+) -> pd.DataFrame:
+    """
+    Barres 1 minute EUR/USD autour des événements passés (±window_min).
+    Marche aléatoire + choc directionnel après publication (proportionnel à la surprise).
+    """
+    rng = np.random.default_rng(seed)
+    impact_by_key = {(k, c): imp for k, c, _f, _h, _q, imp in SYNTHETIC_EVENTS}
+    past = events[events["actual"].notna() & (events["ts_utc"] < pd.Timestamp(now))]
+
+    # Fenêtres (en minutes epoch) fusionnées pour éviter les doublons
+    epoch = pd.Timestamp(0, tz="UTC")
+    centers = ((past["ts_utc"] - epoch) // pd.Timedelta(minutes=1)).to_numpy(dtype="int64")
+    minutes = np.unique(
+        (centers[:, None] + np.arange(-window_min, window_min + 1)[None, :]).ravel()
+    )
+    ts = minutes * 60
+
+    # Marche aléatoire de base (0.3 pip / minute)
+    steps = rng.normal(0.0, 0.3e-4, len(minutes))
+    gaps = np.diff(minutes, prepend=minutes[0]) > 1
+    steps[gaps] += rng.normal(0.0, 5e-4, int(gaps.sum()))
+    close = 1.10 + np.cumsum(steps)
+
+    # Chocs : montée progressive puis retracement partiel
+    idx = np.searchsorted(minutes, centers)
+    for i, (_, ev) in zip(idx, past.iterrows()):
+        impact = impact_by_key.get((ev["event_key"], ev["country"]), 10.0) * 1e-4
+        surprise = (ev["actual"] or 0.0) - (ev["forecast"] or 0.0)
+        sign = 1.0 if surprise >= 0 else -1.0
+        peak_at = int(rng.integers(3, 20))
+        shape = np.concatenate([
+            np.linspace(0.0, 1.0, peak_at),
+            np.linspace(1.0, 0.4, window_min - peak_at + 1),
+        ])
+        amp = sign * impact * float(rng.uniform(0.5, 1.5))
+        close[i:i + len(shape)] += amp * shape[: len(close) - i]
+
+    spread = np.abs(rng.normal(0.0, 0.2e-4, len(close)))
+    df = pd.DataFrame({
+        "timestamp": ts.astype("int64"),
+        "datetime": pd.to_datetime(ts, unit="s", utc=True),
+        "open": close - steps,
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.integers(50, 500, len(close)).astype("int64"),
+    })
+    return df
+
+
+def build_event_families(events: pd.DataFrame, seed: int = 11) -> pd.DataFrame:
+    """Table event_families avec stats pré-calculées (latence, TTR, empirique)."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for key, country, fam, _h, _q, impact in SYNTHETIC_EVENTS:
+        lat = float(rng.uniform(1, 8))
+        score = min(100.0, impact * 2.0)
+        rows.append({
+            "event_key": key,
+            "country": country,
+            "family": fam,
+            "is_tradable": True,
+            "impact_level": "HIGH" if impact >= 20 else "MEDIUM",
+            "notes": None,
+            "latency_median": lat,
+            "latency_p20": lat * 0.5,
+            "latency_p80": lat * 2.0,
+            "ttr_median": lat * 4.0,
+            "ttr_p20": lat * 2.0,
+            "ttr_p80": lat * 8.0,
+            "mfe_p80": impact,
+            "n_events_latency": int((events["event_key"] == key).sum()),
+            "empirical_score": score,
+            "empirical_impact": "HIGH" if score >= 70 else "MEDIUM" if score >= 40 else "LOW",
+            "avg_movement_pips": impact * 0.8,
+            "avg_latency_min": lat,
+            "reaction_rate": 0.8,
+        })
+    return pd.DataFrame(rows)
+
+
+def symbol_prices(prices: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """Barres d'un autre symbole : mêmes mouvements en pips que EUR/USD (sens opposé si USD/xxx)."""
+    sym = get_symbol(symbol)
+    sign = -1.0 if sym.code.startswith("USD") else 1.0
+    scale = sign * 10_000 / sym.pip_factor
+    out = prices.copy()
+    out["datetime"] = pd.to_datetime(prices["datetime"], utc=True).dt.tz_localize(None)
+    for c in ("open", "high", "low", "close"):
+        out[c] = _SYMBOL_BASE[sym.code] + (prices[c] - 1.10) * scale
+    if sign < 0:
+        out["high"], out["low"] = out["low"].copy(), out["high"].copy()
+    return out
+
+
+def build_synthetic_warehouse(
+    db_path: str,
+    years: float = 2.0,
+    future_days: int = 30,
+    window_min: int = 180,
+    now: Optional[datetime] = None,
+    overwrite: bool = True,
+    symbols: Sequence[str] = (DEFAULT_SYMBOL,),
+) -> str:
+    """Crée (ou remplace) un warehouse synthétique complet à db_path."""
+    path = Path(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        if not overwrite:
+            return path.as_posix()
+        path.unlink()
+
+    now = now or datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    events = build_events(now, years=years, future_days=future_days)
+    prices = build_prices(events, now, window_min=window_min)
+    families = build_event_families(events)
+
+    with duckdb.connect(path.as_posix()) as con:
+        con.register("tmp_events", events)
+        con.execute("CREATE TABLE events AS SELECT * FROM tmp_events")
+        con.execute("ALTER TABLE events ALTER COLUMN importance_n TYPE BIGINT")
+        con.unregister("tmp_events")
+
+        con.register("tmp_prices", prices)
+        con.execute("CREATE TABLE prices_1m AS SELECT * FROM tmp_prices ORDER BY timestamp")
+        con.unregister("tmp_prices")
+        con.execute("""
+            CREATE OR REPLACE VIEW prices_1m_v AS
+            SELECT CAST(datetime AS TIMESTAMP) AS ts_utc, open, high, low, close, volume
+            FROM prices_1m
+            WHERE datetime IS NOT NULL
+        """)
+        for code in symbols:
+            sym = get_symbol(code)
+            if sym.code == DEFAULT_SYMBOL:
+                continue
+            ensure_symbol_table(con, sym)
+            con.register("tmp_prices", symbol_prices(prices, sym.code))
+            con.execute(f"""
+                INSERT INTO {sym.table}
+                SELECT timestamp, datetime, open, high, low, close, volume FROM tmp_prices ORDER BY timestamp
+            """)
+            con.unregister("tmp_prices")
+
+        con.register("tmp_families", families)
+        con.execute("CREATE TABLE event_families AS SELECT * FROM tmp_families")
+        con.unregister("tmp_families")
+
+        refresh_events_summary(con)
+        update_family_map(con)
+
+    return path.as_posix()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Génère un warehouse DuckDB synthétique")
+    ap.add_argument("db_path", help="Chemin du fichier .duckdb à créer")
+    ap.add_argument("--years", type=float, default=2.0, help="Profondeur d'historique (années)")
+    ap.add_argument("--future-days", type=int, default=30, help="Jours d'événements futurs")
+    ap.add_argument("--window-min", type=int, default=180, help="Minutes de prix autour de chaque événement")
+    ap.add_argument("--symbols", nargs="+", default=[DEFAULT_SYMBOL], help="Symboles à générer (cf. symbols)")
+    args = ap.parse_args()
+
+    out = build_synthetic_warehouse(
+        args.db_path, years=args.years, future_days=args.future_days, window_min=args.window_min,
+        symbols=args.symbols,
+    )
+    with duckdb.connect(out, read_only=True) as con:
+        n_ev = con.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        n_px = con.execute("SELECT COUNT(*) FROM prices_1m").fetchone()[0]
+    print(f"✅ Warehouse synthétique: {out} ({n_ev} événements, {n_px} barres 1m)")
+
+
+if __name__ == "__main__":
+    main()
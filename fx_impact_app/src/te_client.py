@@ -4,6 +4,8 @@ import requests
 import pandas as pd
 from typing import Any, Dict, List, Optional
 from .config import get_te_key as _get_te_key_config
+from .events_summary import refresh_events_summary
+from .family_map import update_family_map
 
 TE_BASE = "https://api.tradingeconomics.com/calendar"
 
@@ -125,4 +127,6 @@ def upsert_events(con, df: pd.DataFrame) -> int:
             row.get("ts_utc"), row.get("country"), row.get("event_title")
         ])
         inserted += con.execute("SELECT changes()").fetchone()[0]
+    update_family_map(con)
+    refresh_events_summary(con)
     return int(inserted)
@@ -0,0 +1,172 @@
+# fx_impact_app/src/walk_forward.py
+"""
+Évaluation walk-forward des prédictions de latence et de mouvement.
+
+Le backtest historique (backtest_latency_predictions.py) prédit avec les stats
+de famille calculées sur tout l'historique, puis les compare à des événements
+de ce même historique : fuite d'information, et une requête de stats par
+famille (voire par événement).
+
+Ici un seul passage chronologique :
+  - chaque famille garde un état courant (FamilyState) : nombre d'événements,
+    réactions, sommes de latence / mouvement, sketch KLL des latences
+  - un événement est d'abord noté avec l'état de sa famille tel qu'il était
+    AVANT lui (les événements de même horodatage ne se voient pas), puis
+    l'état est mis à jour avec sa réaction mesurée, en O(1) amorti
+  - les erreurs s'accumulent au fil de l'eau par famille × mois
+
+Prédictions (mêmes définitions que LatencyAnalyzer.calculate_family_latency_stats) :
+  predicted_latency         moyenne des latences des réactions passées
+  predicted_latency_median  médiane (sketch) de ces latences
+  predicted_movement        moyenne des pics (pips) des événements passés
+
+Une famille n'est notée qu'à partir de `min_history` réactions passées.
+Entrées : événements (ts_utc, family, ...) et réactions mesurées alignées ligne
+à ligne (latency_minutes, peak_pips, had_reaction, bars_analyzed), p. ex.
+backtest_latency_predictions.measure_actual_market_reactions.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .quantile_sketch import KLLSketch
+except ImportError:
+    from quantile_sketch import KLLSketch
+
+MIN_HISTORY = 5
+
+MONTHLY_COLUMNS = ["family", "month", "n_scored", "n_reaction", "reaction_rate",
+                   "mae_latency", "rmse_latency", "mae_latency_median", "mae_movement"]
+
+
+@dataclass
+class FamilyState:
+    """Stats courantes d'une famille (événements déjà consommés)."""
+    n_events: int = 0
+    n_reaction: int = 0
+    latency_sum: float = 0.0
+    movement_sum: float = 0.0
+    latencies: KLLSketch = field(default_factory=KLLSketch)
+
+    def predict(self, min_history: int = MIN_HISTORY) -> Optional[Dict[str, float]]:
+        if self.n_reaction < min_history:
+            return None
+        return {
+            "predicted_latency": self.latency_sum / self.n_reaction,
+            "predicted_latency_median": float(self.latencies.quantile(0.5)),
+            "predicted_movement": self.movement_sum / self.n_events,
+        }
+
+    def consume(self, latency: float, movement: float, had_reaction: bool) -> None:
+        self.n_events += 1
+        self.movement_sum += movement
+        if had_reaction:
+            self.n_reaction += 1
+            self.latency_sum += latency
+            self.latencies.update(latency)
+
+
+@dataclass
+class _ErrorAcc:
+    n_scored: int = 0
+    n_reaction: int = 0
+    abs_latency: float = 0.0
+    sq_latency: float = 0.0
+    abs_latency_median: float = 0.0
+    abs_movement: float = 0.0
+
+    def add(self, err_latency: float, err_median: float, err_movement: float, had_reaction: bool) -> None:
+        self.n_scored += 1
+        self.n_reaction += int(had_reaction)
+        self.abs_latency += abs(err_latency)
+        self.sq_latency += err_latency ** 2
+        self.abs_latency_median += abs(err_median)
+        self.abs_movement += abs(err_movement)
+
+    def row(self) -> Dict[str, float]:
+        n = self.n_scored
+        return {
+            "n_scored": n,
+            "n_reaction": self.n_reaction,
+            "reaction_rate": self.n_reaction / n,
+            "mae_latency": self.abs_latency / n,
+            "rmse_latency": float(np.sqrt(self.sq_latency / n)),
+            "mae_latency_median": self.abs_latency_median / n,
+            "mae_movement": self.abs_movement / n,
+        }
+
+
+def walk_forward(events: pd.DataFrame, reactions: pd.DataFrame,
+                 min_history: int = MIN_HISTORY) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Passage chronologique unique.
+
+    Returns:
+        (scores, monthly) : une ligne par événement noté (colonnes d'`events`
+        + réaction + prédictions + erreurs), et les métriques par famille × mois
+        (MONTHLY_COLUMNS), dans l'ordre chronologique.
+    """
+    ev = events.reset_index(drop=True)
+    rx = reactions.reset_index(drop=True)
+    ts = pd.to_datetime(ev["ts_utc"], utc=True)
+    ts_ns = ts.dt.tz_localize(None).to_numpy().astype("datetime64[ns]").astype(np.int64)
+    order = np.argsort(ts_ns, kind="stable")
+    months = ts.dt.strftime("%Y-%m").to_numpy()
+
+    families = ev["family"].to_numpy()
+    latency = rx["latency_minutes"].to_numpy(dtype=float)
+    movement = rx["peak_pips"].to_numpy(dtype=float)
+    reacted = rx["had_reaction"].to_numpy(dtype=bool)
+    usable = rx["bars_analyzed"].to_numpy() > 0
+
+    states: Dict[str, FamilyState] = {}
+    acc: Dict[Tuple[str, str], _ErrorAcc] = {}
+    scored: List[Dict[str, object]] = []
+    pending: List[int] = []                 # événements de l'horodatage courant, pas encore consommés
+
+    def flush() -> None:
+        for j in pending:
+            states.setdefault(families[j], FamilyState()).consume(latency[j], movement[j], reacted[j])
+        pending.clear()
+
+    for pos, i in enumerate(order):
+        if pos and ts_ns[i] != ts_ns[order[pos - 1]]:
+            flush()
+        if not usable[i] or pd.isna(families[i]):
+            continue
+        pending.append(i)
+        state = states.get(families[i])
+        pred = state.predict(min_history) if state is not None else None
+        if pred is None:
+            continue
+        err_latency = pred["predicted_latency"] - latency[i]
+        err_median = pred["predicted_latency_median"] - latency[i]
+        err_movement = pred["predicted_movement"] - movement[i]
+        acc.setdefault((families[i], months[i]), _ErrorAcc()).add(
+            err_latency, err_median, err_movement, reacted[i])
+        scored.append({"row": i, **pred,
+                       "error_minutes": abs(err_latency),
+                       "error_movement": abs(err_movement)})
+    flush()
+
+    if scored:
+        s = pd.DataFrame(scored)
+        idx = s.pop("row").to_numpy()
+        base = ev.iloc[idx].reset_index(drop=True)
+        base["month"] = months[idx]
+        base["actual_latency"] = latency[idx]
+        base["actual_movement"] = movement[idx]
+        base["had_reaction"] = reacted[idx]
+        scores = pd.concat([base, s], axis=1)
+    else:
+        scores = pd.DataFrame()
+
+    monthly = pd.DataFrame([{"family": f, "month": m, **a.row()} for (f, m), a in acc.items()],
+                           columns=MONTHLY_COLUMNS)
+    monthly = monthly.sort_values(["month", "family"], kind="stable").reset_index(drop=True)
+    return scores, monthly
@@ -0,0 +1,107 @@
+# fx_impact_app/src/window_fetch.py
+"""
+Lecture groupée de fenêtres de prix autour de N événements, en une requête.
+
+Les fenêtres [t0, t1] sont enregistrées comme petite relation puis jointes à
+prices_1m : chaque ligne de prix ressort étiquetée par son win_id, triée
+(win_id, timestamp). Le découpage par événement se fait ensuite par bornes de
+groupes NumPy (searchsorted), en O(lignes) au lieu d'un filtre Python par
+événement (O(événements × lignes)).
+
+Jointure : plutôt qu'un range join (piecewise merge join, coût qui croît avec le
+nombre de fenêtres), on découpe le temps en buckets de la taille de la plus
+longue fenêtre ; chaque fenêtre couvre au plus 2 buckets, d'où une relation
+(win_id, bucket, t0, t1) de ≤ 2N lignes, une jointure par hachage sur
+`timestamp // bucket` et le filtre résiduel t0 <= timestamp <= t1.
+Mesuré (warehouse synthétique 2 ans) : 5 → 400 fenêtres en 7 → 15 ms, contre
+6 → 460 ms (200 fenêtres) pour l'ancien OR-chaîné + filtre Python.
+
+Le prédicat global `timestamp BETWEEN min(t0) AND max(t1)` laisse aux zone maps
+le soin d'écarter les row groups hors période.
+"""
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+_COUNTER = itertools.count()
+
+
+@dataclass
+class WindowBatch:
+    """Résultat : colonnes NumPy concaténées + bornes de groupe par fenêtre."""
+    win_id: np.ndarray
+    columns: Dict[str, np.ndarray]
+    bounds: np.ndarray              # bounds[i]:bounds[i+1] = lignes de la fenêtre i
+
+    def __len__(self) -> int:
+        return len(self.bounds) - 1
+
+    def rows(self, i: int) -> int:
+        return int(self.bounds[i + 1] - self.bounds[i])
+
+    def column(self, i: int, name: str) -> np.ndarray:
+        return self.columns[name][self.bounds[i]:self.bounds[i + 1]]
+
+    def frame(self, i: int) -> Optional[pd.DataFrame]:
+        """DataFrame de la fenêtre i (None si vide)."""
+        a, b = self.bounds[i], self.bounds[i + 1]
+        if a == b:
+            return None
+        return pd.DataFrame({k: v[a:b] for k, v in self.columns.items()})
+
+
+def to_epoch_seconds(times: Iterable) -> np.ndarray:
+    """Timestamps (str, datetime, pd.Timestamp, naïfs = UTC) → epoch secondes int64."""
+    ts = pd.to_datetime(pd.Series(list(times)), utc=True)
+    return (ts - pd.Timestamp("1970-01-01", tz="UTC")).dt.total_seconds().to_numpy(dtype=np.int64)
+
+
+def fetch_windows(con, starts: Sequence[int], ends: Sequence[int],
+                  columns: Sequence[str] = ("close",), table: str = "prices_1m",
+                  ts_col: str = "timestamp") -> WindowBatch:
+    """
+    Fenêtres [starts[i], ends[i]] (bornes incluses, même unité que ts_col) lues en
+    une seule requête. `con` : connexion DuckDB (brute ou ProfiledConnection).
+    """
+    t0 = np.asarray(starts, dtype=np.int64)
+    t1 = np.asarray(ends, dtype=np.int64)
+    n = len(t0)
+    cols = [ts_col] + [c for c in columns if c != ts_col]
+    if n == 0:
+        empty = {c: np.array([]) for c in cols}
+        return WindowBatch(np.array([], dtype=np.int64), empty, np.zeros(1, dtype=np.int64))
+
+    bucket = max(int((t1 - t0).max()), 1)
+    b0, b1 = t0 // bucket, t1 // bucket
+    reps = (b1 - b0 + 1).clip(min=0)
+    first = np.repeat(np.cumsum(reps) - reps, reps)
+    windows = pd.DataFrame({
+        "win_id": np.repeat(np.arange(n, dtype=np.int64), reps),
+        "bucket": np.repeat(b0, reps) + (np.arange(int(reps.sum())) - first),
+        "t0": np.repeat(t0, reps),
+        "t1": np.repeat(t1, reps),
+    })
+
+    rel = f"_fx_windows_{next(_COUNTER)}"
+    con.register(rel, windows)
+    try:
+        select = ", ".join(f"p.{c}" for c in cols)
+        data = con.execute(f"""
+            SELECT w.win_id, {select}
+            FROM {table} p
+            JOIN {rel} w ON p.{ts_col} // {bucket} = w.bucket
+            WHERE p.{ts_col} BETWEEN w.t0 AND w.t1
+              AND p.{ts_col} BETWEEN ? AND ?
+            ORDER BY w.win_id, p.{ts_col}
+        """, [int(t0.min()), int(t1.max())]).fetchnumpy()
+    finally:
+        con.unregister(rel)
+
+    win_id = np.asarray(data["win_id"], dtype=np.int64)
+    bounds = np.searchsorted(win_id, np.arange(n + 1), side="left")
+    return WindowBatch(win_id, {c: np.asarray(data[c]) for c in cols}, bounds)
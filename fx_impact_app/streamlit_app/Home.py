@@ -16,8 +16,8 @@ if str(src_path) not in sys.path:
 
 # Télécharger la base de données depuis Google Drive si nécessaire
 try:
-    from download_database import download_database
-    download_database()
+    from download_database import ensure_database
+    ensure_database()
 except Exception as e:
     import streamlit as st
     st.error(f"❌ Erreur lors du téléchargement de la base de données: {e}")
@@ -28,7 +28,6 @@ except Exception as e:
 
 
 import streamlit as st
-import duckdb
 from pathlib import Path
 from datetime import datetime, timedelta
 import sys
@@ -44,56 +43,79 @@ st.set_page_config(
     layout="wide"
 )
 
-# Chemins relatifs depuis la racine du projet
-project_root = Path(__file__).parent.parent.parent
-DB_PATH = project_root / "fx_impact_app" / "data" / "warehouse.duckdb"
+# Chemin DB (DUCKDB_PATH prioritaire, cf. config.get_db_path)
+from config import get_db_path
+from query_profiler import profiled_connect
+DB_PATH = Path(get_db_path())
 
 # Header
 st.title("🏠 EUR/USD News Impact Calculator")
 st.caption("Système d'analyse d'impact des événements macroéconomiques | Version 3.0")
 
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_home_metrics(db_path: str):
+    """Métriques d'accueil depuis events_daily_summary (rafraîchie à l'ingestion)."""
+    from events_summary import home_metrics
+    conn = profiled_connect(db_path)
+    try:
+        return home_metrics(conn)
+    finally:
+        conn.close()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_upcoming(db_path: str):
+    conn = profiled_connect(db_path)
+    try:
+        return conn.execute("""
+            SELECT 
+                ts_utc,
+                event_key,
+                country,
+                forecast,
+                previous
+            FROM events
+            WHERE ts_utc > CURRENT_TIMESTAMP
+              AND ts_utc < CURRENT_TIMESTAMP + INTERVAL '7 days'
+              AND country IN ('US', 'EU', 'GB')
+              AND (
+                  event_key LIKE '%farm payroll%'
+                  OR event_key LIKE '%cpi%'
+                  OR event_key LIKE '%unemployment%'
+                  OR event_key LIKE '%gdp%'
+                  OR event_key LIKE '%fomc%'
+                  OR event_key LIKE '%ecb%'
+              )
+            ORDER BY ts_utc
+            LIMIT 10
+        """).fetchdf()
+    finally:
+        conn.close()
+
+
 # Statistiques globales
 if DB_PATH.exists():
-    conn = duckdb.connect(str(DB_PATH))
-    
-    stats = conn.execute("""
-        SELECT 
-            COUNT(*) as total,
-            COUNT(forecast) as with_forecast,
-            COUNT(CASE WHEN ts_utc > CURRENT_TIMESTAMP THEN 1 END) as future,
-            COUNT(CASE WHEN ts_utc > CURRENT_TIMESTAMP AND ts_utc < CURRENT_TIMESTAMP + INTERVAL '7 days' THEN 1 END) as week
-        FROM events
-        WHERE country IN ('US', 'EU', 'GB')
-    """).fetchone()
-    
-    # Événements aujourd'hui
-    today_events = conn.execute("""
-        SELECT COUNT(*)
-        FROM events
-        WHERE DATE(ts_utc) = CURRENT_DATE
-          AND country IN ('US', 'EU', 'GB')
-    """).fetchone()[0]
-    
-    conn.close()
+    m = load_home_metrics(str(DB_PATH))
     
     # Afficher métriques
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Événements", f"{stats[0]:,}", 
+        st.metric("Total Événements", f"{m['total']:,}", 
                   help="Base complète US, EU, GB")
     
     with col2:
-        st.metric("Avec Forecast", f"{stats[1]:,}", 
-                  delta=f"{stats[1]/stats[0]*100:.1f}%",
+        st.metric("Avec Forecast", f"{m['with_forecast']:,}", 
+                  delta=f"{m['with_forecast']/m['total']*100:.1f}%" if m['total'] else None,
                   help="Consensus de marché disponibles")
     
     with col3:
-        st.metric("Cette Semaine", f"{stats[3]}", 
+        st.metric("Cette Semaine", f"{m['week']}", 
                   help="Événements à venir dans 7 jours")
     
     with col4:
-        st.metric("Aujourd'hui", f"{today_events}",
+        st.metric("Aujourd'hui", f"{m['today']}",
                   help="Événements publiés aujourd'hui")
 
 else:
@@ -182,32 +204,7 @@ st.divider()
 st.header("📅 Aperçu Semaine Prochaine")
 
 if DB_PATH.exists():
-    conn = duckdb.connect(str(DB_PATH))
-    
-    upcoming = conn.execute("""
-        SELECT 
-            ts_utc,
-            event_key,
-            country,
-            forecast,
-            previous
-        FROM events
-        WHERE ts_utc > CURRENT_TIMESTAMP
-          AND ts_utc < CURRENT_TIMESTAMP + INTERVAL '7 days'
-          AND country IN ('US', 'EU', 'GB')
-          AND (
-              event_key LIKE '%farm payroll%'
-              OR event_key LIKE '%cpi%'
-              OR event_key LIKE '%unemployment%'
-              OR event_key LIKE '%gdp%'
-              OR event_key LIKE '%fomc%'
-              OR event_key LIKE '%ecb%'
-          )
-        ORDER BY ts_utc
-        LIMIT 10
-    """).fetchdf()
-    
-    conn.close()
+    upcoming = load_upcoming(str(DB_PATH))
     
     if not upcoming.empty:
         # Formater pour affichage propre
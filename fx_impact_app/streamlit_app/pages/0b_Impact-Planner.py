@@ -6,10 +6,10 @@ src_path = Path(__file__).parent.parent.parent / "src"
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-# Télécharger la base de données si nécessaire (une seule fois)
+# Télécharger la base de données si nécessaire (une seule fois par process)
 try:
-    from download_database import download_database
-    download_database()
+    from download_database import ensure_database
+    ensure_database()
 except Exception as e:
     pass  # Déjà téléchargée ou erreur gérée ailleurs
 
@@ -29,8 +29,6 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
 
 from config import get_db_path
-from forecaster_mvp import ForecastEngine
-from scoring_engine import ScoringEngine
 from event_families import FAMILY_PATTERNS, FAMILY_IMPORTANCE, FAMILY_DESCRIPTIONS
 
 # Configuration page
@@ -46,6 +44,8 @@ st.markdown("Sélectionnez les événements à trader selon leur score d'impact"
 # Initialisation
 @st.cache_resource
 def init_engines():
+    from forecaster_mvp import ForecastEngine
+    from scoring_engine import ScoringEngine
     forecast_engine = ForecastEngine(get_db_path())
     scoring_engine = ScoringEngine()
     return forecast_engine, scoring_engine
@@ -6,10 +6,10 @@ src_path = Path(__file__).parent.parent.parent / "src"
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-# Télécharger la base de données si nécessaire (une seule fois)
+# Télécharger la base de données si nécessaire (une seule fois par process)
 try:
-    from download_database import download_database
-    download_database()
+    from download_database import ensure_database
+    ensure_database()
 except Exception as e:
     pass  # Déjà téléchargée ou erreur gérée ailleurs
 
@@ -24,13 +24,12 @@ import pandas as pd
 from datetime import datetime, timedelta
 import sys
 from pathlib import Path
-import duckdb
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
 
 from config import get_db_path
-from forecaster_mvp import ForecastEngine
-from scoring_engine import ScoringEngine
+from query_profiler import profiled_connect
+import data_access
 from event_families import FAMILY_PATTERNS, FAMILY_IMPORTANCE, FAMILY_DESCRIPTIONS
 
 st.set_page_config(page_title="Calendrier Trading", page_icon="📅", layout="wide")
@@ -41,6 +40,8 @@ st.markdown("**Événements futurs classés par potentiel de trading**")
 # Init
 @st.cache_resource
 def init_engines():
+    from forecaster_mvp import ForecastEngine
+    from scoring_engine import ScoringEngine
     return ForecastEngine(get_db_path()), ScoringEngine()
 
 forecast_engine, scoring_engine = init_engines()
@@ -87,28 +88,11 @@ hist_years = st.sidebar.slider("Historique (années)", 1, 5, 3)
 def get_future_events(date_from, date_to, countries, min_importance):
     """Récupère les événements dans la période future"""
     
-    conn = duckdb.connect(get_db_path())
+    conn = profiled_connect(get_db_path())
     
-    country_filter = "', '".join(countries)
-    
-    query = f"""
-    SELECT 
-        ts_utc,
-        event_key,
-        country,
-        importance_n,
-        actual,
-        forecast,
-        previous
-    FROM events
-    WHERE ts_utc >= '{date_from.strftime('%Y-%m-%d %H:%M:%S')}'
-      AND ts_utc <= '{date_to.strftime('%Y-%m-%d %H:%M:%S')}'
-      AND country IN ('{country_filter}')
-      AND importance_n >= {min_importance}
-    ORDER BY ts_utc
-    """
-    
-    df = conn.execute(query).fetchdf()
+    df = data_access.calendar_range(
+        conn, date_from.replace(microsecond=0), date_to.replace(microsecond=0), countries, min_importance
+    ).fetchdf()
     conn.close()
     
     return df
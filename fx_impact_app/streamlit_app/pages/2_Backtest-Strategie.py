@@ -6,10 +6,10 @@ src_path = Path(__file__).parent.parent.parent / "src"
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-# Télécharger la base de données si nécessaire (une seule fois)
+# Télécharger la base de données si nécessaire (une seule fois par process)
 try:
-    from download_database import download_database
-    download_database()
+    from download_database import ensure_database
+    ensure_database()
 except Exception as e:
     pass  # Déjà téléchargée ou erreur gérée ailleurs
 
@@ -25,14 +25,14 @@ import numpy as np
 from datetime import datetime, timedelta
 import sys
 from pathlib import Path
-import duckdb
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
 
 from config import get_db_path
-from forecaster_mvp import ForecastEngine
-from scoring_engine import ScoringEngine
+from query_profiler import profiled_connect
 from event_families import FAMILY_PATTERNS, FAMILY_IMPORTANCE
+from fast_query import epoch_seconds, from_epoch
+import data_access
 
 st.set_page_config(page_title="Backtest Stratégie", page_icon="📈", layout="wide")
 
@@ -42,6 +42,8 @@ st.markdown("**Simulez vos trades sur l'historique pour valider votre approche**
 # Init
 @st.cache_resource
 def init_engines():
+    from forecaster_mvp import ForecastEngine
+    from scoring_engine import ScoringEngine
     return ForecastEngine(get_db_path()), ScoringEngine()
 
 forecast_engine, scoring_engine = init_engines()
@@ -118,102 +120,57 @@ def simulate_trade(event_ts, event_family, direction_expected, stop_loss, take_p
     Returns:
         dict avec résultats du trade
     """
-    import pandas as pd
+    conn = profiled_connect(get_db_path())
     
-    conn = duckdb.connect(get_db_path())
-    
-    # Normaliser event_ts (enlever timezone)
-    if hasattr(event_ts, 'tz_localize'):
-        event_ts_naive = event_ts.tz_localize(None) if event_ts.tzinfo else event_ts
-    else:
-        event_ts_naive = pd.Timestamp(event_ts).tz_localize(None) if pd.Timestamp(event_ts).tzinfo else pd.Timestamp(event_ts)
+    # Temps en epoch secondes (UTC), prix en tableaux NumPy (pas de DataFrame par trade)
+    event_s = epoch_seconds(event_ts)
     
     # Timestamp d'entrée (X minutes avant événement)
-    entry_ts = event_ts_naive + timedelta(minutes=entry_offset)
+    entry_s = event_s + entry_offset * 60
+    entry_ts = from_epoch(entry_s)
     
     # Récupérer prix d'entrée
-    query_entry = f"""
-    SELECT close as entry_price
-    FROM prices_1m_v
-    WHERE ts_utc <= '{entry_ts}'
-    ORDER BY ts_utc DESC
-    LIMIT 1
-    """
-    
-    entry_result = conn.execute(query_entry).fetchdf()
+    entry_price = data_access.ref_price(conn, entry_ts, inclusive=True)
     
-    if len(entry_result) == 0:
+    if entry_price is None:
         conn.close()
         return None  # Pas de données
     
-    entry_price = entry_result['entry_price'].iloc[0]
-    
     # Récupérer prix après événement (jusqu'à exit_time)
-    exit_ts = event_ts_naive + timedelta(minutes=exit_time)
-    
-    query_prices = f"""
-    SELECT ts_utc, close
-    FROM prices_1m_v
-    WHERE ts_utc >= '{entry_ts}'
-      AND ts_utc <= '{exit_ts}'
-    ORDER BY ts_utc
-    """
+    exit_ts = from_epoch(event_s + exit_time * 60)
     
-    prices_df = conn.execute(query_prices).fetchdf()
+    prices = data_access.price_window(conn, entry_ts, exit_ts)
     conn.close()
     
-    if len(prices_df) < 2:
+    ts, close = prices['ts'], prices['close']
+    if len(close) < 2:
         return None
     
-    # Normaliser les timestamps du DataFrame
-    prices_df['ts_utc'] = pd.to_datetime(prices_df['ts_utc']).dt.tz_localize(None)
-    
-    # Simuler le trade tick par tick
+    # Simuler le trade barre par barre (la barre d'entrée est ignorée)
     direction = 1 if direction_expected == 'UP' else -1
     
-    max_profit_pips = 0
-    max_loss_pips = 0
-    exit_price = entry_price
-    exit_reason = "Time"
-    exit_time_actual = prices_df['ts_utc'].iloc[-1]
+    pnl = (close[1:] - entry_price) * 10000 * direction
+    hit = np.flatnonzero((pnl >= take_profit) | (pnl <= -stop_loss))
+    last = hit[0] if len(hit) else len(pnl) - 1
     
-    for idx, row in prices_df.iterrows():
-        if idx == 0:
-            continue
-        
-        current_price = row['close']
-        pnl_pips = (current_price - entry_price) * 10000 * direction
-        
-        # Track max profit/loss
-        if pnl_pips > max_profit_pips:
-            max_profit_pips = pnl_pips
-        if pnl_pips < max_loss_pips:
-            max_loss_pips = pnl_pips
-        
-        # Check TP
-        if pnl_pips >= take_profit:
-            exit_price = current_price
-            exit_reason = "TP"
-            exit_time_actual = row['ts_utc']
-            break
-        
-        # Check SL
-        if pnl_pips <= -stop_loss:
-            exit_price = current_price
-            exit_reason = "SL"
-            exit_time_actual = row['ts_utc']
-            break
+    # Max profit/loss suivis jusqu'à la sortie incluse
+    max_profit_pips = max(0, float(pnl[:last + 1].max()))
+    max_loss_pips = min(0, float(pnl[:last + 1].min()))
     
-    # Si aucun TP/SL touché, sortie au dernier prix
-    if exit_reason == "Time":
-        exit_price = prices_df['close'].iloc[-1]
+    if len(hit):
+        exit_reason = "TP" if pnl[last] >= take_profit else "SL"
+    else:
+        # Si aucun TP/SL touché, sortie au dernier prix
+        exit_reason = "Time"
+    exit_price = float(close[last + 1])
+    exit_time_actual = from_epoch(ts[last + 1])
     
     # Calculer P&L final
     final_pnl_pips = (exit_price - entry_price) * 10000 * direction
     final_pnl_usd = final_pnl_pips * position_size * 10  # 1 pip = $10 pour 1 lot sur EUR/USD
     
     # Durée du trade
-    duration_minutes = (exit_time_actual - entry_ts).total_seconds() / 60
+    duration_minutes = (ts[last + 1] - entry_s) / 60
     
     return {
         'entry_time': entry_ts,
@@ -272,27 +229,15 @@ if st.sidebar.button("🚀 Lancer le Backtest", type="primary", use_container_wi
     with st.spinner("📊 Récupération des événements de la période..."):
         
         # 2. Récupérer les événements dans la période de backtest
-        conn = duckdb.connect(get_db_path())
-        
-        country_filter = "', '".join(countries)
+        conn = profiled_connect(get_db_path())
         
-        # Construire le pattern regex pour les familles tradables
+        # Familles tradables : event_family_map si présente, sinon regex combinée (OR)
         patterns = [FAMILY_PATTERNS[f] for f in tradable_families.keys()]
-        # Combiner avec OR
-        combined_pattern = '|'.join([p.replace('(?i)', '') for p in patterns])
-        
-        query_events = f"""
-        SELECT ts_utc, event_key, country, importance_n
-        FROM events
-        WHERE ts_utc >= '{date_from.strftime('%Y-%m-%d')}'
-          AND ts_utc <= '{date_to.strftime('%Y-%m-%d')}'
-          AND country IN ('{country_filter}')
-          AND importance_n >= {min_importance}
-          AND event_key ~ '{combined_pattern}'
-        ORDER BY ts_utc
-        """
         
-        events_df = conn.execute(query_events).fetchdf()
+        events_df = data_access.events_for_family(
+            conn, patterns, since=date_from.date(), until=date_to.date(),
+            countries=countries, min_importance=min_importance
+        ).fetchdf()
         conn.close()
         
         if len(events_df) == 0:
@@ -6,16 +6,15 @@ src_path = Path(__file__).parent.parent.parent / "src"
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-# Télécharger la base de données si nécessaire (une seule fois)
+# Télécharger la base de données si nécessaire (une seule fois par process)
 try:
-    from download_database import download_database
-    download_database()
+    from download_database import ensure_database
+    ensure_database()
 except Exception as e:
     pass  # Déjà téléchargée ou erreur gérée ailleurs
 
 
 import streamlit as st
-import duckdb
 import pandas as pd
 from datetime import datetime, timedelta
 import sys
@@ -24,9 +23,11 @@ from pathlib import Path
 # Ajouter le chemin du module
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from src.config import get_db_path
-from src.forecaster_mvp import ForecastEngine
+from src.config import db_read_only, get_db_path
+from src.query_profiler import profiled_connect
 from src.event_families import FAMILY_PATTERNS, get_family_info
+from src.events_summary import refresh_events_summary
+from src.family_map import map_predicate, update_family_map
 
 st.set_page_config(page_title="Analyseur Surprise", page_icon="🎯", layout="wide")
 
@@ -36,10 +37,21 @@ st.markdown("**Prédiction d'impact basée sur l'écart actual vs forecast (ou p
 # Initialiser le forecaster
 @st.cache_resource
 def get_forecaster():
+    from src.forecaster_mvp import ForecastEngine
     return ForecastEngine(get_db_path())
 
 forecaster = get_forecaster()
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_family_stats(pattern, countries, horizon_minutes=30, hist_years=1):
+    """Stats famille mises en cache (évite le recalcul à chaque rerun / changement de page)."""
+    return get_forecaster().calculate_family_stats(
+        pattern,
+        horizon_minutes=horizon_minutes,
+        hist_years=hist_years,
+        countries=list(countries)
+    )
+
 # Tabs pour les deux modes
 tab1, tab2 = st.tabs(["📊 Analyse avec Données Existantes", "✍️ Saisie Manuelle Forecast"])
 
@@ -77,11 +89,11 @@ with tab1:
     # Récupérer les événements récents - nouvelle approche sans connexion
     if countries:
         pattern = FAMILY_PATTERNS[selected_family]
-        countries_str = "', '".join(countries)
         
         # Utiliser une nouvelle connexion à chaque fois, sans cache
         try:
-            temp_conn = duckdb.connect(get_db_path())
+            temp_conn = profiled_connect(get_db_path())
+            family_filter, params = map_predicate(temp_conn, pattern) or ("event_key ~ ?", [pattern])
             recent_events = temp_conn.execute(f"""
                 SELECT 
                     ts_utc,
@@ -92,13 +104,13 @@ with tab1:
                     previous,
                     unit
                 FROM events
-                WHERE event_key ~ '{pattern}'
-                  AND country IN ('{countries_str}')
+                WHERE {family_filter}
+                  AND country IN (SELECT unnest(?))
                   AND actual IS NOT NULL
                   AND ts_utc >= CURRENT_DATE - INTERVAL '6 months'
                 ORDER BY ts_utc DESC
                 LIMIT 20
-            """).fetchdf()
+            """, params + [list(countries)]).fetchdf()
             temp_conn.close()
         except Exception as e:
             st.error(f"Erreur lors de la récupération des événements : {e}")
@@ -153,12 +165,7 @@ with tab1:
                 st.metric("Surprise", f"{surprise:+.2f}{selected_event['unit'] or ''}")
                 
                 # Calculer impact prédit
-                stats = forecaster.calculate_family_stats(
-                    pattern, 
-                    horizon_minutes=30,
-                    hist_years=1,
-                    countries=countries 
-                )
+                stats = get_family_stats(pattern, tuple(countries))
                 
                 if stats['n_events'] > 0:
                     # Impact basé sur MFE P80
@@ -236,11 +243,13 @@ with tab2:
         default=[f"{forecast_value:.2f} (En ligne)", f"{forecast_value + 0.2:.2f} (Très positif)"]
     )
     
-    if st.button("💾 Sauvegarder Forecast dans la Base", type="primary"):
+    if st.button("💾 Sauvegarder Forecast dans la Base", type="primary", disabled=db_read_only(),
+                 help="Base de service en lecture seule (FX_DB_READ_ONLY=0 pour saisir en local)"
+                 if db_read_only() else None):
         try:
             event_ts = datetime.combine(event_date, event_time)
             
-            conn = duckdb.connect(get_db_path())
+            conn = profiled_connect(get_db_path())
             existing = conn.execute("""
                 SELECT COUNT(*) FROM events
                 WHERE ts_utc = ? AND event_key = ? AND country = ?
@@ -261,6 +270,8 @@ with tab2:
                      get_family_info(manual_family)['importance']])
                 st.success(f"✅ Nouvel événement créé : {event_name} du {event_ts}")
             
+            update_family_map(conn)
+            refresh_events_summary(conn)
             conn.close()
             st.cache_data.clear()
             st.rerun()
@@ -272,12 +283,7 @@ with tab2:
         st.markdown("---")
         
         pattern = FAMILY_PATTERNS[manual_family]
-        stats = forecaster.calculate_family_stats(
-            pattern,
-            horizon_minutes=30,
-            hist_years=1,
-            countries=[manual_country]
-        )
+        stats = get_family_stats(pattern, (manual_country,))
         
         if stats['n_events'] > 0:
             st.markdown(f"**Basé sur {stats['n_events']} événements historiques**")
@@ -6,10 +6,10 @@ src_path = Path(__file__).parent.parent.parent / "src"
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-# Télécharger la base de données si nécessaire (une seule fois)
+# Télécharger la base de données si nécessaire (une seule fois par process)
 try:
-    from download_database import download_database
-    download_database()
+    from download_database import ensure_database
+    ensure_database()
 except Exception as e:
     pass  # Déjà téléchargée ou erreur gérée ailleurs
 
@@ -23,34 +23,40 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import duckdb
 import re
-import plotly.graph_objects as go
-import plotly.express as px
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from config import get_db_path
+from config import db_read_only, get_db_path
+from query_profiler import profiled_connect
+from window_fetch import fetch_windows, to_epoch_seconds
+from interval_overlaps import prediction_windows, sweep_overlaps
+from scenario_engine import ScenarioInputs, delta_grid, evaluate_grid, calculate_tradability_score
+from planner import compute_family_stats, load_precomputed_stats, predict_event
+from result_cache import cached, data_version
 from event_families import FAMILY_PATTERNS
-from forecaster_mvp import ForecastEngine
-from scoring_engine import ScoringEngine
-from latency_analyzer import LatencyAnalyzer  # ✅ AJOUT IMPORT
 
 st.set_page_config(page_title="Planificateur Multi-Événements", page_icon="📅", layout="wide")
 
 # ═══════════════════════════════════════════════════════════════
 # MIGRATION DB AUTOMATIQUE
 # ═══════════════════════════════════════════════════════════════
-try:
-    import sys
-    from pathlib import Path
-    migrate_path = Path(__file__).parent.parent.parent.parent
-    if str(migrate_path) not in sys.path:
-        sys.path.insert(0, str(migrate_path))
-    from migrate_db import migrate_database
-    migrate_database()
-except Exception as e:
-    pass  # Ignore erreurs migration (DB peut être read-only sur cloud)
+@st.cache_resource(show_spinner=False)
+def _migrate_once():
+    """Migration exécutée une seule fois par process (pas à chaque rerun)."""
+    if db_read_only():
+        return True  # base de service : colonnes latency déjà présentes
+    try:
+        migrate_path = Path(__file__).parent.parent.parent.parent
+        if str(migrate_path) not in sys.path:
+            sys.path.insert(0, str(migrate_path))
+        from migrate_db import migrate_database
+        migrate_database()
+    except Exception as e:
+        pass  # Ignore erreurs migration (DB peut être read-only sur cloud)
+    return True
+
+_migrate_once()
 
 
 st.title("📅 Planificateur Multi-Événements")
@@ -63,10 +69,7 @@ if 'future_events' not in st.session_state:
     st.session_state.future_events = None
 if 'selected_events' not in st.session_state:
     st.session_state.selected_events = set()
-if 'family_stats_cache' not in st.session_state:
-    st.session_state.family_stats_cache = {}
-if 'backtest_cache' not in st.session_state:
-    st.session_state.backtest_cache = {}
+# Stats de familles et prix de backtest : cache partagé entre sessions (result_cache)
 
 
 # Fonctions
@@ -80,54 +83,18 @@ if 'backtest_cache' not in st.session_state:
 def load_precomputed_stats_from_db():
     """Charge stats pré-calculées depuis DB"""
     try:
-        conn = duckdb.connect(get_db_path(), read_only=True)
-        # Vérifier si colonnes latency existent
-        schema = conn.execute("DESCRIBE event_families").fetchall()
-        cols = [col[0] for col in schema]
-        
-        if 'latency_median' not in cols:
+        conn = profiled_connect(get_db_path())
+        try:
+            return load_precomputed_stats(conn)
+        finally:
             conn.close()
-            return {}  # Colonnes pas encore créées
-        query = """
-            SELECT DISTINCT family, latency_median, latency_p20, latency_p80,
-                   ttr_median, ttr_p20, ttr_p80, mfe_p80, n_events_latency
-            FROM event_families WHERE latency_median IS NOT NULL
-        """
-        results = conn.execute(query).fetchall()
-        conn.close()
-        stats_dict = {}
-        for row in results:
-            stats_dict[row[0]] = {
-                'latency_median': row[1], 'latency_p20': row[2], 'latency_p80': row[3],
-                'ttr_median': row[4], 'ttr_p20': row[5], 'ttr_p80': row[6],
-                'mfe_p80': row[7] if row[7] else 10.0, 'n_events': row[8]
-            }
-        return stats_dict
-    except:
+    except Exception:
         return {}
 
 def predict_impact_fast(family, surprise, precomputed_stats, years_back=3):
-    """Version ULTRA-RAPIDE"""
-    # Normaliser le nom de famille (espaces → underscores)
-    family_normalized = family.replace(' ', '_')
-    if family_normalized in precomputed_stats:
-        stats = precomputed_stats[family_normalized]
-        mfe = stats['mfe_p80']
-        impact_factor = min(2.0, 1.0 + (surprise / 100)) if surprise > 0.5 else 1.0
-        impact = mfe * impact_factor
-        direction = 1 if surprise > 0 else -1
-        return {
-            'predicted_pips': impact, 'direction': direction,
-            'latency_median': stats['latency_median'], 'latency_p20': stats['latency_p20'],
-            'latency_p80': stats['latency_p80'], 'ttr_median': stats['ttr_median'],
-            'ttr_p20': stats['ttr_p20'], 'ttr_p80': stats['ttr_p80'],
-            'n_similar': stats['n_events'], 'mfe_p80': stats['mfe_p80'], 'source': 'precomputed_db'
-        }
-    else:
-        result = predict_impact(family, surprise, years_back)
-        if result:
-            result['source'] = 'calculated'
-        return result
+    """Version ULTRA-RAPIDE : stats pré-calculées, sinon calculées (règles de planner, comme l'API)"""
+    return predict_event(family, surprise, precomputed_stats,
+                         lambda: family_stats_for(family, surprise, years_back))
 
 
 def identify_family(event_key):
@@ -139,11 +106,9 @@ def identify_family(event_key):
 
 
 def get_future_events(date_from, date_to, countries):
-    conn = duckdb.connect(get_db_path())
+    conn = profiled_connect(get_db_path())
     
-    country_filter = "', '".join(countries)
-    
-    query = f"""
+    query = """
     SELECT 
         e.ts_utc, e.event_key, e.country, e.importance_n,
         e.actual, e.forecast, e.previous,
@@ -152,13 +117,18 @@ def get_future_events(date_from, date_to, countries):
     FROM events e
     LEFT JOIN event_families ef 
         ON e.event_key = ef.event_key AND e.country = ef.country
-    WHERE e.ts_utc >= '{date_from.strftime('%Y-%m-%d %H:%M')}'
-      AND e.ts_utc <= '{date_to.strftime('%Y-%m-%d %H:%M')}'
-      AND e.country IN ('{country_filter}')
+    WHERE e.ts_utc >= ?
+      AND e.ts_utc <= ?
+      AND e.country IN (SELECT unnest(?))
     ORDER BY e.ts_utc
     """
     
-    df = conn.execute(query).fetchdf()
+    # Bornes à la minute, comme l'ancien filtre texte '%Y-%m-%d %H:%M'
+    df = conn.execute(query, [
+        date_from.replace(second=0, microsecond=0),
+        date_to.replace(second=0, microsecond=0),
+        list(countries),
+    ]).fetchdf()
     conn.close()
     
     if len(df) > 0:
@@ -168,137 +138,43 @@ def get_future_events(date_from, date_to, countries):
     return df
 
 
-def predict_impact(family, surprise, years_back=3):
+def family_stats_for(family, surprise, years_back=3):
     """
-    Prédit impact avec latence et TTR basés sur historique réel (avec cache)
-    ✅ CORRECTION: Utilise LatencyAnalyzer pour latences précises
+    Stats de famille calculées sur l'historique réel (planner.compute_family_stats,
+    cache partagé) ; None avec message si indisponibles.
     """
-    # Vérifier cache
-    cache_key = f"{family}_{years_back}"
-    if cache_key in st.session_state.family_stats_cache:
-        stats = st.session_state.family_stats_cache[cache_key]
-    else:
-        pattern = FAMILY_PATTERNS.get(family, '')
-        if not pattern:
-            # Pas de warning si appelé depuis pré-chargement
-            if surprise != 0:
-                st.warning(f"⚠️ Pattern non trouvé pour famille: {family}")
-            return None
-        
-        try:
-            # === CORRECTION : Utiliser LatencyAnalyzer pour latences ===
-            analyzer = LatencyAnalyzer(get_db_path())
-            
-            # Calculer stats de latence avec LatencyAnalyzer (PRÉCIS)
-            # ✅ CORRECTION: Bons paramètres selon latency_analyzer.py
-            latency_stats = analyzer.calculate_family_latency_stats(
-                family_pattern=pattern,
-                threshold_pips=5.0,
-                min_events=5,
-                lookback_days=years_back * 365  # ✅ C'est lookback_days !
-            )
-            
-            # ✅ Vérification robuste
-            if not latency_stats or not isinstance(latency_stats, dict):
-                analyzer.close()
-                return None
-            
-            if latency_stats.get('events_analyzed', 0) == 0:
-                analyzer.close()
-                if surprise != 0:
-                    st.warning(f"⚠️ Aucun événement historique trouvé pour {family}")
-                return None
-            
-            # Vérifier structure initial_reaction
-            if 'initial_reaction' not in latency_stats or not latency_stats['initial_reaction']:
-                analyzer.close()
-                return None
-            
-            analyzer.close()
-            
-            # === Utiliser ForecastEngine uniquement pour MFE (impact) ===
-            engine = ForecastEngine(get_db_path())
-            
-            mfe_stats = engine.calculate_family_stats(
-                pattern,
-                horizon_minutes=60,
-                hist_years=years_back,
-                countries=None
-            )
-            
-            engine.close()
-            
-            # Combiner les deux sources
-            stats = {
-                'n_events': latency_stats['events_analyzed'],
-                
-                # LATENCE depuis LatencyAnalyzer (CORRECT ✅)
-                'latency_median': latency_stats['initial_reaction']['median_minutes'],
-                'latency_p20': latency_stats['initial_reaction'].get('p20_minutes', 
-                    latency_stats['initial_reaction']['median_minutes'] * 0.5),
-                'latency_p80': latency_stats['initial_reaction'].get('p80_minutes', 
-                    latency_stats['initial_reaction']['median_minutes'] * 1.5),
-                
-                # TTR = Latence × 2 (formule empirique optimale ✅)
-                'ttr_median': latency_stats['initial_reaction']['median_minutes'] * 2,
-                'ttr_p20': latency_stats['initial_reaction']['median_minutes'] * 1.5,
-                'ttr_p80': latency_stats['initial_reaction']['median_minutes'] * 3,
-                
-                # MFE (impact) depuis ForecastEngine
-                'mfe_p80': mfe_stats.get('mfe_p80', 10)
-            }
-            
-        except KeyError as e:
-            # Erreur structure de données
-            if 'analyzer' in locals():
-                analyzer.close()
-            if 'engine' in locals():
-                engine.close()
-            if surprise != 0:
-                st.error(f"❌ Erreur structure données pour {family}: clé manquante '{e}'")
-            return None
-        except ImportError as e:
-            if surprise != 0:
-                st.error(f"❌ Erreur import LatencyAnalyzer: {e}")
-                st.info("💡 Vérifiez que latency_analyzer.py existe dans fx_impact_app/src/")
-            return None
-        except Exception as e:
-            if 'analyzer' in locals():
-                analyzer.close()
-            if 'engine' in locals():
-                engine.close()
-            if surprise != 0:
-                st.error(f"❌ Erreur predict_impact pour {family}: {e}")
-            return None
-        
-        # Mettre en cache
-        st.session_state.family_stats_cache[cache_key] = stats
+    pattern = FAMILY_PATTERNS.get(family, '')
+    if not pattern:
+        # Pas de warning si appelé depuis pré-chargement
+        if surprise != 0:
+            st.warning(f"⚠️ Pattern non trouvé pour famille: {family}")
+        return None
+
+    try:
+        stats = compute_family_stats(pattern, years_back, get_db_path())
+    except KeyError as e:
+        # Erreur structure de données
+        if surprise != 0:
+            st.error(f"❌ Erreur structure données pour {family}: clé manquante '{e}'")
+        return None
+    except ImportError as e:
+        if surprise != 0:
+            st.error(f"❌ Erreur import LatencyAnalyzer: {e}")
+            st.info("💡 Vérifiez que latency_analyzer.py existe dans fx_impact_app/src/")
+        return None
+    except Exception as e:
+        if surprise != 0:
+            st.error(f"❌ Erreur stats de famille pour {family}: {e}")
+        return None
+
+    if stats is None:
+        return None
+    if stats['n_events'] == 0 and surprise != 0:
+        st.warning(f"⚠️ Aucun événement historique trouvé pour {family}")
     
     if stats['n_events'] == 0:
         return None
-    
-    # Impact basé sur MFE P80 historique
-    base_impact = stats['mfe_p80']
-    
-    # Direction selon surprise
-    direction = 1 if surprise > 0 else -1
-    
-    # Ajustement proportionnel à la surprise
-    surprise_factor = min(abs(surprise) / 50.0, 2.0)
-    adjusted_impact = base_impact * (0.5 + 0.5 * surprise_factor)
-    
-    return {
-        'predicted_pips': adjusted_impact,
-        'direction': direction,
-        'latency_median': stats['latency_median'],
-        'latency_p20': stats['latency_p20'],
-        'latency_p80': stats['latency_p80'],
-        'ttr_median': stats['ttr_median'],
-        'ttr_p20': stats['ttr_p20'],
-        'ttr_p80': stats['ttr_p80'],
-        'n_similar': stats['n_events'],
-        'mfe_p80': stats['mfe_p80']
-    }
+    return stats
 
 
 def calculate_fibonacci_levels(impact_pips, direction):
@@ -319,8 +195,10 @@ def calculate_fibonacci_levels(impact_pips, direction):
     return levels
 
 
-def create_timeline_chart(predictions, weighted_latency, min_ttr):
-    """Crée timeline visuelle interactive avec Plotly"""
+def create_timeline_chart(predictions, weighted_latency, min_ttr, overlap_result=None):
+    """Crée timeline visuelle interactive avec Plotly (+ zones de chevauchement si fournies)"""
+    import plotly.graph_objects as go
+    import plotly.express as px
     
     fig = go.Figure()
     
@@ -376,6 +254,16 @@ def create_timeline_chart(predictions, weighted_latency, min_ttr):
             hovertemplate=f"TTR: {pred['ttr_median']:.0f} min<extra></extra>"
         ))
     
+    # Zones de chevauchement (groupes du balayage, même origine T0)
+    if overlap_result is not None:
+        for grp in overlap_result.groups():
+            fig.add_vrect(
+                x0=grp['start'], x1=grp['end'],
+                fillcolor="red" if grp['severity'] == 'HIGH' else "orange",
+                opacity=0.12, line_width=0, layer="below",
+                annotation_text=f"{len(grp['members'])} fenêtres", annotation_position="bottom left"
+            )
+    
     # Ligne verticale réaction attendue (moyenne pondérée)
     fig.add_vline(
         x=weighted_latency,
@@ -412,126 +300,56 @@ def create_timeline_chart(predictions, weighted_latency, min_ttr):
     return fig
 
 
-def detect_overlaps(predictions):
-    """Détecte les chevauchements entre fenêtres d'événements"""
+def detect_overlaps(predictions, result=None):
+    """
+    Détecte les chevauchements entre fenêtres [ts + latence P20, ts + TTR P80]
+    (balayage O(n log n), cf. interval_overlaps).
+    """
+    if result is None:
+        result = sweep_overlaps(*prediction_windows(predictions)[:2])
     overlaps = []
-    
-    for i, pred1 in enumerate(predictions):
-        time1 = pd.to_datetime(pred1['event']['ts_utc'])
-        end1 = time1 + timedelta(minutes=pred1['ttr_median'])
-        
-        for j, pred2 in enumerate(predictions[i+1:], start=i+1):
-            time2 = pd.to_datetime(pred2['event']['ts_utc'])
-            start2 = time2
-            
-            # Chevauchement si événement 2 démarre avant fin de TTR événement 1
-            if start2 < end1:
-                overlap_minutes = (end1 - start2).total_seconds() / 60
-                overlaps.append({
-                    'event1': f"{pred1['event']['family']} ({pred1['event']['country']})",
-                    'event2': f"{pred2['event']['family']} ({pred2['event']['country']})",
-                    'overlap_minutes': overlap_minutes,
-                    'severity': 'HIGH' if overlap_minutes > 10 else 'MEDIUM'
-                })
-    
+    for i, j, overlap_minutes in result.pairs:
+        pred1, pred2 = predictions[i], predictions[j]
+        overlaps.append({
+            'event1': f"{pred1['event']['family']} ({pred1['event']['country']})",
+            'event2': f"{pred2['event']['family']} ({pred2['event']['country']})",
+            'overlap_minutes': overlap_minutes,
+            'severity': result.severity(overlap_minutes)
+        })
     return overlaps
 
 
-def calculate_tradability_score(predictions, overlaps, time_span):
-    """Calcule un score de tradabilité de 0-100 pour la session"""
-    score = 50  # Base
-    
-    # Bonus : nombre d'événements
-    if len(predictions) == 2:
-        score += 10
-    elif len(predictions) >= 3:
-        score += 5
-    
-    # Bonus : cohérence directionnelle
-    directions = [p['direction'] for p in predictions]
-    if len(set(directions)) == 1:
-        score += 20  # Amplification
-    else:
-        score -= 10  # Antagonisme
-    
-    # Bonus : impact total significatif
-    total_impact = sum(abs(p['predicted_pips'] * p['direction']) for p in predictions)
-    if total_impact > 20:
-        score += 15
-    elif total_impact > 10:
-        score += 10
-    
-    # Malus : chevauchements
-    high_overlaps = len([o for o in overlaps if o['severity'] == 'HIGH'])
-    score -= high_overlaps * 10
-    
-    # Malus : événements trop espacés
-    if time_span > 3:
-        score -= 15
-    
-    # Bonus : fenêtre compacte
-    if time_span < 1:
-        score += 10
-    
-    return max(0, min(100, score))
+def get_real_prices_batch(event_times, window_minutes=60):
+    """
+    Récupère les prix réels pour plusieurs événements en UNE SEULE query :
+    jointure par intervalle sur les fenêtres (cf. window_fetch), découpage NumPy.
+    Résultat partagé entre sessions (result_cache), par fenêtres et version de la base.
+    """
+    if len(event_times) == 0:
+        return {}
+    try:
+        return _fetch_real_prices(tuple(to_epoch_seconds(event_times).tolist()), window_minutes, get_db_path())
+    except Exception as e:
+        print(f"Erreur get_real_prices_batch: {e}")
+        return {}
 
 
-def get_real_prices_batch(event_times, window_minutes=60):
-    """Récupère les prix réels pour plusieurs événements en UNE SEULE query (OPTIMISÉ)"""
-    conn = duckdb.connect(get_db_path())
-    
-    results = {}
-    
-    # Convertir tous les timestamps
-    epochs = []
-    for i, event_time in enumerate(event_times):
-        if isinstance(event_time, str):
-            event_time = pd.to_datetime(event_time)
-        
-        if hasattr(event_time, 'tz') and event_time.tz is not None:
-            event_time = event_time.tz_convert('UTC').tz_localize(None)
-        elif hasattr(event_time, 'tz_localize'):
-            event_time = pd.Timestamp(event_time).tz_localize('UTC').tz_localize(None)
-        else:
-            event_time = pd.Timestamp(event_time)
-        
-        event_epoch = int(event_time.timestamp())
-        end_epoch = event_epoch + (window_minutes * 60)
-        epochs.append((i, event_epoch, end_epoch))
-    
-    # UNE SEULE query pour tous les événements
-    if len(epochs) > 0:
-        # Créer conditions OR pour tous les événements
-        conditions = " OR ".join([f"(timestamp >= {e[1]} AND timestamp <= {e[2]})" for e in epochs])
-        
-        query = f"""
-        SELECT timestamp, close
-        FROM prices_1m
-        WHERE {conditions}
-        ORDER BY timestamp ASC
-        """
-        
-        try:
-            all_prices = conn.execute(query).fetchall()
-            conn.close()
-            
-            # Dispatcher les prix vers chaque événement
-            for i, event_epoch, end_epoch in epochs:
-                event_prices = [(t, p) for t, p in all_prices if event_epoch <= t <= end_epoch]
-                
-                if len(event_prices) > 0:
-                    times = [datetime.fromtimestamp(r[0]) for r in event_prices]
-                    prices = [r[1] for r in event_prices]
-                    results[i] = pd.DataFrame({'time': times, 'price': prices})
-                else:
-                    results[i] = None
-        except Exception as e:
-            print(f"Erreur get_real_prices_batch: {e}")
-            conn.close()
-            return {}
-    else:
+@cached("backtest_prices", version=lambda starts, window_minutes, db_path: data_version(db_path))
+def _fetch_real_prices(starts, window_minutes, db_path):
+    starts = np.asarray(starts, dtype=np.int64)
+    conn = profiled_connect(db_path)
+    try:
+        batch = fetch_windows(conn, starts, starts + window_minutes * 60, columns=("close",))
+    finally:
         conn.close()
-    
+
+    results = {}
+    for i in range(len(batch)):
+        if batch.rows(i) == 0:
+            results[i] = None
+            continue
+        times = [datetime.fromtimestamp(t) for t in batch.column(i, "timestamp").tolist()]
+        results[i] = pd.DataFrame({'time': times, 'price': batch.column(i, "close")})
     return results
 
 
@@ -589,6 +407,7 @@ def measure_real_impact(prices_df, threshold_pips=5.0):
 def create_backtest_chart(prices_df, event_time, predicted_impact, predicted_latency, predicted_ttr, real_metrics):
     """Crée graphique comparaison prédiction vs réalité"""
     from datetime import timedelta
+    import plotly.graph_objects as go
     
     fig = go.Figure()
     
@@ -987,8 +806,9 @@ else:
             # TTR = minimum
             min_ttr = min(p['ttr_median'] for p in predictions)
             
-            # Détection chevauchements
-            overlaps = detect_overlaps(predictions)
+            # Détection chevauchements (balayage partagé avec la timeline)
+            overlap_result = sweep_overlaps(*prediction_windows(predictions)[:2])
+            overlaps = detect_overlaps(predictions, overlap_result)
             
             # Score de tradabilité
             tradability_score = calculate_tradability_score(predictions, overlaps, time_span)
@@ -1039,7 +859,7 @@ else:
             # === SECTION 2 : TIMELINE VISUELLE ===
             st.subheader("📈 Timeline Visuelle Interactive")
             
-            timeline_fig = create_timeline_chart(predictions, weighted_latency, min_ttr)
+            timeline_fig = create_timeline_chart(predictions, weighted_latency, min_ttr, overlap_result)
             st.plotly_chart(timeline_fig, use_container_width=True)
             
             st.divider()
@@ -1168,33 +988,25 @@ else:
             # === SECTION 7 : SCÉNARIOS ===
             st.subheader("🎭 Scénarios Alternatifs")
             
-            scenarios = []
-            for delta in [-2, -1, 0, 1, 2]:
-                scenario_predictions = []
-                
-                for p in predictions:
-                    new_surprise = p['surprise'] + delta
-                    new_pred = predict_impact(p['event']['family'], new_surprise)
-                    
-                    if new_pred:
-                        scenario_predictions.append({
-                            'impact': new_pred['predicted_pips'] * new_pred['direction'],
-                            'latency': new_pred['latency_median'],
-                            'ttr': new_pred['ttr_median']
-                        })
-                
-                if scenario_predictions:
-                    scenario_impact = sum(sp['impact'] for sp in scenario_predictions)
-                    scenario_latency = np.mean([sp['latency'] for sp in scenario_predictions])
-                    scenario_ttr = min(sp['ttr'] for sp in scenario_predictions)
-                    
-                    scenarios.append({
-                        'Variation': f"{delta:+d}",
-                        'Impact': f"{abs(scenario_impact):.1f} pips",
-                        'Direction': "🔼 UP" if scenario_impact > 0 else "🔽 DOWN",
-                        'Latence': f"{scenario_latency:.0f} min",
-                        'TTR': f"{scenario_ttr:.0f} min"
-                    })
+            # Stats de famille des prédictions affichées, grille évaluée en un bloc NumPy
+            # (formule scaled_impact : pour une famille pré-calculée, la ligne delta = 0
+            # peut différer de l'impact affiché plus haut, cf. scenario_engine)
+            scenario_span = st.slider("Amplitude de variation de la surprise", 0.5, 10.0, 2.0, 0.5,
+                                      key="scenario_span")
+            grid = evaluate_grid(ScenarioInputs.from_predictions(predictions),
+                                 delta_grid(scenario_span, scenario_span / 20))
+            
+            st.line_chart(grid.set_index('delta')[['impact']].rename(columns={'impact': 'Impact combiné (pips)'}))
+            
+            # Tableau : 5 points de la grille (-amplitude, -amplitude/2, 0, +amplitude/2, +amplitude)
+            key_rows = grid.iloc[::10]
+            scenarios = [{
+                'Variation': f"{row.delta:+g}",
+                'Impact': f"{row.abs_impact:.1f} pips",
+                'Direction': "🔼 UP" if row.impact > 0 else "🔽 DOWN",
+                'Latence': f"{row.latency_mean:.0f} min",
+                'TTR': f"{row.ttr_min:.0f} min"
+            } for row in key_rows.itertuples()]
             
             if scenarios:
                 st.table(pd.DataFrame(scenarios))
@@ -11,17 +11,15 @@ if str(src_path) not in sys.path:
 
 # Télécharger la base de données si nécessaire
 try:
-    from download_database import download_database
-    download_database()
+    from download_database import ensure_database
+    ensure_database()
 except Exception as e:
     pass
 
 import streamlit as st
 import pandas as pd
-import importlib
-import latency_analyzer
-importlib.reload(latency_analyzer)
 from latency_analyzer import LatencyAnalyzer
+from config import get_db_path
 
 st.set_page_config(page_title="Analyse Latence", page_icon="⏱️", layout="wide")
 
@@ -32,7 +30,14 @@ Comprendre combien de temps après l'annonce le marché commence à bouger et qu
 """)
 
 # Initialiser l'analyseur
-analyzer = LatencyAnalyzer()
+analyzer = LatencyAnalyzer(get_db_path())
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_latency_summary(db_path: str, threshold_pips: float):
+    """Résumé toutes familles (coûteux) : calculé une fois par seuil, pas à chaque rerun."""
+    with LatencyAnalyzer(db_path) as a:
+        return a.get_all_families_latency_summary(threshold_pips)
 
 # Sidebar : Configuration
 st.sidebar.header("⚙️ Configuration")
@@ -64,8 +69,7 @@ with tab1:
     st.header("Résumé : Latences par Type d'Événement")
     
     with st.spinner("Calcul des latences pour toutes les familles..."):
-        with analyzer:
-            all_stats = analyzer.get_all_families_latency_summary(threshold_pips)
+        all_stats = load_latency_summary(get_db_path(), threshold_pips)
     
     if all_stats:
         # Créer DataFrame pour affichage
@@ -5,7 +5,8 @@ import pandas as pd
 from datetime import date
 from typing import Any, Dict, List
 
-from fx_impact_app.src.config import get_db_path, get_eod_key, get_te_key, env_status
+from fx_impact_app.src.config import db_read_only, get_db_path, get_eod_key, get_te_key, env_status
+from fx_impact_app.src.query_profiler import get_profiler, profiling_enabled
 from fx_impact_app.src.eodhd_client import (
     fetch_calendar_json as eod_fetch,
     calendar_to_events_df as eod_norm,
@@ -79,7 +80,8 @@ else:
                                    file_name=f"eodhd_{d1}_{d2}.csv",
                                    mime="text/csv")
             with cexp2:
-                if st.button("Insérer dans `events` (UPSERT)"):
+                if st.button("Insérer dans `events` (UPSERT)", disabled=db_read_only(),
+                             help="Base de service en lecture seule" if db_read_only() else None):
                     n = eod_upsert(df, db_path=db)
                     st.success(f"Upsert terminé — lignes traitées : {n}")
         else:
@@ -96,3 +98,43 @@ if not te_key:
     st.info("TE_API_KEY absente ou plan sans droit `/calendar`.")
 else:
     st.info("Client TE non activé dans ce projet (on peut l’ajouter plus tard si tu passes au plan avec Calendar API).")
+
+st.markdown("---")
+
+# -------- Profilage des requêtes DuckDB --------
+st.header("⏱️ Profilage des requêtes DuckDB")
+prof = get_profiler()
+if not profiling_enabled():
+    st.info("Profilage désactivé (FX_QUERY_PROFILE=0).")
+else:
+    st.caption(
+        f"Depuis {prof.started_at} (process Streamlit, toutes pages confondues) — "
+        f"EXPLAIN ANALYZE: {'> %.0f ms' % prof.explain_threshold_ms if prof.explain_threshold_ms is not None else 'off (FX_QUERY_EXPLAIN_MS)'}"
+    )
+    aggs = prof.aggregates()
+    if not aggs:
+        st.info("Aucune requête enregistrée pour l’instant — naviguez dans les pages puis revenez ici.")
+    else:
+        agg_df = pd.DataFrame(aggs)
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Requêtes", f"{int(agg_df['count'].sum()):,}")
+        m2.metric("Empreintes distinctes", f"{len(agg_df)}")
+        m3.metric("Temps total", f"{agg_df['total_ms'].sum() / 1000:.2f} s")
+        st.dataframe(
+            agg_df[["count", "total_ms", "p50_ms", "p95_ms", "max_ms", "rows", "last_caller", "fingerprint"]],
+            use_container_width=True,
+        )
+        with st.expander("Dernières requêtes (ring buffer)"):
+            st.dataframe(pd.DataFrame(prof.recent(200)).drop(columns=["explain"]), use_container_width=True)
+        for ex in prof.explains()[:10]:
+            with st.expander(f"EXPLAIN ANALYZE — {ex['duration_ms']:.0f} ms — {ex['caller']}"):
+                st.code(ex["explain"], language="text")
+
+    cp1, cp2 = st.columns(2)
+    with cp1:
+        st.download_button("Export JSON du profil", data=prof.dump_json().encode("utf-8"),
+                           file_name="query_profile.json", mime="application/json")
+    with cp2:
+        if st.button("Réinitialiser le profil"):
+            prof.reset()
+            st.rerun()
@@ -1,9 +1,13 @@
 """Migration DB : Ajoute colonnes latency si manquantes"""
+import os
 import duckdb
 from pathlib import Path
 
 def get_db_path():
-    """Trouve le chemin de la DB"""
+    """Trouve le chemin de la DB (DUCKDB_PATH prioritaire)"""
+    env = os.environ.get("DUCKDB_PATH")
+    if env and env.strip():
+        return str(Path(env).expanduser().resolve())
     possible_paths = [
         Path(__file__).parent / "fx_impact_app" / "data" / "warehouse.duckdb",
         Path("fx_impact_app/data/warehouse.duckdb"),
@@ -18,25 +18,24 @@ from datetime import datetime, timedelta
 from latency_analyzer import LatencyAnalyzer
 from forecaster_mvp import ForecastEngine
 from event_families import FAMILY_PATTERNS
+from metrics import PRECOMPUTE_FAMILY_LAST, PRECOMPUTE_FAMILY_SECONDS, write_textfile
+from family_map import map_predicate
+import time
 
 DB_PATH = "fx_impact_app/data/warehouse.duckdb"
 
 def get_events_for_family(conn, family_pattern, lookback_days=1095):
     """Récupère tous les événements matchant un pattern"""
     
-    pattern_clean = family_pattern.replace('(?i)', '').replace('(', '').replace(')', '')
-    
-    terms = []
-    for term in pattern_clean.split('|'):
-        term = term.strip()
-        if term:
-            terms.append(term)
-    
-    if not terms:
+    # Famille connue : event_family_map (égalité) au lieu des LIKE '%terme%'
+    mapped = map_predicate(conn, family_pattern, full_match=False)
+    if mapped:
+        where_conditions, params = mapped
+    else:
+        where_conditions, params = _like_conditions(family_pattern), []
+    if not where_conditions:
         return []
     
-    where_conditions = " OR ".join([f"LOWER(event_key) LIKE '%{term}%'" for term in terms])
-    
     date_cutoff = (datetime.now() - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
     
     query = f"""
@@ -50,13 +49,29 @@ def get_events_for_family(conn, family_pattern, lookback_days=1095):
     """
     
     try:
-        results = conn.execute(query).fetchall()
+        results = conn.execute(query, params).fetchall()
         return results
     except Exception as e:
         print(f"    Erreur query: {e}")
         return []
 
 
+def _like_conditions(family_pattern):
+    """Ancien filtre : termes du pattern en LIKE '%terme%' combinés par OR"""
+    pattern_clean = family_pattern.replace('(?i)', '').replace('(', '').replace(')', '')
+    
+    terms = []
+    for term in pattern_clean.split('|'):
+        term = term.strip()
+        if term:
+            terms.append(term)
+    
+    if not terms:
+        return ""
+    
+    return " OR ".join([f"LOWER(event_key) LIKE '%{term}%'" for term in terms])
+
+
 def calculate_latency_for_event(analyzer, event_time, event_key, threshold_pips=3.0):
     """
     Calcule la latence pour UN événement spécifique
@@ -110,10 +125,10 @@ def calculate_stats_from_latencies(latencies):
     }
 
 
-def precompute_all_families():
+def precompute_all_families(db_path=DB_PATH):
     """Pré-calcule stats avec workaround manuel v7.1"""
     
-    conn = duckdb.connect(DB_PATH)
+    conn = duckdb.connect(db_path)
     
     print("📋 Table setup...")
     try:
@@ -150,14 +165,15 @@ def precompute_all_families():
         'Wages': 'Employment Change'
     }
     
-    analyzer = LatencyAnalyzer(DB_PATH)
-    engine = ForecastEngine(DB_PATH)
+    analyzer = LatencyAnalyzer(db_path)
+    engine = ForecastEngine(db_path)
     
     success_count = 0
     error_count = 0
     
     for i, family in enumerate(families, 1):
         print(f"[{i}/{len(families)}] {family}", end='')
+        t_family = time.perf_counter()
         
         pattern_key = family_mapping.get(family, family)
         pattern = FAMILY_PATTERNS.get(pattern_key, '')
@@ -258,6 +274,10 @@ def precompute_all_families():
         except Exception as e:
             print(f" ❌ {str(e)[:60]}")
             error_count += 1
+        finally:
+            elapsed = time.perf_counter() - t_family
+            PRECOMPUTE_FAMILY_SECONDS.observe(elapsed, family=family)
+            PRECOMPUTE_FAMILY_LAST.set(elapsed, family=family)
     
     analyzer.close()
     engine.close()
@@ -276,6 +296,11 @@ def precompute_all_families():
         print(f"\n✅ BON ! {success_count} familles")
     else:
         print(f"\n⚠️ {success_count} familles seulement")
+    
+    # Export Prometheus (FX_METRICS_TEXTFILE)
+    out = write_textfile()
+    if out:
+        print(f"📈 Métriques: {out}")
 
 
 if __name__ == "__main__":
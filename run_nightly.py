@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Job nocturne : pré-calcule tout ce que les pages lisent, dans l'ordre des
+dépendances, en sautant ce qui est déjà à jour (fx_impact_app.src.job_runner).
+
+  classify   create_event_families_table.py   event_families (classification)
+  reactions  family_stats_cube                family_stats_cube (tous symboles)
+  sketches   family_sketches                  family_sketches (incrémental)
+  empirical  calculate_empirical_impact.py    event_families.empirical_*   ← classify
+  latency    precompute_family_stats.py       event_families.latency_*     ← classify, reactions
+  backtest   backtest_latency_predictions.py  CSV de validation            ← empirical, latency
+
+classify, reactions et sketches tournent en parallèle ; empirical et latency
+écrivent tous deux event_families et passent donc l'un après l'autre.
+Une étape est relancée si les données brutes lues (events, prix) ont changé,
+si une dépendance a été relancée, ou si elle est forcée (--force).
+
+  python run_nightly.py                         # tout ce qui n'est pas à jour
+  python run_nightly.py --force latency         # relance latency (et backtest)
+  python run_nightly.py --only classify empirical --workers 1
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import duckdb
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from fx_impact_app.src.family_sketches import PENDING_TABLE, SKETCH_TABLE, STATE_TABLE
+from fx_impact_app.src.job_runner import Step, run_dag
+from fx_impact_app.src.metrics import write_textfile
+from fx_impact_app.src.symbols import SYMBOLS
+
+# Données brutes : colonnes dont dépendent les calculs
+EVENTS = ("events", ("ts_utc", "event_key", "country", "actual", "forecast", "previous"))
+EVENT_KEYS = ("events", ("event_key", "country", "actual IS NOT NULL"))
+PRICES = ("prices_1m", ("timestamp", "close"))
+# Cube tous symboles : une table par symbole (absente → empreinte 'absent')
+SYMBOL_PRICES = tuple((sym.table, ("timestamp", "close")) for sym in SYMBOLS.values())
+
+
+def classify(db_path):
+    from create_event_families_table import create_event_families_table
+    create_event_families_table(db_path)
+
+
+def reactions(db_path):
+    from fx_impact_app.src.family_stats_cube import build_cube
+    from fx_impact_app.src.symbols import available_symbols
+    with duckdb.connect(db_path) as con:
+        build_cube(con, symbols=available_symbols(con))
+
+
+def sketches(db_path):
+    from fx_impact_app.src.family_sketches import update_sketch_store
+    with duckdb.connect(db_path) as con:
+        update_sketch_store(con)
+
+
+def empirical(db_path):
+    from calculate_empirical_impact import calculate_all_empirical_impacts
+    calculate_all_empirical_impacts(db_path)
+
+
+def latency(db_path):
+    from precompute_family_stats import precompute_all_families
+    precompute_all_families(db_path)
+
+
+def nightly_steps(backtest_dir=project_root):
+    def backtest(db_path):
+        from backtest_latency_predictions import run_backtest_batch
+        run_backtest_batch(db_path=db_path, output_dir=Path(backtest_dir))
+
+    return (
+        Step("classify", classify, inputs=(EVENT_KEYS,), writes=("event_families",)),
+        Step("reactions", reactions, inputs=(EVENTS, *SYMBOL_PRICES),
+             writes=("family_stats_cube",)),
+        Step("sketches", sketches, inputs=(EVENTS, PRICES), writes=(SKETCH_TABLE, STATE_TABLE, PENDING_TABLE)),
+        Step("empirical", empirical, deps=("classify",), inputs=(EVENTS, PRICES),
+             writes=("event_families",)),
+        Step("latency", latency, deps=("classify", "reactions"), inputs=(EVENTS, PRICES),
+             writes=("event_families",)),
+        Step("backtest", backtest, deps=("empirical", "latency"), inputs=(EVENTS, PRICES)),
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pré-calculs nocturnes (DAG, étapes à jour sautées)")
+    ap.add_argument("--db", default=str(project_root / "fx_impact_app" / "data" / "warehouse.duckdb"))
+    ap.add_argument("--force", nargs="*", default=[], help="étapes à relancer même à jour ('all' : toutes)")
+    ap.add_argument("--only", nargs="*", default=None, help="sous-ensemble d'étapes")
+    ap.add_argument("--workers", type=int, default=3, help="étapes indépendantes en parallèle")
+    ap.add_argument("--backtest-dir", default=str(project_root), help="dossier des CSV de backtest")
+    args = ap.parse_args()
+
+    results = run_dag(args.db, nightly_steps(args.backtest_dir), force=args.force, only=args.only,
+                      workers=args.workers)
+
+    print(f"\n{'='*60}")
+    for r in results:
+        print(f"{r.name:<10} {r.status:<8} {r.seconds:>8.1f} s" + (f"  {r.error}" if r.error else ""))
+    print(f"{'='*60}")
+    out = write_textfile()
+    if out:
+        print(f"📈 Métriques: {out}")
+    if any(r.status in ("failed", "blocked") for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()